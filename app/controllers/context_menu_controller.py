@@ -23,13 +23,12 @@ from PyQt6.QtGui import (
 )
 from PyQt6.QtCore import Qt, QUrl, QPoint
 
-from widgets.table_dialog import TablePropertiesDialog
-
 
 class ContextMenuController:
     """Builds and executes the context menu for a given QTextEdit."""
 
-    def __init__(self, set_alignment_fn, parent_widget, spell_service=None):
+    def __init__(self, set_alignment_fn, parent_widget, spell_service=None,
+                 spell_language_fn=None):
         """
         Parameters
         ----------
@@ -39,10 +38,14 @@ class ContextMenuController:
         spell_service    : SpellCheckService, optional
             When provided, right-clicking a misspelled word prepends
             correction suggestions and an "Add to Dictionary" action.
+        spell_language_fn : callable(QTextEdit) -> str | None, optional
+            Language the given editor is spellchecked in; None (or no
+            callable) means the spell service's default language.
         """
         self._set_alignment = set_alignment_fn
         self._parent = parent_widget
         self._spell = spell_service
+        self._spell_language = spell_language_fn
 
     # ------------------------------------------------------------------
     # Public entry point
@@ -123,10 +126,11 @@ class ContextMenuController:
 
         if not word or not word.isalpha():
             return
-        if self._spell.is_correct(word):
+        language = self._spell_language(text_edit) if self._spell_language else None
+        if self._spell.is_correct(word, language=language):
             return
 
-        suggestions = self._spell.suggestions(word)
+        suggestions = self._spell.suggestions(word, language=language)
         suggestions = [self._match_case(word, s) for s in suggestions]
 
         def replace_with(replacement: str):
@@ -162,6 +166,7 @@ class ContextMenuController:
         return replacement
 
     def _open_table_props(self, table, text_edit: QTextEdit):
+        from widgets.table_dialog import TablePropertiesDialog
         dlg = TablePropertiesDialog(table, self._parent)
         dlg.exec()
         text_edit.setFocus()
@@ -35,7 +35,6 @@ from PyQt6.QtGui import QTextFrameFormat
 from PyQt6.QtGui import QTextLength
 
 from config.styles import StyleSheet
-from widgets.table_dialog import TablePropertiesDialog
 
 
 class FormattingController:
@@ -413,6 +412,7 @@ class FormattingController:
             QMessageBox.information(self._parent, "Table Properties",
                                     "Please click inside a table first.")
             return
+        from widgets.table_dialog import TablePropertiesDialog
         dlg = TablePropertiesDialog(table, self._parent)
         dlg.exec()
         tab.text_edit.setFocus()
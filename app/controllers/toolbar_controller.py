@@ -48,8 +48,29 @@ class ToolbarController:
     # Build
     # ------------------------------------------------------------------
 
-    def build(self, sep_color: str) -> QWidget:
-        """Create the toolbar widget and return it.  Must be called once."""
+    def _make_font_combo(self) -> QFontComboBox:
+        combo = QFontComboBox()
+        combo.setFixedWidth(160)
+        combo.setFixedHeight(28)
+        combo.setFontFilters(QFontComboBox.FontFilter.ScalableFonts)
+        combo.currentFontChanged.connect(self._fmt.change_font_family)
+        return combo
+
+    def build_font_combo(self):
+        """Swap the deferred placeholder for the real font box (no-op if built)."""
+        if isinstance(self.font_combo, QFontComboBox):
+            return
+        placeholder, self.font_combo = self.font_combo, self._make_font_combo()
+        self._row1.replaceWidget(placeholder, self.font_combo)
+        placeholder.deleteLater()
+
+    def build(self, sep_color: str, defer_font_combo: bool = False) -> QWidget:
+        """Create the toolbar widget and return it.  Must be called once.
+
+        With ``defer_font_combo`` the font family box starts as a disabled
+        placeholder; QFontComboBox scans the font database when created, so
+        MainWindow builds it after the first paint via ``build_font_combo()``.
+        """
         self._sep_color = sep_color
 
         self.toolbar_widget = QWidget()
@@ -76,12 +97,16 @@ class ToolbarController:
 
         # ── ROW 1 ────────────────────────────────────────────────────
         # Font family
-        self.font_combo = QFontComboBox()
-        self.font_combo.setFixedWidth(160)
-        self.font_combo.setFixedHeight(28)
-        self.font_combo.setFontFilters(QFontComboBox.FontFilter.ScalableFonts)
-        self.font_combo.currentFontChanged.connect(self._fmt.change_font_family)
-        row1.addWidget(self.font_combo)
+        self._row1 = row1
+        if defer_font_combo:
+            self.font_combo = QComboBox()
+            self.font_combo.setFixedWidth(160)
+            self.font_combo.setFixedHeight(28)
+            self.font_combo.setEnabled(False)
+            row1.addWidget(self.font_combo)
+        else:
+            self.font_combo = self._make_font_combo()
+            row1.addWidget(self.font_combo)
         row1.addSpacing(4)
 
         # Font size
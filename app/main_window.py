@@ -1,20 +1,22 @@
 from PyQt6.QtWidgets import *
 from PyQt6.QtGui import *
 from PyQt6.QtCore import *
+import time
+import weakref
 from pathlib import Path
 from typing import Optional, List
-from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 
 from config.app_config import AppConfig
 from config.styles import StyleSheet
+from models.document import count_words
 from models.document_tab import DocumentTab
 from services.file_operations import FileOperations, FileLoadWorker
+from services import profiler
+from services.profiler import traced
 from services.settings_manager import SettingsManager
-from services.spellcheck_service import SpellCheckService
-from services.export_services import html_to_markdown, save_html_as_docx
+from services.spellcheck_service import SpellCheckService, SUPPORTED_LANGUAGES
 from widgets.search_bar import SearchBar
 from widgets.status_bar import StatusBarWidget
-from widgets.table_dialog import TablePropertiesDialog
 from widgets.spellcheck_highlighter import SpellCheckHighlighter
 
 from app.controllers.formatting_controller import FormattingController
@@ -25,9 +27,22 @@ from app.controllers.context_menu_controller import ContextMenuController
 class MainWindow(QMainWindow):
     """Main application window with tabbed document interface"""
 
-    def __init__(self):
+    def __init__(self, started_at: Optional[float] = None):
+        """*started_at* is the time.perf_counter() of process start, if known
+        (main.py passes it), so the startup timings include the imports."""
         super().__init__()
 
+        # Milliseconds since startup began for each startup milestone
+        # ("imports", "ui_ready", "first_paint", "session_restored" once the
+        # last restored tab has loaded, "spellcheck_ready"); startup
+        # is process start if given, otherwise this constructor.
+        self.startup_timings: dict[str, float] = {}
+        self._startup_began = time.perf_counter() if started_at is None else started_at
+        if started_at is not None:
+            self._mark_startup("imports")
+        self._first_shown = False
+        self._spellcheck_started = False
+
         self.tabs: List[DocumentTab] = []
         self.tab_counter = 1
         self.settings_manager = SettingsManager()
@@ -42,7 +57,9 @@ class MainWindow(QMainWindow):
         self._setup_timers()
         self._restore_settings()
         self._restore_session()
+        self._mark_startup("ui_ready")
 
+    @traced(category="startup")
     def _setup_ui(self):
         """Initialize the user interface"""
         self._dark_theme = self.settings_manager.get_theme()
@@ -54,12 +71,18 @@ class MainWindow(QMainWindow):
             parent_widget=self,
         )
         self.toolbar_ctrl = ToolbarController(self.fmt_ctrl, self)
-        self.spell_service = SpellCheckService()
-        self.spell_check_enabled = True
+        # The dictionary is loaded after first paint (see _on_first_paint);
+        # highlighters sit in a pending state until it's ready.
+        self.spell_service = SpellCheckService(
+            lazy=True, store_dir=str(self.settings_manager.data_dir() / "dictionaries")
+        )
+        self.spell_check_enabled = self.settings_manager.get_spell_check_enabled()
+        self.compact_html = self.settings_manager.get_compact_html()
         self.ctx_menu_ctrl = ContextMenuController(
             set_alignment_fn=self.set_alignment,
             parent_widget=self,
             spell_service=self.spell_service,
+            spell_language_fn=self._spell_language_for,
         )
 
         tokens = StyleSheet.toolbar_tokens(self._dark_theme)
@@ -78,7 +101,7 @@ class MainWindow(QMainWindow):
         layout.setSpacing(0)
 
         # Build toolbar via controller
-        self.format_toolbar = self.toolbar_ctrl.build(self._toolbar_sep_color)
+        self.format_toolbar = self.toolbar_ctrl.build(self._toolbar_sep_color, defer_font_combo=True)
         self.toolbar_ctrl.apply_theme(self._dark_theme)
         layout.addWidget(self.format_toolbar)
 
@@ -99,6 +122,11 @@ class MainWindow(QMainWindow):
         self.status_widget = StatusBarWidget()
         self.statusBar().addPermanentWidget(self.status_widget, 1)
 
+        # Created by the first export (see the export_runner property)
+        self._export_runner = None
+        self._export_percent = 0
+        self.status_widget.export_cancel_requested.connect(self._cancel_running_export)
+
     def _create_menu_bar(self):
         """Create application menu bar"""
         menu_bar = self.menuBar()
@@ -131,13 +159,27 @@ class MainWindow(QMainWindow):
         save_as_action.triggered.connect(self.save_as)
         file_menu.addAction(save_as_action)
 
+        self.compact_html_action = QAction("Save Compact &HTML", self)
+        self.compact_html_action.setCheckable(True)
+        self.compact_html_action.setChecked(self.compact_html)
+        self.compact_html_action.setToolTip(
+            "Store repeated formatting once in the file's style sheet instead "
+            "of on every paragraph; the note opens exactly the same"
+        )
+        self.compact_html_action.triggered.connect(self._toggle_compact_html)
+        file_menu.addAction(self.compact_html_action)
+
         file_menu.addSeparator()
 
         print_action = QAction("&Print...", self)
         print_action.setShortcut(QKeySequence.StandardKey.Print)
-        print_action.triggered.connect(self._print_document)
+        print_action.triggered.connect(lambda: self._print_document())
         file_menu.addAction(print_action)
 
+        print_preview_action = QAction("Print Pre&view...", self)
+        print_preview_action.triggered.connect(self._print_preview)
+        file_menu.addAction(print_preview_action)
+
         export_pdf_action = QAction("Export as &PDF...", self)
         export_pdf_action.setShortcut(QKeySequence("Ctrl+Shift+E"))
         export_pdf_action.triggered.connect(self._export_to_pdf)
@@ -164,6 +206,11 @@ class MainWindow(QMainWindow):
         export_md_html_action.triggered.connect(lambda: self._export_to_markdown(html_fallback=True))
         export_md_menu.addAction(export_md_html_action)
 
+        export_all_action = QAction("Export &All Tabs...", self)
+        export_all_action.setToolTip("Export every open tab into one folder")
+        export_all_action.triggered.connect(self._export_all)
+        file_menu.addAction(export_all_action)
+
         file_menu.addSeparator()
 
         close_tab_action = QAction("&Close Tab", self)
@@ -331,10 +378,23 @@ class MainWindow(QMainWindow):
 
         self.spell_check_action = QAction("Spell Check", self)
         self.spell_check_action.setCheckable(True)
-        self.spell_check_action.setChecked(True)
+        self.spell_check_action.setChecked(self.spell_check_enabled)
         self.spell_check_action.triggered.connect(self._toggle_spell_check)
         view_menu.addAction(self.spell_check_action)
 
+        language_menu = view_menu.addMenu("Spell Check Language")
+        self.spell_language_group = QActionGroup(self)
+        self.spell_language_actions = {}
+        choices = [(SpellCheckHighlighter.AUTO_LANGUAGE, "Auto-detect")]
+        choices += list(SUPPORTED_LANGUAGES.items())
+        for code, label in choices:
+            action = QAction(label, self, checkable=True)
+            action.setChecked(code == SpellCheckHighlighter.AUTO_LANGUAGE)
+            action.triggered.connect(lambda checked=False, c=code: self._set_spell_language(c))
+            self.spell_language_group.addAction(action)
+            language_menu.addAction(action)
+            self.spell_language_actions[code] = action
+
     def _toggle_theme(self, checked: bool):
         """Switch between dark and light themes and persist the choice."""
         self._dark_theme = not checked
@@ -346,10 +406,68 @@ class MainWindow(QMainWindow):
     def _toggle_spell_check(self, checked: bool):
         """Enable or disable live spell-check underlines on every open tab."""
         self.spell_check_enabled = checked
+        self.settings_manager.save_spell_check_enabled(checked)
+        if checked and self._first_shown:
+            self._start_spell_check()
         for doc_tab in self.tabs:
             if hasattr(doc_tab, "spell_highlighter"):
                 doc_tab.spell_highlighter.set_enabled(checked)
 
+    def _toggle_compact_html(self, checked: bool):
+        """Choose between compact and verbatim Qt HTML for future saves."""
+        self.compact_html = checked
+        self.settings_manager.save_compact_html(checked)
+
+    def _set_spell_language(self, language: str):
+        """Spellcheck the current tab in `language` ("auto" to detect it)."""
+        doc_tab = self._get_current_tab()
+        if doc_tab and hasattr(doc_tab, "spell_highlighter"):
+            doc_tab.spell_highlighter.set_language(language)
+
+    def _sync_spell_language_menu(self, doc_tab: DocumentTab):
+        if hasattr(doc_tab, "spell_highlighter"):
+            action = self.spell_language_actions.get(doc_tab.spell_highlighter.language)
+            if action is not None:
+                action.setChecked(True)
+
+    def _spell_language_for(self, text_edit) -> Optional[str]:
+        """Language the tab owning `text_edit` is being spellchecked in."""
+        for doc_tab in self.tabs:
+            if doc_tab.text_edit is text_edit and hasattr(doc_tab, "spell_highlighter"):
+                return doc_tab.spell_highlighter.effective_language()
+        return None
+
+    def _start_spell_check(self):
+        """Load the dictionary and suggestion index in the background (once)."""
+        if self._spellcheck_started:
+            return
+        self._spellcheck_started = True
+        self.spell_service.call_when_ready(lambda: self._mark_startup("spellcheck_ready"))
+        self.spell_service.start_loading()
+        self.spell_service.prepare_suggestions(str(self.settings_manager.cache_dir()))
+
+    # ── Startup ───────────────────────────────────────────────────────
+
+    def _mark_startup(self, milestone: str):
+        if milestone not in self.startup_timings:
+            elapsed = time.perf_counter() - self._startup_began
+            self.startup_timings[milestone] = round(elapsed * 1000, 1)
+            profiler.mark(milestone)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._first_shown:
+            self._first_shown = True
+            # Queued behind the paint events the show just posted.
+            QTimer.singleShot(0, self._on_first_paint)
+
+    def _on_first_paint(self):
+        """Deferred startup work that shouldn't delay the first frame."""
+        self._mark_startup("first_paint")
+        self.toolbar_ctrl.build_font_combo()
+        if self.spell_check_enabled:
+            self._start_spell_check()
+
     def duplicate_tab(self):
         """Duplicate the current tab's content into a new tab."""
         current_tab = self._get_current_tab()
@@ -442,7 +560,8 @@ class MainWindow(QMainWindow):
             if tab.is_modified and tab.current_file and tab.current_file.exists():
                 try:
                     is_html = tab.current_file.suffix.lower() == '.html'
-                    content = tab.get_content_html() if is_html else tab.get_content_plain()
+                    content = tab.iter_content_html(self.compact_html) if is_html \
+                        else tab.get_content_plain()
                     FileOperations.write_file(tab.current_file, content, is_html)
                     tab.mark_saved()
                     self._update_tab_title(tab)
@@ -452,6 +571,7 @@ class MainWindow(QMainWindow):
         if saved_any:
             self.statusBar().showMessage("Autosaved", 2000)
 
+    @traced(category="startup")
     def _restore_settings(self):
         """Restore saved application settings"""
         if not self.settings_manager.restore_window_geometry(self):
@@ -461,6 +581,7 @@ class MainWindow(QMainWindow):
                 (screen.height() - self.height()) // 2,
             )
 
+    @traced(category="startup")
     def _restore_session(self):
         """Restore previously open tabs from last session"""
         open_tabs, active_index = self.settings_manager.get_open_tabs()
@@ -502,6 +623,7 @@ class MainWindow(QMainWindow):
             return
 
         self._is_restoring_session = False
+        self._mark_startup("session_restored")
         if 0 <= self._restore_active_index < self.tab_widget.count():
             self.tab_widget.setCurrentIndex(self._restore_active_index)
         if self.tab_widget.count() == 0:
@@ -544,7 +666,7 @@ class MainWindow(QMainWindow):
             lambda pos, te=doc_tab.text_edit: self.ctx_menu_ctrl.show(pos, te)
         )
         doc_tab.spell_highlighter = SpellCheckHighlighter(
-            doc_tab.text_edit.document(), self.spell_service
+            doc_tab.text_edit.document(), self.spell_service, doc_tab.text_edit
         )
         doc_tab.spell_highlighter.set_enabled(self.spell_check_enabled)
 
@@ -582,6 +704,7 @@ class MainWindow(QMainWindow):
             self._update_window_title(doc_tab)
             self._update_format_buttons()
             self._update_status_bar()
+            self._sync_spell_language_menu(doc_tab)
             doc_tab.text_edit.setFocus()
 
             if not self._is_restoring_session:
@@ -623,7 +746,7 @@ class MainWindow(QMainWindow):
         """Open a file in a new tab"""
         if not filepath:
             filepath, _ = QFileDialog.getOpenFileName(
-                self, "Open File", "", AppConfig.FILE_FILTERS
+                self, "Open File", "", AppConfig.OPEN_FILE_FILTERS
             )
 
         if not filepath:
@@ -632,7 +755,7 @@ class MainWindow(QMainWindow):
         file_path = Path(filepath)
 
         for i, tab in enumerate(self.tabs):
-            if tab.current_file == file_path:
+            if file_path in (tab.current_file, tab.imported_from):
                 self.tab_widget.setCurrentIndex(i)
                 self.statusBar().showMessage(f"File already open: {file_path.name}", 3000)
                 return
@@ -641,9 +764,10 @@ class MainWindow(QMainWindow):
 
     def _load_file_async(self, filepath: Path):
         """
-        Load a file on a background QThread so reading it never blocks the
-        UI, regardless of file size. Completion/failure are delivered back
-        via signals and handled on the main thread.
+        Load a file on a background QThread so reading it - and converting
+        and decoding its images - never blocks the UI, regardless of file
+        size. Completion/failure are delivered back via signals and handled
+        on the main thread.
         """
         if str(filepath) in self._load_threads:
             # Already loading this file; don't start a second read.
@@ -656,7 +780,8 @@ class MainWindow(QMainWindow):
         worker.moveToThread(thread)
 
         thread.started.connect(worker.run)
-        worker.finished.connect(lambda content, is_html: self._on_file_loaded(filepath, content, is_html))
+        worker.finished.connect(lambda content, is_html, images:
+                                self._on_file_loaded(filepath, content, is_html, images))
         worker.failed.connect(lambda msg: self._on_file_load_failed(filepath, msg))
         worker.finished.connect(thread.quit)
         worker.failed.connect(thread.quit)
@@ -665,8 +790,10 @@ class MainWindow(QMainWindow):
         self._load_threads[str(filepath)] = (thread, worker)
         thread.start()
 
-    def _on_file_loaded(self, filepath: Path, content: str, is_html: bool):
-        """Handle a successful background file load (runs on the main thread)."""
+    def _on_file_loaded(self, filepath: Path, content: str, is_html: bool,
+                        images: Optional[dict] = None):
+        """Handle a successful background file load (runs on the main thread).
+        *images* are the pictures the worker already decoded out of *content*."""
         if self._is_restoring_session:
             # The placeholder tab for this file already exists in the right
             # slot (created up front in _restore_session) - just fill it in.
@@ -675,7 +802,7 @@ class MainWindow(QMainWindow):
                 self._on_restore_step_done()
                 return
 
-            doc_tab.set_content(content, is_html)
+            doc_tab.set_content(content, is_html, images)
             doc_tab.text_edit.setReadOnly(False)
             index = self.tab_widget.indexOf(doc_tab.text_edit)
             if index != -1:
@@ -684,8 +811,13 @@ class MainWindow(QMainWindow):
             self._on_restore_step_done()
         else:
             doc_tab = DocumentTab()
-            doc_tab.set_content(content, is_html)
-            doc_tab.current_file = filepath
+            doc_tab.set_content(content, is_html, images)
+            if FileOperations.is_import(filepath):
+                # Converted from Markdown/Word: saving asks where to put the note
+                doc_tab.name = filepath.name
+                doc_tab.imported_from = filepath
+            else:
+                doc_tab.current_file = filepath
 
             self._wire_tab(doc_tab)
 
@@ -730,10 +862,14 @@ class MainWindow(QMainWindow):
         if not doc_tab:
             return False
 
+        if doc_tab.current_file:
+            suggested = doc_tab.current_file.name
+        elif doc_tab.imported_from:
+            suggested = str(doc_tab.imported_from.with_suffix(AppConfig.DEFAULT_EXTENSION))
+        else:
+            suggested = "untitled.html"
         filename, _ = QFileDialog.getSaveFileName(
-            self, "Save File As",
-            doc_tab.current_file.name if doc_tab.current_file else "untitled.html",
-            AppConfig.FILE_FILTERS,
+            self, "Save File As", suggested, AppConfig.FILE_FILTERS,
         )
 
         if not filename:
@@ -753,7 +889,9 @@ class MainWindow(QMainWindow):
 
         try:
             is_html = doc_tab.current_file.suffix.lower() == '.html'
-            content = doc_tab.get_content_html() if is_html else doc_tab.get_content_plain()
+            # HTML is streamed to disk piece by piece, never joined into one string
+            content = doc_tab.iter_content_html(self.compact_html) if is_html \
+                else doc_tab.get_content_plain()
 
             FileOperations.write_file(doc_tab.current_file, content, is_html)
 
@@ -1007,6 +1145,7 @@ class MainWindow(QMainWindow):
 
         self._highlight_all_matches(search_text)
 
+    @traced(category="search")
     def _highlight_all_matches(self, search_text: str):
         current_tab = self._get_current_tab()
         if not current_tab:
@@ -1177,39 +1316,10 @@ class MainWindow(QMainWindow):
         if not filename.endswith('.pdf'):
             filename += '.pdf'
 
-        printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-        printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-        printer.setOutputFileName(filename)
-        printer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
-        margins = QMarginsF(25.4, 25.4, 25.4, 25.4)
-        printer.setPageMargins(margins, QPageLayout.Unit.Millimeter)
-
-        original_html = current_tab.get_content_html()
-        css_style = f"""
-        <style>
-            body {{ font-size: {font_size}pt; line-height: 1.5; }}
-            h1 {{ font-size: {font_size + 14}pt; }}
-            h2 {{ font-size: {font_size + 10}pt; }}
-            h3 {{ font-size: {font_size + 8}pt; }}
-            p {{ font-size: {font_size}pt; }}
-            pre, code {{ font-size: {font_size - 1}pt; }}
-        </style>
-        """
-        if '<head>' in original_html:
-            modified_html = original_html.replace('<head>', f'<head>{css_style}')
-        elif '<html>' in original_html:
-            modified_html = original_html.replace('<html>', f'<html><head>{css_style}</head>')
-        else:
-            modified_html = f'<html><head>{css_style}</head><body>{original_html}</body></html>'
-
-        temp_doc = QTextDocument()
-        temp_doc.setHtml(modified_html)
-        temp_doc.print(printer)
-
-        QMessageBox.information(
-            self, "Success",
-            f"PDF exported successfully to:\n{filename}\n\nFont size: {font_size}pt"
-        )
+        # Reuses the pages if the print preview already laid them out
+        from services.print_document import PageSetup
+        self._queue_export(current_tab, filename, "pdf", font_size=font_size,
+                           layout=current_tab.cached_print_layout(PageSetup(font_size)))
 
     def _export_to_docx(self):
         current_tab = self._get_current_tab()
@@ -1227,19 +1337,7 @@ class MainWindow(QMainWindow):
         if not filename.endswith('.docx'):
             filename += '.docx'
 
-        try:
-            save_html_as_docx(current_tab.get_content_html(), Path(filename))
-        except ImportError as e:
-            QMessageBox.critical(self, "Export Word Document", str(e))
-            return
-        except Exception as e:
-            QMessageBox.critical(self, "Export Word Document", f"Failed to export document:\n{e}")
-            return
-
-        QMessageBox.information(
-            self, "Success",
-            f"Word document exported successfully to:\n{filename}"
-        )
+        self._queue_export(current_tab, filename, "docx")
 
     def _export_to_markdown(self, html_fallback: bool = False):
         current_tab = self._get_current_tab()
@@ -1258,53 +1356,194 @@ class MainWindow(QMainWindow):
         if not filename.endswith('.md'):
             filename += '.md'
 
-        try:
-            markdown_text = html_to_markdown(current_tab.get_content_html(), html_fallback=html_fallback)
-            Path(filename).write_text(markdown_text, encoding='utf-8')
-        except Exception as e:
-            QMessageBox.critical(self, "Export Markdown", f"Failed to export document:\n{e}")
+        self._queue_export(current_tab, filename, "md", html_fallback=html_fallback)
+
+    # ── Background exports ───────────────────────────────────────────
+
+    _EXPORT_TITLES = {"md": "Export Markdown", "docx": "Export Word Document", "pdf": "Export PDF",
+                      "batch": "Export All Tabs"}
+
+    @property
+    def export_runner(self):
+        """The export queue; it and the exporters are loaded on first use"""
+        if self._export_runner is None:
+            from services.export_jobs import ExportJobRunner
+            runner = ExportJobRunner(self)
+            runner.job_started.connect(self._on_export_started)
+            runner.job_progress.connect(lambda job, percent: self._refresh_export_progress(percent))
+            runner.job_finished.connect(self._on_export_finished)
+            runner.job_failed.connect(self._on_export_failed)
+            runner.job_cancelled.connect(self._on_export_cancelled)
+            self._export_runner = runner
+        return self._export_runner
+
+    def _queue_export(self, tab: DocumentTab, filename: str, fmt: str, **options):
+        """Snapshot *tab* and export it on the worker thread, behind earlier exports"""
+        from services.export_jobs import ExportJob
+        layout = options.get("layout")
+        snapshot = layout.tree if layout is not None else tab.get_export_snapshot()
+        job = ExportJob(snapshot, Path(filename), fmt,
+                        context=(weakref.ref(tab), tab.revision), **options)
+        self.export_runner.submit(job)
+        self._refresh_export_progress()
+
+    def _refresh_export_progress(self, percent: Optional[int] = None):
+        pending = self.export_runner.pending()
+        if not pending:
+            self.status_widget.clear_export_progress()
             return
+        if percent is not None:
+            self._export_percent = percent
+        self.status_widget.update_export_progress(pending[0].description, self._export_percent,
+                                                  queued=len(pending) - 1)
+
+    def _cancel_running_export(self):
+        if self._export_runner is None:
+            return
+        pending = self._export_runner.pending()
+        if pending:
+            pending[0].cancel()
+
+    def _on_export_started(self, job):
+        self._refresh_export_progress(0)
+
+    def _on_export_finished(self, job):
+        from services.export_jobs import BatchExportJob
+        if isinstance(job, BatchExportJob):
+            self._on_export_all_finished(job)
+            return
+        # The worker parsed the snapshot; keep the tree if the tab is unchanged
+        tab_ref, revision = job.context
+        tab = tab_ref()
+        if tab is not None and job.tree is not None:
+            tab.remember_document_tree(revision, job.tree)
+        self._refresh_export_progress()
+        self.statusBar().showMessage(f"Exported: {job.filepath}", 5000)
+
+    def _on_export_all_finished(self, job):
+        self._refresh_export_progress()
+        failed = any(result.error is not None for result in job.results)
+        icon = QMessageBox.Icon.Warning if failed else QMessageBox.Icon.Information
+        box = QMessageBox(icon, self._EXPORT_TITLES[job.format], job.summary(),
+                          QMessageBox.StandardButton.Ok, self)
+        # Per-file timings and errors, behind "Show Details..."
+        box.setDetailedText("\n".join(job.log_lines()))
+        box.exec()
+
+    def _on_export_failed(self, job, message: str):
+        self._refresh_export_progress()
+        QMessageBox.critical(self, self._EXPORT_TITLES[job.format],
+                             f"Failed to export {job.filepath}:\n{message}")
+
+    def _on_export_cancelled(self, job):
+        self._refresh_export_progress()
+        self.statusBar().showMessage(f"Export cancelled: {job.description}", 3000)
+
+    def _export_all(self):
+        if not self.tabs:
+            QMessageBox.warning(self, "Export All Tabs", "No documents to export")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Export All Tabs")
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel(f"Export {len(self.tabs)} open tab(s) as:"))
+        checks = {
+            "md": QCheckBox("Markdown (.md)"),
+            "docx": QCheckBox("Word Document (.docx)"),
+            "pdf": QCheckBox("PDF (.pdf)"),
+        }
+        checks["md"].setChecked(True)
+        for check in checks.values():
+            layout.addWidget(check)
+        html_fallback = QCheckBox("Keep formatting Markdown can't express as inline HTML")
+        layout.addWidget(html_fallback)
 
-        QMessageBox.information(
-            self, "Success",
-            f"Markdown exported successfully to:\n{filename}"
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel
         )
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        formats = [fmt for fmt, check in checks.items() if check.isChecked()]
+        if not formats:
+            return
 
-    def _print_document(self):
+        out_dir = QFileDialog.getExistingDirectory(self, "Export All Tabs To")
+        if not out_dir:
+            return
+        self._queue_export_all(Path(out_dir), formats, html_fallback=html_fallback.isChecked())
+
+    def _queue_export_all(self, out_dir: Path, formats: list, **options):
+        """Snapshot every tab, in tab order, and export them all as one job"""
+        from services.export_jobs import BatchExportJob
+        tabs_by_widget = {id(tab.text_edit): tab for tab in self.tabs}
+        tabs = [tabs_by_widget.get(id(self.tab_widget.widget(index)))
+                for index in range(self.tab_widget.count())]
+        notes = [(tab.current_file.stem if tab.current_file else tab.name, tab.get_content_html())
+                 for tab in tabs if tab is not None]
+        job = BatchExportJob(notes, out_dir, formats, **options)
+        self.export_runner.submit(job)
+        self._refresh_export_progress()
+        return job
+
+    def _print_document(self, setup: Optional["PageSetup"] = None):
         current_tab = self._get_current_tab()
         if not current_tab:
             QMessageBox.warning(self, "Print", "No document to print")
             return
+        # Print support is only loaded once something is printed
+        from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
+        from services.print_document import PageSetup, build_print_document
+        if setup is None:
+            setup = PageSetup()
 
         printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-        printer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
-        margins = QMarginsF(25.4, 25.4, 25.4, 25.4)
-        printer.setPageMargins(margins, QPageLayout.Unit.Millimeter)
+        printer.setPageSize(QPageSize(setup.page_size))
+        margin = setup.margin_mm
+        printer.setPageMargins(QMarginsF(margin, margin, margin, margin), QPageLayout.Unit.Millimeter)
 
         print_dialog = QPrintDialog(printer, self)
         if print_dialog.exec() == QDialog.DialogCode.Accepted:
-            original_html = current_tab.get_content_html()
-            css_style = """
-            <style>
-                body { font-size: 12pt; line-height: 1.5; }
-                h1 { font-size: 24pt; }
-                h2 { font-size: 20pt; }
-                h3 { font-size: 18pt; }
-                p { font-size: 12pt; }
-            </style>
-            """
-            if '<head>' in original_html:
-                modified_html = original_html.replace('<head>', f'<head>{css_style}')
-            elif '<html>' in original_html:
-                modified_html = original_html.replace('<html>', f'<html><head>{css_style}</head>')
+            layout = current_tab.cached_print_layout(setup)
+            if layout is not None:
+                layout.print_to(printer)
             else:
-                modified_html = f'<html><head>{css_style}</head><body>{original_html}</body></html>'
-
-            temp_doc = QTextDocument()
-            temp_doc.setHtml(modified_html)
-            temp_doc.print(printer)
+                temp_doc = build_print_document(current_tab.get_document_tree(), setup.font_size)
+                temp_doc.print(printer)
             QMessageBox.information(self, "Print", "Document sent to printer successfully")
 
+    def _print_preview(self):
+        current_tab = self._get_current_tab()
+        if not current_tab:
+            QMessageBox.warning(self, "Print Preview", "No document to preview")
+            return
+
+        from widgets.print_preview import PrintPreviewDialog
+        dialog = PrintPreviewDialog(current_tab, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted or dialog.print_layout is None:
+            return
+        layout = dialog.print_layout
+        if dialog.action == "print":
+            self._print_document(layout.setup)
+            return
+
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export as PDF",
+            current_tab.current_file.stem if current_tab.current_file else "document",
+            "PDF Files (*.pdf)",
+        )
+        if not filename:
+            return
+        if not filename.endswith('.pdf'):
+            filename += '.pdf'
+        self._queue_export(current_tab, filename, "pdf", font_size=layout.setup.font_size,
+                           layout=layout)
+
     # ── Status bar ────────────────────────────────────────────────────
 
     def _update_status_bar(self):
@@ -1321,7 +1560,7 @@ class MainWindow(QMainWindow):
         self.status_widget.update_cursor(line, col)
 
         text = current_tab.get_content_plain()
-        words = len(text.split()) if text.strip() else 0
+        words = count_words(text)
         chars = len(text)
         self.status_widget.update_word_count(words, chars)
 
@@ -1359,6 +1598,21 @@ class MainWindow(QMainWindow):
                 event.ignore()
                 return
 
+        pending_exports = self._export_runner.pending() if self._export_runner else []
+        if pending_exports:
+            reply = QMessageBox.question(
+                self, "Exports Running",
+                f"{len(pending_exports)} export(s) have not finished.\n"
+                "Do you want to quit and cancel them?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.No,
+            )
+            if reply == QMessageBox.StandardButton.No:
+                event.ignore()
+                return
+        if self._export_runner is not None:
+            self._export_runner.shutdown()
+
         self.settings_manager.save_window_geometry(
             self.saveGeometry(),
             self.saveState(),
@@ -0,0 +1,92 @@
+# ============================================================================
+# Benchmark: services/html_rewrite
+# single-pass tag scanner vs the regex passes DocumentTab used to run
+# ============================================================================
+#
+#   python -m benchmarks.bench_html_rewrite
+#
+# Builds notes in Qt's toHtml() shape at doubling sizes - paragraphs, table
+# cells with baked-in backgrounds and base64 images - and times both the
+# save-side rewrite (image names -> data URIs, cell backgrounds stripped)
+# and the load-side one (data URIs -> resource names). Time per MB should
+# stay flat as the note grows.
+
+import base64
+import random
+import re
+import time
+
+from services.html_rewrite import rewrite_html
+
+_PARAGRAPH = ('<p style=" margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px; '
+              '-qt-block-indent:0; text-indent:0px;">Some text with <span style=" font-weight:700;">'
+              'bold</span> words in it.</p>\n')
+_CELL = '<td style=" vertical-align:top; background-color:#2b2b2b;">\n' + _PARAGRAPH + '</td>'
+
+
+def _note(units: int, image_bytes: int = 64 * 1024) -> tuple[str, str, dict]:
+    """(html with image names, html with data URIs, name -> data URI)"""
+    rng = random.Random(units)
+    named, embedded, images = [], [], {}
+    for n in range(units):
+        uri = "data:image/png;base64," + base64.b64encode(rng.randbytes(image_bytes)).decode()
+        name = f"restored_{n:08x}.png"
+        images[name] = uri
+        body = _PARAGRAPH * 20 + "<table><tr>" + _CELL * 4 + "</tr></table>\n"
+        named.append(body + f'<p><img src="{name}" /></p>\n')
+        embedded.append(body + f'<p><img src="{uri}" /></p>\n')
+    return "".join(named), "".join(embedded), images
+
+
+# -- what DocumentTab did before ----------------------------------------------
+
+def _regex_save(html: str, images: dict) -> str:
+    html = re.sub(r'src="([^"]*)"', lambda m: f'src="{images.get(m.group(1), m.group(1))}"', html)
+
+    def strip(match):
+        attrs = re.sub(r'\s*background-color\s*:\s*[^;"]+(;)?', '', match.group(2),
+                       flags=re.IGNORECASE)
+        return f'<{match.group(1)} {attrs.strip()}>'
+    return re.sub(r'<(td|th)\s+([^>]+)>', strip, html, flags=re.IGNORECASE)
+
+
+def _regex_load(html: str) -> str:
+    return re.sub(r'src="([^"]*)"', lambda m: 'src="x"' if m.group(1).startswith("data:") else m.group(0),
+                  html)
+
+
+# -- the scanner ------------------------------------------------------------
+
+def _scan_save(html: str, images: dict) -> str:
+    return "".join(rewrite_html(html, images.get, strip_cell_backgrounds=True))
+
+
+def _scan_load(html: str) -> str:
+    return "".join(rewrite_html(html, lambda src: "x" if src.startswith("data:") else None))
+
+
+def _best_of(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    print(f"{'MB':>7} {'save regex':>11} {'save scan':>10} {'load regex':>11} {'load scan':>10}"
+          "   (ms per MB)")
+    for units in (8, 16, 32, 64, 128):
+        named, embedded, images = _note(units)
+        mb = len(embedded) / 2**20
+        assert _scan_save(named, images) == _regex_save(named, images)
+        timings = (
+            _best_of(_regex_save, named, images), _best_of(_scan_save, named, images),
+            _best_of(_regex_load, embedded), _best_of(_scan_load, embedded),
+        )
+        print(f"{mb:7.1f} " + " ".join(f"{1000 * t / mb:10.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# ============================================================================
+# Benchmark: cold start
+# time from a fresh interpreter to the main window's first paint
+# ============================================================================
+#
+#   python -m benchmarks.bench_startup [runs]
+#
+# Each run starts a new Python process with an empty settings/cache/data
+# home (so no session is restored), builds MainWindow the way main.py does
+# and waits for its first_paint milestone. MainWindow gets the time the
+# process started, so every startup_timings entry counts the imports too.
+# Prints the median of each milestone, plus which heavy modules were
+# already imported by then - they should only load on first use.
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+_CHILD = """
+import time
+started = time.perf_counter()
+import json, sys
+from PyQt6.QtWidgets import QApplication
+from app.main_window import MainWindow
+
+app = QApplication(sys.argv)
+window = MainWindow(started_at=started)
+window.show()
+# Taken before the event loop runs: the spellchecker loads just after first paint
+modules = sorted(name for name in sys.modules if name in %r)
+while "first_paint" not in window.startup_timings:
+    app.processEvents()
+print(json.dumps({"timings": window.startup_timings, "modules": modules}))
+window.close()
+"""
+
+# Modules that only some menu actions or dialogs need
+LAZY_MODULES = (
+    "PyQt6.QtPrintSupport", "docx", "spellchecker", "lxml", "webbrowser",
+    "multiprocessing", "services.print_document", "services.export_services",
+    "services.export_jobs", "services.import_services", "widgets.print_preview",
+    "widgets.table_dialog",
+)
+
+
+def run_once(root: Path) -> dict:
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, XDG_CONFIG_HOME=home, XDG_CACHE_HOME=home,
+                   XDG_DATA_HOME=home)
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        result = subprocess.run([sys.executable, "-c", _CHILD % (LAZY_MODULES,)], cwd=root,
+                                env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(runs: int = 7):
+    root = Path(__file__).resolve().parent.parent
+    results = [run_once(root) for _ in range(runs)]
+    milestones = sorted({name for r in results for name in r["timings"]},
+                        key=lambda name: results[0]["timings"].get(name, 0))
+    for name in milestones:
+        values = [r["timings"][name] for r in results if name in r["timings"]]
+        print(f"{name:>16}: {statistics.median(values):8.1f} ms (median of {len(values)})")
+    loaded = results[-1]["modules"]
+    print(f"{'loaded eagerly':>16}: {', '.join(loaded) if loaded else 'none'}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
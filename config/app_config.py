@@ -10,4 +10,14 @@ class AppConfig:
         "Text Files (*.txt);;"
         "All Files (*)"
     )
+    # The open dialog also lists what can be imported; notes are only
+    # ever saved as HTML or text
+    OPEN_FILE_FILTERS = (
+        "All Supported Files (*.html *.txt *.md *.markdown *.docx);;"
+        "HTML Files (*.html);;"
+        "Text Files (*.txt);;"
+        "Markdown Files (*.md *.markdown);;"
+        "Word Documents (*.docx);;"
+        "All Files (*)"
+    )
     DEFAULT_EXTENSION = ".html"
\ No newline at end of file
@@ -1,12 +1,35 @@
-from app.main_window import MainWindow
-from PyQt6.QtWidgets import QApplication
 import sys
+import time
+
+_STARTED = time.perf_counter()
+
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    # `python main.py convert|watch ...` run headless and never import Qt
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        from services.batch_convert import main as convert_main
+        sys.exit(convert_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        from services.watch_export import main as watch_main
+        sys.exit(watch_main(sys.argv[2:]))
+
+    # --profile must be on before the app is imported: @traced decides then
+    from services import profiler
+    trace_file, argv = profiler.parse_profile_option(sys.argv)
+    if trace_file is not None:
+        profiler.enable(origin=_STARTED)
+
+    from app.main_window import MainWindow
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication(argv)
+    window = MainWindow(started_at=_STARTED)
     window.show()
-    sys.exit(app.exec())
+    status = app.exec()
+    if trace_file is not None:
+        profiler.active().write(trace_file)
+        print(f"Profile written to {trace_file.resolve()}", file=sys.stderr)
+    sys.exit(status)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
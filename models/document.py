@@ -0,0 +1,240 @@
+# ============================================================================
+# Document
+# the Qt-free model of one note: loads and saves its HTML and answers the
+# questions (plain text, word count, outline) that don't need an editor
+# ============================================================================
+#
+# DocumentTab wraps a QTextEdit, so everything done through it needs a
+# QApplication. A Document is the same note as plain Python objects - the
+# DocumentTree blocks (paragraphs, headings, lists, tables, code, rules) with
+# their runs and images - so stats, search indexing and conversion can run
+# in worker processes or on a server that never imports PyQt6.
+#
+# to_html() writes the note format the editor opens: semantic tags plus the
+# inline styles parse_html() reads back, so a Document saved and loaded
+# again has the same blocks. DocumentTab.get_document() gives the model of
+# an open tab, and set_document() loads one into the editor.
+#
+# It is an export, not a round-trip of the editor's own HTML: only what the
+# blocks capture is written. A note Qt saved loses its cell spans (a spanned
+# cell comes back as separate cells), heading alignment and paragraph
+# margins and line height; a cell's background becomes a highlight on its
+# text, and heading text is written bold. The app saves notes from the
+# editor (get_content_html()), never through a Document.
+
+from collections import namedtuple
+from html import escape
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from services.document_tree import (
+    CodeBlock, DocumentTree, Heading, Image, LineBreak, ListBlock, Paragraph,
+    Rule, Run, Table, inline_text, parse_html,
+)
+
+OutlineEntry = namedtuple("OutlineEntry", ["level", "text", "block"])
+OutlineEntry.__doc__ = """A heading: its level (1-6), text, and index among the top-level blocks."""
+
+_TABLE_OPEN = '<table border="1" cellspacing="0" cellpadding="5" width="100%">'
+# Keeps runs of spaces and tabs when the editor loads the note
+_HEAD = "<head><style>p, li { white-space: pre-wrap; }</style></head>"
+
+
+def count_words(text: str) -> int:
+    """Whitespace-separated words in *text*, as the status bar counts them."""
+    return len(text.split())
+
+
+class Document(DocumentTree):
+    """A note's content as Qt-free blocks, runs, images and tables."""
+
+    @classmethod
+    def from_html(cls, html: Union[str, Iterable[str]]) -> "Document":
+        """Parse a note's HTML, whole or in pieces."""
+        return cls.from_tree(parse_html(html))
+
+    @classmethod
+    def from_tree(cls, tree: DocumentTree) -> "Document":
+        """Wrap an already parsed tree; the blocks are shared, not copied."""
+        return tree if isinstance(tree, cls) else cls(tree.blocks, tree.default_font)
+
+    @classmethod
+    def load(cls, filepath: Path) -> "Document":
+        """Read a saved note (UTF-8, falling back to Latin-1 like the editor)."""
+        filepath = Path(filepath)
+        try:
+            html = filepath.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            html = filepath.read_text(encoding="latin-1")
+        return cls.from_html(html)
+
+    def save(self, filepath: Path):
+        """Write the note to *filepath* as HTML the editor opens."""
+        with open(filepath, "w", encoding="utf-8") as f:
+            for piece in self.iter_html():
+                f.write(piece)
+
+    def to_html(self) -> str:
+        """The blocks as note HTML; layout they don't record is not kept."""
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        """The note's HTML in pieces, one per top-level block."""
+        body = f' style="font-family:\'{escape(self.default_font)}\';"' if self.default_font else ""
+        yield f"<html>{_HEAD}<body{body}>\n"
+        for block in self.blocks:
+            yield _block_html(block)
+        yield "</body></html>"
+
+    # -- queries -------------------------------------------------------
+
+    def word_count(self) -> int:
+        return count_words(self.plain_text())
+
+    def character_count(self) -> int:
+        return len(self.plain_text())
+
+    def outline(self) -> list[OutlineEntry]:
+        """The top-level headings, in order."""
+        return [OutlineEntry(block.level, inline_text(block.inlines).strip(), index)
+                for index, block in enumerate(self.blocks) if type(block) is Heading]
+
+    def images(self) -> Iterator[Image]:
+        """Every image, including those in lists and tables, in order."""
+        for inlines in _iter_inlines(self.blocks):
+            for item in inlines:
+                if type(item) is Image:
+                    yield item
+
+    def tables(self) -> Iterator[Table]:
+        """Every table, a nested one right after the table holding it."""
+        for block in _iter_blocks(self.blocks):
+            if type(block) is Table:
+                yield block
+
+
+# ============================================================================
+# Walking the blocks
+# ============================================================================
+
+def _iter_blocks(blocks: Iterable) -> Iterator:
+    """*blocks* and, depth first, the blocks inside their table cells."""
+    for block in blocks:
+        yield block
+        if type(block) is Table:
+            for row in block.rows:
+                for cell in row:
+                    yield from _iter_blocks(cell.blocks)
+
+
+def _iter_list_inlines(block: ListBlock) -> Iterator[list]:
+    for item in block.items:
+        yield item.inlines
+        for sublist in item.sublists:
+            yield from _iter_list_inlines(sublist)
+
+
+def _iter_inlines(blocks: Iterable) -> Iterator[list]:
+    """The inline lists of every paragraph, heading and list item."""
+    for block in _iter_blocks(blocks):
+        kind = type(block)
+        if kind is Paragraph or kind is Heading:
+            yield block.inlines
+        elif kind is ListBlock:
+            yield from _iter_list_inlines(block)
+
+
+# ============================================================================
+# Document -> HTML
+# ============================================================================
+
+def _block_html(block) -> str:
+    kind = type(block)
+    if kind is Paragraph:
+        attrs = f' align="{block.align}"' if block.align else ""
+        styles = []
+        if block.indent:
+            styles.append(f"-qt-block-indent:{block.indent};")
+        if block.text_indent:
+            styles.append(f"text-indent:{block.text_indent}px;")
+        if styles:
+            attrs += f' style="{" ".join(styles)}"'
+        return f"<p{attrs}>{_inlines_html(block.inlines)}</p>\n"
+    if kind is Heading:
+        return f"<h{block.level}>{_inlines_html(block.inlines)}</h{block.level}>\n"
+    if kind is CodeBlock:
+        return f"<pre>{escape(block.text, quote=False)}</pre>\n"
+    if kind is ListBlock:
+        return _list_html(block) + "\n"
+    if kind is Table:
+        rows = []
+        for row in block.rows:
+            cells = []
+            for cell in row:
+                tag = "th" if cell.header else "td"
+                cells.append(f"<{tag}>{''.join(_block_html(b) for b in cell.blocks)}</{tag}>")
+            rows.append(f"<tr>{''.join(cells)}</tr>")
+        return f"{_TABLE_OPEN}{''.join(rows)}</table>\n"
+    if kind is Rule:
+        return "<hr />\n"
+    return ""
+
+
+def _list_html(block: ListBlock) -> str:
+    tag = "ol" if block.ordered else "ul"
+    items = "".join(
+        f"<li>{_inlines_html(item.inlines)}{''.join(_list_html(s) for s in item.sublists)}</li>"
+        for item in block.items
+    )
+    return f"<{tag}>{items}</{tag}>"
+
+
+def _inlines_html(inlines: list) -> str:
+    parts = []
+    index, count = 0, len(inlines)
+    while index < count:
+        href = inlines[index].href
+        end = index + 1
+        # Consecutive inlines sharing a target are one link
+        while end < count and inlines[end].href == href:
+            end += 1
+        html = "".join(_inline_html(item) for item in inlines[index:end])
+        parts.append(f'<a href="{escape(href)}">{html}</a>' if href is not None else html)
+        index = end
+    return "".join(parts)
+
+
+def _inline_html(item) -> str:
+    kind = type(item)
+    if kind is LineBreak:
+        return "<br />"
+    if kind is Image:
+        attrs = f' src="{escape(item.src)}" alt="{escape(item.alt)}"'
+        if item.width is not None:
+            attrs += f' width="{item.width}"'
+        if item.height is not None:
+            attrs += f' height="{item.height}"'
+        return f"<img{attrs} />"
+    if kind is not Run:
+        return ""
+    return _run_html(item)
+
+
+def _run_html(run: Run) -> str:
+    html = escape(run.text, quote=False)
+    for flag, tag in ((run.code, "code"), (run.strike, "s"), (run.underline, "u"),
+                      (run.italic, "i"), (run.bold, "b")):
+        if flag:
+            html = f"<{tag}>{html}</{tag}>"
+    styles = []
+    if run.font:
+        styles.append(f"font-family:'{escape(run.font)}';")
+    if run.size:
+        styles.append(f"font-size:{run.size:g}pt;")
+    if run.color:
+        styles.append(f"color:{escape(run.color)};")
+    if run.highlight:
+        styles.append(f"background-color:{escape(run.highlight)};")
+    if styles:
+        html = f'<span style="{" ".join(styles)}">{html}</span>'
+    return html
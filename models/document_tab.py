@@ -3,14 +3,23 @@
 # document logic, content management, and state tracking for each open document
 # ============================================================================
 
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional, Union
 from PyQt6.QtWidgets import QTextEdit
 from PyQt6.QtGui import QMouseEvent, QImage, QTextDocument, QTextFormat
 from PyQt6.QtCore import QMimeData
 from PyQt6.QtCore import Qt, QBuffer, QIODevice, QUrl
-import webbrowser
-import re
+
+from services.compact_html import compact_qt_html
+from models.document import Document
+from services.document_tree import DocumentTree
+from services.embedded_images import decode_embedded_images
+from services.html_rewrite import rewrite_html
+from services.profiler import traced
+
+if TYPE_CHECKING:  # print support is loaded on first print/preview
+    from services.print_document import PageSetup, PrintLayout
 
 
 class LinkAwareTextEdit(QTextEdit):
@@ -25,6 +34,7 @@ class LinkAwareTextEdit(QTextEdit):
             
             if url:
                 # Open URL in default browser
+                import webbrowser
                 try:
                     webbrowser.open(url)
                 except Exception as e:
@@ -93,6 +103,11 @@ class LinkAwareTextEdit(QTextEdit):
 
 class DocumentTab:
     """Encapsulating a single document with its state and metadata"""
+
+    # Print layouts kept per tab (one per page setup tried in the preview)
+    MAX_PRINT_LAYOUTS = 3
+    # Print preview page images kept per tab (about 0.5 MB each)
+    MAX_PAGE_IMAGES = 64
     
     def __init__(self, name: Optional[str] = None):
         self.text_edit = LinkAwareTextEdit()
@@ -100,12 +115,39 @@ class DocumentTab:
         self.text_edit.setUndoRedoEnabled(True)  # Explicitly enable
         
         self.current_file: Optional[Path] = None
+        # The Markdown/Word file this document was converted from; it is
+        # never written back to, so current_file stays None until Save As
+        self.imported_from: Optional[Path] = None
         self.name = name or "Untitled"
         self._last_saved_content = ""
         
         # Use Qt's built-in document modified tracking
         self.text_edit.document().setModified(False)
+
+        # Bumped on every edit; keys the cached DocumentTree the exporters share
+        self._revision = 0
+        self._document_tree: Optional[tuple[int, DocumentTree]] = None
+        # PageSetup -> (revision, PrintLayout), most recently used last
+        self._print_layouts: OrderedDict = OrderedDict()
+        # Page signature -> preview image without its number, most recently
+        # used last; a signature describes the page's content, so these stay
+        # valid across edits and are shared by every layout and preview
+        self._page_images: OrderedDict = OrderedDict()
+        self.text_edit.document().contentsChanged.connect(self._bump_revision)
+
+        # Image resource name -> (QImage.cacheKey(), data URI). Images keep
+        # the bytes they were loaded from (a JPEG stays a JPEG) and are only
+        # encoded once; a resize swaps in a new QImage, so the key goes stale.
+        self._image_sources: dict[str, tuple[int, str]] = {}
         
+    def _bump_revision(self):
+        self._revision += 1
+
+    @property
+    def revision(self) -> int:
+        """Counter that changes whenever the document content changes"""
+        return self._revision
+
     @property
     def is_modified(self) -> bool:
         """Check if document has unsaved changes"""
@@ -128,108 +170,143 @@ class DocumentTab:
         """Get the file path as string, or empty if unsaved"""
         return str(self.current_file) if self.current_file else ""
     
+    @traced(category="editor")
     def get_content_html(self) -> str:
         """Get document content as HTML with embedded images"""
+        return "".join(self.iter_content_html())
+
+    def iter_content_html(self, compact: bool = False) -> Iterator[str]:
+        """
+        Yield get_content_html() in pieces, for writing or parsing without
+        joining it. An embedded image is yielded as the data URI string kept
+        for it, so the pieces share memory with the document's images.
+        With *compact*, repeated inline styles become <style> rules (see
+        services/compact_html); set_content() reads either form back.
+        """
         html = self.text_edit.toHtml()
-        
-        # Find all src="..." values in the HTML
-        doc = self.text_edit.document()
-        
-        def embed_image(match):
-            src = match.group(1)
-            # Skip already-embedded base64 data URIs
-            if src.startswith("data:"):
-                return match.group(0)
-            
-            url = QUrl(src)
-            # QTextDocument.ResourceType.ImageResource == 2 in PyQt6
-            resource = doc.resource(2, url)
-            image = None
-            if isinstance(resource, QImage):
-                image = resource
-            elif hasattr(resource, 'value') and isinstance(resource.value(), QImage):
-                image = resource.value()
-            
-            if image is not None and not image.isNull():
-                buf = QBuffer()
-                buf.open(QIODevice.OpenModeFlag.WriteOnly)
-                image.save(buf, "PNG")
-                buf.close()
-                base64_data = buf.data().toBase64().data().decode('utf-8')
-                return f'src="data:image/png;base64,{base64_data}"'
-            return match.group(0)
-        
-        html = re.sub(r'src="([^"]*)"', embed_image, html)
-        
+        if compact:
+            html = compact_qt_html(html)
         # Qt bakes the app's dark palette colors into table cell inline styles.
         # Strip background-color from <td> and <th> cells so they inherit the
         # page background when opened in a browser.
-        def strip_cell_background(match):
-            tag, attrs = match.group(1), match.group(2)
-            attrs = re.sub(r'\s*background-color\s*:\s*[^;"]+(;)?', '', attrs, flags=re.IGNORECASE)
-            return f'<{tag} {attrs.strip()}>'
-        html = re.sub(r'<(td|th)\s+([^>]+)>', strip_cell_background, html, flags=re.IGNORECASE)
-        
-        return html
+        yield from rewrite_html(html, self._embedded_image, strip_cell_backgrounds=True)
 
-    def set_content(self, content: str, is_html: bool = False):
-        """Set document content, preserving undo stack and restoring images"""
+    def _embedded_image(self, src: str) -> Optional[str]:
+        """Data URI for the image resource *src*, None to leave it as is."""
+        # Skip already-embedded base64 data URIs
+        if src.startswith("data:"):
+            return None
+
+        # QTextDocument.ResourceType.ImageResource == 2 in PyQt6
+        resource = self.text_edit.document().resource(2, QUrl(src))
+        image = None
+        if isinstance(resource, QImage):
+            image = resource
+        elif hasattr(resource, 'value') and isinstance(resource.value(), QImage):
+            image = resource.value()
+        if image is None or image.isNull():
+            return None
+
+        cached = self._image_sources.get(src)
+        if cached is not None and cached[0] == image.cacheKey():
+            return cached[1]
+        buf = QBuffer()
+        buf.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(buf, "PNG")
+        buf.close()
+        base64_data = buf.data().toBase64().data().decode('utf-8')
+        data_uri = f"data:image/png;base64,{base64_data}"
+        self._image_sources[src] = (image.cacheKey(), data_uri)
+        return data_uri
+
+    def get_document_tree(self) -> DocumentTree:
+        """Get the parsed content for export, re-parsed only after an edit"""
+        if self._document_tree is None or self._document_tree[0] != self._revision:
+            self._document_tree = (self._revision, Document.from_html(self.iter_content_html()))
+        return self._document_tree[1]
+
+    def get_document(self) -> Document:
+        """Get the content as a Qt-free Document (the cached tree, wrapped)"""
+        return Document.from_tree(self.get_document_tree())
+
+    def set_document(self, document: Document):
+        """Replace the content with *document* (built or edited as a Document).
+        Not a round-trip: set_document(get_document()) drops the layout the
+        blocks don't record, see models/document.py"""
+        self.set_content(document.to_html(), is_html=True)
+
+    def get_export_snapshot(self) -> Union[DocumentTree, list[str]]:
+        """Get what a background export should convert: the cached tree while
+        it is current, otherwise the HTML pieces for the worker to parse"""
+        if self._document_tree is not None and self._document_tree[0] == self._revision:
+            return self._document_tree[1]
+        return list(self.iter_content_html())
+
+    def remember_document_tree(self, revision: int, tree: DocumentTree):
+        """Cache a tree parsed elsewhere, if the content is still at *revision*"""
+        if revision == self._revision:
+            self._document_tree = (revision, tree)
+
+    def cached_print_layout(self, setup: "PageSetup") -> Optional["PrintLayout"]:
+        """The print layout for *setup*, if one was made at this revision"""
+        cached = self._print_layouts.get(setup)
+        if cached is None or cached[0] != self._revision:
+            return None
+        self._print_layouts.move_to_end(setup)
+        return cached[1]
+
+    def remember_print_layout(self, revision: int, layout: "PrintLayout"):
+        """Cache a layout made elsewhere, if the content is still at *revision*"""
+        if revision != self._revision:
+            return
+        self._print_layouts[layout.setup] = (revision, layout)
+        self._print_layouts.move_to_end(layout.setup)
+        # Each holds a whole laid-out document; drop stale and old ones
+        for setup, (cached_revision, _layout) in list(self._print_layouts.items()):
+            if cached_revision != revision:
+                del self._print_layouts[setup]
+        while len(self._print_layouts) > self.MAX_PRINT_LAYOUTS:
+            self._print_layouts.popitem(last=False)
+
+    def cached_page_image(self, signature: int) -> Optional[QImage]:
+        """The preview image of a print page with *signature*, if drawn before"""
+        image = self._page_images.get(signature)
+        if image is not None:
+            self._page_images.move_to_end(signature)
+        return image
+
+    def remember_page_image(self, signature: int, image: QImage):
+        self._page_images[signature] = image
+        self._page_images.move_to_end(signature)
+        while len(self._page_images) > self.MAX_PAGE_IMAGES:
+            self._page_images.popitem(last=False)
+
+    @traced(category="editor")
+    def set_content(self, content: str, is_html: bool = False,
+                    images: Optional[dict] = None):
+        """
+        Set document content, preserving undo stack and restoring images.
+        *images* is the name -> (QImage, data URI) map for HTML that
+        decode_embedded_images() already went through (FileLoadWorker does
+        so off the GUI thread); without it the HTML's images are decoded here.
+        """
         cursor = self.text_edit.textCursor()
         cursor.beginEditBlock()
         
         if is_html:
-            # Extract base64 images from HTML before setting
-            import base64
-            from PyQt6.QtCore import QByteArray
-            from PyQt6.QtGui import QImageReader
-            from PyQt6.QtCore import QBuffer, QIODevice
-            
-            images = {}
-            
-            def extract_and_replace(match):
-                src = match.group(1)
-                if src.startswith('data:image/'):
-                    # Parse the data URI
-                    header, data = src.split(',', 1)
-                    # Extract image format (png, jpeg, etc.)
-                    image_format = header.split('/')[1].split(';')[0]
-                    
-                    # Decode base64 data
-                    try:
-                        image_data = base64.b64decode(data)
-                        
-                        # Create QImage from bytes
-                        buffer = QBuffer()
-                        buffer.setData(QByteArray(image_data))
-                        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
-                        
-                        reader = QImageReader(buffer)
-                        reader.setAutoDetectImageFormat(True)
-                        image = reader.read()
-                        buffer.close()
-                        
-                        if not image.isNull():
-                            # Generate unique name
-                            import uuid
-                            img_name = f"restored_{uuid.uuid4().hex[:8]}.{image_format}"
-                            images[img_name] = image
-                            return f'src="{img_name}"'
-                    except Exception as e:
-                        print(f"Failed to decode image: {e}")
-                
-                return match.group(0)
-            
-            # Replace all base64 data URIs with placeholder names
-            processed_html = re.sub(r'src="([^"]*)"', extract_and_replace, content)
-            
+            if images is None:
+                content, images = decode_embedded_images(content)
+
             # Set the processed HTML
-            self.text_edit.setHtml(processed_html)
+            self.text_edit.setHtml(content)
             
             # Add extracted images as document resources
             doc = self.text_edit.document()
-            for img_name, image in images.items():
+            self._image_sources = {}
+            for img_name, (image, src) in images.items():
                 doc.addResource(QTextDocument.ResourceType.ImageResource, 
                             QUrl(img_name), image)
+                self._image_sources[img_name] = (image.cacheKey(), src)
             
             # Force document to refresh
             doc.adjustSize()
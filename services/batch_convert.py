@@ -0,0 +1,162 @@
+# ============================================================================
+# Batch Convert
+# the headless `python main.py convert` mode: exports whole folders of
+# saved notes to Markdown or Word on a process pool
+# ============================================================================
+#
+#   python main.py convert --to md notes/ --out mirror/ -j 8
+#
+# Everything here stays Qt-free (export_services and document_tree are), so
+# it runs on a box without a display or even PyQt6, and worker processes
+# only import the converters. Notes whose output is already newer than the
+# source are skipped, which makes repeated nightly runs cheap.
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable, Optional
+
+from services.export_services import save_html_as_docx, save_html_as_markdown
+
+OUTPUT_SUFFIXES = {"md": ".md", "docx": ".docx"}
+NOTE_SUFFIXES = (".html", ".htm")
+
+# Tasks handed to a worker per round trip, at most; small notes convert in
+# well under a millisecond, so one pickle per note would dominate.
+_MAX_CHUNK = 32
+
+ConversionTask = namedtuple("ConversionTask", ["source", "target"])
+ConversionResult = namedtuple("ConversionResult", ["task", "bytes_in", "seconds", "error"])
+
+
+def plan_conversions(sources: Iterable, out_dir: Path, fmt: str) -> list[ConversionTask]:
+    """Pair each note under *sources* (files or folders) with its output file.
+
+    Notes found in a folder keep their path relative to it under *out_dir*;
+    notes named directly go straight into *out_dir*.
+    """
+    suffix = OUTPUT_SUFFIXES[fmt]
+    out_dir = Path(out_dir)
+    tasks = []
+    for source in sources:
+        source = Path(source)
+        if source.is_dir():
+            notes = sorted(p for p in source.rglob("*")
+                           if p.suffix.lower() in NOTE_SUFFIXES and p.is_file())
+            for note in notes:
+                tasks.append(ConversionTask(note, out_dir / note.relative_to(source).with_suffix(suffix)))
+        else:
+            tasks.append(ConversionTask(source, out_dir / (source.stem + suffix)))
+    return tasks
+
+
+def is_up_to_date(task: ConversionTask) -> bool:
+    """True when the output exists and is at least as new as its note."""
+    try:
+        return task.target.stat().st_mtime >= task.source.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _read_note(path: Path) -> str:
+    # Same fallback as FileOperations.read_file, without importing Qt
+    try:
+        return path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        return path.read_text(encoding="latin-1")
+
+
+def convert_note(task: ConversionTask, fmt: str, html_fallback: bool = False) -> ConversionResult:
+    """Convert one note; runs in a worker process and never raises."""
+    started = time.perf_counter()
+    try:
+        html = _read_note(task.source)
+    except Exception as e:
+        return ConversionResult(task, 0, time.perf_counter() - started, str(e))
+    return _convert(task, html, fmt, html_fallback, started)
+
+
+def convert_html(task: ConversionTask, html: str, fmt: str,
+                 html_fallback: bool = False) -> ConversionResult:
+    """Convert a note already in memory (``task.source`` only names it), e.g.
+    an open tab's snapshot; like convert_note it never raises."""
+    return _convert(task, html, fmt, html_fallback, time.perf_counter())
+
+
+def _convert(task: ConversionTask, html: str, fmt: str, html_fallback: bool,
+             started: float) -> ConversionResult:
+    try:
+        if fmt == "md":
+            save_html_as_markdown(html, task.target, html_fallback=html_fallback)
+        else:
+            save_html_as_docx(html, task.target)
+    except Exception as e:
+        return ConversionResult(task, 0, time.perf_counter() - started, str(e))
+    return ConversionResult(task, len(html.encode("utf-8")), time.perf_counter() - started, None)
+
+
+def convert_all(tasks: list[ConversionTask], fmt: str, jobs: int = 1,
+                html_fallback: bool = False) -> list[ConversionResult]:
+    """Convert *tasks* on *jobs* worker processes (inline when jobs is 1)."""
+    if jobs <= 1 or len(tasks) <= 1:
+        return [convert_note(task, fmt, html_fallback) for task in tasks]
+    chunk = max(1, min(_MAX_CHUNK, len(tasks) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(convert_note, tasks, repeat(fmt), repeat(html_fallback),
+                             chunksize=chunk))
+
+
+def format_summary(results: list[ConversionResult], skipped: int, elapsed: float,
+                   jobs: int) -> str:
+    """One line of throughput stats for a finished run."""
+    converted = [r for r in results if r.error is None]
+    failed = len(results) - len(converted)
+    megabytes = sum(r.bytes_in for r in converted) / (1024 * 1024)
+    rate = len(converted) / elapsed if elapsed > 0 else 0.0
+    mb_rate = megabytes / elapsed if elapsed > 0 else 0.0
+    return (f"Converted {len(converted)} notes ({megabytes:.1f} MB) in {elapsed:.2f}s "
+            f"with {jobs} worker(s): {rate:.1f} notes/s, {mb_rate:.2f} MB/s; "
+            f"{skipped} up to date, {failed} failed")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py convert ...`; returns the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="main.py convert",
+        description="Convert saved HTML notes to Markdown or Word without opening the editor.",
+    )
+    parser.add_argument("sources", nargs="+", metavar="SRC",
+                        help="note files, or folders searched recursively for .html notes")
+    parser.add_argument("--to", required=True, choices=sorted(OUTPUT_SUFFIXES),
+                        help="output format")
+    parser.add_argument("--out", required=True, type=Path, metavar="DIR",
+                        help="folder to write the converted notes into")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, metavar="N",
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="convert even when the output is newer than the note")
+    parser.add_argument("--html-fallback", action="store_true",
+                        help="keep underline, colors and fonts as inline HTML in Markdown")
+    args = parser.parse_args(argv)
+
+    missing = [s for s in args.sources if not Path(s).exists()]
+    if missing:
+        parser.error(f"no such file or folder: {', '.join(missing)}")
+
+    started = time.perf_counter()
+    tasks = plan_conversions(args.sources, args.out, args.to)
+    todo = tasks if args.force else [t for t in tasks if not is_up_to_date(t)]
+    jobs = max(1, args.jobs)
+    results = convert_all(todo, args.to, jobs, args.html_fallback)
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        if result.error is not None:
+            print(f"Failed: {result.task.source}: {result.error}", file=sys.stderr)
+    print(format_summary(results, len(tasks) - len(todo), elapsed, jobs))
+    return 1 if any(r.error is not None for r in results) else 0
@@ -0,0 +1,146 @@
+# ============================================================================
+# Compact HTML
+# shrinks QTextEdit.toHtml() output for saving by moving repeated inline
+# styles into the document's <style> block
+# ============================================================================
+#
+# toHtml() spells out a full style="..." on every paragraph, list item and
+# span - margins, -qt-block-indent, text-indent, font properties - so a note
+# is typically several times larger than its text. compact_qt_html() gives
+# every distinct style a class rule instead:
+#
+#   <style>... .s0 { font-weight:700; } </style>
+#   <p>plain</p><p><span class="s0">bold</span></p>
+#
+# The most common paragraph style becomes a bare ``p`` rule, so ordinary
+# paragraphs carry no attribute at all, and adjacent spans that end up with
+# the same class are merged (Qt would merge them on load anyway).
+#
+# Qt's HTML importer applies these rules exactly like the inline styles, so
+# setHtml(compact_qt_html(doc.toHtml())) rebuilds the same document as
+# setHtml(doc.toHtml()) would. That is not always doc itself: reloading
+# toHtml() turns a <pre> block into a paragraph and copies a cell's bgcolor
+# onto its paragraphs. So <pre> blocks and everything inside table cells
+# are left exactly as Qt wrote them, and compacting never adds a change of
+# its own there. parse_html() resolves the rules too, so exports of compact
+# files are unchanged.
+
+import re
+from collections import Counter
+
+_BODY_RE = re.compile(r"<body\b[^>]*>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9]*)([^>]*)>")
+_STYLE_ATTR_RE = re.compile(r' style="([^"]*)"')
+
+# Tags whose style attribute is moved into a class rule
+_CLASSED_TAGS = frozenset({
+    "p", "li", "span", "ul", "ol", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+})
+# Tags whose whole content is left as Qt wrote it
+_VERBATIM_TAGS = frozenset({"pre", "td", "th"})
+
+
+def _properties(style: str) -> set:
+    return {decl.split(":", 1)[0].strip() for decl in style.split(";") if ":" in decl}
+
+
+def compact_qt_html(html: str) -> str:
+    """Return *html* (toHtml() output) with its repeated inline styles as rules.
+
+    Anything that doesn't look like Qt's output - no <style> block ahead of
+    the body - is returned unchanged.
+    """
+    body_tag = _BODY_RE.search(html)
+    if body_tag is None:
+        return html
+    style_end = html.rfind("</style>", 0, body_tag.start())
+    if style_end < 0:
+        return html
+    body = html[body_tag.end():]
+
+    # First pass: how often each style is used, and which properties every
+    # paragraph sets (the bare "p" rule applies to all of them, so it may
+    # only set those)
+    uses = Counter()
+    paragraph_uses = Counter()
+    shared = None
+    verbatim_depth = 0
+    for match in _TAG_RE.finditer(body):
+        closing, tag, attrs = match.groups()
+        tag = tag.lower()
+        if tag in _VERBATIM_TAGS:
+            verbatim_depth += -1 if closing else 1
+            continue
+        if closing or verbatim_depth or tag not in _CLASSED_TAGS:
+            continue
+        style_attr = _STYLE_ATTR_RE.search(attrs)
+        style = style_attr.group(1) if style_attr else None
+        if tag == "p":
+            properties = _properties(style or "")
+            shared = properties if shared is None else shared & properties
+            paragraph_uses[style] += 1
+        if style and " class=" not in attrs:
+            uses[style] += 1
+
+    default_p = None
+    for style, _count in paragraph_uses.most_common():
+        if style and _properties(style) == shared:
+            default_p = style
+            break
+
+    # Second pass: swap styles for classes, merging spans that end up alike.
+    # A style used only once stays inline; a rule for it would be longer.
+    classes: dict[str, str] = {}
+    out = []
+    pos = 0
+    open_span = None  # style of the span we're in, if any
+    verbatim_depth = 0
+    for match in _TAG_RE.finditer(body):
+        if match.start() < pos:
+            continue  # the opening tag of a span merged into the one before
+        closing, tag, attrs = match.groups()
+        tag = tag.lower()
+        if tag in _VERBATIM_TAGS:
+            verbatim_depth += -1 if closing else 1
+            continue
+        if verbatim_depth:
+            continue
+        if closing:
+            if tag == "span" and open_span is not None:
+                follow = _TAG_RE.match(body, match.end())
+                if follow and follow.group(2) == "span" and not follow.group(1) \
+                        and follow.group(3) == f' style="{open_span}"':
+                    out.append(body[pos:match.start()])
+                    pos = follow.end()
+                    continue
+                open_span = None
+            continue
+        if tag not in _CLASSED_TAGS or " class=" in attrs:
+            continue
+        style_attr = _STYLE_ATTR_RE.search(attrs)
+        if style_attr is None:
+            continue
+        style = style_attr.group(1)
+        if tag == "span":
+            open_span = style
+        if tag == "p" and style == default_p:
+            replacement = ""
+        elif uses[style] > 1:
+            name = classes.get(style)
+            if name is None:
+                name = classes[style] = f"s{len(classes)}"
+            replacement = f' class="{name}"'
+        else:
+            continue
+        out.append(body[pos:match.start()])
+        out.append(f"<{match.group(2)}{attrs[:style_attr.start()]}{replacement}"
+                   f"{attrs[style_attr.end():]}>")
+        pos = match.end()
+    out.append(body[pos:])
+
+    rules = []
+    if default_p is not None:
+        rules.append(f"p {{{default_p} }}\n")
+    rules.extend(f".{name} {{{style} }}\n" for style, name in classes.items())
+    return "".join([html[:style_end], *rules, html[style_end:body_tag.end()], *out])
@@ -0,0 +1,165 @@
+# ============================================================================
+# Dictionary Store
+# compiled, memory-mapped spellcheck dictionaries plus the user's own words
+# ============================================================================
+#
+# pyspellchecker ships each language as a gzipped JSON word -> frequency
+# list and parses the whole thing into a dict on every launch. For "is this
+# word spelled correctly" we only need set membership, so the first launch
+# compiles the word list into a sorted array of 64-bit hashes and writes it
+# next to the other caches. Later launches mmap that file and binary-search
+# it in place: nothing to parse, and the pages are shared with the OS file
+# cache instead of living in a Python dict.
+#
+# A hash collision would accept one misspelling as correct; at 160k words
+# in a 2**64 space that's a ~1e-9 chance per dictionary, which we accept.
+#
+# The same directory also holds custom-words.txt, the words added through
+# "Add to Dictionary", one per line.
+
+import hashlib
+import importlib.util
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+_MAGIC = b"RTNDICT1"
+_HEADER = struct.Struct("<8sQII8x")  # magic, source fingerprint, count, longest word; 32 bytes
+_CUSTOM_WORDS_FILE = "custom-words.txt"
+
+
+def word_hash(word: str) -> int:
+    """Stable 64-bit hash of an (already lowercased) word."""
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def source_fingerprint(language: str) -> int:
+    """
+    Identity of pyspellchecker's bundled word list for `language` (size and
+    mtime of the resource file), so compiled copies of an older list are
+    rebuilt after an upgrade. 0 if the resource can't be found.
+    """
+    # Found without importing pyspellchecker, which is only needed to rebuild
+    spec = importlib.util.find_spec("spellchecker")
+    if spec is None or spec.origin is None:
+        return 0
+    path = os.path.join(os.path.dirname(spec.origin), "resources", f"{language}.json.gz")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0
+    return word_hash(f"{language}:{stat.st_size}:{stat.st_mtime_ns}")
+
+
+class CompiledDictionary:
+    """
+    Read-only set of words stored as sorted 64-bit hashes.
+
+    Mirrors pyspellchecker's unknown(): words more than three characters
+    longer than anything in the list are never flagged.
+    """
+
+    def __init__(self, hashes, longest_word_length: int, fingerprint: int,
+                 mapping: Optional[mmap.mmap] = None):
+        self._hashes = hashes  # array("Q") or a memoryview cast to "Q"
+        self.longest_word_length = longest_word_length
+        self.fingerprint = fingerprint
+        self._mapping = mapping
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __contains__(self, word: str) -> bool:
+        if len(word) > self.longest_word_length + 3:
+            return True
+        h = word_hash(word)
+        i = bisect_left(self._hashes, h)
+        return i < len(self._hashes) and self._hashes[i] == h
+
+    @classmethod
+    def compile(cls, words: Iterable[str], fingerprint: int = 0) -> "CompiledDictionary":
+        """Build an in-memory dictionary from lowercased `words`."""
+        longest = 0
+        hashes = set()
+        for word in words:
+            hashes.add(word_hash(word))
+            longest = max(longest, len(word))
+        return cls(array("Q", sorted(hashes)), longest, fingerprint)
+
+    def save(self, path: str):
+        """Write the dictionary to `path` (atomically, via a temp file)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.fingerprint, len(self._hashes),
+                                 self.longest_word_length))
+            f.write(memoryview(self._hashes).cast("B"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path: str, fingerprint: Optional[int] = None) -> Optional["CompiledDictionary"]:
+        """
+        Memory-map a dictionary written by save(). Returns None if it's
+        missing, corrupt, or (when `fingerprint` is given) stale.
+        """
+        try:
+            with open(path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, saved_fingerprint, count, longest = _HEADER.unpack_from(mapping)
+        except struct.error:
+            mapping.close()
+            return None
+        if (magic != _MAGIC or len(mapping) != _HEADER.size + count * 8
+                or (fingerprint is not None and saved_fingerprint != fingerprint)):
+            mapping.close()
+            return None
+        hashes = memoryview(mapping)[_HEADER.size:].cast("Q")
+        return cls(hashes, longest, saved_fingerprint, mapping)
+
+    def close(self):
+        """Release the memory map (the dictionary is unusable afterwards)."""
+        if self._mapping is not None:
+            self._hashes.release()
+            self._mapping.close()
+            self._mapping = None
+
+
+class DictionaryStore:
+    """
+    A directory of compiled dictionaries (one file per language) and the
+    user's custom word list.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def dictionary_path(self, language: str) -> str:
+        return os.path.join(self.directory, f"dictionary-{language}.bin")
+
+    def load_dictionary(self, language: str) -> Optional[CompiledDictionary]:
+        """The compiled dictionary for `language`, or None if absent or stale."""
+        return CompiledDictionary.open(self.dictionary_path(language),
+                                       source_fingerprint(language))
+
+    def save_dictionary(self, language: str, dictionary: CompiledDictionary):
+        os.makedirs(self.directory, exist_ok=True)
+        dictionary.save(self.dictionary_path(language))
+
+    def load_custom_words(self) -> set[str]:
+        """Every word previously passed to add_custom_word()."""
+        try:
+            with open(os.path.join(self.directory, _CUSTOM_WORDS_FILE), encoding="utf-8") as f:
+                return {line.strip() for line in f if line.strip()}
+        except OSError:
+            return set()
+
+    def add_custom_word(self, word: str):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, _CUSTOM_WORDS_FILE), "a", encoding="utf-8") as f:
+            f.write(word + "\n")
@@ -0,0 +1,543 @@
+# ============================================================================
+# Document Tree
+# one parsed, Qt-free representation of a note that every exporter shares
+# ============================================================================
+#
+# parse_html() reads the HTML produced by DocumentTab.get_content_html() (or
+# plain hand-written semantic HTML) once, and turns it into a small tree:
+#
+#   DocumentTree.blocks  - Paragraph, Heading, CodeBlock, ListBlock, Table, Rule
+#   Paragraph.inlines    - Run (text + formatting + link), Image, LineBreak
+#   Table.rows           - lists of TableCell, each holding its own blocks
+#
+# Qt's toHtml() has no semantic tags for what this app calls styles: a
+# heading is a <p> with 12px margins around a single bold, oversized <span>,
+# and inline code is a <span> in a monospace font. Those rules are applied
+# here, while parsing, so the Markdown, Word and PDF exporters only ever see
+# the tree and never look at HTML themselves. DocumentTab caches the tree per
+# document revision, so exporting one note to several formats parses it once.
+
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+from typing import Iterable, Optional, Union
+
+# ============================================================================
+# Tree nodes
+# ============================================================================
+
+Run = namedtuple(
+    "Run",
+    ["text", "bold", "italic", "underline", "strike", "code",
+     "color", "highlight", "font", "size", "href"],
+    defaults=(False, False, False, False, False, None, None, None, None, None),
+)
+Run.__doc__ = """A stretch of text sharing one set of formatting (and link target)."""
+
+Image = namedtuple("Image", ["src", "alt", "width", "height", "href"],
+                   defaults=("", None, None, None))
+Image.__doc__ = """An inline image; width/height are display pixels, if the HTML gave them."""
+
+LineBreak = namedtuple("LineBreak", ["href"], defaults=(None,))
+LineBreak.__doc__ = """A manual line break (<br>) inside a block."""
+
+Paragraph = namedtuple("Paragraph", ["inlines", "align", "indent", "text_indent"],
+                       defaults=(None, 0, 0))
+Paragraph.__doc__ = """A paragraph; indent is Qt's block-indent level, text_indent is in px."""
+
+Heading = namedtuple("Heading", ["level", "inlines"])
+CodeBlock = namedtuple("CodeBlock", ["text"])
+ListItem = namedtuple("ListItem", ["inlines", "sublists"])
+ListBlock = namedtuple("ListBlock", ["ordered", "items"])
+TableCell = namedtuple("TableCell", ["blocks", "header"], defaults=(False,))
+Table = namedtuple("Table", ["rows"])
+Rule = namedtuple("Rule", [])
+
+
+class DocumentTree:
+    """The parsed form of one note: its blocks plus the document-wide font."""
+
+    def __init__(self, blocks: list, default_font: Optional[str] = None):
+        self.blocks = blocks
+        self.default_font = default_font
+
+    def plain_text(self) -> str:
+        """The note's text, one line per paragraph/list item/table row."""
+        return blocks_text(self.blocks)
+
+
+def inline_text(inlines: Iterable) -> str:
+    """Bare text of a block's inlines; images contribute nothing."""
+    return "".join(
+        item.text if type(item) is Run else "\n" if type(item) is LineBreak else ""
+        for item in inlines
+    )
+
+
+def blocks_text(blocks: Iterable) -> str:
+    """Bare text of a sequence of blocks, separated by newlines."""
+    lines = []
+    for block in blocks:
+        kind = type(block)
+        if kind is Paragraph or kind is Heading:
+            lines.append(inline_text(block.inlines))
+        elif kind is CodeBlock:
+            lines.append(block.text)
+        elif kind is ListBlock:
+            for item in block.items:
+                lines.append(inline_text(item.inlines))
+                if item.sublists:
+                    lines.append(blocks_text(item.sublists))
+        elif kind is Table:
+            for row in block.rows:
+                lines.append("\t".join(blocks_text(cell.blocks) for cell in row))
+    return "\n".join(lines)
+
+
+# ============================================================================
+# Qt style interpretation
+# ============================================================================
+
+# font-size (pt) -> heading level, mirrors FormattingController.apply_text_style
+_HEADING_SIZES = {28: 1, 24: 1, 20: 2, 18: 3, 16: 4, 14: 5, 12: 6}
+_MONOSPACE_FAMILIES = ("courier", "consolas", "monospace", "menlo", "monaco")
+_BOLD_WEIGHTS = ("700", "bold", "600")
+
+# Common web-safe / "basic" fonts. A font-family is only ever carried through
+# to an export (as a Markdown <font> tag or a real Word font) when it's in
+# this set; anything else falls back to the document's normal font, since we
+# can't know if the reader's machine even has it installed.
+_BASIC_HTML_FONTS = {
+    "arial", "helvetica", "verdana", "tahoma", "trebuchet ms",
+    "times new roman", "times", "georgia", "garamond", "book antiqua",
+    "palatino linotype", "palatino", "comic sans ms", "impact",
+    "arial black", "calibri", "cambria", "lucida console",
+    "lucida sans unicode", "segoe ui",
+}
+
+# Qt renders hyperlinks as blue + underlined text; this lets us recognize
+# that combination and avoid giving link text a redundant color/underline.
+_LINK_BLUE = "#0000ff"
+
+_FONT_FAMILY_RE = re.compile(r"font-family:\s*([^;]+)", re.IGNORECASE)
+_POINT_SIZE_RE = re.compile(r"(\d+(?:\.\d+)?)pt")
+_PIXELS_RE = re.compile(r"(-?\d+)(?:px)?$")
+_CSS_RULE_RE = re.compile(r"([^{}]+)\{([^}]*)\}")
+_SIMPLE_SELECTOR_RE = re.compile(r"\.?[A-Za-z][\w-]*$")
+
+
+def _style_dict(style: str) -> dict:
+    """Parse a ``key:value; key:value`` inline CSS string into a dict."""
+    result = {}
+    for chunk in style.split(";"):
+        if ":" not in chunk:
+            continue
+        key, _, value = chunk.partition(":")
+        result[key.strip().lower()] = value.strip().lower()
+    return result
+
+
+def _heading_level_for_size(size_pt: float) -> Optional[int]:
+    """Map a font size to the closest heading level this app produces."""
+    if size_pt in _HEADING_SIZES:
+        return _HEADING_SIZES[size_pt]
+    if size_pt > 24:
+        return 1
+    # Snap to the nearest known size below it (e.g. 22pt -> H2's 20pt bucket)
+    for known in sorted(_HEADING_SIZES, reverse=True):
+        if size_pt >= known:
+            return _HEADING_SIZES[known]
+    return None
+
+
+def is_basic_font(family: str) -> bool:
+    """Whether *family* is a common, web/Word-safe font we're willing to keep."""
+    return family.strip().strip("'\"").lower() in _BASIC_HTML_FONTS
+
+
+def _font_family(style: str) -> str:
+    """The font-family in a raw style string, original casing kept.
+
+    The last declaration wins, as in CSS (stylesheet rules come first).
+    """
+    matches = _FONT_FAMILY_RE.findall(style)
+    return matches[-1].strip().strip("'\"") if matches else ""
+
+
+def _stylesheet_rules(css: str) -> dict:
+    """Declarations of the simple rules (``p {...}``, ``.name {...}``) in *css*.
+
+    Saved notes may keep their styles here rather than inline; see
+    services/compact_html. Other selectors are ignored.
+    """
+    rules = {}
+    for selectors, declarations in _CSS_RULE_RE.findall(css):
+        for selector in selectors.split(","):
+            selector = selector.strip()
+            if _SIMPLE_SELECTOR_RE.match(selector):
+                rules[selector.lower() if selector[0] != "." else selector] = declarations
+    return rules
+
+
+def _pixels(value: Optional[str]) -> Optional[int]:
+    match = _PIXELS_RE.match(value.strip()) if value else None
+    return int(match.group(1)) if match else None
+
+
+# ============================================================================
+# HTML -> tree
+# ============================================================================
+
+class _Frame:
+    """A block-level element still open in _TreeBuilder."""
+
+    __slots__ = ("tag", "inlines", "blocks", "items", "rows", "cells", "ordered",
+                 "attrs", "base_depth", "heading_level", "children", "loose")
+
+    def __init__(self, tag: Optional[str], base_depth: int):
+        self.tag = tag  # None for an implicit paragraph around loose text
+        self.base_depth = base_depth
+        self.inlines: Optional[list] = None
+        self.blocks: Optional[list] = None
+        self.items: Optional[list] = None
+        self.rows: Optional[list] = None
+        self.cells: Optional[list] = None
+        self.ordered = False
+        self.attrs: dict = {}
+        # <p>: Qt heading detection - see _TreeBuilder._close_frame
+        self.heading_level = 0
+        self.children = 0
+        self.loose = False
+
+
+class _TreeBuilder(HTMLParser):
+    """Single-pass HTML parser producing a DocumentTree."""
+
+    _HEADING_TAGS = {f"h{i}" for i in range(1, 7)}
+    _INLINE_BLOCK_TAGS = _HEADING_TAGS | {"p", "li", "pre"}
+    _BLOCK_TAGS = _INLINE_BLOCK_TAGS | {"ul", "ol", "table", "hr"}
+    _SKIPPED_TAGS = {"head", "style", "script", "title"}
+    _INLINE_TAGS = {
+        "strong": {"bold": True}, "b": {"bold": True},
+        "em": {"italic": True}, "i": {"italic": True},
+        "u": {"underline": True},
+        "s": {"strike": True}, "strike": {"strike": True}, "del": {"strike": True},
+        "code": {"code": True},
+    }
+    _PLAIN = Run("")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tree = DocumentTree([])
+        root = _Frame("#document", 0)
+        root.blocks = self.tree.blocks
+        self._frames: list[_Frame] = [root]
+        # Inline formatting: (tag, Run template to restore when it closes)
+        self._inline_stack: list[tuple[str, Run]] = []
+        self._style = self._PLAIN
+        self._skip_depth = 0
+        self._body_closed = False
+        # From the document's <style> block: selector -> declarations
+        self._css: Optional[list[str]] = None
+        self._rules: dict[str, str] = {}
+
+    # -- tag handling --------------------------------------------------
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+            if tag == "style":
+                self._css = []
+            return
+        if self._skip_depth or self._body_closed:
+            return
+        if self._rules:
+            attrs = self._apply_rules(tag, attrs)
+        if tag == "body":
+            family = _font_family(dict(attrs).get("style") or "")
+            if family and is_basic_font(family):
+                self.tree.default_font = family
+            return
+
+        frame = self._frames[-1]
+        if frame.tag == "p" and len(self._inline_stack) == frame.base_depth:
+            frame.children += 1
+
+        if tag in self._BLOCK_TAGS:
+            self._start_block(tag, attrs)
+        elif tag in ("td", "th"):
+            self._close_until({"tr", "table"})
+            if self._frames[-1].tag == "tr":
+                self._push(tag, attrs).blocks = []
+        elif tag == "tr":
+            self._close_until({"table"})
+            if self._frames[-1].tag == "table":
+                self._push(tag, attrs).cells = []
+        elif tag == "br":
+            if self._frames[-1].inlines is not None:
+                self._frames[-1].inlines.append(LineBreak(self._style.href))
+        elif tag == "img":
+            attrs_dict = dict(attrs)
+            style = _style_dict(attrs_dict.get("style") or "")
+            image = Image(
+                attrs_dict.get("src") or "", attrs_dict.get("alt") or "",
+                _pixels(attrs_dict.get("width") or style.get("width")),
+                _pixels(attrs_dict.get("height") or style.get("height")),
+                self._style.href,
+            )
+            self._inline_target().append(image)
+        elif tag in self._INLINE_TAGS:
+            self._push_style(tag, self._style._replace(**self._INLINE_TAGS[tag]))
+        elif tag == "a":
+            self._push_style(tag, self._style._replace(href=dict(attrs).get("href")))
+        elif tag == "span":
+            self._start_span(dict(attrs).get("style") or "")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            if tag == "style" and self._css is not None:
+                self._rules.update(_stylesheet_rules("".join(self._css)))
+                self._css = None
+            return
+        if self._skip_depth or self._body_closed:
+            return
+        if tag == "body":
+            self._finish()
+            self._body_closed = True
+            return
+
+        if tag in self._INLINE_TAGS or tag in ("a", "span"):
+            for index in range(len(self._inline_stack) - 1, self._frames[-1].base_depth - 1, -1):
+                if self._inline_stack[index][0] == tag:
+                    self._pop_styles(index)
+                    return
+            return
+
+        for index in range(len(self._frames) - 1, 0, -1):
+            if self._frames[index].tag == tag:
+                while len(self._frames) > index:
+                    self._close_frame()
+                return
+
+    def handle_data(self, data):
+        if self._css is not None:
+            self._css.append(data)
+        if self._skip_depth or self._body_closed:
+            return
+        frame = self._frames[-1]
+        if frame.inlines is None:
+            if frame.blocks is None or not data.strip():
+                return  # whitespace between blocks, or stray text in a list/table
+            frame = self._push_loose_text()
+        elif frame.tag == "p" and not frame.loose and len(self._inline_stack) == frame.base_depth \
+                and data.strip():
+            frame.loose = True
+
+        inlines = frame.inlines
+        style = self._style
+        if inlines and type(inlines[-1]) is Run and inlines[-1][1:] == style[1:]:
+            inlines[-1] = inlines[-1]._replace(text=inlines[-1].text + data)
+        else:
+            inlines.append(style._replace(text=data))
+
+    def close(self):
+        super().close()
+        self._finish()
+
+    def _apply_rules(self, tag: str, attrs: list) -> list:
+        """*attrs* with the stylesheet rules for *tag* and its classes folded
+        into its style attribute, ahead of (so overridden by) inline styles."""
+        styles = [self._rules.get(tag, "")]
+        inline = ""
+        for name, value in attrs:
+            if name == "class" and value:
+                styles.extend(self._rules.get("." + cls, "") for cls in value.split())
+            elif name == "style":
+                inline = value or ""
+        if not any(styles):
+            return attrs
+        styles.append(inline)
+        return [(n, v) for n, v in attrs if n != "style"] + [("style", ";".join(styles))]
+
+    # -- blocks ------------------------------------------------------------
+
+    def _push(self, tag: Optional[str], attrs) -> _Frame:
+        frame = _Frame(tag, len(self._inline_stack))
+        frame.attrs = dict(attrs)
+        self._frames.append(frame)
+        return frame
+
+    def _start_block(self, tag: str, attrs):
+        frame = self._frames[-1]
+        # A block can't live inside a paragraph/heading: like a browser, close
+        # the paragraph first. Inside a list item, p/h tags are just ignored.
+        if frame.tag == "li" and tag not in ("ul", "ol", "table", "hr", "li"):
+            return
+        if frame.tag is None or (frame.inlines is not None and frame.tag != "li"):
+            self._close_frame()
+        elif frame.tag == "li" and tag == "li":
+            self._close_frame()  # unclosed <li> before its sibling
+
+        if tag == "hr":
+            self._container().append(Rule())
+            return
+        frame = self._push(tag, attrs)
+        if tag in self._INLINE_BLOCK_TAGS:
+            frame.inlines = []
+            if tag == "p":
+                styles = _style_dict(frame.attrs.get("style") or "")
+                # Qt marks its heading paragraphs only by their 12px margins
+                if styles.get("margin-top") != "12px" or styles.get("margin-bottom") != "12px":
+                    frame.loose = True
+        elif tag in ("ul", "ol"):
+            frame.items = []
+            frame.ordered = tag == "ol"
+        elif tag == "table":
+            frame.rows = []
+
+    def _close_until(self, tags: set):
+        """Close open blocks (e.g. a cell missing its end tag) down to one of *tags*."""
+        for index in range(len(self._frames) - 1, 0, -1):
+            if self._frames[index].tag in tags:
+                while len(self._frames) > index + 1:
+                    self._close_frame()
+                return
+
+    def _close_frame(self):
+        frame = self._frames.pop()
+        if len(self._inline_stack) > frame.base_depth:
+            self._pop_styles(frame.base_depth)  # inline tags left unclosed
+        tag = frame.tag
+
+        if tag is None:
+            self._container().append(Paragraph(frame.inlines))
+        elif tag == "p":
+            if frame.heading_level and frame.children == 1 and not frame.loose:
+                self._container().append(Heading(frame.heading_level, frame.inlines))
+            else:
+                self._container().append(self._paragraph(frame))
+        elif tag in self._HEADING_TAGS:
+            self._container().append(Heading(int(tag[1]), frame.inlines))
+        elif tag == "pre":
+            self._container().append(CodeBlock(inline_text(frame.inlines)))
+        elif tag == "li":
+            parent = self._frames[-1]
+            if parent.items is not None:
+                parent.items.append(ListItem(frame.inlines, frame.blocks or []))
+            else:
+                self._container().append(Paragraph(frame.inlines))
+        elif tag in ("ul", "ol"):
+            block = ListBlock(frame.ordered, frame.items)
+            parent = self._frames[-1]
+            if parent.tag == "li":
+                if parent.blocks is None:
+                    parent.blocks = []
+                parent.blocks.append(block)
+            else:
+                self._container().append(block)
+        elif tag in ("td", "th"):
+            self._frames[-1].cells.append(TableCell(frame.blocks, tag == "th"))
+        elif tag == "tr":
+            if frame.cells:
+                self._frames[-1].rows.append(frame.cells)
+        elif tag == "table":
+            if frame.rows:
+                self._container().append(Table(frame.rows))
+
+    def _paragraph(self, frame: _Frame) -> Paragraph:
+        align = (frame.attrs.get("align") or "").strip().lower() or None
+        style = _style_dict(frame.attrs.get("style") or "")
+        indent = _pixels(style.get("-qt-block-indent")) or 0
+        text_indent = _pixels(style.get("text-indent")) or 0
+        return Paragraph(frame.inlines, align, indent, text_indent)
+
+    def _container(self) -> list:
+        """Block list of the innermost document/table cell."""
+        for frame in reversed(self._frames):
+            if frame.blocks is not None and frame.tag != "li":
+                return frame.blocks
+        return self.tree.blocks
+
+    def _inline_target(self) -> list:
+        frame = self._frames[-1]
+        if frame.inlines is None:
+            frame = self._push_loose_text()
+        return frame.inlines
+
+    def _push_loose_text(self) -> _Frame:
+        """An implicit paragraph for inline content directly in a container."""
+        container = self._frames[-1]
+        frame = self._push(None, ())
+        # Inline tags opened before the text (as in <td><b>x</b> y) belong to
+        # the paragraph, so their end tags can still close them
+        frame.base_depth = container.base_depth
+        frame.inlines = []
+        return frame
+
+    def _finish(self):
+        while len(self._frames) > 1:
+            self._close_frame()
+
+    # -- inline formatting -------------------------------------------------
+
+    def _push_style(self, tag: str, style: Run):
+        self._inline_stack.append((tag, self._style))
+        self._style = style
+
+    def _pop_styles(self, index: int):
+        """Close the inline element at *index* and everything opened after it."""
+        self._style = self._inline_stack[index][1]
+        del self._inline_stack[index:]
+
+    def _start_span(self, raw_style: str):
+        styles = _style_dict(raw_style)
+        changes = {}
+
+        family = _font_family(raw_style)
+        if any(mono in family.lower() for mono in _MONOSPACE_FAMILIES):
+            changes["code"] = True
+        elif family and is_basic_font(family):
+            changes["font"] = family
+
+        weight = styles.get("font-weight", "")
+        if weight in _BOLD_WEIGHTS:
+            changes["bold"] = True
+        if styles.get("font-style") == "italic":
+            changes["italic"] = True
+        size_match = _POINT_SIZE_RE.match(styles.get("font-size", ""))
+        if size_match:
+            changes["size"] = float(size_match.group(1))
+
+        text_decoration = styles.get("text-decoration", "")
+        color = styles.get("color", "").strip()
+        is_link_style = color == _LINK_BLUE and "underline" in text_decoration
+        if "line-through" in text_decoration:
+            changes["strike"] = True
+        elif "underline" in text_decoration and not is_link_style:
+            changes["underline"] = True
+
+        background = styles.get("background-color", "").strip()
+        if background and background not in ("transparent", "none"):
+            changes["highlight"] = background
+        if color and not is_link_style and color not in ("#000000", "black"):
+            changes["color"] = color
+
+        frame = self._frames[-1]
+        if frame.tag == "p" and len(self._inline_stack) == frame.base_depth and frame.children == 1:
+            if weight in _BOLD_WEIGHTS and size_match:
+                frame.heading_level = _heading_level_for_size(float(size_match.group(1))) or 0
+
+        self._push_style("span", self._style._replace(**changes) if changes else self._style)
+
+
+def parse_html(html: Union[str, Iterable[str]]) -> DocumentTree:
+    """Parse Qt (or plain semantic) HTML, whole or in pieces, into a DocumentTree."""
+    builder = _TreeBuilder()
+    if isinstance(html, str):
+        builder.feed(html)
+    else:
+        for chunk in html:
+            builder.feed(chunk)
+    builder.close()
+    return builder.tree
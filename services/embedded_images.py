@@ -0,0 +1,68 @@
+# ============================================================================
+# Embedded Images
+# decodes a note's base64 data-URI pictures into QImages
+# ============================================================================
+#
+# Notes carry their images inline as data URIs, and so does the HTML the
+# Markdown/Word importers produce. decode_embedded_images() swaps each one
+# for a resource name and decodes it, which is the slow part of opening a
+# picture-heavy file. FileLoadWorker calls it on the loading thread - QImage,
+# unlike QPixmap, may be used off the GUI thread - and hands the result to
+# DocumentTab.set_content(), which only has to register the resources.
+
+import base64
+import uuid
+from collections import namedtuple
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+from PyQt6.QtGui import QImage, QImageReader
+
+from services.html_rewrite import rewrite_html
+
+DecodedHtml = namedtuple("DecodedHtml", ["html", "images"])
+DecodedHtml.__doc__ = """HTML whose data URIs became resource names, and
+name -> (QImage, data URI) for each of them."""
+
+
+def _decode(src: str):
+    """QImage for the data URI *src*, or None if it isn't a readable picture."""
+    _header, data = src.split(',', 1)
+    buffer = QBuffer()
+    buffer.setData(QByteArray(base64.b64decode(data)))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    reader.setAutoDetectImageFormat(True)
+    image = reader.read()
+    buffer.close()
+    return None if image.isNull() else image
+
+
+def decode_embedded_images(html: str) -> DecodedHtml:
+    """Replace every data-URI image in *html* with a unique resource name.
+
+    The same picture used several times is decoded once and shares a name.
+    Sources that aren't data URIs, or don't decode, are left as they are.
+    """
+    images: dict[str, tuple[QImage, str]] = {}
+    names_by_src: dict[str, str] = {}
+
+    def extract(src):
+        if src in names_by_src:
+            return names_by_src[src]
+        if not src.startswith('data:image/'):
+            return None
+        # Extract image format (png, jpeg, etc.) for the name
+        image_format = src[len('data:image/'):].split(';', 1)[0].split(',', 1)[0]
+        try:
+            image = _decode(src)
+        except Exception as e:
+            print(f"Failed to decode image: {e}")
+            return None
+        if image is None:
+            return None
+        name = f"restored_{uuid.uuid4().hex[:8]}.{image_format}"
+        images[name] = (image, src)
+        names_by_src[src] = name
+        return name
+
+    return DecodedHtml("".join(rewrite_html(html, extract)), images)
@@ -0,0 +1,354 @@
+# ============================================================================
+# Export Jobs
+# runs Markdown, Word and PDF exports on a worker thread, one at a time,
+# with progress reporting and cancellation
+# ============================================================================
+#
+# Converting a long note - especially building a python-docx document or
+# printing a PDF - used to block the editor for as long as it took. Exports
+# are now queued on ExportJobRunner's QThread instead. The GUI thread only
+# takes a snapshot of the note (its cached DocumentTree, or the HTML for the
+# worker to parse), so the user can keep editing, and queue more exports,
+# while earlier ones run.
+#
+# Cancellation is cooperative: the exporters call a progress callback after
+# every block (and every PDF page), which raises ExportCancelled once the
+# job has been cancelled. They write to a temporary file that only replaces
+# the target when complete, so a cancelled export leaves nothing behind.
+#
+# "Export All" queues a BatchExportJob instead: every open tab's HTML,
+# converted into one folder with Markdown/Word on a process pool, and one
+# summary at the end rather than a dialog per file.
+
+import itertools
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from services.batch_convert import ConversionResult, ConversionTask, convert_html
+from services.document_tree import DocumentTree, parse_html
+from services.export_services import save_html_as_docx, save_html_as_markdown
+from services.print_document import PrintLayout, save_as_pdf
+from services.profiler import traced
+
+_job_ids = itertools.count(1)
+
+# Characters Windows or macOS won't take in a file name
+_UNSAFE_NAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+class ExportCancelled(Exception):
+    """Raised inside a running export once its job has been cancelled."""
+
+
+class ExportJob:
+    """One export of one note snapshot to one file."""
+
+    FORMATS = ("md", "docx", "pdf")
+
+    def __init__(self, source: Union[DocumentTree, str, list[str]], filepath: Path, fmt: str,
+                 html_fallback: bool = False, font_size: float = 12, context=None,
+                 layout: Optional[PrintLayout] = None):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.id = next(_job_ids)
+        self.source = source
+        self.filepath = Path(filepath)
+        self.format = fmt
+        self.html_fallback = html_fallback
+        self.font_size = font_size
+        # Free for the submitter, e.g. to find the tab a job came from
+        self.context = context
+        # The parsed snapshot, set once the job has run
+        self.tree: Optional[DocumentTree] = None
+        # A PDF's pages, if the print preview already laid them out
+        self.layout = layout
+        self._cancelled = threading.Event()
+
+    @property
+    def description(self) -> str:
+        return self.filepath.name
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Ask the job to stop; it does so at its next block or page."""
+        self._cancelled.set()
+
+    @traced(category="export")
+    def run(self, progress: Optional[Callable[[int, int], None]] = None):
+        """Convert the snapshot and write the file, on the calling thread."""
+        if progress is not None:
+            progress(0, 1)
+        if self.format == "pdf" and self.layout is not None:
+            # Only the pages are left to write
+            self.tree = self.layout.tree
+            self.layout.write_pdf(self.filepath, progress)
+            return
+        tree = self.source if isinstance(self.source, DocumentTree) else parse_html(self.source)
+        # The tree replaces the HTML, so the two aren't held at once
+        self.source = self.tree = tree
+        if self.format == "md":
+            save_html_as_markdown(tree, self.filepath, html_fallback=self.html_fallback,
+                                  progress=progress)
+        elif self.format == "docx":
+            save_html_as_docx(tree, self.filepath, progress=progress)
+        else:
+            save_as_pdf(tree, self.filepath, self.font_size, progress)
+
+
+def _file_stems(names: Iterable[str]) -> list[str]:
+    """File-system safe, case-insensitively unique stems for *names*."""
+    stems, seen = [], set()
+    for name in names:
+        base = _UNSAFE_NAME_CHARS.sub("_", name).strip(" .") or "note"
+        stem, copy = base, 1
+        while stem.lower() in seen:
+            copy += 1
+            stem = f"{base} ({copy})"
+        seen.add(stem.lower())
+        stems.append(stem)
+    return stems
+
+
+class BatchExportJob:
+    """
+    Several note snapshots exported into one folder, in one or more formats.
+
+    Markdown and Word files are converted concurrently on a pool of worker
+    processes (batch_convert.convert_html, which is Qt-free); PDFs need Qt,
+    so they are printed on the runner's thread while the pool works. Runs
+    on an ExportJobRunner like an ExportJob, reporting progress per file.
+    """
+
+    FORMATS = ("md", "docx", "pdf")
+    SUFFIXES = {"md": ".md", "docx": ".docx", "pdf": ".pdf"}
+
+    def __init__(self, notes: list[tuple[str, str]], out_dir: Path, formats: Iterable[str],
+                 html_fallback: bool = False, font_size: float = 12,
+                 workers: Optional[int] = None, context=None):
+        """*notes* are (name, HTML) pairs; each name becomes a file stem."""
+        self.formats = tuple(formats)
+        unknown = [fmt for fmt in self.formats if fmt not in self.FORMATS]
+        if unknown or not self.formats:
+            raise ValueError(f"Unknown export formats: {unknown or 'none given'}")
+        self.id = next(_job_ids)
+        self.format = "batch"
+        self.filepath = Path(out_dir)
+        self.html_fallback = html_fallback
+        self.font_size = font_size
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.context = context
+        # A ConversionResult per file, in the order they finished, and the
+        # wall time of the whole run; both set once the job has run
+        self.results: list[ConversionResult] = []
+        self.elapsed = 0.0
+        self._items = []  # (ConversionTask, format, HTML)
+        for stem, (name, html) in zip(_file_stems(name for name, _ in notes), notes):
+            for fmt in self.formats:
+                task = ConversionTask(name, self.filepath / (stem + self.SUFFIXES[fmt]))
+                self._items.append((task, fmt, html))
+        self._cancelled = threading.Event()
+
+    @property
+    def description(self) -> str:
+        return f"{len(self._items)} files to {self.filepath.name or self.filepath}"
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Ask the job to stop; it does so at the next finished file."""
+        self._cancelled.set()
+
+    @traced(category="export")
+    def run(self, progress: Optional[Callable[[int, int], None]] = None):
+        """Export every file, on the calling thread and the process pool."""
+        started = time.perf_counter()
+        self.results = []
+        total = len(self._items)
+
+        def settle(result: ConversionResult):
+            self.results.append(result)
+            if progress is not None:
+                progress(len(self.results), total)
+
+        if progress is not None:
+            progress(0, total)
+        self.filepath.mkdir(parents=True, exist_ok=True)
+        pooled = [item for item in self._items if item[1] != "pdf"]
+        printed = [item for item in self._items if item[1] == "pdf"]
+        pool = None
+        pending = []
+        try:
+            if len(pooled) > 1 and self.workers > 1:
+                # Spawned, not forked: this process runs Qt threads
+                pool = ProcessPoolExecutor(max_workers=min(self.workers, len(pooled)),
+                                           mp_context=multiprocessing.get_context("spawn"))
+                pending = [pool.submit(convert_html, task, html, fmt, self.html_fallback)
+                           for task, fmt, html in pooled]
+            else:
+                printed = pooled + printed
+            for task, fmt, html in printed:
+                settle(self._convert_here(task, fmt, html))
+                for future in [f for f in pending if f.done()]:
+                    pending.remove(future)
+                    settle(future.result())
+            while pending:
+                future = pending.pop(0)
+                settle(future.result())
+        finally:
+            if pool is not None:
+                # On cancellation, files already being converted still finish
+                pool.shutdown(wait=not pending, cancel_futures=True)
+            self.elapsed = time.perf_counter() - started
+
+    def _convert_here(self, task: ConversionTask, fmt: str, html: str) -> ConversionResult:
+        if fmt != "pdf":
+            return convert_html(task, html, fmt, self.html_fallback)
+        began = time.perf_counter()
+        try:
+            save_as_pdf(parse_html(html), task.target, self.font_size)
+        except Exception as e:
+            return ConversionResult(task, 0, time.perf_counter() - began, str(e))
+        return ConversionResult(task, len(html.encode("utf-8")), time.perf_counter() - began, None)
+
+    def log_lines(self) -> list[str]:
+        """One line per file with how long it took, or why it failed."""
+        return [f"Failed: {r.task.target.name} ({r.task.source}): {r.error}" if r.error
+                else f"Exported {r.task.target.name} in {r.seconds * 1000:.1f} ms"
+                for r in self.results]
+
+    def summary(self) -> str:
+        """What the finished run did, for a single message to the user."""
+        converted = [r for r in self.results if r.error is None]
+        failed = [r for r in self.results if r.error is not None]
+        megabytes = sum(r.bytes_in for r in converted) / (1024 * 1024)
+        text = (f"Exported {len(converted)} file{'s' if len(converted) != 1 else ''} "
+                f"({megabytes:.1f} MB of notes) to {self.filepath} in {self.elapsed:.2f}s")
+        if failed:
+            text += f"\n\n{len(failed)} failed:\n" + "\n".join(
+                f"{r.task.target.name}: {r.error}" for r in failed)
+        return text
+
+
+class _ExportWorker(QObject):
+    """Lives on the runner's thread; jobs arrive through a queued signal."""
+
+    started = pyqtSignal(object)
+    progress = pyqtSignal(object, int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(object, str)
+    cancelled = pyqtSignal(object)
+
+    @pyqtSlot(object)
+    def run(self, job: ExportJob):
+        if job.cancelled:
+            self.cancelled.emit(job)
+            return
+        self.started.emit(job)
+        last_percent = -1
+
+        def report(done: int, total: int):
+            nonlocal last_percent
+            if job.cancelled:
+                raise ExportCancelled()
+            percent = 100 * done // total if total else 100
+            if percent != last_percent:
+                last_percent = percent
+                self.progress.emit(job, percent)
+
+        try:
+            job.run(report)
+        except ExportCancelled:
+            self.cancelled.emit(job)
+        except Exception as e:
+            self.failed.emit(job, str(e))
+        else:
+            self.finished.emit(job)
+
+
+class ExportJobRunner(QObject):
+    """
+    Queues ExportJobs onto a single worker thread, oldest first.
+
+    Every signal is delivered on the GUI thread. A job leaves pending()
+    right before its job_finished, job_failed or job_cancelled fires. The
+    thread only runs while there is something pending.
+    """
+
+    job_started = pyqtSignal(object)
+    job_progress = pyqtSignal(object, int)  # job, percent done
+    job_finished = pyqtSignal(object)
+    job_failed = pyqtSignal(object, str)
+    job_cancelled = pyqtSignal(object)
+
+    _dispatch = pyqtSignal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._pending: list[ExportJob] = []
+        self._thread = QThread(self)
+        self._worker = _ExportWorker()
+        self._worker.moveToThread(self._thread)
+        self._dispatch.connect(self._worker.run)
+        self._worker.started.connect(self.job_started)
+        self._worker.progress.connect(self.job_progress)
+        self._worker.finished.connect(self._on_finished)
+        self._worker.failed.connect(self._on_failed)
+        self._worker.cancelled.connect(self._on_cancelled)
+
+    def submit(self, job: ExportJob) -> ExportJob:
+        """Queue *job* behind any exports already pending."""
+        if not self._pending:
+            # The thread was told to quit when the queue last drained
+            self._thread.wait()
+            self._thread.start()
+        self._pending.append(job)
+        self._dispatch.emit(job)
+        return job
+
+    def pending(self) -> list[ExportJob]:
+        """Jobs not yet settled, the running one (if any) first."""
+        return list(self._pending)
+
+    def cancel_all(self):
+        for job in self._pending:
+            job.cancel()
+
+    def shutdown(self, timeout_ms: int = 5000):
+        """Cancel everything and stop the worker thread."""
+        self.cancel_all()
+        self._thread.quit()
+        self._thread.wait(timeout_ms)
+
+    @pyqtSlot(object)
+    def _on_finished(self, job: ExportJob):
+        self._settle(job)
+        self.job_finished.emit(job)
+
+    @pyqtSlot(object, str)
+    def _on_failed(self, job: ExportJob, message: str):
+        self._settle(job)
+        self.job_failed.emit(job, message)
+
+    @pyqtSlot(object)
+    def _on_cancelled(self, job: ExportJob):
+        self._settle(job)
+        self.job_cancelled.emit(job)
+
+    def _settle(self, job: ExportJob):
+        if job in self._pending:
+            self._pending.remove(job)
+        if not self._pending:
+            self._thread.quit()
@@ -1,62 +1,50 @@
 """
 Export services
 ===============
-Converts the rich-text HTML produced by ``DocumentTab.get_content_html()``
-(a QTextEdit's ``toHtml()`` output, with images already embedded as base64
-data URIs) into two portable formats:
+Converts a note - either the rich-text HTML produced by
+``DocumentTab.get_content_html()`` (a QTextEdit's ``toHtml()`` output, with
+images already embedded as base64 data URIs) or the ``DocumentTree`` it
+parses into - into two portable formats:
 
-- ``html_to_markdown``   -> a plain ``.md`` string
-- ``save_html_as_docx``  -> a real Word ``.docx`` file on disk
+- ``html_to_markdown``       -> a plain ``.md`` string (``write_markdown`` /
+  ``save_html_as_markdown`` stream the same output to a file instead)
+- ``save_html_as_docx``      -> a real Word ``.docx`` file on disk
 
-Both entry points also happily accept plain hand-written semantic HTML
+Every entry point also happily accepts plain hand-written semantic HTML
 (``<h1>``, ``<strong>``, ``<a href="">`` etc.), which is what the unit tests
 exercise directly - that keeps the converters honest and testable without
 needing a running Qt application.
 
 Design
 ------
-Qt's ``toHtml()`` does not use semantic tags for the things this app treats
-as "styles": a heading is just a ``<p>`` with extra top/bottom margin whose
-text is wrapped in a bold, oversized ``<span>``, and a code block is a
-``<span>`` in a monospace font.  ``_normalize_qt_html`` rewrites that markup
-into plain semantic HTML (``<h1>``, ``<code>``, ``<strong>`` ...) first, so
-the rest of the pipeline only has to deal with ordinary tags - whether they
-came from Qt or from a caller's own HTML string.
+HTML is only ever parsed once, by ``services.document_tree.parse_html``,
+which also takes care of Qt's span-based "styles" (headings and code that
+are really just bold/oversized or monospace ``<span>`` tags). The
+converters here only walk the resulting tree, so callers exporting the same
+note several times - or to several formats - can parse it once and pass
+the ``DocumentTree`` instead of the HTML string.
 """
 
 from __future__ import annotations
 
 import base64
+import hashlib
+import os
 import re
 from html import unescape
-from html.parser import HTMLParser
-from io import BytesIO
+from io import BytesIO, StringIO
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Optional, TextIO, Union
+from xml.sax.saxutils import escape as xml_escape
 
-# ============================================================================
-# Shared HTML normalization (Qt's span-based "styles" -> semantic tags)
-# ============================================================================
-
-# font-size (pt) -> heading level, mirrors FormattingController.apply_text_style
-_HEADING_SIZES = {28: 1, 24: 1, 20: 2, 18: 3, 16: 4, 14: 5, 12: 6}
-_MONOSPACE_FAMILIES = ("courier", "consolas", "monospace", "menlo", "monaco")
-
-# Common web-safe / "basic" fonts. A font-family is only ever carried through
-# to the export (as a Markdown <font> tag or a real Word font) when it's in
-# this set; anything else falls back to the document's normal font, since we
-# can't know if the reader's machine even has it installed.
-_BASIC_HTML_FONTS = {
-    "arial", "helvetica", "verdana", "tahoma", "trebuchet ms",
-    "times new roman", "times", "georgia", "garamond", "book antiqua",
-    "palatino linotype", "palatino", "comic sans ms", "impact",
-    "arial black", "calibri", "cambria", "lucida console",
-    "lucida sans unicode", "segoe ui",
-}
+from services.document_tree import (
+    CodeBlock, DocumentTree, Heading, Image, LineBreak, ListBlock, Paragraph,
+    Rule, Run, Table, blocks_text, parse_html,
+)
 
-# Qt renders hyperlinks as blue + underlined text; this lets us recognize
-# that combination and avoid wrapping link text in a redundant color span.
-_LINK_BLUE = "#0000ff"
+# A note as HTML (whole, or in the pieces DocumentTab.iter_content_html()
+# yields) or already parsed
+Source = Union[str, Iterable[str], DocumentTree]
 
 _NAMED_COLORS = {
     "black": "000000", "white": "ffffff", "red": "ff0000", "green": "008000",
@@ -65,42 +53,16 @@ _NAMED_COLORS = {
     "cyan": "00ffff", "magenta": "ff00ff",
 }
 
-_STYLE_ATTR_RE = re.compile(r'<span\s+style="([^"]*)">(.*?)</span>', re.IGNORECASE | re.DOTALL)
-_HEADING_BLOCK_RE = re.compile(
-    r'<p\s+style="[^"]*margin-top:\s*(\d+)px;\s*margin-bottom:\s*(\d+)px[^"]*"[^>]*>'
-    r'\s*<span\s+style="([^"]*)">(.*?)</span>\s*</p>',
-    re.IGNORECASE | re.DOTALL,
-)
-
 
-def _style_dict(style: str) -> dict:
-    """Parse a ``key:value; key:value`` inline CSS string into a dict."""
-    result = {}
-    for chunk in style.split(";"):
-        if ":" not in chunk:
-            continue
-        key, _, value = chunk.partition(":")
-        result[key.strip().lower()] = value.strip().lower()
-    return result
-
-
-def _heading_level_for_size(size_pt: int) -> Optional[int]:
-    """Map a font size to the closest heading level this app produces."""
-    if size_pt in _HEADING_SIZES:
-        return _HEADING_SIZES[size_pt]
-    if size_pt > 24:
-        return 1
-    # Snap to the nearest known size below it (e.g. 22pt -> H2's 20pt bucket)
-    candidates = sorted(_HEADING_SIZES, reverse=True)
-    for known in candidates:
-        if size_pt >= known:
-            return _HEADING_SIZES[known]
-    return None
+# Called as progress(blocks_done, blocks_total) after each top-level block.
+# It may raise (e.g. when a background export is cancelled) to abort the
+# conversion; the file being written is then left untouched.
+Progress = Optional[Callable[[int, int], None]]
 
 
-def _is_basic_font(family: str) -> bool:
-    """Whether *family* is a common, web/Word-safe font we're willing to keep."""
-    return family.strip().strip("'\"").lower() in _BASIC_HTML_FONTS
+def _as_tree(source: Source) -> DocumentTree:
+    """Parse *source* unless it already is a DocumentTree."""
+    return source if isinstance(source, DocumentTree) else parse_html(source)
 
 
 def _to_hex(value: str) -> Optional[str]:
@@ -122,110 +84,27 @@ def _to_hex(value: str) -> Optional[str]:
     return None
 
 
-def _normalize_qt_html(html: str) -> str:
-    """Rewrite Qt's span/margin-based "styles" into semantic HTML tags."""
-
-    def heading_sub(match: "re.Match") -> str:
-        top, bottom, style, inner = match.groups()
-        if top != "12" or bottom != "12":
-            return match.group(0)
-        styles = _style_dict(style)
-        size = styles.get("font-size", "")
-        weight = styles.get("font-weight", "")
-        is_bold = weight in ("700", "bold", "600")
-        size_match = re.match(r"(\d+)pt", size)
-        if not (is_bold and size_match):
-            return match.group(0)
-        level = _heading_level_for_size(int(size_match.group(1)))
-        if level is None:
-            return match.group(0)
-        return f"<h{level}>{inner}</h{level}>"
-
-    html = _HEADING_BLOCK_RE.sub(heading_sub, html)
-
-    def span_sub(match: "re.Match") -> str:
-        style, inner = match.groups()
-        styles = _style_dict(style)
-        weight = styles.get("font-weight", "")
-        text_decoration = styles.get("text-decoration", "")
-        color = styles.get("color", "").strip()
-        background = styles.get("background-color", "").strip()
-
-        # Font-family needs its original casing preserved (e.g. "Georgia"),
-        # so pull it straight from the raw style string rather than the
-        # lowercased _style_dict value.
-        family_match = re.search(r"font-family:\s*([^;]+)", style, re.IGNORECASE)
-        font_family_raw = family_match.group(1).strip() if family_match else ""
-        font_family = font_family_raw.strip("'\"").lower()
-
-        out = inner
-        is_mono = any(mono in font_family for mono in _MONOSPACE_FAMILIES)
-        if is_mono:
-            out = f"<code>{out}</code>"
-        elif font_family and _is_basic_font(font_family):
-            out = f'<mdfont data="{font_family_raw.strip(chr(39)).strip(chr(34))}">{out}</mdfont>'
-
-        if weight in ("700", "bold", "600"):
-            out = f"<strong>{out}</strong>"
-        if styles.get("font-style") == "italic":
-            out = f"<em>{out}</em>"
-
-        # Qt renders hyperlinks as blue + underlined; don't double that up
-        # with a redundant color span on the link text itself.
-        is_link_style = color == _LINK_BLUE and "underline" in text_decoration
-
-        if "line-through" in text_decoration:
-            out = f"<s>{out}</s>"
-        elif "underline" in text_decoration and not is_link_style:
-            out = f"<u>{out}</u>"
-
-        if background and background not in ("transparent", "none"):
-            out = f'<mdhl data="{background}">{out}</mdhl>'
-        if color and not is_link_style and color not in ("#000000", "black"):
-            out = f'<mdcolor data="{color}">{out}</mdcolor>'
-        return out
-
-    # Spans can't meaningfully nest in Qt's output, but run twice in case a
-    # link's inner <span> left another plain span behind.
-    for _ in range(2):
-        new_html = _STYLE_ATTR_RE.sub(span_sub, html)
-        if new_html == html:
-            break
-        html = new_html
-
-    return html
-
-
 # ============================================================================
-# HTML -> Markdown
+# Tree -> Markdown
 # ============================================================================
 
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
 def strip_tags(text: str) -> str:
     """Remove any remaining HTML tags and unescape entities."""
     text = re.sub(r"<[^>]+>", "", text)
     return unescape(text).strip()
 
 
-def _strip_tags_no_trim(text: str) -> str:
-    """Like strip_tags, but keeps leading/trailing whitespace.
-
-    Used for inline formatting (bold/italic/strike/code) so that, e.g.,
-    "tender <strong>young</strong>" doesn't lose the space that separates
-    the two runs.
-    """
-    text = re.sub(r"<[^>]+>", "", text)
-    return unescape(text)
-
-
-def _wrap_inline(inner_html: str, marker: str) -> str:
-    """Wrap inner HTML's text in a Markdown emphasis marker.
+def _wrap_inline(text: str, marker: str) -> str:
+    """Wrap inline text in a Markdown emphasis marker.
 
     Markdown emphasis can't have whitespace touching the marker (CommonMark),
-    so any leading/trailing space in *inner_html* is moved outside the
-    markers rather than lost - "tender " + "young" stays "tender " when
-    wrapped, instead of becoming "tender" and losing the word boundary.
+    so any leading/trailing space in *text* is moved outside the markers
+    rather than lost - "tender " + "young" stays "tender " when wrapped,
+    instead of becoming "tender" and losing the word boundary.
     """
-    text = _strip_tags_no_trim(inner_html)
     core = text.strip()
     if not core:
         return text
@@ -234,37 +113,112 @@ def _wrap_inline(inner_html: str, marker: str) -> str:
     return f"{leading}{marker}{core}{marker}{trailing}"
 
 
-def _md_list_sub(list_tag: str, ordered: bool):
-    item_re = re.compile(r"<li[^>]*>(.*?)</li>", re.IGNORECASE | re.DOTALL)
-
-    def block_sub(match: "re.Match") -> str:
-        inner = match.group(1)
-        lines = []
-        for index, item_match in enumerate(item_re.finditer(inner), start=1):
-            text = strip_tags(item_match.group(1))
-            if not text:
-                continue
-            prefix = f"{index}. " if ordered else "- "
-            lines.append(prefix + text)
-        return ("\n".join(lines) + "\n\n") if lines else ""
-
-    return re.compile(rf"<{list_tag}[^>]*>(.*?)</{list_tag}>", re.IGNORECASE | re.DOTALL), block_sub
-
+class _MarkdownWriter:
+    """Writes Markdown to a text stream, tidying whitespace on the fly.
 
-def _md_table_sub(match: "re.Match") -> str:
-    table_html = match.group(0)
-    row_re = re.compile(r"<tr[^>]*>(.*?)</tr>", re.IGNORECASE | re.DOTALL)
-    cell_re = re.compile(r"<t[dh][^>]*>(.*?)</t[dh]>", re.IGNORECASE | re.DOTALL)
-
-    rows = []
-    for row_match in row_re.finditer(table_html):
-        cells = [strip_tags(c).replace("|", "\\|") for c in cell_re.findall(row_match.group(1))]
-        if cells:
-            rows.append(cells)
+    Each run of trailing whitespace is held back until more text arrives,
+    which is enough to drop whitespace at the very start and end of the
+    document and to squeeze 3+ newlines down to a single blank line -
+    without ever holding the whole output in memory.
+    """
 
-    if not rows:
-        return ""
+    def __init__(self, stream: TextIO):
+        self._stream = stream
+        self._pending = ""
+        self._started = False
 
+    def write(self, text: str):
+        if not text:
+            return
+        text = self._pending + text
+        core = text.rstrip()
+        if not core:
+            self._pending = text
+            return
+        self._pending = text[len(core):]
+        if not self._started:
+            core = core.lstrip()
+            self._started = True
+        self._stream.write(_BLANK_LINES_RE.sub("\n\n", core))
+
+    def close(self):
+        self._pending = ""
+        self._stream.write("\n")
+
+
+def _md_text(inlines: list) -> str:
+    """Bare text for places Markdown can't format (headings, list items)."""
+    return "".join(item.text for item in inlines if type(item) is Run)
+
+
+def _md_run(run: Run, html_fallback: bool) -> str:
+    text = run.text
+    if run.code:
+        text = _wrap_inline(text, "`")
+    elif run.font and html_fallback:
+        text = f'<font face="{run.font}">{text}</font>'
+    if run.bold:
+        text = _wrap_inline(text, "**")
+    if run.italic:
+        text = _wrap_inline(text, "*")
+    if run.strike:
+        text = _wrap_inline(text, "~~")
+    elif run.underline and html_fallback:
+        text = f"<u>{text}</u>"
+    if html_fallback:
+        if run.highlight:
+            text = f'<span style="background-color: {run.highlight};">{text}</span>'
+        if run.color:
+            text = f'<span style="color: {run.color};">{text}</span>'
+    return text
+
+
+def _md_inlines(inlines: list, html_fallback: bool) -> str:
+    parts = []
+    index, count = 0, len(inlines)
+    while index < count:
+        item = inlines[index]
+        kind = type(item)
+        if item.href is not None:
+            # Consecutive inlines sharing a target form one link, whose text
+            # (like a heading's) can't carry further formatting.
+            end = index + 1
+            while end < count and inlines[end].href == item.href:
+                end += 1
+            text = "".join(
+                i.text if type(i) is Run else f"![{i.alt}]({i.src})" if type(i) is Image else ""
+                for i in inlines[index:end]
+            )
+            parts.append(f"[{text.strip()}]({item.href})")
+            index = end
+            continue
+        if kind is Run:
+            parts.append(_md_run(item, html_fallback))
+        elif kind is Image:
+            parts.append(f"![{item.alt}]({item.src})")
+        elif kind is LineBreak:
+            parts.append("\n")
+        index += 1
+    return "".join(parts)
+
+
+def _md_list_lines(block: ListBlock, indent: str = "") -> list[str]:
+    lines = []
+    for number, item in enumerate(block.items, start=1):
+        prefix = f"{number}. " if block.ordered else "- "
+        text = _md_text(item.inlines).strip()
+        if text:
+            lines.append(indent + prefix + text)
+        for sublist in item.sublists:
+            lines.extend(_md_list_lines(sublist, indent + " " * len(prefix)))
+    return lines
+
+
+def _md_table(table: Table) -> str:
+    rows = [
+        [" ".join(blocks_text(cell.blocks).split()).replace("|", "\\|") for cell in row]
+        for row in table.rows
+    ]
     width = max(len(r) for r in rows)
     rows = [r + [""] * (width - len(r)) for r in rows]
 
@@ -274,8 +228,38 @@ def _md_table_sub(match: "re.Match") -> str:
     return "\n".join(lines) + "\n\n"
 
 
-def html_to_markdown(html: str, html_fallback: bool = False) -> str:
-    """Convert an HTML fragment/document into Markdown text.
+def write_markdown(source: Source, stream: TextIO, html_fallback: bool = False,
+                   progress: Progress = None):
+    """Convert a note (HTML or DocumentTree) to Markdown, writing it to *stream*.
+
+    Output is written block by block. See ``html_to_markdown`` for what
+    ``html_fallback`` does.
+    """
+    out = _MarkdownWriter(stream)
+    blocks = _as_tree(source).blocks
+    for done, block in enumerate(blocks, 1):
+        kind = type(block)
+        if kind is Paragraph:
+            out.write(_md_inlines(block.inlines, html_fallback).strip() + "\n\n")
+        elif kind is Heading:
+            out.write(f"{'#' * block.level} {_md_text(block.inlines).strip()}\n\n")
+        elif kind is CodeBlock:
+            out.write(f"```\n{block.text.strip()}\n```\n\n")
+        elif kind is ListBlock:
+            lines = _md_list_lines(block)
+            if lines:
+                out.write("\n".join(lines) + "\n\n")
+        elif kind is Table:
+            out.write(_md_table(block))
+        elif kind is Rule:
+            out.write("\n---\n\n")
+        if progress is not None:
+            progress(done, len(blocks))
+    out.close()
+
+
+def html_to_markdown(html: Source, html_fallback: bool = False) -> str:
+    """Convert an HTML fragment/document (or its DocumentTree) into Markdown text.
 
     By default (``html_fallback=False``) the output is pure Markdown: things
     Markdown has no syntax for - underline, text color, highlighting, and
@@ -286,469 +270,353 @@ def html_to_markdown(html: str, html_fallback: bool = False) -> str:
     ...">``, ``<font face="...">``), which most Markdown renderers pass
     through unchanged.
     """
-    text = _normalize_qt_html(html)
-
-    # Drop everything outside the body, plus Qt's <style>/<head> boilerplate
-    body_match = re.search(r"<body[^>]*>(.*)</body>", text, re.IGNORECASE | re.DOTALL)
-    if body_match:
-        text = body_match.group(1)
-    text = re.sub(r"<style[^>]*>.*?</style>", "", text, flags=re.IGNORECASE | re.DOTALL)
-    text = re.sub(r"<head[^>]*>.*?</head>", "", text, flags=re.IGNORECASE | re.DOTALL)
-
-    # Tables first, so their <tr>/<td> guts aren't mangled by later rules
-    text = re.sub(r"<table[^>]*>.*?</table>", _md_table_sub, text, flags=re.IGNORECASE | re.DOTALL)
-
-    for tag, ordered in (("ul", False), ("ol", True)):
-        pattern, sub_fn = _md_list_sub(tag, ordered)
-        text = pattern.sub(sub_fn, text)
-
-    text = re.sub(
-        r"<h([1-6])[^>]*>(.*?)</h\1>",
-        lambda m: "#" * int(m.group(1)) + " " + strip_tags(m.group(2)) + "\n\n",
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    text = re.sub(r"<hr[^>]*/?>", "\n---\n\n", text, flags=re.IGNORECASE)
-
-    def img_sub(match: "re.Match") -> str:
-        attrs = match.group(1)
-        src_match = re.search(r'src="([^"]*)"', attrs, re.IGNORECASE)
-        alt_match = re.search(r'alt="([^"]*)"', attrs, re.IGNORECASE)
-        src = src_match.group(1) if src_match else ""
-        alt = alt_match.group(1) if alt_match else ""
-        return f"![{alt}]({src})"
-
-    text = re.sub(r"<img\s+([^>]*)/?>", img_sub, text, flags=re.IGNORECASE)
-
-    text = re.sub(
-        r'<a[^>]*\bhref="([^"]*)"[^>]*>(.*?)</a>',
-        lambda m: f"[{strip_tags(m.group(2))}]({m.group(1)})",
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    text = re.sub(
-        r"<pre[^>]*>(.*?)</pre>",
-        lambda m: "```\n" + strip_tags(m.group(1)) + "\n```\n\n",
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-    text = re.sub(
-        r"<code[^>]*>(.*?)</code>",
-        lambda m: _wrap_inline(m.group(1), "`"),
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    text = re.sub(
-        r"<(strong|b)[^>]*>(.*?)</\1>",
-        lambda m: _wrap_inline(m.group(2), "**"),
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-    text = re.sub(
-        r"<(em|i)[^>]*>(.*?)</\1>",
-        lambda m: _wrap_inline(m.group(2), "*"),
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-    text = re.sub(
-        r"<(s|strike|del)[^>]*>(.*?)</\1>",
-        lambda m: _wrap_inline(m.group(2), "~~"),
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    # Underline / color / highlight / font have no native Markdown syntax.
-    # In plain mode we just drop the wrapper tags (the final strip_tags()
-    # pass below takes care of that). In html_fallback mode we protect them
-    # with \x00-delimited placeholders - which strip_tags() won't touch,
-    # since it only matches literal '<...>' - and turn them back into real
-    # HTML tags after strip_tags() has cleaned up everything else.
-    if html_fallback:
-        text = re.sub(
-            r"<u>(.*?)</u>",
-            lambda m: f"\x00U\x00{m.group(1)}\x00/U\x00",
-            text, flags=re.IGNORECASE | re.DOTALL,
-        )
-        text = re.sub(
-            r'<mdcolor data="([^"]*)">(.*?)</mdcolor>',
-            lambda m: f"\x00C:{m.group(1)}\x00{m.group(2)}\x00/C\x00",
-            text, flags=re.IGNORECASE | re.DOTALL,
-        )
-        text = re.sub(
-            r'<mdhl data="([^"]*)">(.*?)</mdhl>',
-            lambda m: f"\x00H:{m.group(1)}\x00{m.group(2)}\x00/H\x00",
-            text, flags=re.IGNORECASE | re.DOTALL,
-        )
-        text = re.sub(
-            r'<mdfont data="([^"]*)">(.*?)</mdfont>',
-            lambda m: f"\x00F:{m.group(1)}\x00{m.group(2)}\x00/F\x00",
-            text, flags=re.IGNORECASE | re.DOTALL,
-        )
-
-    text = re.sub(r"<br\s*/?>", "\n", text, flags=re.IGNORECASE)
-
-    text = re.sub(
-        r"<p[^>]*>(.*?)</p>",
-        lambda m: m.group(1).strip() + "\n\n",
-        text, flags=re.IGNORECASE | re.DOTALL,
-    )
-
-    text = strip_tags(text)
-
-    # Collapse runs of 3+ blank lines down to a single blank line
-    text = re.sub(r"\n{3,}", "\n\n", text)
-
-    if html_fallback:
-        text = text.replace("\x00U\x00", "<u>").replace("\x00/U\x00", "</u>")
-        text = re.sub(r"\x00C:([^\x00]*)\x00", lambda m: f'<span style="color: {m.group(1)};">', text)
-        text = text.replace("\x00/C\x00", "</span>")
-        text = re.sub(r"\x00H:([^\x00]*)\x00", lambda m: f'<span style="background-color: {m.group(1)};">', text)
-        text = text.replace("\x00/H\x00", "</span>")
-        text = re.sub(r"\x00F:([^\x00]*)\x00", lambda m: f'<font face="{m.group(1)}">', text)
-        text = text.replace("\x00/F\x00", "</font>")
+    buffer = StringIO()
+    write_markdown(html, buffer, html_fallback=html_fallback)
+    return buffer.getvalue()
 
-    return text.strip() + "\n"
 
+def save_html_as_markdown(html: Source, filepath: Path, html_fallback: bool = False,
+                          progress: Progress = None):
+    """Convert a note to Markdown, streaming it into *filepath*.
 
-# ============================================================================
-# HTML -> DOCX
-# ============================================================================
-
-def _set_run_highlight(run, color_value: str):
-    """Shade a run's background with an arbitrary RGB color (real Word highlight)."""
-    hex_color = _to_hex(color_value)
-    if not hex_color:
-        return
-    from docx.oxml.shared import OxmlElement, qn
-
-    rpr = run._element.get_or_add_rPr()
-    shd = OxmlElement("w:shd")
-    shd.set(qn("w:val"), "clear")
-    shd.set(qn("w:color"), "auto")
-    shd.set(qn("w:fill"), hex_color)
-    rpr.append(shd)
-
-
-def _set_run_font(run, font_name: str):
-    """Set a run's font, including the east-asian fallback Word also checks."""
-    from docx.oxml.shared import OxmlElement, qn
-
-    run.font.name = font_name
-    rpr = run._element.get_or_add_rPr()
-    r_fonts = rpr.find(qn("w:rFonts"))
-    if r_fonts is None:
-        r_fonts = OxmlElement("w:rFonts")
-        rpr.append(r_fonts)
-    r_fonts.set(qn("w:eastAsia"), font_name)
-
-
-def _extract_body_font(html: str) -> Optional[str]:
-    """Get the document-wide default font Qt stores on <body style="...">.
-
-    When a font is applied to the *whole* document (e.g. select-all then
-    change font), Qt doesn't wrap every word in a <span> - it just sets the
-    font once on <body style="font-family:...">, and individual runs simply
-    inherit it. Without this, that common case would silently lose the font
-    entirely, since the rest of the pipeline only looks at <span> styles.
+    The output goes to a temporary file beside *filepath* that replaces it
+    only once complete, so a failed or cancelled export never leaves a
+    truncated file behind.
     """
-    body_match = re.search(r"<body[^>]*style=\"([^\"]*)\"", html, re.IGNORECASE)
-    if not body_match:
-        return None
-    family_match = re.search(r"font-family:\s*([^;]+)", body_match.group(1), re.IGNORECASE)
-    if not family_match:
-        return None
-    family = family_match.group(1).strip().strip("'\"")
-    return family if _is_basic_font(family) else None
-
-
-def _add_hyperlink(paragraph, url: str, text: str):
-    """Insert a real, clickable hyperlink run into a python-docx paragraph."""
-    from docx.oxml.shared import OxmlElement, qn
-
-    part = paragraph.part
-    r_id = part.relate_to(
-        url,
-        "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink",
-        is_external=True,
-    )
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    partial = filepath.with_name(filepath.name + ".part")
+    try:
+        with open(partial, "w", encoding="utf-8") as f:
+            write_markdown(html, f, html_fallback=html_fallback, progress=progress)
+        os.replace(partial, filepath)
+    finally:
+        if partial.exists():
+            partial.unlink()
 
-    hyperlink = OxmlElement("w:hyperlink")
-    hyperlink.set(qn("r:id"), r_id)
 
-    run_element = OxmlElement("w:r")
-    run_props = OxmlElement("w:rPr")
+# ============================================================================
+# Tree -> DOCX
+# ============================================================================
 
-    color = OxmlElement("w:color")
-    color.set(qn("w:val"), "0563C1")
-    run_props.append(color)
+# python-docx's object API costs several lxml calls per property set, and
+# table.cell() re-walks the whole grid on every lookup, which made large
+# tables quadratic. The writer therefore renders each top-level block
+# straight to WordprocessingML text - run properties spelled out once per
+# run, table and cell properties once per table - and parses it in one go.
+# The markup is what the python-docx calls used to produce.
 
-    underline = OxmlElement("w:u")
-    underline.set(qn("w:val"), "single")
-    run_props.append(underline)
+_JUSTIFICATION = {"center": "center", "right": "right", "justify": "both", "left": "left"}
+_HYPERLINK_RELATIONSHIP = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+)
+_LINK_COLOR = "0563C1"
+_CODE_FONT = "Courier New"
+_EMU_PER_PIXEL = 9525  # at the 96 dpi Qt lays notes out at
+_TABLE_STYLE = "Light Grid Accent 1"
+_TABLE_LOOK = ('<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0"'
+               ' w:noHBand="0" w:noVBand="1" w:val="04A0"/>')
+_RUN_SPECIAL_RE = re.compile(r"([\t\r\n])")
+
+
+def _xml_attr(value: str) -> str:
+    return xml_escape(value, {'"': "&quot;"})
+
+
+def _text_xml(text: str) -> str:
+    """Run content for *text*: tabs and newlines become w:tab and w:br."""
+    parts = []
+    for chunk in _RUN_SPECIAL_RE.split(text):
+        if chunk == "\t":
+            parts.append("<w:tab/>")
+        elif chunk in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif chunk:
+            space = ' xml:space="preserve"' if chunk.strip() != chunk else ""
+            parts.append(f"<w:t{space}>{xml_escape(chunk)}</w:t>")
+    return "".join(parts)
+
+
+def _run_xml(run: Run, font: Optional[str], link: bool = False) -> str:
+    """A w:r for *run* in *font*; properties in the order the schema wants.
+    A *link* run is underlined and, unless it has a color, link blue."""
+    props = []
+    if font:
+        name = _xml_attr(font)
+        props.append(f'<w:rFonts w:ascii="{name}" w:hAnsi="{name}" w:eastAsia="{name}"/>')
+    if run.bold:
+        props.append("<w:b/>")
+    if run.italic:
+        props.append("<w:i/>")
+    if run.strike:
+        props.append("<w:strike/>")
+    color = _to_hex(run.color) if run.color else None
+    if link and not color:
+        color = _LINK_COLOR
+    if color:
+        props.append(f'<w:color w:val="{color}"/>')
+    if run.underline or link:
+        props.append('<w:u w:val="single"/>')
+    # Shading rather than w:highlight, which only knows 16 colors
+    fill = _to_hex(run.highlight) if run.highlight else None
+    if fill:
+        props.append(f'<w:shd w:val="clear" w:color="auto" w:fill="{fill}"/>')
+    rpr = f"<w:rPr>{''.join(props)}</w:rPr>" if props else ""
+    return f"<w:r>{rpr}{_text_xml(run.text)}</w:r>"
+
+
+def _image_extent(image: Image, px_width: int, px_height: int, max_width: int) -> tuple:
+    """(cx, cy) in EMU for *image* as the note displays it, at most *max_width* wide.
+
+    Sizes given in the HTML win; a missing one follows the aspect ratio.
+    Without either the picture keeps its pixel size, whatever dpi it declares.
+    """
+    width, height = image.width, image.height
+    if width and not height:
+        height = width * px_height / px_width
+    elif height and not width:
+        width = height * px_width / px_height
+    elif not width:
+        width, height = px_width, px_height
+    cx, cy = int(width * _EMU_PER_PIXEL), int(height * _EMU_PER_PIXEL)
+    if cx > max_width:
+        cx, cy = max_width, int(cy * max_width / cx)
+    return cx, cy
 
-    run_element.append(run_props)
-    text_element = OxmlElement("w:t")
-    text_element.text = text
-    run_element.append(text_element)
-    hyperlink.append(run_element)
-    paragraph._p.append(hyperlink)
 
+def _paragraph_xml(content: str, ppr: str = "") -> str:
+    return f"<w:p>{ppr}{content}</w:p>"
 
-class _HtmlToDocxParser(HTMLParser):
-    """Streams normalized HTML into a python-docx ``Document``."""
 
-    _HEADING_TAGS = {f"h{i}" for i in range(1, 7)}
-    _INLINE_STYLE_TAGS = {
-        "strong": "bold", "b": "bold",
-        "em": "italic", "i": "italic",
-        "u": "underline",
-        "s": "strike", "strike": "strike", "del": "strike",
-        "code": "code",
-    }
-    _WRAPPER_TAGS = {"mdcolor": "color", "mdhl": "highlight", "mdfont": "font"}
+class _DocxWriter:
+    """Renders a ``DocumentTree`` into a python-docx ``Document``."""
 
     def __init__(self, document, default_font: Optional[str] = None):
-        super().__init__(convert_charrefs=True)
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-        self._align_map = {
-            "center": WD_ALIGN_PARAGRAPH.CENTER,
-            "right": WD_ALIGN_PARAGRAPH.RIGHT,
-            "justify": WD_ALIGN_PARAGRAPH.JUSTIFY,
-            "left": WD_ALIGN_PARAGRAPH.LEFT,
-        }
+        from docx.oxml.ns import nsdecls
+
         self.document = document
         self.default_font = default_font
-        self.current_paragraph = None
-        # Each entry is a (kind, value) tuple, e.g. ("bold", None) or
-        # ("color", "#ff0000"); value-bearing kinds use the most recently
-        # pushed entry so nested tags of the same kind override correctly.
-        self.style_stack: list[tuple[str, Optional[str]]] = []
-        self.list_type: Optional[str] = None
-        self.in_link = False
-        self.link_href = ""
-        self._link_text_parts: list[str] = []
-        # Minimal table support: buffer rows/cells as plain text, then build
-        # a real docx table once </table> is reached.
-        self._in_table = False
-        self._table_rows: list[list[str]] = []
-        self._table_current_row: Optional[list[str]] = None
-        self._table_cell_buffer: Optional[list[str]] = None
-
-    # -- tag handling --------------------------------------------------
-
-    def handle_starttag(self, tag, attrs):
-        attrs_dict = dict(attrs)
-
-        if tag == "table":
-            self._in_table = True
-            self._table_rows = []
-            return
-        if self._in_table:
-            if tag == "tr":
-                self._table_current_row = []
-            elif tag in ("td", "th"):
-                self._table_cell_buffer = []
-            elif tag == "br" and self._table_cell_buffer is not None:
-                self._table_cell_buffer.append("\n")
-            return
-
-        if tag in self._HEADING_TAGS:
-
-            level = int(tag[1])
-            self.current_paragraph = self.document.add_heading(level=level)
-        elif tag == "p":
-            self._new_paragraph()
-            self._apply_paragraph_attrs(attrs_dict)
-        elif tag in self._INLINE_STYLE_TAGS:
-            self.style_stack.append((self._INLINE_STYLE_TAGS[tag], None))
-        elif tag in self._WRAPPER_TAGS:
-            self.style_stack.append((self._WRAPPER_TAGS[tag], attrs_dict.get("data", "")))
-        elif tag == "a":
-            self.in_link = True
-            self.link_href = attrs_dict.get("href", "")
-            self._link_text_parts = []
-        elif tag == "ul":
-            self.list_type = "ul"
-        elif tag == "ol":
-            self.list_type = "ol"
-        elif tag == "li":
-            style = "List Number" if self.list_type == "ol" else "List Bullet"
-            self.current_paragraph = self.document.add_paragraph(style=style)
-        elif tag == "br":
-            if self.current_paragraph is not None:
-                self.current_paragraph.add_run().add_break()
-        elif tag == "img":
-            self._add_image(attrs_dict.get("src", ""))
-        elif tag == "hr":
-            self._new_paragraph()
-            self.current_paragraph.add_run("―" * 20)
-
-    def handle_endtag(self, tag):
-        if tag == "table":
-            self._in_table = False
-            self._build_table()
-            return
-        if self._in_table:
-            if tag in ("td", "th") and self._table_cell_buffer is not None:
-                if self._table_current_row is not None:
-                    self._table_current_row.append("".join(self._table_cell_buffer).strip())
-                self._table_cell_buffer = None
-            elif tag == "tr" and self._table_current_row is not None:
-                self._table_rows.append(self._table_current_row)
-                self._table_current_row = None
-            return
+        self._part = document.part
+        self._body = document.element.body
+        self._nsdecls = nsdecls("w", "r")
+        section = document.sections[-1]
+        self._text_width = section.page_width - section.left_margin - section.right_margin
+        self._style_ids: dict[str, Optional[str]] = {}
+        self._next_shape_id: Optional[int] = None
+        self._link_rels: dict[str, str] = {}
+        self._image_parts: dict[bytes, tuple] = {}
+        self._next_rel = 1
+
+    def write_blocks(self, blocks: list, progress: Progress = None):
+        from docx.oxml import parse_xml
+
+        end = self._body.sectPr
+        for done, block in enumerate(blocks, 1):
+            if type(block) is Table:
+                # Parsed as a root of its own: lxml is quadratic moving a big
+                # subtree out of a parent that declares its namespaces
+                elements = [parse_xml(self._table_xml(block, self._text_width, self._nsdecls))]
+            else:
+                xml = self._block_xml(block, self._text_width)
+                # Wrapped so that a list's several paragraphs parse at once
+                elements = list(parse_xml(f"<w:body {self._nsdecls}>{xml}</w:body>")) if xml else []
+            for element in elements:
+                if end is not None:
+                    end.addprevious(element)
+                else:
+                    self._body.append(element)
+            if progress is not None:
+                progress(done, len(blocks))
+
+    # -- blocks ------------------------------------------------------------
+
+    def _block_xml(self, block, width: int) -> str:
+        kind = type(block)
+        if kind is Paragraph:
+            return _paragraph_xml(self._inlines_xml(block.inlines, width),
+                                  self._paragraph_ppr(block))
+        if kind is Heading:
+            return _paragraph_xml(self._inlines_xml(block.inlines, width),
+                                  self._style_pr(f"Heading {block.level}"))
+        if kind is CodeBlock:
+            return _paragraph_xml(_run_xml(Run(block.text), _CODE_FONT))
+        if kind is ListBlock:
+            return self._list_xml(block, 0, width)
+        if kind is Table:
+            return self._table_xml(block, width)
+        if kind is Rule:
+            return _paragraph_xml(_run_xml(Run("―" * 20), None))
+        return ""
 
-        if tag in self._HEADING_TAGS:
-            self.current_paragraph = None
-        elif tag == "p":
-            self.current_paragraph = None
-        elif tag in self._INLINE_STYLE_TAGS:
-            self._pop_style(self._INLINE_STYLE_TAGS[tag])
-        elif tag in self._WRAPPER_TAGS:
-            self._pop_style(self._WRAPPER_TAGS[tag])
-        elif tag == "a":
-            text = "".join(self._link_text_parts).strip()
-            if text and self.link_href:
-                if self.current_paragraph is None:
-                    self._new_paragraph()
-                _add_hyperlink(self.current_paragraph, self.link_href, text)
-            elif text:
-                self._add_run(text)
-            self.in_link = False
-            self.link_href = ""
-            self._link_text_parts = []
-        elif tag in ("ul", "ol"):
-            self.list_type = None
-        elif tag == "li":
-            self.current_paragraph = None
-
-    def handle_data(self, data):
-        if not data:
-            return
-        if self._in_table:
-            if self._table_cell_buffer is not None:
-                self._table_cell_buffer.append(data)
-            return
-        if self.in_link:
-            self._link_text_parts.append(data)
-            return
-        if self.current_paragraph is None:
-            if not data.strip():
-                return
-            self._new_paragraph()
-        self._add_run(data)
-
-    # -- helpers ---------------------------------------------------------
-
-    def _pop_style(self, kind: str):
-        """Remove the most recently pushed entry of *kind* (LIFO by tag)."""
-        for i in range(len(self.style_stack) - 1, -1, -1):
-            if self.style_stack[i][0] == kind:
-                del self.style_stack[i]
-                return
-
-    def _new_paragraph(self):
-        self.current_paragraph = self.document.add_paragraph()
-
-    def _apply_paragraph_attrs(self, attrs_dict: dict):
-        align = attrs_dict.get("align", "").strip().lower()
-        if align in self._align_map:
-            self.current_paragraph.alignment = self._align_map[align]
-
-        style = attrs_dict.get("style", "")
-        indent_match = re.search(r"-qt-block-indent:\s*(\d+)", style)
-        if indent_match:
-            level = int(indent_match.group(1))
-            if level > 0:
-                from docx.shared import Inches
-                self.current_paragraph.paragraph_format.left_indent = Inches(0.5 * level)
-
-        first_line_match = re.search(r"text-indent:\s*(-?\d+)px", style)
-        if first_line_match:
-            px = int(first_line_match.group(1))
-            if px:
-                from docx.shared import Pt
-                self.current_paragraph.paragraph_format.first_line_indent = Pt(px * 0.75)
-
-    def _add_run(self, text: str):
-        if self.current_paragraph is None:
-            self._new_paragraph()
-        run = self.current_paragraph.add_run(text)
-
-        kinds = {kind for kind, _ in self.style_stack}
-        if "bold" in kinds:
-            run.bold = True
-        if "italic" in kinds:
-            run.italic = True
-        if "underline" in kinds:
-            run.underline = True
-        if "strike" in kinds:
-            run.font.strike = True
-        if "code" in kinds:
-            _set_run_font(run, "Courier New")
-
-        # Value-bearing styles: use the most recently pushed value of each kind.
-        color_value = next((v for k, v in reversed(self.style_stack) if k == "color" and v), None)
-        if color_value:
-            hex_color = _to_hex(color_value)
-            if hex_color:
-                from docx.shared import RGBColor
-                run.font.color.rgb = RGBColor.from_string(hex_color)
-
-        font_value = next((v for k, v in reversed(self.style_stack) if k == "font" and v), None)
-        if "code" in kinds:
-            pass  # already handled above via _set_run_font(run, "Courier New")
-        elif font_value:
-            _set_run_font(run, font_value)
-        elif self.default_font:
-            _set_run_font(run, self.default_font)
-
-        highlight_value = next((v for k, v in reversed(self.style_stack) if k == "highlight" and v), None)
-        if highlight_value:
-            _set_run_highlight(run, highlight_value)
-
-        return run
-
-    def _build_table(self):
-        rows = [r for r in self._table_rows if r]
-        if not rows:
-            return
-        cols = max(len(r) for r in rows)
-        rows = [r + [""] * (cols - len(r)) for r in rows]
+    def _style_id(self, name: str) -> Optional[str]:
+        """The id of style *name* in this document, or None if it lacks one."""
+        if name not in self._style_ids:
+            try:
+                self._style_ids[name] = _xml_attr(self.document.styles[name].style_id)
+            except KeyError:
+                self._style_ids[name] = None
+        return self._style_ids[name]
+
+    def _style_pr(self, name: str) -> str:
+        """A w:pPr applying paragraph style *name*, empty if there is none."""
+        style_id = self._style_id(name)
+        return f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+
+    @staticmethod
+    def _paragraph_ppr(block: Paragraph) -> str:
+        from docx.shared import Inches, Pt
+
+        props = []
+        indent = ""
+        if block.indent > 0:
+            indent += f' w:left="{Inches(0.5 * block.indent).twips}"'
+        if block.text_indent:
+            first_line = Pt(block.text_indent * 0.75).twips
+            indent += (f' w:firstLine="{first_line}"' if first_line >= 0
+                       else f' w:hanging="{-first_line}"')
+        if indent:
+            props.append(f"<w:ind{indent}/>")
+        if block.align in _JUSTIFICATION:
+            props.append(f'<w:jc w:val="{_JUSTIFICATION[block.align]}"/>')
+        return f"<w:pPr>{''.join(props)}</w:pPr>" if props else ""
+
+    def _list_xml(self, block: ListBlock, level: int, width: int) -> str:
+        style = "List Number" if block.ordered else "List Bullet"
+        if level:
+            # Word's default template only goes three levels deep
+            style = f"{style} {min(level + 1, 3)}"
+        ppr = self._style_pr(style)
+        parts = []
+        for item in block.items:
+            parts.append(_paragraph_xml(self._inlines_xml(item.inlines, width), ppr))
+            for sublist in item.sublists:
+                parts.append(self._list_xml(sublist, level + 1, width))
+        return "".join(parts)
+
+    def _table_xml(self, block: Table, width: int, nsdecls: str = "") -> str:
+        from docx.shared import Emu
+
+        cols = max(len(row) for row in block.rows)
+        col_width = width // cols
+        col_twips = Emu(col_width).twips
+        style_id = self._style_id(_TABLE_STYLE)
+        style = f'<w:tblStyle w:val="{style_id}"/>' if style_id else ""
+        grid_col = f'<w:gridCol w:w="{col_twips}"/>'
+        # Shared by every cell, so built once and repeated as text
+        cell_start = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_twips}"/></w:tcPr>'
+        parts = [
+            f'<w:tbl{" " + nsdecls if nsdecls else ""}><w:tblPr>{style}<w:tblW w:type="auto" w:w="0"/>{_TABLE_LOOK}</w:tblPr>',
+            f"<w:tblGrid>{grid_col * cols}</w:tblGrid>",
+        ]
+        for row in block.rows:
+            parts.append("<w:tr>")
+            for cell in row:
+                content = "".join(self._block_xml(b, col_width) for b in cell.blocks)
+                if not content.endswith("</w:p>"):
+                    content += "<w:p/>"  # a cell must end with a paragraph
+                parts.append(f"{cell_start}{content}</w:tc>")
+            parts.append(f"{cell_start}<w:p/></w:tc>" * (cols - len(row)))
+            parts.append("</w:tr>")
+        parts.append("</w:tbl>")
+        return "".join(parts)
+
+    # -- inlines -----------------------------------------------------------
+
+    def _inlines_xml(self, inlines: list, width: int) -> str:
+        parts = []
+        index, count = 0, len(inlines)
+        while index < count:
+            item = inlines[index]
+            if item.href:
+                # One w:r per run, keeping its formatting; pictures inside a
+                # link are placed after it.
+                end = index + 1
+                while end < count and inlines[end].href == item.href:
+                    end += 1
+                group = inlines[index:end]
+                runs = []
+                for link_item in group:
+                    if type(link_item) is Run:
+                        font = _CODE_FONT if link_item.code else link_item.font or self.default_font
+                        runs.append(_run_xml(link_item, font, link=True))
+                    elif type(link_item) is LineBreak:
+                        runs.append("<w:r><w:br/></w:r>")
+                if any(type(i) is Run and i.text for i in group):
+                    r_id = self._link_rel(item.href)
+                    parts.append(f'<w:hyperlink r:id="{r_id}">{"".join(runs)}</w:hyperlink>')
+                for image in (i for i in group if type(i) is Image):
+                    parts.append(self._image_xml(image, width))
+                index = end
+                continue
 
-        table = self.document.add_table(rows=len(rows), cols=cols)
-        try:
-            table.style = "Light Grid Accent 1"
-        except KeyError:
-            pass
-        for row_index, row in enumerate(rows):
-            for col_index, cell_text in enumerate(row):
-                cell = table.cell(row_index, col_index)
-                cell.text = cell_text
-                if self.default_font:
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            _set_run_font(run, self.default_font)
-        self.current_paragraph = None
-
-    def _add_image(self, src: str):
-        from docx.shared import Inches
-
-        if not src.startswith("data:image/"):
-            return
+            kind = type(item)
+            if kind is Run:
+                font = _CODE_FONT if item.code else item.font or self.default_font
+                parts.append(_run_xml(item, font))
+            elif kind is Image:
+                parts.append(self._image_xml(item, width))
+            elif kind is LineBreak:
+                parts.append("<w:r><w:br/></w:r>")
+            index += 1
+        return "".join(parts)
+
+    def _link_rel(self, href: str) -> str:
+        """The rId of the relationship to *href*, added on first use."""
+        # Part.relate_to() finds both the existing match and a free rId by
+        # scanning every relationship, which is quadratic in a note's links
+        r_id = self._link_rels.get(href)
+        if r_id is None:
+            rels = self._part.rels
+            while f"rId{self._next_rel}" in rels:
+                self._next_rel += 1
+            r_id = f"rId{self._next_rel}"
+            rels.add_relationship(_HYPERLINK_RELATIONSHIP, href, r_id, is_external=True)
+            self._link_rels[href] = r_id
+        return r_id
+
+    def _image_part(self, image_bytes: bytes) -> tuple:
+        """(rId, docx Image) for *image_bytes*, embedded on first use only."""
+        # get_or_add_image() dedupes too, but only after parsing the image
+        # header and comparing against every part and relationship so far
+        digest = hashlib.sha1(image_bytes).digest()
+        part = self._image_parts.get(digest)
+        if part is None:
+            part = self._image_parts[digest] = self._part.get_or_add_image(BytesIO(image_bytes))
+        return part
+
+    def _image_xml(self, image: Image, max_width: int) -> str:
+        from docx.oxml.shape import CT_Inline
+        from lxml import etree
+
+        if not image.src.startswith("data:image/"):
+            return ""
         try:
-            header, b64data = src.split(",", 1)
+            header, b64data = image.src.split(",", 1)
             image_bytes = base64.b64decode(b64data)
         except (ValueError, base64.binascii.Error):
-            return
+            return ""
 
         try:
-            self._new_paragraph()
-            run = self.current_paragraph.add_run()
-            run.add_picture(BytesIO(image_bytes), width=Inches(5.5))
+            # The bytes go in as they are, so a JPEG stays a JPEG
+            r_id, picture = self._image_part(image_bytes)
+            cx, cy = _image_extent(image, picture.px_width, picture.px_height, max_width)
         except Exception:
-            self._add_run("[image could not be embedded]")
+            return _run_xml(Run("[image could not be embedded]"), None)
+        # StoryPart.next_id scans the whole document, and the pictures of a
+        # block aren't in it yet, so number them here
+        if self._next_shape_id is None:
+            self._next_shape_id = self._part.next_id
+        shape_id, self._next_shape_id = self._next_shape_id, self._next_shape_id + 1
+        inline = CT_Inline.new_pic_inline(shape_id, r_id, picture.filename, cx, cy)
+        return f"<w:r><w:drawing>{etree.tostring(inline, encoding='unicode')}</w:drawing></w:r>"
 
 
-def save_html_as_docx(html: str, filepath: Path):
-    """Convert HTML into a .docx file and save it to *filepath*."""
+def save_html_as_docx(html: Source, filepath: Path, progress: Progress = None):
+    """Convert a note (HTML or DocumentTree) into a .docx file at *filepath*.
+
+    Nothing is written until the whole document has been built in memory,
+    so an export aborted through *progress* leaves *filepath* untouched.
+    """
     try:
         from docx import Document
     except ImportError as exc:
@@ -758,14 +626,7 @@ def save_html_as_docx(html: str, filepath: Path):
         ) from exc
 
     filepath = Path(filepath)
-    default_font = _extract_body_font(html)
-    normalized = _normalize_qt_html(html)
-
-    body_match = re.search(r"<body[^>]*>(.*)</body>", normalized, re.IGNORECASE | re.DOTALL)
-    if body_match:
-        normalized = body_match.group(1)
-    normalized = re.sub(r"<style[^>]*>.*?</style>", "", normalized, flags=re.IGNORECASE | re.DOTALL)
-
+    tree = _as_tree(html)
     document = Document()
 
     # Word's default template adds ~10pt of space after every paragraph on
@@ -777,9 +638,7 @@ def save_html_as_docx(html: str, filepath: Path):
     normal_format.space_before = Pt(0)
     normal_format.space_after = Pt(0)
 
-    parser = _HtmlToDocxParser(document, default_font=default_font)
-    parser.feed(normalized)
-    parser.close()
+    _DocxWriter(document, default_font=tree.default_font).write_blocks(tree.blocks, progress)
 
     if not document.paragraphs and not document.tables:
         document.add_paragraph("")
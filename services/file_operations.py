@@ -1,6 +1,11 @@
+import os
+import shutil
 from pathlib import Path
+from typing import Iterable, Union
 from PyQt6.QtCore import QObject, pyqtSignal
 from config.app_config import AppConfig
+from services.embedded_images import decode_embedded_images
+from services.profiler import traced
 
 # ============================================================================
 # File Operations Handler
@@ -10,11 +15,12 @@ from config.app_config import AppConfig
 class FileLoadWorker(QObject):
     """
     Runs FileOperations.read_file() on a background thread so large files
-    don't block the UI. Create one per load, move it to a QThread, and
-    start the thread - do not call run() directly.
+    don't block the UI - including converting Markdown/Word files and
+    decoding the pictures embedded in the HTML. Create one per load, move it
+    to a QThread, and start the thread - do not call run() directly.
     """
-    finished = pyqtSignal(str, bool)   # content, is_html
-    failed = pyqtSignal(str)           # error message
+    finished = pyqtSignal(str, bool, object)   # content, is_html, images (or None)
+    failed = pyqtSignal(str)                   # error message
 
     def __init__(self, filepath: Path):
         super().__init__()
@@ -23,7 +29,11 @@ class FileLoadWorker(QObject):
     def run(self):
         try:
             content, is_html = FileOperations.read_file(self.filepath)
-            self.finished.emit(content, is_html)
+            images = None
+            if is_html:
+                # Ready for DocumentTab.set_content(content, True, images)
+                content, images = decode_embedded_images(content)
+            self.finished.emit(content, is_html, images)
         except Exception as e:
             self.failed.emit(str(e))
 
@@ -38,9 +48,19 @@ class FileOperations:
         return size_mb <= AppConfig.MAX_FILE_SIZE_MB
     
     @staticmethod
+    def is_import(filepath: Path) -> bool:
+        """Check if a file is opened by converting it (Markdown, Word)"""
+        # The converters (and python-docx) load with the first import
+        from services.import_services import IMPORT_SUFFIXES
+        return filepath.suffix.lower() in IMPORT_SUFFIXES
+
+    @staticmethod
+    @traced(category="file")
     def read_file(filepath: Path) -> tuple[str, bool]:
         """
-        Read file content safely
+        Read file content safely.
+        Markdown and Word files are converted to HTML (see
+        services/import_services), so they come back as (html, True).
         Returns: (content, is_html)
         Raises: IOError, UnicodeDecodeError
         """
@@ -53,6 +73,10 @@ class FileOperations:
                 f"Maximum size is {AppConfig.MAX_FILE_SIZE_MB} MB."
             )
         
+        if FileOperations.is_import(filepath):
+            from services.import_services import import_document
+            return import_document(filepath), True
+
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -66,30 +90,48 @@ class FileOperations:
             return content, is_html
     
     @staticmethod
-    def write_file(filepath: Path, content: str, as_html: bool = True):
+    def write_file(filepath: Path, content: Union[str, Iterable[str]], as_html: bool = True):
         """
         Write content to file safely.
-        A .bak is created before writing so the original is recoverable if the
-        write fails.  The backup is removed automatically on success so old
+        *content* may be a string or an iterable of pieces (such as
+        DocumentTab.iter_content_html()), which are streamed to disk as they
+        come rather than joined first.
+        The content is written to a .part file that replaces the target
+        only when complete, so a failed write leaves the original intact.
+        A .bak is also created before writing so the original is recoverable
+        if the write fails.  The backup is removed automatically on success so old
         backups never accumulate silently.
         Raises: IOError
         """
         backup_path = None
 
-        # Create backup if file exists (best-effort safety net during write)
+        # Create backup if file exists (best-effort safety net during write).
+        # Copied block by block, never read into memory whole.
         if filepath.exists():
             backup_path = filepath.with_suffix(filepath.suffix + '.bak')
             try:
-                backup_path.write_text(filepath.read_text(encoding='utf-8'), encoding='utf-8')
+                shutil.copyfile(filepath, backup_path)
             except Exception:
                 backup_path = None  # Backup failed; don't try to delete it later
 
-        # Write new content
+        # Write new content. The pieces are produced while writing, so they
+        # go to a temporary file beside the note that replaces it only once
+        # complete; a failure midway never leaves the note truncated.
+        partial = filepath.with_name(filepath.name + '.part')
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            with open(partial, 'w', encoding='utf-8') as f:
+                if isinstance(content, str):
+                    f.write(content)
+                else:
+                    f.writelines(content)
+            if filepath.exists():
+                shutil.copymode(filepath, partial)
+            os.replace(partial, filepath)
         except Exception as e:
             raise IOError(f"Failed to write file: {e}")
+        finally:
+            if partial.exists():
+                partial.unlink()
 
         # Write succeeded — remove the now-redundant backup
         if backup_path is not None:
@@ -0,0 +1,113 @@
+# ============================================================================
+# HTML Rewrite
+# single-pass tag scanner behind DocumentTab's image embedding/extraction
+# and table-cell clean-up
+# ============================================================================
+#
+# A note's HTML is mostly attribute text: every image is a base64 data URI
+# of up to megabytes in its src. Regexes over the whole document (src="...",
+# then <td ...> with a nested substitution per cell) walked all of it once
+# per pattern. rewrite_html() instead hops from '<' to '<' and over quoted
+# attribute values with str.find(), which runs at memchr speed, and looks
+# at characters one by one only in tag and attribute names. Both rewrites
+# happen in the same traversal, and the output comes in pieces so a large
+# data URI is passed along, not copied into a new string.
+
+from typing import Callable, Iterator, Optional
+
+_SPACE = " \t\r\n\f"
+_NAME_END = _SPACE + "/>="
+_CELL_TAGS = ("td", "th")
+
+
+def _strip_background(style: str) -> str:
+    """*style* without its background-color declarations (and their ';')."""
+    kept = [decl for decl in style.split(";")
+            if decl.split(":", 1)[0].strip().lower() != "background-color"]
+    return ";".join(kept)
+
+
+def rewrite_html(html: str, image_src: Optional[Callable[[str], Optional[str]]] = None,
+                 strip_cell_backgrounds: bool = False) -> Iterator[str]:
+    """
+    Yield *html* in pieces, with two optional rewrites applied in one pass:
+
+    - image_src(src) is called for each <img> src; a string it returns
+      replaces the value, None keeps it.
+    - strip_cell_backgrounds removes background-color from the style of
+      <td>/<th> tags (Qt bakes the app's palette into them).
+
+    Comments, doctypes and <style>/<script> content pass through untouched.
+    """
+    n = len(html)
+    pos = 0  # start of the text not yet yielded
+    i = html.find("<")
+    while 0 <= i < n - 1:
+        if html.startswith("<!--", i):
+            end = html.find("-->", i + 4)
+            i = html.find("<", end + 3) if end >= 0 else -1
+            continue
+        j = i + 1
+        if html[j] in "/!?":
+            i = html.find("<", j)
+            continue
+        while j < n and html[j] not in _NAME_END:
+            j += 1
+        tag = html[i + 1:j].lower()
+
+        # Walk the attributes up to the '>' closing the tag
+        k = j
+        while k < n:
+            while k < n and html[k] in _SPACE:
+                k += 1
+            if k >= n or html[k] == ">":
+                break
+            if html[k] == "/":
+                k += 1
+                continue
+            name_start = k
+            while k < n and html[k] not in _NAME_END:
+                k += 1
+            name = html[name_start:k].lower()
+            while k < n and html[k] in _SPACE:
+                k += 1
+            if k >= n or html[k] != "=":
+                continue
+            k += 1
+            while k < n and html[k] in _SPACE:
+                k += 1
+            if k < n and html[k] in "\"'":
+                value_start = k + 1
+                value_end = html.find(html[k], value_start)
+                if value_end < 0:
+                    value_end = n
+                k = value_end + 1
+            else:
+                value_start = k
+                while k < n and html[k] not in _SPACE and html[k] != ">":
+                    k += 1
+                value_end = k
+
+            replacement = None
+            if name == "src" and tag == "img" and image_src is not None:
+                replacement = image_src(html[value_start:value_end])
+            elif name == "style" and strip_cell_backgrounds and tag in _CELL_TAGS:
+                style = html[value_start:value_end]
+                if "background-color" in style.lower():
+                    replacement = _strip_background(style)
+            if replacement is not None:
+                yield html[pos:value_start]
+                yield replacement
+                pos = value_end
+        tag_end = k + 1
+
+        if tag in ("style", "script"):
+            # Raw text: skip to the matching end tag
+            end = html.find(f"</{tag}", tag_end)
+            if end < 0:
+                end = html.find(f"</{tag.upper()}", tag_end)
+            i = html.find("<", end + 1) if end >= 0 else -1
+        else:
+            i = html.find("<", tag_end)
+    yield html[pos:]
+
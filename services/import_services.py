@@ -0,0 +1,957 @@
+"""
+Import services
+===============
+The opposite direction of ``export_services``: turns a Markdown or Word
+file into HTML that ``DocumentTab.set_content()`` loads like a saved note.
+
+- ``markdown_to_html``       -> HTML for a Markdown string (CommonMark
+  blocks and inlines plus GitHub-style tables and ``~~strike~~``)
+- ``docx_to_html``           -> HTML for a ``.docx`` file on disk
+- ``import_document``        -> either of the above, picked by suffix
+
+Pictures come out as base64 data URIs, exactly like the ones a saved note
+embeds - the bytes of a DOCX image part, or of a local file a Markdown
+image points at - so the loader decodes them the same way it decodes a
+note's. Nothing here touches Qt: ``FileOperations.read_file`` runs it on the
+background load thread.
+
+What Qt's rich text can't show (footnotes, comments, text boxes, page
+layout) is dropped; the text itself never is.
+"""
+
+from __future__ import annotations
+
+import base64
+import functools
+import mimetypes
+import re
+from html import escape
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote
+
+# Suffixes import_document() understands
+IMPORT_SUFFIXES = (".md", ".markdown", ".docx")
+
+# Same look as a table inserted from the Insert menu
+_TABLE_OPEN = '<table border="1" cellspacing="0" cellpadding="5" width="100%">'
+_TAB_HTML = '<span style=" white-space:pre;">\t</span>'
+
+
+def _text(text: str) -> str:
+    return escape(text, quote=False)
+
+
+def _attr(value: str) -> str:
+    return escape(value, quote=True)
+
+
+def _data_uri(data: bytes, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def import_document(filepath: Path) -> str:
+    """HTML for the Markdown or Word file at *filepath*.
+
+    Raises ValueError for a suffix not in IMPORT_SUFFIXES.
+    """
+    filepath = Path(filepath)
+    suffix = filepath.suffix.lower()
+    if suffix == ".docx":
+        return docx_to_html(filepath)
+    if suffix in (".md", ".markdown"):
+        try:
+            text = filepath.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            text = filepath.read_text(encoding="latin-1")
+        return markdown_to_html(text, base_dir=filepath.parent)
+    raise ValueError(f"Cannot import {filepath.name}: unsupported file type")
+
+
+# ============================================================================
+# Markdown -> HTML
+# ============================================================================
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})\s*([^`\s]*)[^`]*$")
+_ATX_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_SETEXT_RE = re.compile(r"^ {0,3}(=+|-+)[ \t]*$")
+_RULE_RE = re.compile(r"^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$")
+_QUOTE_RE = re.compile(r"^ {0,3}> ?")
+_LIST_RE = re.compile(r"^( {0,3})([-+*]|\d{1,9}[.)])([ \t]+|$)(.*)$")
+_TABLE_DELIM_RE = re.compile(r"^ {0,3}\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_HTML_BLOCK_RE = re.compile(
+    r"^ {0,3}<(?:!--|/?(?:address|blockquote|body|center|div|dl|h[1-6]|head|hr|html|"
+    r"ol|p|pre|table|tbody|td|th|thead|tr|ul)(?:[\s/>]|$))",
+    re.IGNORECASE,
+)
+_INLINE_TAG_RE = re.compile(r"</?[A-Za-z][A-Za-z0-9-]*(?:\s[^<>]*)?/?>|<!--.*?-->", re.DOTALL)
+_AUTOLINK_RE = re.compile(r"<([A-Za-z][A-Za-z0-9+.-]{1,31}:[^<>\s]*|[^<>\s@]+@[^<>\s@]+\.[^<>\s@]+)>")
+_ENTITY_RE = re.compile(r"&(?:#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|[A-Za-z][A-Za-z0-9]{1,31});")
+_PUNCTUATION = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+_EMPHASIS_TAGS = {1: "em", 2: "strong"}
+
+
+class _Delimiter:
+    """A run of '*', '_' or '~' that may open or close emphasis."""
+
+    __slots__ = ("char", "count", "length", "can_open", "can_close")
+
+    def __init__(self, char: str, count: int, can_open: bool, can_close: bool):
+        self.char = char
+        self.count = self.length = count
+        self.can_open = can_open
+        self.can_close = can_close
+
+
+def _starts_block(line: str) -> bool:
+    """Whether *line* starts something that interrupts a paragraph."""
+    if _FENCE_RE.match(line) or _ATX_RE.match(line) or _RULE_RE.match(line) \
+            or _QUOTE_RE.match(line) or _HTML_BLOCK_RE.match(line):
+        return True
+    item = _LIST_RE.match(line)
+    # Only a list that can't be mistaken for a number ending a sentence
+    return bool(item and item.group(4).strip()
+                and (not item.group(2)[0].isdigit() or item.group(2)[:-1] == "1"))
+
+
+def _split_row(line: str) -> list[str]:
+    """The cells of a table row, splitting on pipes that aren't escaped."""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in re.split(r"(?<!\\)\|", line)]
+
+
+class _MarkdownReader:
+    """Block and inline parser for one Markdown document."""
+
+    def __init__(self, base_dir: Optional[Path]):
+        self.base_dir = base_dir
+        self._images: dict[str, str] = {}
+
+    # -- blocks ------------------------------------------------------------
+
+    def blocks(self, lines: list[str], tight: bool = False) -> list[str]:
+        """HTML for *lines*; with *tight*, paragraphs come without <p> (list items)."""
+        out = []
+        i, n = 0, len(lines)
+        while i < n:
+            line = lines[i]
+            if not line.strip():
+                i += 1
+                continue
+
+            if len(line) - len(line.lstrip(" ")) >= 4:
+                # Indented code, running to the last indented line
+                end = i
+                while end < n and (not lines[end].strip() or lines[end].startswith("    ")):
+                    end += 1
+                while not lines[end - 1].strip():
+                    end -= 1
+                out.append(self._pre([l[4:] for l in lines[i:end]]))
+                i = end
+                continue
+
+            fence = _FENCE_RE.match(line)
+            if fence:
+                marker = fence.group(1)
+                end = i + 1
+                while end < n and not (lines[end].strip().startswith(marker)
+                                       and not lines[end].strip().strip(marker[0])):
+                    end += 1
+                out.append(self._pre(lines[i + 1:end]))
+                i = end + 1
+                continue
+
+            heading = _ATX_RE.match(line)
+            if heading:
+                level = len(heading.group(1))
+                out.append(f"<h{level}>{self.inline(heading.group(2) or '')}</h{level}>")
+                i += 1
+                continue
+
+            if _RULE_RE.match(line):
+                out.append("<hr />")
+                i += 1
+                continue
+
+            if _QUOTE_RE.match(line):
+                end = i
+                quoted = []
+                while end < n and lines[end].strip():
+                    match = _QUOTE_RE.match(lines[end])
+                    quoted.append(lines[end][match.end():] if match else lines[end])
+                    end += 1
+                out.append(f"<blockquote>{''.join(self.blocks(quoted))}</blockquote>")
+                i = end
+                continue
+
+            if _LIST_RE.match(line):
+                html, i = self._list(lines, i)
+                out.append(html)
+                continue
+
+            if "|" in line and i + 1 < n and _TABLE_DELIM_RE.match(lines[i + 1]) \
+                    and "-" in lines[i + 1]:
+                html, i = self._table(lines, i)
+                out.append(html)
+                continue
+
+            if _HTML_BLOCK_RE.match(line):
+                # Raw HTML passes through up to the next blank line
+                end = i
+                while end < n and lines[end].strip():
+                    end += 1
+                out.append("\n".join(lines[i:end]))
+                i = end
+                continue
+
+            # Paragraph, possibly turned into a heading by an underline
+            end = i + 1
+            level = 0
+            while end < n and lines[end].strip():
+                underline = _SETEXT_RE.match(lines[end])
+                if underline:
+                    level = 1 if underline.group(1)[0] == "=" else 2
+                    break
+                if _starts_block(lines[end]):
+                    break
+                end += 1
+            # Trailing spaces stay until inline() has seen the hard breaks
+            text = self.inline("\n".join(l.lstrip() for l in lines[i:end]).rstrip())
+            if level:
+                out.append(f"<h{level}>{text}</h{level}>")
+                end += 1
+            else:
+                out.append(text if tight else f"<p>{text}</p>")
+            i = end
+        return out
+
+    @staticmethod
+    def _pre(lines: list[str]) -> str:
+        return f"<pre>{_text(chr(10).join(lines))}</pre>"
+
+    def _list(self, lines: list[str], i: int) -> tuple[str, int]:
+        first = _LIST_RE.match(lines[i])
+        marker = first.group(2)
+        ordered = marker[0].isdigit()
+        tag = "ol" if ordered else "ul"
+        start = int(marker[:-1]) if ordered else 1
+
+        def next_item(line):
+            match = _LIST_RE.match(line)
+            if match and not _RULE_RE.match(line) and match.group(2)[-1] == marker[-1] \
+                    and match.group(2)[0].isdigit() == ordered:
+                return match
+            return None
+
+        items = []
+        loose = False
+        n = len(lines)
+        while i < n:
+            match = next_item(lines[i])
+            if not match:
+                break
+            spacing = len(match.group(3).expandtabs(4))
+            if not match.group(4) or spacing > 4:
+                spacing = 1
+            content_indent = len(match.group(1)) + len(match.group(2)) + spacing
+            item = [match.group(4)]
+            i += 1
+            while i < n:
+                line = lines[i]
+                if not line.strip():
+                    item.append("")
+                elif len(line) - len(line.lstrip(" ")) >= content_indent:
+                    item.append(line[content_indent:])
+                elif item[-1] and not _LIST_RE.match(line) and not _starts_block(line):
+                    item.append(line.strip())  # lazy continuation of a paragraph
+                else:
+                    break
+                i += 1
+            while item and not item[-1]:
+                item.pop()
+                if i < n and next_item(lines[i]):
+                    loose = True  # a blank line between items
+            loose = loose or "" in item
+            items.append(item)
+
+        body = "".join(f"<li>{''.join(self.blocks(item, tight=not loose))}</li>"
+                       for item in items)
+        start_attr = f' start="{start}"' if start != 1 else ""
+        return f"<{tag}{start_attr}>{body}</{tag}>", i
+
+    def _table(self, lines: list[str], i: int) -> tuple[str, int]:
+        header = _split_row(lines[i])
+        aligns = []
+        for cell in _split_row(lines[i + 1]):
+            if cell.startswith(":") and cell.endswith(":"):
+                aligns.append(' align="center"')
+            elif cell.endswith(":"):
+                aligns.append(' align="right"')
+            else:
+                aligns.append("")
+        aligns += [""] * (len(header) - len(aligns))
+
+        def row(cells, tag):
+            cells = (cells + [""] * len(header))[:len(header)]
+            return "<tr>" + "".join(f"<{tag}{align}>{self.inline(cell)}</{tag}>"
+                                    for cell, align in zip(cells, aligns)) + "</tr>"
+
+        parts = [_TABLE_OPEN, row(header, "th")]
+        i += 2
+        while i < len(lines) and lines[i].strip() and not _starts_block(lines[i]):
+            parts.append(row(_split_row(lines[i]), "td"))
+            i += 1
+        parts.append("</table>")
+        return "".join(parts), i
+
+    # -- inlines -----------------------------------------------------------
+
+    def inline(self, text: str) -> str:
+        """HTML for the inline Markdown *text*."""
+        tokens = self._inline_tokens(text)
+        self._resolve_emphasis(tokens)
+        return "".join(
+            token.char * token.count if type(token) is _Delimiter else token
+            for token in tokens
+        )
+
+    def _inline_tokens(self, text: str) -> list:
+        """HTML strings and the _Delimiters between them."""
+        tokens: list = []
+        plain = []  # literal text waiting to be escaped
+
+        def flush():
+            if plain:
+                tokens.append(_text("".join(plain)))
+                plain.clear()
+
+        i, n = 0, len(text)
+        while i < n:
+            char = text[i]
+            if char == "\\" and i + 1 < n:
+                following = text[i + 1]
+                if following == "\n":
+                    flush()
+                    tokens.append("<br />")
+                    i += 2
+                    continue
+                if following in _PUNCTUATION:
+                    plain.append(following)
+                    i += 2
+                    continue
+            elif char == "\n":
+                # Two trailing spaces make a hard break, otherwise a space
+                trailing = 0
+                while plain and plain[-1] == " ":
+                    plain.pop()
+                    trailing += 1
+                flush()
+                tokens.append("<br />" if trailing >= 2 else " ")
+                i += 1
+                continue
+            elif char == "`":
+                run = n - i - len(text[i:].lstrip("`"))
+                close = text.find("`" * run, i + run)
+                while close >= 0 and text.startswith("`", close + run):
+                    close = text.find("`" * run, close + run + 1)
+                if close >= 0:
+                    code = text[i + run:close].replace("\n", " ")
+                    if code.startswith(" ") and code.endswith(" ") and code.strip():
+                        code = code[1:-1]
+                    flush()
+                    tokens.append(f"<code>{_text(code)}</code>")
+                    i = close + run
+                    continue
+                plain.append("`" * run)
+                i += run
+                continue
+            elif char == "[" or (char == "!" and text.startswith("[", i + 1)):
+                link = self._link(text, i + (char == "!"))
+                if link:
+                    label, dest, title, end = link
+                    flush()
+                    title_attr = f' title="{_attr(title)}"' if title else ""
+                    if char == "!":
+                        tokens.append(f'<img src="{_attr(self._image_src(dest))}" '
+                                      f'alt="{_attr(label)}"{title_attr} />')
+                    else:
+                        tokens.append(f'<a href="{_attr(dest)}"{title_attr}>'
+                                      f"{self.inline(label)}</a>")
+                    i = end
+                    continue
+            elif char == "<":
+                autolink = _AUTOLINK_RE.match(text, i)
+                if autolink:
+                    target = autolink.group(1)
+                    href = target if ":" in target else f"mailto:{target}"
+                    flush()
+                    tokens.append(f'<a href="{_attr(href)}">{_text(target)}</a>')
+                    i = autolink.end()
+                    continue
+                tag = _INLINE_TAG_RE.match(text, i)
+                if tag:
+                    # Inline HTML (e.g. html_fallback exports) passes through
+                    flush()
+                    tokens.append(tag.group(0))
+                    i = tag.end()
+                    continue
+            elif char == "&":
+                entity = _ENTITY_RE.match(text, i)
+                if entity:
+                    flush()
+                    tokens.append(entity.group(0))
+                    i = entity.end()
+                    continue
+            elif char in "*_~":
+                end = i
+                while end < n and text[end] == char:
+                    end += 1
+                before = text[i - 1] if i else " "
+                after = text[end] if end < n else " "
+                left = not after.isspace() and (
+                    after not in _PUNCTUATION or before.isspace() or before in _PUNCTUATION)
+                right = not before.isspace() and (
+                    before not in _PUNCTUATION or after.isspace() or after in _PUNCTUATION)
+                if char == "_":
+                    can_open = left and (not right or before in _PUNCTUATION)
+                    can_close = right and (not left or after in _PUNCTUATION)
+                else:
+                    can_open, can_close = left, right
+                flush()
+                tokens.append(_Delimiter(char, end - i, can_open, can_close))
+                i = end
+                continue
+            plain.append(char)
+            i += 1
+        flush()
+        return tokens
+
+    @staticmethod
+    def _resolve_emphasis(tokens: list):
+        """Pair delimiters into em/strong/s tags, innermost first (CommonMark's
+        "process emphasis", without its corner cases for mixed runs)."""
+        i = 0
+        while i < len(tokens):
+            closer = tokens[i]
+            if type(closer) is not _Delimiter or not closer.can_close or not closer.count:
+                i += 1
+                continue
+            j = i - 1
+            while j >= 0:
+                opener = tokens[j]
+                if type(opener) is _Delimiter and opener.char == closer.char \
+                        and opener.can_open and opener.count:
+                    odd_match = (opener.can_close or closer.can_open) \
+                        and (opener.length + closer.length) % 3 == 0 \
+                        and not (opener.length % 3 == 0 and closer.length % 3 == 0)
+                    if not odd_match:
+                        break
+                j -= 1
+            if j < 0 or (closer.char == "~" and min(opener.count, closer.count) < 2):
+                i += 1
+                continue
+            used = 2 if min(opener.count, closer.count) >= 2 else 1
+            tag = "s" if closer.char == "~" else _EMPHASIS_TAGS[used]
+            opener.count -= used
+            closer.count -= used
+            for inner in tokens[j + 1:i]:
+                if type(inner) is _Delimiter:
+                    inner.can_open = inner.can_close = False
+            tokens[i:i] = [f"</{tag}>"]
+            tokens[j + 1:j + 1] = [f"<{tag}>"]
+            i += 2  # still the closer, which may have more to give
+
+    @staticmethod
+    def _link(text: str, i: int) -> Optional[tuple]:
+        """(label, destination, title, end) for a [label](dest "title") at *i*."""
+        depth = 0
+        j = i
+        n = len(text)
+        while j < n:
+            char = text[j]
+            if char == "\\":
+                j += 2
+                continue
+            if char == "`":
+                close = text.find("`", j + 1)
+                j = close + 1 if close >= 0 else j + 1
+                continue
+            if char == "[":
+                depth += 1
+            elif char == "]":
+                depth -= 1
+                if depth == 0:
+                    break
+            j += 1
+        if j >= n or not text.startswith("(", j + 1):
+            return None
+        label = text[i + 1:j]
+
+        k = j + 2
+        while k < n and text[k] in " \t\n":
+            k += 1
+        if text.startswith("<", k):
+            close = text.find(">", k)
+            if close < 0:
+                return None
+            dest, k = text[k + 1:close], close + 1
+        else:
+            start, parens = k, 0
+            while k < n and not text[k].isspace():
+                if text[k] == "(":
+                    parens += 1
+                elif text[k] == ")":
+                    if parens == 0:
+                        break
+                    parens -= 1
+                k += 1
+            dest = text[start:k]
+        while k < n and text[k] in " \t\n":
+            k += 1
+        title = ""
+        if k < n and text[k] in "\"'(":
+            closing = ")" if text[k] == "(" else text[k]
+            close = text.find(closing, k + 1)
+            if close < 0:
+                return None
+            title, k = text[k + 1:close], close + 1
+            while k < n and text[k] in " \t\n":
+                k += 1
+        if k >= n or text[k] != ")":
+            return None
+        dest = re.sub(r"\\([!-/:-@\[-`{-~])", r"\1", dest)
+        return label, dest, title, k + 1
+
+    def _image_src(self, dest: str) -> str:
+        """A data URI for a local picture, so it loads like an embedded one."""
+        if self.base_dir is None or dest.startswith("data:") or ":" in dest.split("/", 1)[0]:
+            return dest
+        cached = self._images.get(dest)
+        if cached is None:
+            path = self.base_dir / unquote(dest)
+            mime = mimetypes.guess_type(path.name)[0]
+            try:
+                if not mime or not mime.startswith("image/"):
+                    raise OSError
+                cached = _data_uri(path.read_bytes(), mime)
+            except OSError:
+                cached = dest
+            self._images[dest] = cached
+        return cached
+
+
+def markdown_to_html(text: str, base_dir: Optional[Path] = None) -> str:
+    """Convert Markdown *text* into HTML for a note.
+
+    Images with a relative path are read from *base_dir* (the Markdown
+    file's folder) and embedded; remote ones and any that can't be read
+    keep their address.
+    """
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").expandtabs(4).split("\n")
+    body = "\n".join(_MarkdownReader(base_dir).blocks(lines))
+    return f"<html><body>{body}</body></html>"
+
+
+# ============================================================================
+# DOCX -> HTML
+# ============================================================================
+
+# Word's 16 highlight colors
+_HIGHLIGHT_COLORS = {
+    "black": "#000000", "blue": "#0000ff", "cyan": "#00ffff", "green": "#00ff00",
+    "magenta": "#ff00ff", "red": "#ff0000", "yellow": "#ffff00", "white": "#ffffff",
+    "darkBlue": "#000080", "darkCyan": "#008080", "darkGreen": "#008000",
+    "darkMagenta": "#800080", "darkRed": "#800000", "darkYellow": "#808000",
+    "darkGray": "#808080", "lightGray": "#c0c0c0",
+}
+_ALIGNMENT = {"center": "center", "right": "right", "end": "right", "both": "justify",
+              "distribute": "justify"}
+_HEADING_STYLE_RE = re.compile(r"^heading (\d)$", re.IGNORECASE)
+_LIST_STYLE_RE = re.compile(r"^list (bullet|number)(?: (\d))?$", re.IGNORECASE)
+_TWIPS_PER_PIXEL = 15  # 1440 per inch, at 96 dpi
+_EMU_PER_PIXEL = 9525
+_FALSE_VALUES = ("0", "false", "off", "none")
+# Containers whose runs belong to the paragraph they sit in
+_RUN_CONTAINERS = ("w:ins", "w:smartTag", "w:customXml", "w:fldSimple", "w:moveTo", "w:dir",
+                   "w:bdo")
+# Namespaces python-docx doesn't map a prefix for
+_MC = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+_VML = "{urn:schemas-microsoft-com:vml}"
+
+
+@functools.lru_cache(maxsize=None)
+def _qn(tag: str) -> str:
+    """python-docx's qn(), cached: the reader asks for the same few per run."""
+    from docx.oxml.ns import qn
+    return qn(tag)
+
+
+class _DocxReader:
+    """Walks a python-docx document's XML, writing HTML block by block.
+
+    lxml directly rather than python-docx's paragraph/run objects: those
+    skip hyperlinks and revisions, and cost a proxy object per run.
+    """
+
+    def __init__(self, document):
+        qn = _qn
+        self._part = document.part
+        self._style_names = {
+            style.get(qn("w:styleId")): style.find(qn("w:name")).get(qn("w:val"))
+            for style in document.styles.element.iter(qn("w:style"))
+            if style.find(qn("w:name")) is not None
+        }
+        self._run_containers = frozenset(qn(name) for name in _RUN_CONTAINERS)
+        self._numbering: Optional[dict] = None
+        self._images: dict[str, str] = {}
+        self._lists: list[str] = []  # tags of the lists open around the current item
+
+    def body_html(self, body) -> str:
+        parts = []
+        self._blocks(body, parts)
+        return "".join(parts)
+
+    # -- blocks ------------------------------------------------------------
+
+    def _blocks(self, container, parts: list):
+        qn = _qn
+        outer_lists, self._lists = self._lists, []
+        for child in container:
+            tag = child.tag
+            if tag == qn("w:p"):
+                self._paragraph(child, parts)
+            elif tag == qn("w:tbl"):
+                self._close_lists(parts)
+                self._table(child, parts)
+            elif tag in (qn("w:sdt"), qn("w:customXml")):
+                content = child.find(qn("w:sdtContent")) if tag == qn("w:sdt") else child
+                if content is not None:
+                    self._close_lists(parts)
+                    self._blocks(content, parts)
+        self._close_lists(parts)
+        self._lists = outer_lists
+
+    def _paragraph(self, p, parts: list):
+        qn = _qn
+        ppr = p.find(qn("w:pPr"))
+        style = ""
+        num_pr = None
+        if ppr is not None:
+            style_el = ppr.find(qn("w:pStyle"))
+            if style_el is not None:
+                style_id = style_el.get(qn("w:val"))
+                style = self._style_names.get(style_id, style_id)
+            num_pr = ppr.find(qn("w:numPr"))
+        content = self._inlines(p)
+
+        list_style = _LIST_STYLE_RE.match(style)
+        if list_style:
+            self._list_item(parts, int(list_style.group(2) or 1) - 1,
+                            list_style.group(1).lower() == "number", content)
+            return
+        if num_pr is not None:
+            level_el = num_pr.find(qn("w:ilvl"))
+            num_el = num_pr.find(qn("w:numId"))
+            level = int(level_el.get(qn("w:val"), 0)) if level_el is not None else 0
+            num_id = num_el.get(qn("w:val")) if num_el is not None else "0"
+            if num_id != "0":
+                self._list_item(parts, level, self._is_ordered(num_id, level), content)
+                return
+        self._close_lists(parts)
+
+        heading = _HEADING_STYLE_RE.match(style)
+        if heading or style == "Title":
+            level = min(int(heading.group(1)), 6) if heading else 1
+            parts.append(f"<h{level}>{content}</h{level}>")
+            return
+        parts.append(f"<p{self._paragraph_attrs(ppr)}>{content}</p>")
+
+    def _paragraph_attrs(self, ppr) -> str:
+        if ppr is None:
+            return ""
+        qn = _qn
+        attrs = ""
+        jc = ppr.find(qn("w:jc"))
+        if jc is not None and jc.get(qn("w:val")) in _ALIGNMENT:
+            attrs += f' align="{_ALIGNMENT[jc.get(qn("w:val"))]}"'
+        styles = []
+        ind = ppr.find(qn("w:ind"))
+        if ind is not None:
+            left = ind.get(qn("w:left")) or ind.get(qn("w:start"))
+            if left and left.lstrip("-").isdigit() and int(left) > 0:
+                styles.append(f"margin-left:{int(left) // _TWIPS_PER_PIXEL}px;")
+            first = ind.get(qn("w:firstLine"))
+            hanging = ind.get(qn("w:hanging"))
+            if first and first.isdigit() and int(first):
+                styles.append(f"text-indent:{int(first) // _TWIPS_PER_PIXEL}px;")
+            elif hanging and hanging.isdigit() and int(hanging):
+                styles.append(f"text-indent:-{int(hanging) // _TWIPS_PER_PIXEL}px;")
+        if styles:
+            attrs += f' style="{" ".join(styles)}"'
+        return attrs
+
+    def _is_ordered(self, num_id: str, level: int) -> bool:
+        """Whether list *num_id* numbers its items at *level* (vs. bullets)."""
+        if self._numbering is None:
+            self._numbering = self._read_numbering()
+        formats = self._numbering.get(num_id, {})
+        return formats.get(level, formats.get(0, "bullet")) != "bullet"
+
+    def _read_numbering(self) -> dict:
+        """numId -> {level: numFmt} from the numbering part, if there is one."""
+        qn = _qn
+        try:
+            numbering = self._part.numbering_part.element
+        except (KeyError, NotImplementedError):
+            return {}
+        abstract = {}
+        for definition in numbering.iter(qn("w:abstractNum")):
+            formats = {}
+            for lvl in definition.iter(qn("w:lvl")):
+                fmt = lvl.find(qn("w:numFmt"))
+                formats[int(lvl.get(qn("w:ilvl"), 0))] = \
+                    fmt.get(qn("w:val")) if fmt is not None else "decimal"
+            abstract[definition.get(qn("w:abstractNumId"))] = formats
+        result = {}
+        for num in numbering.iter(qn("w:num")):
+            ref = num.find(qn("w:abstractNumId"))
+            if ref is not None:
+                result[num.get(qn("w:numId"))] = abstract.get(ref.get(qn("w:val")), {})
+        return result
+
+    def _list_item(self, parts: list, level: int, ordered: bool, content: str):
+        tag = "ol" if ordered else "ul"
+        lists = self._lists
+        while len(lists) > level + 1:
+            parts.append(f"</li></{lists.pop()}>")
+        if len(lists) == level + 1 and lists[-1] != tag:
+            parts.append(f"</li></{lists.pop()}>")
+        if len(lists) == level + 1:
+            parts.append("</li>")  # the previous item at this level
+        while len(lists) < level + 1:
+            if lists and parts[-1] == f"<{lists[-1]}>":
+                parts.append("<li>")  # a level skipped over gets an empty item
+            lists.append(tag)
+            parts.append(f"<{tag}>")
+        parts.append(f"<li>{content}")
+
+    def _close_lists(self, parts: list):
+        while self._lists:
+            parts.append(f"</li></{self._lists.pop()}>")
+
+    def _table(self, tbl, parts: list):
+        qn = _qn
+        # Grid position, span and vertical-merge state of every cell, so that
+        # Word's merged cells become rowspan/colspan
+        rows = []
+        for tr in tbl.iter(qn("w:tr")):
+            if tr.getparent() is not tbl:
+                continue  # a nested table's row
+            column = 0
+            trpr = tr.find(qn("w:trPr"))
+            header = False
+            if trpr is not None:
+                before = trpr.find(qn("w:gridBefore"))
+                if before is not None:
+                    column = int(before.get(qn("w:val"), 0))
+                header = trpr.find(qn("w:tblHeader")) is not None
+            cells = []
+            for tc in tr.findall(qn("w:tc")):
+                tcpr = tc.find(qn("w:tcPr"))
+                span, merge, fill = 1, None, None
+                if tcpr is not None:
+                    span_el = tcpr.find(qn("w:gridSpan"))
+                    if span_el is not None:
+                        span = int(span_el.get(qn("w:val"), 1))
+                    merge_el = tcpr.find(qn("w:vMerge"))
+                    if merge_el is not None:
+                        merge = merge_el.get(qn("w:val"), "continue")
+                    shd = tcpr.find(qn("w:shd"))
+                    if shd is not None and shd.get(qn("w:fill"), "auto") != "auto":
+                        fill = shd.get(qn("w:fill"))
+                cells.append([tc, column, span, merge, fill, 1])
+                column += span
+            rows.append((header, cells))
+
+        for index, (_header, cells) in enumerate(rows):
+            for cell in cells:
+                if cell[3] != "restart":
+                    continue
+                for _h, below in rows[index + 1:]:
+                    if not any(c[1] == cell[1] and c[3] == "continue" for c in below):
+                        break
+                    cell[5] += 1
+
+        parts.append(_TABLE_OPEN)
+        for header, cells in rows:
+            parts.append("<tr>")
+            tag = "th" if header else "td"
+            for tc, _column, span, merge, fill, rowspan in cells:
+                if merge == "continue":
+                    continue
+                attrs = f' colspan="{span}"' if span > 1 else ""
+                attrs += f' rowspan="{rowspan}"' if rowspan > 1 else ""
+                attrs += f' bgcolor="#{fill}"' if fill else ""
+                parts.append(f"<{tag}{attrs}>")
+                self._blocks(tc, parts)
+                parts.append(f"</{tag}>")
+            parts.append("</tr>")
+        parts.append("</table>")
+
+    # -- inlines -----------------------------------------------------------
+
+    def _inlines(self, element) -> str:
+        qn = _qn
+        parts = []
+        for child in element:
+            tag = child.tag
+            if tag == qn("w:r"):
+                parts.append(self._run(child))
+            elif tag == qn("w:hyperlink"):
+                href = None
+                r_id = child.get(qn("r:id"))
+                if r_id and r_id in self._part.rels:
+                    href = self._part.rels[r_id].target_ref
+                elif child.get(qn("w:anchor")):
+                    href = "#" + child.get(qn("w:anchor"))
+                inner = self._inlines(child)
+                parts.append(f'<a href="{_attr(href)}">{inner}</a>' if href else inner)
+            elif tag in self._run_containers:
+                parts.append(self._inlines(child))
+            elif tag == qn("w:sdt"):
+                content = child.find(qn("w:sdtContent"))
+                if content is not None:
+                    parts.append(self._inlines(content))
+        return "".join(parts)
+
+    def _run(self, r) -> str:
+        qn = _qn
+        content = []
+        for child in r:
+            tag = child.tag
+            if tag == qn("w:t"):
+                content.append(_text(child.text or ""))
+            elif tag == qn("w:tab"):
+                content.append(_TAB_HTML)
+            elif tag == qn("w:br"):
+                if child.get(qn("w:type")) not in ("page", "column"):
+                    content.append("<br />")
+            elif tag == qn("w:cr"):
+                content.append("<br />")
+            elif tag in (qn("w:noBreakHyphen"), qn("w:softHyphen")):
+                content.append("-" if tag == qn("w:noBreakHyphen") else "")
+            elif tag in (qn("w:drawing"), qn("w:pict"), _MC + "AlternateContent"):
+                content.append(self._pictures(child))
+        html = "".join(content)
+        if not html:
+            return ""
+        rpr = r.find(qn("w:rPr"))
+        return self._formatted(rpr, html) if rpr is not None else html
+
+    def _formatted(self, rpr, html: str) -> str:
+        """*html* wrapped in the tags and span style for the run properties *rpr*."""
+        qn = _qn
+        props = {child.tag: child for child in rpr}
+
+        def value(name, default=None):
+            el = props.get(qn(name))
+            return None if el is None else el.get(qn("w:val"), default)
+
+        def on(name):
+            return value(name, "true") not in (None, *_FALSE_VALUES)
+
+        styles = []
+        fonts = props.get(qn("w:rFonts"))
+        if fonts is not None:
+            family = fonts.get(qn("w:ascii")) or fonts.get(qn("w:hAnsi"))
+            if family:
+                styles.append(f"font-family:'{_attr(family)}';")
+        size = value("w:sz")
+        if size and size.isdigit():
+            styles.append(f"font-size:{int(size) / 2:g}pt;")
+        color = value("w:color", "auto")
+        if color and color != "auto":
+            styles.append(f"color:#{color};")
+        highlight = value("w:highlight")
+        shading = props.get(qn("w:shd"))
+        if highlight in _HIGHLIGHT_COLORS:
+            styles.append(f"background-color:{_HIGHLIGHT_COLORS[highlight]};")
+        elif shading is not None and shading.get(qn("w:fill"), "auto") != "auto":
+            styles.append(f"background-color:#{shading.get(qn('w:fill'))};")
+
+        if on("w:b"):
+            html = f"<b>{html}</b>"
+        if on("w:i"):
+            html = f"<i>{html}</i>"
+        if value("w:u", "single") not in (None, *_FALSE_VALUES):
+            html = f"<u>{html}</u>"
+        if on("w:strike") or on("w:dstrike"):
+            html = f"<s>{html}</s>"
+        vert = value("w:vertAlign")
+        if vert in ("superscript", "subscript"):
+            tag = "sup" if vert == "superscript" else "sub"
+            html = f"<{tag}>{html}</{tag}>"
+        if styles:
+            html = f'<span style="{" ".join(styles)}">{html}</span>'
+        return html
+
+    def _pictures(self, element) -> str:
+        """<img> tags for the pictures in a w:drawing, a legacy w:pict, or
+        the first alternative of an mc:AlternateContent that has any."""
+        qn = _qn
+        if element.tag == _MC + "AlternateContent":
+            for alternative in element:
+                html = self._pictures(alternative)
+                if html:
+                    return html
+            return ""
+        extent = next(element.iter(qn("wp:extent")), None)
+        doc_pr = next(element.iter(qn("wp:docPr")), None)
+        alt = (doc_pr.get("descr") or doc_pr.get("title") or "") if doc_pr is not None else ""
+        size = ""
+        if extent is not None:
+            width = round(int(extent.get("cx", 0)) / _EMU_PER_PIXEL)
+            height = round(int(extent.get("cy", 0)) / _EMU_PER_PIXEL)
+            if width and height:
+                size = f' width="{width}" height="{height}"'
+        refs = [blip.get(qn("r:embed")) for blip in element.iter(qn("a:blip"))]
+        refs += [data.get(qn("r:id")) for data in element.iter(_VML + "imagedata")]
+        images = []
+        for r_id in refs:
+            src = self._image_src(r_id)
+            if src:
+                images.append(f'<img src="{src}" alt="{_attr(alt)}"{size} />')
+        return "".join(images)
+
+    def _image_src(self, r_id: Optional[str]) -> Optional[str]:
+        """A data URI of the image part *r_id*, built once per part."""
+        if not r_id:
+            return None
+        if r_id not in self._images:
+            try:
+                part = self._part.related_parts[r_id]
+                self._images[r_id] = _data_uri(part.blob, part.content_type)
+            except (KeyError, AttributeError):
+                self._images[r_id] = None
+        return self._images[r_id]
+
+
+def docx_to_html(filepath: Path) -> str:
+    """Convert the Word document at *filepath* into HTML for a note."""
+    try:
+        from docx import Document
+    except ImportError as exc:
+        raise ImportError(
+            "The 'python-docx' package is required to open Word documents. "
+            "Install it with: pip install python-docx"
+        ) from exc
+
+    document = Document(str(filepath))
+    body = _DocxReader(document).body_html(document.element.body)
+    # Spaces in a Word run are significant, as in Qt's own toHtml()
+    return ('<html><head><style type="text/css">p, li { white-space: pre-wrap; }</style>'
+            f"</head><body>{body}</body></html>")
@@ -0,0 +1,70 @@
+# ============================================================================
+# Language Detection
+# cheap stopword-based guess at a note's language, no dictionaries needed
+# ============================================================================
+#
+# Good enough to pick a spellcheck dictionary: every language's most common
+# function words ("the", "und", "les", ...) make up a large share of any
+# real prose, and the short lists below barely overlap. Counting hits over
+# a few KB of text costs microseconds and - unlike trying each dictionary
+# in turn - never loads a word list we end up not needing.
+
+import re
+from typing import Iterable, Optional
+
+STOPWORDS: dict[str, frozenset[str]] = {
+    "en": frozenset(
+        "the and of to in is that it for was on are with as be this have "
+        "not but they you at by from or which we an were has had".split()
+    ),
+    "fr": frozenset(
+        "le la les et des est un une du dans que qui pour pas sur au avec "
+        "ce il elle sont par plus ne se nous vous mais ou aux".split()
+    ),
+    "de": frozenset(
+        "der die das und ist nicht ein eine zu den von mit sich des auf "
+        "für im dem auch es an als wird sind ich sie wir oder aber".split()
+    ),
+    "es": frozenset(
+        "el la los las y es en que del un una por con para se no su al "
+        "lo como más pero sus le ya o este sí porque".split()
+    ),
+    "it": frozenset(
+        "il di che è la e per un una non sono del della con si le da gli "
+        "nel alla ma come più anche questo ha lo dei".split()
+    ),
+    "pt": frozenset(
+        "o os de que e do da em um uma para é com não uma dos as se na "
+        "por mais mas ao ele das foi seu sua ou".split()
+    ),
+    "nl": frozenset(
+        "de het een en van is dat in te niet op zijn met voor er maar "
+        "die ook als aan bij wordt zij ik dit".split()
+    ),
+}
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+")
+
+# Below this many stopword hits the sample says too little to go on.
+MIN_HITS = 3
+
+
+def detect_language(text: str, languages: Optional[Iterable[str]] = None) -> Optional[str]:
+    """
+    Best guess at the language of `text` among `languages` (default: all
+    with a stopword list), or None if there isn't enough evidence yet.
+    """
+    candidates = [lang for lang in (languages or STOPWORDS) if lang in STOPWORDS]
+    scores = dict.fromkeys(candidates, 0)
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        for lang in candidates:
+            if token in STOPWORDS[lang]:
+                scores[lang] += 1
+
+    if not scores:
+        return None
+    best = max(scores, key=scores.get)
+    if scores[best] < MIN_HITS:
+        return None
+    return best
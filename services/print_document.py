@@ -0,0 +1,620 @@
+# ============================================================================
+# Print Document
+# builds the QTextDocument that printing and PDF export render, from a
+# DocumentTree instead of a second HTML parse
+# ============================================================================
+#
+# Printing used to splice a <style> block into get_content_html() and hand
+# the whole string back to QTextDocument.setHtml(), re-parsing a note the
+# other exporters had already parsed. Here the cached DocumentTree is
+# written straight into a fresh QTextDocument with a QTextCursor, and the
+# print font size is applied to the formats directly rather than via CSS.
+#
+# Nothing here touches a widget, so PDF export can build and print the
+# document on a worker thread from a DocumentTree snapshot (print_pages and
+# save_as_pdf report progress per block and per page for that).
+#
+# Laying a long note out is the expensive part, so layout_print_document()
+# returns a PrintLayout: the document laid out once for a PageSetup, which
+# the print preview draws pages from and PDF export then writes without
+# laying it out again. Each page also gets a signature of what decides its
+# pixels - the blocks on it, where they sit, the sheet and margins - but not
+# its number, which previews draw on top; pages that keep their signature
+# across an edit or a new layout don't have to be drawn again.
+
+import atexit
+import base64
+import binascii
+import os
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from PyQt6.QtCore import (
+    QBuffer, QCoreApplication, QMarginsF, QObject, QRectF, Qt, QThread, QUrl,
+    pyqtSignal, pyqtSlot,
+)
+from PyQt6.QtGui import (
+    QAbstractTextDocumentLayout, QColor, QFont, QFontMetrics, QImage,
+    QPagedPaintDevice, QPageLayout, QPageSize, QPainter, QPalette, QPdfWriter,
+    QTextBlockFormat, QTextCharFormat, QTextCursor, QTextDocument, QTextFormat,
+    QTextImageFormat, QTextLength, QTextListFormat, QTextTableFormat,
+)
+
+from services.document_tree import (
+    CodeBlock, DocumentTree, Heading, Image, LineBreak, ListBlock, Paragraph,
+    Rule, Run, Table, parse_html,
+)
+
+# Heading size relative to the body text (h1 is twice the body size)
+_HEADING_SCALE = {1: 2.0, 2: 5 / 3, 3: 1.5, 4: 1.25, 5: 1.1, 6: 1.0}
+_LINE_HEIGHT_PERCENT = 150
+_CODE_FONT = "Courier New"
+_LINK_COLOR = "#0000ff"
+_LINE_SEPARATOR = "\u2028"  # a line break within a block, like <br>
+_ALIGNMENTS = {
+    "center": Qt.AlignmentFlag.AlignHCenter,
+    "right": Qt.AlignmentFlag.AlignRight,
+    "justify": Qt.AlignmentFlag.AlignJustify,
+    "left": Qt.AlignmentFlag.AlignLeft,
+}
+
+# QTextDocument.print() lays a document out in 96 dpi "source" pixels scaled
+# up to the printer's resolution, with a 2 cm frame margin inside the page
+# margins and the page number in the bottom right corner; print_pages keeps
+# that look.
+_SOURCE_DPI = 96
+_FRAME_MARGIN_CM = 2
+_PDF_RESOLUTION = 1200
+_PDF_MARGINS_MM = 25.4
+
+# Called as progress(done, total); may raise to abort (see export_services).
+Progress = Optional[Callable[[int, int], None]]
+
+
+PageSetup = namedtuple("PageSetup", ["font_size", "page_size", "margin_mm"],
+                       defaults=(12, QPageSize.PageSizeId.A4, _PDF_MARGINS_MM))
+PageSetup.__doc__ = """Body text size (pt), paper (a QPageSize.PageSizeId) and page margin (mm)."""
+
+
+def build_print_document(tree: DocumentTree, font_size: float = 12,
+                         progress: Progress = None,
+                         block_starts: Optional[list] = None) -> QTextDocument:
+    """A QTextDocument laid out for print at *font_size* pt body text.
+
+    *block_starts*, if given, receives the document position where each
+    of the tree's top-level blocks begins.
+    """
+    document = QTextDocument()
+    font = QFont(tree.default_font) if tree.default_font else QFont()
+    font.setPointSizeF(font_size)
+    document.setDefaultFont(font)
+    _PrintDocumentBuilder(document, font_size).write_blocks(QTextCursor(document), tree.blocks,
+                                                           progress, block_starts)
+    return document
+
+
+def prepare_pages(document: QTextDocument, device: QPagedPaintDevice):
+    """Lay *document* out in pages of *device* (a QPrinter or QPdfWriter).
+
+    The layout keeps using *device* for font metrics, so it must outlive
+    the document. Preparing again for a device of the same size and
+    resolution leaves the layout as it is.
+    """
+    document.documentLayout().setPaintDevice(device)
+    margin = round(_FRAME_MARGIN_CM / 2.54 * _SOURCE_DPI)
+    frame_format = document.rootFrame().frameFormat()
+    if frame_format.margin() != margin:
+        frame_format.setMargin(margin)
+        document.rootFrame().setFrameFormat(frame_format)
+    body = QRectF(0, 0, device.width(), device.height())
+    # setPageSize() lays the whole document out again, even for the same size
+    if document.pageSize() != body.size():
+        document.setPageSize(body.size())
+
+
+def draw_page(painter: QPainter, document: QTextDocument, page: int, number: bool = True):
+    """Paint *page* (0-based) of a prepare_pages() document, in the device
+    pixels it was laid out in, with the page number in the bottom right
+    unless *number* is False."""
+    layout = document.documentLayout()
+    size = document.pageSize()
+
+    context = QAbstractTextDocumentLayout.PaintContext()
+    palette = context.palette
+    palette.setColor(QPalette.ColorRole.Text, QColor(Qt.GlobalColor.black))
+    context.palette = palette
+
+    view = QRectF(0, page * size.height(), size.width(), size.height())
+    painter.save()
+    painter.translate(0, -view.top())
+    painter.setClipRect(view)
+    context.clip = view
+    layout.draw(painter, context)
+    painter.restore()
+    if number:
+        draw_page_number(painter, document, page)
+
+
+def draw_page_number(painter: QPainter, document: QTextDocument, page: int):
+    """Paint the number of *page* in its bottom right corner, in the page's
+    own coordinates (as draw_page() leaves the painter)."""
+    device = document.documentLayout().paintDevice()
+    size = document.pageSize()
+    margin = document.rootFrame().frameFormat().margin()
+    number_x = size.width() - margin * device.logicalDpiX() / _SOURCE_DPI
+    number_y = (size.height() - margin * device.logicalDpiY() / _SOURCE_DPI
+                + QFontMetrics(document.defaultFont(), device).ascent()
+                + 5 * device.logicalDpiY() / 72)
+    painter.save()
+    # In the layout device's pixels, so a preview image gets the same size
+    font = QFont(document.defaultFont())
+    font.setPixelSize(round(font.pointSizeF() * device.logicalDpiY() / 72))
+    painter.setFont(font)
+    number = str(page + 1)
+    painter.drawText(round(number_x - painter.fontMetrics().horizontalAdvance(number)),
+                     round(number_y), number)
+    painter.restore()
+
+
+def print_pages(document: QTextDocument, device: QPagedPaintDevice, progress: Progress = None):
+    """Print *document* onto *device* (a QPrinter or QPdfWriter) page by page.
+
+    Produces the same pages as ``QTextDocument.print()``, but lays out
+    *document* itself instead of a clone and calls progress(page, pages)
+    after each page, so it must be a throwaway print document (or one
+    already prepared for a device like this one).
+    """
+    painter = QPainter()
+    if not painter.begin(device):
+        raise OSError("Could not start painting on the print device")
+    try:
+        prepare_pages(document, device)
+        page_count = document.pageCount()
+        for page in range(page_count):
+            if page:
+                device.newPage()
+            draw_page(painter, document, page)
+            if progress is not None:
+                progress(page + 1, page_count)
+    finally:
+        painter.end()
+
+
+def _pdf_writer(target: Union[str, QBuffer], setup: PageSetup) -> QPdfWriter:
+    writer = QPdfWriter(target)
+    writer.setResolution(_PDF_RESOLUTION)
+    writer.setPageSize(QPageSize(setup.page_size))
+    margin = setup.margin_mm
+    writer.setPageMargins(QMarginsF(margin, margin, margin, margin), QPageLayout.Unit.Millimeter)
+    return writer
+
+
+def _write_pdf(filepath: Path, write: Callable[[QPdfWriter], None], setup: PageSetup):
+    """Run write(writer) on a PDF writer for a file beside *filepath*, which
+    is moved into place once complete."""
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    partial = filepath.with_name(filepath.name + ".part")
+    try:
+        writer = _pdf_writer(str(partial), setup)
+        write(writer)
+        del writer  # closes the file
+        os.replace(partial, filepath)
+    finally:
+        if partial.exists():
+            partial.unlink()
+
+
+def save_as_pdf(tree: DocumentTree, filepath: Path, font_size: float = 12,
+                progress: Progress = None) -> "PrintLayout":
+    """Render a note to an A4 PDF at *filepath* with one inch margins.
+
+    *progress* sees laying the document out as the first half of the work
+    and printing its pages as the second, reported in thousandths. The PDF
+    is written beside *filepath* and moved into place once complete.
+    Returns the layout, for writing or previewing the same pages again.
+    """
+    def phase(start: int):
+        if progress is None:
+            return None
+        return lambda done, total: progress(start + 500 * done // max(total, 1), 1000)
+
+    layout = layout_print_document(tree, PageSetup(font_size), phase(0))
+    layout.write_pdf(filepath, phase(500))
+    return layout
+
+
+# ============================================================================
+# Cached layout
+# ============================================================================
+
+def _page_signatures(document: QTextDocument, tree: DocumentTree, block_starts: list,
+                     font_size: float, geometry: tuple) -> list:
+    """A hash per page of the top-level tree blocks on it, their offsets,
+    and the page *geometry* (sheet and body rectangles).
+
+    Two layouts draw a page identically, page number aside, when its
+    signature matches, so a preview can keep the pages an edit or a new
+    setting didn't move.
+    """
+    layout = document.documentLayout()
+    page_height = document.pageSize().height()
+    extents = {}  # tree block index -> (top, bottom)
+    it = document.rootFrame().begin()
+    while not it.atEnd():
+        frame = it.currentFrame()
+        if frame is not None:
+            rect, position = layout.frameBoundingRect(frame), frame.firstPosition()
+        else:
+            block = it.currentBlock()
+            rect, position = layout.blockBoundingRect(block), block.position()
+        index = max(bisect_right(block_starts, position) - 1, 0)
+        top, bottom = extents.get(index, (rect.top(), rect.bottom()))
+        extents[index] = (min(top, rect.top()), max(bottom, rect.bottom()))
+        it += 1
+
+    # The text size and font decide how every block draws
+    style = (font_size, tree.default_font)
+    pages = [[] for _ in range(document.pageCount())]
+    for index, (top, bottom) in sorted(extents.items()):
+        fingerprint = hash((style, repr(tree.blocks[index]))) if index < len(tree.blocks) else None
+        first = int(top // page_height)
+        last = int(max(top, bottom - 1) // page_height)
+        for page in range(max(first, 0), min(last, len(pages) - 1) + 1):
+            pages[page].append((fingerprint, round(top - page * page_height, 1)))
+    return [hash((geometry, tuple(items))) for items in pages]
+
+
+class PrintLayout:
+    """
+    A note's print document, laid out once for a PageSetup.
+
+    Built by layout_print_document(), on any thread that outlives it (see
+    PrintLayoutRunner). After that it is only used by one thread at a time
+    (``lock`` is held while drawing), for preview images, printing and
+    writing PDFs, none of which lay it out again. ``signatures`` has one
+    entry per page (see _page_signatures).
+    """
+
+    def __init__(self, tree: DocumentTree, setup: PageSetup, document: QTextDocument,
+                 device: QPdfWriter, buffer: QBuffer, signatures: list):
+        self.tree = tree
+        self.setup = setup
+        self.document = document
+        self.signatures = signatures
+        self.lock = threading.Lock()
+        # The layout measures text with the device: both stay alive with it
+        self._device = device
+        self._buffer = buffer
+
+    @property
+    def page_count(self) -> int:
+        return len(self.signatures)
+
+    def move_to_main_thread(self):
+        """Hand the Qt objects to the GUI thread (call from the building thread)."""
+        main = QCoreApplication.instance().thread()
+        for obj in (self.document, self._device, self._buffer):
+            obj.moveToThread(main)
+
+    def render_page(self, page: int, width: int, number: bool = True) -> QImage:
+        """Page *page* as a *width* pixels wide image of the whole sheet,
+        without the page number if *number* is False (see number_page())."""
+        page_layout = self._device.pageLayout()
+        sheet = page_layout.fullRectPixels(self._device.resolution())
+        image = QImage(width, round(sheet.height() * width / sheet.width()),
+                       QImage.Format.Format_RGB32)
+        image.fill(Qt.GlobalColor.white)
+        painter = self._page_painter(image)
+        with self.lock:
+            draw_page(painter, self.document, page, number)
+        painter.end()
+        return image
+
+    def number_page(self, image: QImage, page: int) -> QImage:
+        """A copy of a render_page(number=False) *image* with *page*'s number."""
+        numbered = image.copy()
+        painter = self._page_painter(numbered)
+        with self.lock:
+            draw_page_number(painter, self.document, page)
+        painter.end()
+        return numbered
+
+    def _page_painter(self, image: QImage) -> QPainter:
+        """A painter mapping the page's device pixels onto *image* (the sheet)."""
+        page_layout = self._device.pageLayout()
+        resolution = self._device.resolution()
+        sheet = page_layout.fullRectPixels(resolution)
+        body = page_layout.paintRectPixels(resolution)
+        scale = image.width() / sheet.width()
+        painter = QPainter(image)
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing
+                               | QPainter.RenderHint.TextAntialiasing
+                               | QPainter.RenderHint.SmoothPixmapTransform)
+        painter.scale(scale, scale)
+        painter.translate(body.left(), body.top())
+        return painter
+
+    def write_pdf(self, filepath: Path, progress: Progress = None):
+        """Write the pages to a PDF at *filepath*, reusing the layout."""
+        def write(writer):
+            with self.lock:
+                try:
+                    print_pages(self.document, writer, progress)
+                finally:
+                    # Back to the layout's own device: the writer is about to go
+                    prepare_pages(self.document, self._device)
+
+        _write_pdf(filepath, write, self.setup)
+
+    def print_to(self, device: QPagedPaintDevice, progress: Progress = None):
+        """Print onto *device*; the layout is reused if it has the same page
+        size and resolution, otherwise a fresh document is laid out for it."""
+        if device.width() == self._device.width() and device.height() == self._device.height() \
+                and device.logicalDpiX() == self._device.logicalDpiX() \
+                and device.logicalDpiY() == self._device.logicalDpiY():
+            with self.lock:
+                try:
+                    print_pages(self.document, device, progress)
+                finally:
+                    prepare_pages(self.document, self._device)
+        else:
+            print_pages(build_print_document(self.tree, self.setup.font_size), device, progress)
+
+
+def layout_print_document(tree: DocumentTree, setup: PageSetup = PageSetup(),
+                          progress: Progress = None) -> PrintLayout:
+    """Build and lay out the print document of *tree* for *setup*."""
+    block_starts: list = []
+    document = build_print_document(tree, setup.font_size, progress, block_starts)
+    buffer = QBuffer()
+    device = _pdf_writer(buffer, setup)
+    prepare_pages(document, device)
+    document.pageCount()  # lays out every page now, on this thread
+    page_layout = device.pageLayout()
+    geometry = tuple(round(value, 2) for rect in (page_layout.fullRect(QPageLayout.Unit.Point),
+                                                  page_layout.paintRect(QPageLayout.Unit.Point))
+                     for value in rect.getRect())
+    return PrintLayout(tree, setup, document, device, buffer,
+                       _page_signatures(document, tree, block_starts, setup.font_size, geometry))
+
+
+class _PrintLayoutWorker(QObject):
+    """Lives on the runner's thread; requests arrive through a queued signal."""
+
+    finished = pyqtSignal(object, object)
+    failed = pyqtSignal(object, str)
+
+    @pyqtSlot(object, object, object)
+    def run(self, source, setup: PageSetup, context):
+        try:
+            tree = source if isinstance(source, DocumentTree) else parse_html(source)
+            layout = layout_print_document(tree, setup)
+            layout.move_to_main_thread()
+            self.finished.emit(context, layout)
+        except Exception as e:
+            self.failed.emit(context, str(e))
+
+
+class PrintLayoutRunner(QObject):
+    """
+    Lays out print documents on one background thread, oldest request first.
+
+    Qt caches fonts per thread and a laid-out document points into that
+    cache, so a PrintLayout can be drawn from any thread, but only while
+    the thread that laid it out is still running. The runner's thread
+    therefore lives as long as the runner, rather than one per layout; use
+    shared_layout_runner() instead of making more. Signals are delivered on
+    the GUI thread, with the *context* given to submit().
+    """
+
+    layout_ready = pyqtSignal(object, object)   # context, PrintLayout
+    layout_failed = pyqtSignal(object, str)     # context, error message
+
+    _dispatch = pyqtSignal(object, object, object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._thread = QThread(self)
+        self._worker = _PrintLayoutWorker()
+        self._worker.moveToThread(self._thread)
+        self._dispatch.connect(self._worker.run)
+        self._worker.finished.connect(self.layout_ready)
+        self._worker.failed.connect(self.layout_failed)
+        self._thread.start()
+
+    def submit(self, source: Union[DocumentTree, str, list[str]], setup: PageSetup, context=None):
+        """Queue a layout of *source* (a DocumentTree, or HTML to parse)."""
+        self._dispatch.emit(source, setup, context)
+
+    def shutdown(self, timeout_ms: int = 5000):
+        self._thread.quit()
+        self._thread.wait(timeout_ms)
+
+
+_shared_runner: Optional[PrintLayoutRunner] = None
+
+
+def shared_layout_runner() -> PrintLayoutRunner:
+    """The application's PrintLayoutRunner, started on first use."""
+    global _shared_runner
+    if _shared_runner is None:
+        app = QCoreApplication.instance()
+        _shared_runner = PrintLayoutRunner(app)
+        app.aboutToQuit.connect(_shared_runner.shutdown)
+        # Tests never quit the application, and its thread must not outlive it
+        atexit.register(_shared_runner.shutdown)
+    return _shared_runner
+
+
+class _PrintDocumentBuilder:
+    """Writes tree blocks into a QTextDocument through a QTextCursor."""
+
+    def __init__(self, document: QTextDocument, font_size: float):
+        self.document = document
+        self.font_size = font_size
+        self._image_count = 0
+
+    def write_blocks(self, cursor: QTextCursor, blocks: list, progress: Progress = None,
+                     block_starts: Optional[list] = None):
+        # The cursor starts in an empty block (a new document, a table cell,
+        # or the block Qt adds after a table), which the first block reuses.
+        fresh = True
+        for done, block in enumerate(blocks, 1):
+            kind = type(block)
+            if block_starts is not None:
+                block_starts.append(cursor.position() + (0 if fresh else 1))
+            if kind is Paragraph:
+                block_format = self._block_format()
+                if block.align in _ALIGNMENTS:
+                    block_format.setAlignment(_ALIGNMENTS[block.align])
+                if block.indent > 0:
+                    block_format.setIndent(block.indent)
+                if block.text_indent:
+                    block_format.setTextIndent(block.text_indent)
+                self._begin_block(cursor, block_format, fresh)
+                self._write_inlines(cursor, block.inlines, self.font_size)
+            elif kind is Heading:
+                self._begin_block(cursor, self._block_format(), fresh)
+                size = round(self.font_size * _HEADING_SCALE.get(block.level, 1.0))
+                self._write_inlines(cursor, block.inlines, size, bold=True)
+            elif kind is CodeBlock:
+                block_format = self._block_format()
+                block_format.setNonBreakableLines(True)
+                self._begin_block(cursor, block_format, fresh)
+                cursor.insertText(block.text.replace("\n", _LINE_SEPARATOR),
+                                  self._char_format(Run("", code=True), self.font_size))
+            elif kind is ListBlock:
+                self._write_list(cursor, block, 1, fresh)
+            elif kind is Table:
+                self._write_table(cursor, block)
+            elif kind is Rule:
+                block_format = self._block_format()
+                block_format.setProperty(
+                    QTextFormat.Property.BlockTrailingHorizontalRulerWidth,
+                    QTextLength(QTextLength.Type.PercentageLength, 100),
+                )
+                self._begin_block(cursor, block_format, fresh)
+            else:
+                continue
+            fresh = kind is Table
+            if progress is not None:
+                progress(done, len(blocks))
+
+    # -- blocks ------------------------------------------------------------
+
+    @staticmethod
+    def _block_format() -> QTextBlockFormat:
+        block_format = QTextBlockFormat()
+        block_format.setLineHeight(_LINE_HEIGHT_PERCENT,
+                                   QTextBlockFormat.LineHeightTypes.ProportionalHeight.value)
+        return block_format
+
+    @staticmethod
+    def _begin_block(cursor: QTextCursor, block_format: QTextBlockFormat, fresh: bool):
+        if fresh:
+            cursor.setBlockFormat(block_format)
+        else:
+            cursor.insertBlock(block_format)
+
+    def _write_list(self, cursor: QTextCursor, block: ListBlock, level: int, fresh: bool):
+        list_format = QTextListFormat()
+        list_format.setStyle(QTextListFormat.Style.ListDecimal if block.ordered
+                             else QTextListFormat.Style.ListDisc)
+        list_format.setIndent(level)
+        text_list = None
+        for item in block.items:
+            self._begin_block(cursor, self._block_format(), fresh)
+            fresh = False
+            if text_list is None:
+                text_list = cursor.createList(list_format)
+            else:
+                text_list.add(cursor.block())
+            self._write_inlines(cursor, item.inlines, self.font_size)
+            for sublist in item.sublists:
+                self._write_list(cursor, sublist, level + 1, False)
+
+    def _write_table(self, cursor: QTextCursor, block: Table):
+        # insertTable() starts its own block, and Qt always adds an empty
+        # one after the table, which the next block written then reuses.
+        cols = max(len(row) for row in block.rows)
+        table_format = QTextTableFormat()
+        table_format.setBorder(1)
+        table_format.setCellPadding(4)
+        table_format.setCellSpacing(0)
+        table_format.setBorderCollapse(True)
+        table = cursor.insertTable(len(block.rows), cols, table_format)
+        for row_index, row in enumerate(block.rows):
+            for col_index, cell in enumerate(row):
+                self.write_blocks(table.cellAt(row_index, col_index).firstCursorPosition(),
+                                  cell.blocks)
+        cursor.setPosition(table.lastPosition() + 1)
+
+    # -- inlines -----------------------------------------------------------
+
+    def _write_inlines(self, cursor: QTextCursor, inlines: list, size: float, bold: bool = False):
+        for item in inlines:
+            kind = type(item)
+            if kind is Run:
+                cursor.insertText(item.text, self._char_format(item, size, bold))
+            elif kind is LineBreak:
+                cursor.insertText(_LINE_SEPARATOR)
+            elif kind is Image:
+                self._insert_image(cursor, item)
+
+    def _char_format(self, run: Run, size: float, bold: bool = False) -> QTextCharFormat:
+        char_format = QTextCharFormat()
+        if run.code:
+            char_format.setFontFamilies([_CODE_FONT])
+            char_format.setFontPointSize(run.size or size - 1)
+        else:
+            if run.font:
+                char_format.setFontFamilies([run.font])
+            char_format.setFontPointSize(run.size or size)
+        if bold or run.bold:
+            char_format.setFontWeight(QFont.Weight.Bold)
+        if run.italic:
+            char_format.setFontItalic(True)
+        if run.underline:
+            char_format.setFontUnderline(True)
+        if run.strike:
+            char_format.setFontStrikeOut(True)
+
+        color = QColor(run.color) if run.color else None
+        if color is not None and color.isValid():
+            char_format.setForeground(color)
+        highlight = QColor(run.highlight) if run.highlight else None
+        if highlight is not None and highlight.isValid():
+            char_format.setBackground(highlight)
+
+        if run.href:
+            char_format.setAnchor(True)
+            char_format.setAnchorHref(run.href)
+            char_format.setForeground(QColor(_LINK_COLOR))
+            char_format.setFontUnderline(True)
+        return char_format
+
+    def _insert_image(self, cursor: QTextCursor, image: Image):
+        name = image.src
+        if image.src.startswith("data:image/"):
+            try:
+                data = base64.b64decode(image.src.split(",", 1)[1])
+            except (IndexError, ValueError, binascii.Error):
+                return
+            qimage = QImage.fromData(data)
+            if qimage.isNull():
+                return
+            self._image_count += 1
+            name = f"print-image-{self._image_count}"
+            self.document.addResource(QTextDocument.ResourceType.ImageResource,
+                                      QUrl(name), qimage)
+        image_format = QTextImageFormat()
+        image_format.setName(name)
+        if image.width:
+            image_format.setWidth(image.width)
+        if image.height:
+            image_format.setHeight(image.height)
+        cursor.insertImage(image_format)
@@ -0,0 +1,162 @@
+# ============================================================================
+# Profiler
+# the `python main.py --profile` mode: startup phases and hot paths recorded
+# as a Chrome trace-event file
+# ============================================================================
+#
+#   python main.py --profile                 # writes ./notepad-profile.json
+#   python main.py --profile=startup.json
+#
+# Open the file in about:tracing (Chrome) or https://ui.perfetto.dev. Each
+# traced call is a complete ("X") event on the thread that made it, so the
+# export thread, file loads and the main thread show as separate tracks;
+# startup milestones (first_paint, session_restored, ...) are instant events.
+# Timestamps count from process start (main.py's _STARTED).
+#
+# Functions opt in with the @traced decorator. It decides once, when the
+# decorated module is imported: without --profile it returns the function
+# itself, so the hot paths (highlightBlock runs for every block Qt lays
+# out) cost nothing extra. main.py therefore enables the profiler before it
+# imports the application; modules imported earlier stay untraced.
+#
+# It doesn't import Qt, so the headless modes (convert, watch) could use it too.
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+DEFAULT_TRACE_FILE = "notepad-profile.json"
+
+
+class Profiler:
+    """Collects trace events in memory until write() saves them."""
+
+    # Enough for minutes of typing with highlighting; later events are
+    # counted but dropped so a forgotten --profile can't eat the memory
+    MAX_EVENTS = 500_000
+
+    def __init__(self, origin: Optional[float] = None):
+        """*origin* is the time.perf_counter() that becomes timestamp 0."""
+        self.origin = time.perf_counter() if origin is None else origin
+        self.dropped = 0
+        self._events: list[dict] = []
+        self._thread_names: dict[int, str] = {}
+        self._pid = os.getpid()
+
+    def _micros(self, counter: float) -> float:
+        return round((counter - self.origin) * 1_000_000, 1)
+
+    def _append(self, event: dict):
+        # list.append is atomic, so worker threads need no lock
+        if len(self._events) >= self.MAX_EVENTS:
+            self.dropped += 1
+            return
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        event["pid"] = self._pid
+        event["tid"] = tid
+        self._events.append(event)
+
+    def complete(self, name: str, category: str, start: float, end: float,
+                 args: Optional[dict] = None):
+        """Record a call that ran from perf_counter *start* to *end*."""
+        event = {"name": name, "cat": category, "ph": "X",
+                 "ts": self._micros(start), "dur": round((end - start) * 1_000_000, 1)}
+        if args:
+            event["args"] = args
+        self._append(event)
+
+    def instant(self, name: str, category: str = "startup"):
+        """Record a moment, e.g. a startup milestone."""
+        self._append({"name": name, "cat": category, "ph": "i", "s": "p",
+                      "ts": self._micros(time.perf_counter())})
+
+    def events(self) -> list[dict]:
+        return list(self._events)
+
+    def trace(self) -> dict:
+        """The Chrome trace-event JSON object."""
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                     "args": {"name": name}} for tid, name in self._thread_names.items()]
+        return {"traceEvents": metadata + self.events(), "displayTimeUnit": "ms",
+                "otherData": {"dropped_events": self.dropped}}
+
+    def write(self, filepath: Path):
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+
+
+# -- process-wide profiler ----------------------------------------------------
+
+_profiler: Optional[Profiler] = None
+
+
+def enable(origin: Optional[float] = None) -> Profiler:
+    """Start profiling; only functions decorated after this are traced."""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(origin)
+    return _profiler
+
+
+def disable():
+    global _profiler
+    _profiler = None
+
+
+def active() -> Optional[Profiler]:
+    return _profiler
+
+
+def mark(name: str, category: str = "startup"):
+    """Record an instant event if profiling (cheap no-op otherwise)."""
+    if _profiler is not None:
+        _profiler.instant(name, category)
+
+
+def traced(name: Optional[str] = None, category: str = "app") -> Callable:
+    """
+    Decorator recording each call as a complete event named *name*
+    (default: the function's qualified name). Returns the function
+    unchanged when profiling wasn't enabled before it was defined.
+    """
+    def decorate(func: Callable) -> Callable:
+        profiler = _profiler
+        if profiler is None:
+            return func
+        event_name = name or func.__qualname__
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.complete(event_name, category, start, clock())
+
+        return wrapper
+
+    return decorate
+
+
+def parse_profile_option(argv: list[str]) -> tuple[Optional[Path], list[str]]:
+    """
+    Take --profile / --profile=PATH out of *argv* (Qt never sees it).
+    Returns (trace file or None, the remaining arguments).
+    """
+    path = None
+    remaining = []
+    for arg in argv:
+        if arg == "--profile":
+            path = Path(DEFAULT_TRACE_FILE)
+        elif arg.startswith("--profile="):
+            path = Path(arg.split("=", 1)[1] or DEFAULT_TRACE_FILE)
+        else:
+            remaining.append(arg)
+    return path, remaining
@@ -18,6 +18,24 @@ class SettingsManager:
     def __init__(self):
         self.settings = QSettings("RichTextNotepad", "MainApp")
     
+    def cache_dir(self) -> Path:
+        """Directory for rebuildable on-disk caches (created if missing)"""
+        base = QStandardPaths.writableLocation(
+            QStandardPaths.StandardLocation.GenericCacheLocation
+        )
+        path = Path(base) / "RichTextNotepad"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def data_dir(self) -> Path:
+        """Directory for user data kept outside QSettings (created if missing)"""
+        base = QStandardPaths.writableLocation(
+            QStandardPaths.StandardLocation.GenericDataLocation
+        )
+        path = Path(base) / "RichTextNotepad"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
     def save_window_geometry(self, geometry: QByteArray, state: QByteArray):
         """Save window geometry and state"""
         self.settings.setValue("window/geometry", geometry)
@@ -85,4 +103,20 @@ class SettingsManager:
 
     def get_theme(self) -> bool:
         """Return True for dark theme (default), False for light."""
-        return self.settings.value("appearance/dark_theme", True, type=bool)
\ No newline at end of file
+        return self.settings.value("appearance/dark_theme", True, type=bool)
+
+    def save_spell_check_enabled(self, enabled: bool):
+        """Persist whether live spell checking is on."""
+        self.settings.setValue("editor/spell_check", enabled)
+
+    def get_spell_check_enabled(self) -> bool:
+        """Return True if live spell checking is on (default)."""
+        return self.settings.value("editor/spell_check", True, type=bool)
+
+    def save_compact_html(self, enabled: bool):
+        """Persist whether notes are saved as compact HTML."""
+        self.settings.setValue("files/compact_html", enabled)
+
+    def get_compact_html(self) -> bool:
+        """Return True if notes are saved as compact HTML (default)."""
+        return self.settings.value("files/compact_html", True, type=bool)
@@ -1,45 +1,503 @@
 # ============================================================================
 # Spell Check Service
-# thin wrapper around pyspellchecker, plus a per-session custom dictionary
+# thin wrapper around pyspellchecker, plus the user's custom dictionary
 # ============================================================================
 
-from spellchecker import SpellChecker
+import itertools
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Callable, Optional
+
+from services.dictionary_store import (
+    CompiledDictionary, DictionaryStore, source_fingerprint,
+)
+from services.suggestion_index import SuggestionIndex
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+# Languages offered in the UI: pyspellchecker ships a dictionary for each,
+# and services.language_detection knows their stopwords.
+SUPPORTED_LANGUAGES = {
+    "en": "English",
+    "fr": "French",
+    "de": "German",
+    "es": "Spanish",
+    "it": "Italian",
+    "pt": "Portuguese",
+    "nl": "Dutch",
+}
+
+# Runs of letters (any script, so "café" and "Straße" are one word), with
+# internal apostrophes kept: "don't", "l'homme".
+_WORD_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+
+# URLs, bare www. hosts and email addresses: never prose, never checked.
+_SKIP_RE = re.compile(
+    r"(?:\b[a-z][a-z0-9+.-]*://|\bwww\.)\S+|[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+    re.IGNORECASE,
+)
 
 
 class SpellCheckService:
     """
     Wraps pyspellchecker's dictionary lookups and adds a lightweight
-    in-memory "add to dictionary" list so users can permanently allow
-    custom words (names, jargon, etc.) for the current session.
+    "add to dictionary" list so users can permanently allow custom words
+    (names, jargon, etc.).
 
     One instance is shared across all open tabs (created once in
-    MainWindow) since loading the dictionary has a small upfront cost
-    and the word list itself is read-only per lookup.
+    MainWindow), whatever their language: every lookup takes an optional
+    `language` and falls back to the service's default `language`.
+    Dictionaries are loaded on first use and kept in a process-wide
+    registry, so each language is only ever loaded once.
+
+    Given a `store_dir`, each word list is compiled once into a
+    memory-mapped DictionaryStore file that later launches open instead of
+    parsing pyspellchecker's JSON, and custom words are saved there too.
+    Without one, pyspellchecker is used directly and custom words last for
+    the session only.
+
+    With lazy=True nothing is loaded by the constructor: start_loading()
+    loads the default language on a background thread (MainWindow does this
+    after the window first paints), and from then on any other language is
+    loaded in the background as soon as someone waits for it with
+    call_when_ready(). Anything that needs a verdict before its dictionary
+    is ready simply loads it synchronously.
+
+    Verdicts are memoized in a bounded LRU keyed by language and the
+    lowercased word, so common words ("the", "and", ...) only ever hit the
+    dictionary once no matter how many blocks or tabs get rehighlighted.
+
+    Lookups may come from the GUI thread (context menu) and from the
+    BackgroundSpellChecker thread at the same time, so all cache state is
+    guarded by a single lock.
+
+    Suggestions come from a precomputed SuggestionIndex once
+    prepare_suggestions() has loaded (or built) one for the language;
+    until then they fall back to pyspellchecker's much slower runtime
+    candidate search.
     """
 
-    def __init__(self, language: str = "en"):
-        self._checker = SpellChecker(language=language)
-        self._custom_words: set[str] = set()
+    DEFAULT_CACHE_SIZE = 50_000
 
-    def is_correct(self, word: str) -> bool:
+    def __init__(self, language: str = "en", cache_size: int = DEFAULT_CACHE_SIZE,
+                 lazy: bool = False, store_dir: Optional[str] = None):
+        self.language = language
+        self._store = DictionaryStore(store_dir) if store_dir is not None else None
+        # language -> membership test: a CompiledDictionary, or
+        # pyspellchecker itself when there's no store.
+        self._dictionaries: dict[str, object] = {}
+        self._load_lock = threading.RLock()
+        # Whether languages may be loaded in the background on request; a
+        # lazy service waits for start_loading().
+        self._started = not lazy
+        self._loading: set[str] = set()
+        self._ready_callbacks: dict[str, list[Callable[[], None]]] = {}
+        self._custom_words: set[str] = (
+            self._store.load_custom_words() if self._store is not None else set()
+        )
+        # Bumped whenever a previously computed verdict may have changed, so
+        # callers holding their own derived results (e.g. per-block spans in
+        # SpellCheckHighlighter) know to recompute them.
+        self.generation = 0
+
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[tuple[str, str], bool] = OrderedDict()
+        self._cache_size = cache_size
+        self._hits = 0
+        self._misses = 0
+
+        self._background: Optional["BackgroundSpellChecker"] = None
+
+        self._suggestion_indexes: dict[str, SuggestionIndex] = {}
+        # Set once prepare_suggestions() has been called, so languages
+        # loaded later get their index prepared too.
+        self._suggestions_wanted = False
+        self._suggestion_cache_dir: Optional[str] = None
+
+        if not lazy:
+            self._ensure_loaded(language)
+
+    def is_correct(self, word: str, language: Optional[str] = None) -> bool:
         """Return True if word is spelled correctly (or user-added)."""
-        lower = word.lower()
-        if lower in self._custom_words:
-            return True
-        return len(self._checker.unknown([lower])) == 0
+        language = language or self.language
+        lower = _normalize_word(word)
+        key = (language, lower)
+        dictionary = self._ensure_loaded(language)
+        with self._lock:
+            verdict = self._cache.get(key)
+            if verdict is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return verdict
 
-    def suggestions(self, word: str, limit: int = 5) -> list[str]:
+            self._misses += 1
+            verdict = lower in self._custom_words or _known(lower, dictionary)
+            self._cache[key] = verdict
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+            return verdict
+
+    def misspelled_spans(self, text: str, language: Optional[str] = None) -> list[tuple[int, int]]:
+        """Return (start, length) for every misspelled word in `text`."""
+        if "://" in text or "www." in text or "@" in text:
+            # Blank out URLs/emails, keeping offsets.
+            text = _SKIP_RE.sub(lambda m: " " * len(m.group()), text)
+        spans = []
+        for match in _WORD_RE.finditer(text):
+            word = match.group()
+            if len(word) < 2:
+                continue
+            if not self.is_correct(word, language):
+                spans.append((match.start(), len(word)))
+        return spans
+
+    def suggestions(self, word: str, limit: int = 5, language: Optional[str] = None) -> list[str]:
         """Return up to `limit` candidate corrections, best guess first."""
-        candidates = self._checker.candidates(word.lower())
+        language = language or self.language
+        index = self._suggestion_indexes.get(language)
+        if index is not None:
+            with self._lock:
+                custom_words = list(self._custom_words)
+            return index.lookup(word.lower(), limit, extra_words=custom_words)
+
+        checker = _shared_checker(language)
+        candidates = checker.candidates(word.lower())
         if not candidates:
             return []
         # pyspellchecker returns an unordered set; rank by edit distance
         # proxy (its own correction() call gives the single best guess,
         # so surface that first if it's in the candidate set).
-        best = self._checker.correction(word.lower())
+        best = checker.correction(word.lower())
         ordered = sorted(candidates, key=lambda w: (w != best, w))
         return ordered[:limit]
 
     def add_word(self, word: str):
-        """Permanently allow `word` for the rest of this session."""
-        self._custom_words.add(word.lower())
+        """Permanently allow `word` (saved to the store, if there is one)."""
+        lower = _normalize_word(word)
+        with self._lock:
+            if lower in self._custom_words:
+                return
+            self._custom_words.add(lower)
+            # Only this word's verdicts can have changed - drop just those
+            # entries rather than throwing away the whole warm cache.
+            for language in list(self._dictionaries):
+                self._cache.pop((language, lower), None)
+            self.generation += 1
+        if self._store is not None:
+            try:
+                self._store.add_custom_word(lower)
+            except OSError as e:
+                print(f"Could not save custom word: {e}")
+
+    def set_language(self, language: str):
+        """Change the default language (e.g. "fr", "de") for lookups without one."""
+        if language == self.language:
+            return
+        with self._lock:
+            self.language = language
+            self._clear_cache_locked()
+            self.generation += 1
+        if self._started:
+            self.start_loading(language)
+
+    # -- dictionary loading -------------------------------------------------
+
+    def is_ready(self, language: Optional[str] = None) -> bool:
+        """True once the dictionary for `language` has been loaded."""
+        return (language or self.language) in self._dictionaries
+
+    def start_loading(self, language: Optional[str] = None):
+        """
+        Load `language` (default: the service's) on a background thread, plus
+        any other language someone is already waiting for. Once called, later
+        call_when_ready() requests start their own loads straight away.
+        """
+        with self._load_lock:
+            self._started = True
+            wanted = {language or self.language, *self._ready_callbacks}
+        for lang in wanted:
+            self._load_in_background(lang)
+
+    def call_when_ready(self, callback: Callable[[], None], language: Optional[str] = None):
+        """
+        Run `callback()` once the dictionary for `language` is loaded -
+        immediately if it already is, otherwise on whichever thread finishes
+        loading it.
+        """
+        language = language or self.language
+        with self._load_lock:
+            if language not in self._dictionaries:
+                self._ready_callbacks.setdefault(language, []).append(callback)
+                if self._started:
+                    self._load_in_background(language)
+                return
+        callback()
+
+    def _load_in_background(self, language: str):
+        with self._load_lock:
+            if language in self._loading or language in self._dictionaries:
+                return
+            self._loading.add(language)
+        threading.Thread(
+            target=self._ensure_loaded, args=(language,),
+            name=f"spellcheck-loader-{language}", daemon=True,
+        ).start()
+
+    def _ensure_loaded(self, language: str):
+        dictionary = self._dictionaries.get(language)
+        if dictionary is not None:
+            return dictionary
+        dictionary = _shared_dictionary(language, self._store)
+        with self._load_lock:
+            self._dictionaries[language] = dictionary
+            self._loading.discard(language)
+            callbacks = self._ready_callbacks.pop(language, [])
+            prepare = self._suggestions_wanted and language not in self._suggestion_indexes
+        if prepare:
+            self._prepare_suggestions_for(language)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Spellcheck ready callback failed: {e}")
+        return dictionary
+
+    # -- suggestions --------------------------------------------------------
+
+    def prepare_suggestions(self, cache_dir: Optional[str] = None):
+        """
+        Load the suggestion index for the default language - and for every
+        language loaded later - on a background thread, building it (a few
+        seconds) if `cache_dir` has no up-to-date copy yet and saving it
+        there for next time. suggestions() keeps using the slow path until
+        it's ready.
+        """
+        with self._load_lock:
+            self._suggestions_wanted = True
+            self._suggestion_cache_dir = cache_dir
+        self._prepare_suggestions_for(self.language)
+
+    def suggestions_ready(self, language: Optional[str] = None) -> bool:
+        """True once suggestions() is served from the precomputed index."""
+        return (language or self.language) in self._suggestion_indexes
+
+    def _prepare_suggestions_for(self, language: str):
+        threading.Thread(
+            target=self._load_suggestion_index,
+            args=(language, self._suggestion_cache_dir),
+            name=f"suggestion-index-{language}", daemon=True,
+        ).start()
+
+    def _load_suggestion_index(self, language: str, cache_dir: Optional[str]):
+        try:
+            index = _shared_suggestion_index(language, cache_dir)
+        except Exception as e:
+            print(f"Could not prepare spelling suggestions: {e}")
+            return
+        self._suggestion_indexes[language] = index
+        if self._store is not None:
+            # Compiled dictionary + index cover everything; nothing needs
+            # the parsed word list any more.
+            _release_checker(language)
+
+    @property
+    def background(self) -> "BackgroundSpellChecker":
+        """The shared worker thread for off-GUI-thread checks (started lazily)."""
+        if self._background is None:
+            self._background = BackgroundSpellChecker(self)
+        return self._background
+
+    # -- cache introspection ----------------------------------------------
+
+    def cache_info(self) -> CacheInfo:
+        """Hit/miss counters and current size of the verdict cache."""
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._cache_size, len(self._cache))
+
+    def clear_cache(self):
+        """Forget every memoized verdict and reset the hit/miss counters."""
+        with self._lock:
+            self._clear_cache_locked()
+
+    def _clear_cache_locked(self):
+        self._cache.clear()
+        self._hits = 0
+        self._misses = 0
+
+
+def _normalize_word(word: str) -> str:
+    """The form words are looked up and stored in: lowercase, with the
+    typographic apostrophe the tokenizer also accepts made straight."""
+    return word.lower().replace("’", "'")
+
+
+def _known(word: str, dictionary) -> bool:
+    if word in dictionary:
+        return True
+    # Elisions and contractions the list doesn't carry whole ("l'homme",
+    # "qu'il"): fine if every multi-letter part is a word.
+    if "'" in word:
+        parts = [part for part in word.split("'") if len(part) > 1]
+        return bool(parts) and all(part in dictionary for part in parts)
+    return False
+
+
+class _CheckerWords:
+    """Adapts a SpellChecker to the `word in dictionary` test."""
+
+    def __init__(self, checker: "SpellChecker"):
+        self._checker = checker
+
+    def __contains__(self, word: str) -> bool:
+        return not self._checker.unknown([word])
+
+
+# -- process-wide registry ----------------------------------------------------
+#
+# Every SpellCheckService (and every tab, window, or language switch) asks
+# here, so each dictionary is loaded once per process. A per-key lock lets
+# two threads that want the same language wait for one load instead of
+# racing, while different languages still load in parallel.
+
+_registry_lock = threading.Lock()
+_key_locks: dict[tuple, threading.Lock] = {}
+_dictionaries: dict[tuple[str, Optional[str]], object] = {}
+_checkers: dict[str, "SpellChecker"] = {}
+_indexes: dict[tuple[str, int], SuggestionIndex] = {}
+
+
+def _key_lock(key: tuple) -> threading.Lock:
+    with _registry_lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def _shared_checker(language: str) -> "SpellChecker":
+    """The parsed pyspellchecker word list for `language` (loaded on demand)."""
+    from spellchecker import SpellChecker
+    with _key_lock(("checker", language)):
+        checker = _checkers.get(language)
+        if checker is None:
+            checker = _checkers[language] = SpellChecker(language=language)
+        return checker
+
+
+def _release_checker(language: str):
+    with _key_lock(("checker", language)):
+        _checkers.pop(language, None)
+
+
+def _shared_dictionary(language: str, store: Optional[DictionaryStore]):
+    """
+    Membership test for `language`: the compiled dictionary from `store`
+    when it's up to date (compiling it on the way if not), otherwise
+    pyspellchecker itself.
+    """
+    key = (language, store.directory if store is not None else None)
+    with _key_lock(("dictionary",) + key):
+        dictionary = _dictionaries.get(key)
+        if dictionary is not None:
+            return dictionary
+
+        if store is None:
+            dictionary = _CheckerWords(_shared_checker(language))
+        else:
+            dictionary = store.load_dictionary(language)
+            if dictionary is None:
+                compiled = CompiledDictionary.compile(
+                    _shared_checker(language).word_frequency.dictionary,
+                    source_fingerprint(language),
+                )
+                try:
+                    store.save_dictionary(language, compiled)
+                    # Serve from the mapped file, like every later launch will.
+                    dictionary = store.load_dictionary(language)
+                except OSError as e:
+                    print(f"Could not save compiled dictionary: {e}")
+                dictionary = dictionary or compiled
+
+        _dictionaries[key] = dictionary
+        return dictionary
+
+
+def _shared_suggestion_index(language: str, cache_dir: Optional[str]) -> SuggestionIndex:
+    """
+    One SuggestionIndex per dictionary per process, loaded from `cache_dir`
+    when possible. pyspellchecker's word list is only parsed when the index
+    actually has to be built.
+    """
+    fingerprint = source_fingerprint(language)
+    with _key_lock(("index", language)):
+        index = _indexes.get((language, fingerprint))
+        if index is not None:
+            return index
+
+        path = None
+        if cache_dir is not None:
+            path = os.path.join(cache_dir, f"suggestions-{language}.idx")
+            index = SuggestionIndex.load(path, fingerprint)
+        if index is None:
+            frequencies = _shared_checker(language).word_frequency.dictionary
+            index = SuggestionIndex.build(frequencies, fingerprint=fingerprint)
+            if path is not None:
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    index.save(path)
+                except OSError as e:
+                    print(f"Could not save suggestion index: {e}")
+
+        _indexes[(language, fingerprint)] = index
+        return index
+
+
+class BackgroundSpellChecker:
+    """
+    A single daemon thread that runs SpellCheckService.misspelled_spans()
+    off the GUI thread, shared by every highlighter using the same service.
+
+    Jobs run lowest priority first, then in submission order. The callback
+    is invoked *on the worker thread* with the spans; anything that needs
+    to touch Qt objects must marshal the result back to the GUI thread
+    itself (SpellCheckHighlighter does that with a queued signal).
+    """
+
+    PRIORITY_VISIBLE = 0
+    PRIORITY_BACKGROUND = 1
+    PRIORITY_IDLE = 2
+
+    def __init__(self, service: SpellCheckService):
+        self._service = service
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, text: str, callback: Callable[[list[tuple[int, int]]], None],
+               priority: int = PRIORITY_BACKGROUND, language: Optional[str] = None):
+        """Queue `text` to be checked; `callback(spans)` fires when done."""
+        self._ensure_started()
+        self._queue.put((priority, next(self._sequence), text, language, callback))
+
+    def pending(self) -> int:
+        """Approximate number of jobs still waiting in the queue."""
+        return self._queue.qsize()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="spellcheck-worker", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            _priority, _seq, text, language, callback = self._queue.get()
+            try:
+                callback(self._service.misspelled_spans(text, language))
+            except Exception as e:
+                # One bad job (or a callback whose receiver has gone away)
+                # must never take the shared worker down with it.
+                print(f"Background spellcheck failed: {e}")
@@ -0,0 +1,260 @@
+# ============================================================================
+# Suggestion Index
+# SymSpell-style symmetric-delete index for fast spelling suggestions
+# ============================================================================
+#
+# pyspellchecker finds candidates by generating every edit-distance-2
+# permutation of the misspelled word (tens of thousands of strings) and
+# looking each one up. The symmetric-delete trick flips that around: for
+# every dictionary word we precompute the strings reachable by *deleting*
+# up to MAX_DISTANCE characters, once. At lookup time we only generate the
+# deletes of the input (a few dozen strings) - any dictionary word sharing
+# a delete with it is a candidate, and a real edit-distance check on that
+# short list does the rest.
+#
+# Like SymSpell, only the first PREFIX_LENGTH characters of each word are
+# indexed, which keeps the index small without hurting ranking much.
+#
+# Layout (all flat arrays, so the whole thing pickles-free to a file and
+# loads back with a handful of frombytes() calls):
+#   words    - every dictionary word, sorted; words sharing an indexed
+#              prefix are therefore contiguous
+#   counts   - frequency of each word, parallel to `words`
+#   starts   - index into `words` where each distinct prefix begins
+#   keys     - sorted 64-bit keys, crc32(delete) << 32 | prefix number
+# crc32 collisions only add spurious candidates, which the distance check
+# throws away.
+
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Mapping, Optional
+
+_MAGIC = b"RTNSYMS1"
+_HEADER = struct.Struct("<8sBBQIIII")
+
+
+def _deletes(word: str, max_distance: int) -> set[str]:
+    """`word` itself plus every string reachable by up to max_distance deletes."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            s[:i] + s[i + 1:]
+            for s in frontier if len(s) > 1
+            for i in range(len(s))
+        }
+        result |= frontier
+    return result
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal-string-alignment distance (insert/delete/substitute plus
+    adjacent transposition), or max_distance + 1 if it's any larger than
+    max_distance. Only the diagonal band the limit allows is computed.
+    """
+    too_far = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return too_far
+
+    # A shared prefix/suffix never changes the distance - drop it first.
+    end_a, end_b = len(a), len(b)
+    while end_a and end_b and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    start = 0
+    while start < end_a and start < end_b and a[start] == b[start]:
+        start += 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return len(a) + len(b) if len(a) + len(b) <= max_distance else too_far
+
+    width = len(b)
+    previous2 = None
+    previous = [j if j <= max_distance else too_far for j in range(width + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (width + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = too_far
+        char_a = a[i - 1]
+        for j in range(max(1, i - max_distance), min(width, i + max_distance) + 1):
+            value = previous[j - 1] if char_a == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous2 is not None and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == b[j - 1] and previous2[j - 2] + 1 < value):
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        previous2, previous = previous, current
+    return min(previous[width], too_far)
+
+
+class SuggestionIndex:
+    """
+    Immutable symmetric-delete index over a word -> frequency dictionary.
+
+    Build once with SuggestionIndex.build() (a few seconds for a full
+    pyspellchecker dictionary), then save() / load() it so later sessions
+    skip the build entirely. lookup() is safe to call from any thread.
+    """
+
+    MAX_DISTANCE = 2
+    PREFIX_LENGTH = 7
+
+    def __init__(self, words: list[str], counts: array, starts: array, keys: array,
+                 fingerprint: int, max_distance: int = MAX_DISTANCE,
+                 prefix_length: int = PREFIX_LENGTH):
+        self._words = words
+        self._counts = counts
+        self._starts = starts
+        self._keys = keys
+        self.fingerprint = fingerprint
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    # -- building ------------------------------------------------------------
+
+    @staticmethod
+    def fingerprint_of(frequencies: Mapping[str, int]) -> int:
+        """Cheap identity for a dictionary, used to spot stale saved indexes."""
+        return (len(frequencies) << 32) ^ (sum(frequencies.values()) & 0xFFFFFFFFFFFF)
+
+    @classmethod
+    def build(cls, frequencies: Mapping[str, int], max_distance: int = MAX_DISTANCE,
+              prefix_length: int = PREFIX_LENGTH,
+              fingerprint: Optional[int] = None) -> "SuggestionIndex":
+        """
+        Index every word in `frequencies` (word -> occurrence count).
+        `fingerprint` identifies the source list for load(); it defaults to
+        fingerprint_of(frequencies).
+        """
+        words = sorted(frequencies)
+        counts = array("Q", (frequencies[w] for w in words))
+
+        starts = array("I")
+        keys = []
+        crc32 = zlib.crc32
+        last_prefix = None
+        for i, word in enumerate(words):
+            prefix = word[:prefix_length]
+            if prefix == last_prefix:
+                continue
+            last_prefix = prefix
+            number = len(starts)
+            starts.append(i)
+            keys.extend(
+                (crc32(d.encode("utf-8")) << 32) | number
+                for d in _deletes(prefix, max_distance)
+            )
+        starts.append(len(words))
+        keys.sort()
+
+        if fingerprint is None:
+            fingerprint = cls.fingerprint_of(frequencies)
+        return cls(words, counts, starts, array("Q", keys),
+                   fingerprint, max_distance, prefix_length)
+
+    # -- lookup ----------------------------------------------------------------
+
+    def lookup(self, word: str, limit: int = 5,
+               extra_words: Iterable[str] = ()) -> list[str]:
+        """
+        Up to `limit` dictionary words within max_distance edits of `word`,
+        closest first, then most frequent. `word` is expected lowercased.
+        `extra_words` (e.g. a user's custom dictionary) are checked by brute
+        force and ranked as if they were rare dictionary words.
+        """
+        max_distance = self.max_distance
+        keys = self._keys
+        starts = self._starts
+        words = self._words
+
+        prefix_numbers = set()
+        for d in _deletes(word[:self.prefix_length], max_distance):
+            low = crc = zlib.crc32(d.encode("utf-8")) << 32
+            i = bisect_left(keys, low)
+            while i < len(keys) and keys[i] & 0xFFFFFFFF00000000 == crc:
+                prefix_numbers.add(keys[i] & 0xFFFFFFFF)
+                i += 1
+
+        ranked = []
+        for candidate in extra_words:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                ranked.append((distance, 0, candidate))
+        low_length, high_length = len(word) - max_distance, len(word) + max_distance
+        for number in prefix_numbers:
+            for i in range(starts[number], starts[number + 1]):
+                candidate = words[i]
+                if not low_length <= len(candidate) <= high_length:
+                    continue
+                distance = edit_distance(word, candidate, max_distance)
+                if distance <= max_distance:
+                    ranked.append((distance, -self._counts[i], candidate))
+
+        ranked.sort()
+        result = []
+        for _distance, _count, candidate in ranked:
+            if candidate == word or candidate in result:
+                continue
+            result.append(candidate)
+            if len(result) == limit:
+                break
+        return result
+
+    # -- persistence -----------------------------------------------------------
+
+    def save(self, path: str):
+        """Write the index to `path` (atomically, via a temp file)."""
+        blob = "\n".join(self._words).encode("utf-8")
+        header = _HEADER.pack(
+            _MAGIC, self.max_distance, self.prefix_length, self.fingerprint,
+            len(self._words), len(self._starts), len(self._keys), len(blob),
+        )
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(blob)
+            self._counts.tofile(f)
+            self._starts.tofile(f)
+            self._keys.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, fingerprint: Optional[int] = None) -> Optional["SuggestionIndex"]:
+        """
+        Read an index written by save(). Returns None if the file is
+        missing, unreadable, or (when `fingerprint` is given) was built
+        from a different dictionary.
+        """
+        try:
+            with open(path, "rb") as f:
+                (magic, max_distance, prefix_length, saved_fingerprint,
+                 n_words, n_starts, n_keys, blob_len) = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    return None
+                if fingerprint is not None and saved_fingerprint != fingerprint:
+                    return None
+                words = f.read(blob_len).decode("utf-8").split("\n") if n_words else []
+                counts, starts, keys = array("Q"), array("I"), array("Q")
+                counts.fromfile(f, n_words)
+                starts.fromfile(f, n_starts)
+                keys.fromfile(f, n_keys)
+        except (OSError, EOFError, struct.error, UnicodeDecodeError):
+            return None
+        if len(words) != n_words:
+            return None
+        return cls(words, counts, starts, keys, saved_fingerprint, max_distance, prefix_length)
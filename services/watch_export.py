@@ -0,0 +1,397 @@
+# ============================================================================
+# Watch Export
+# the headless `python main.py watch` mode: keeps a Markdown or Word mirror
+# of a notes folder up to date as notes change
+# ============================================================================
+#
+#   python main.py watch --to md notes/ --out mirror/ -j 2
+#
+# Changes are found by comparing (mtime, size) snapshots of the folder, so
+# plain polling always works. On Linux, inotify (through ctypes) is used
+# only to wake the loop as soon as something happens instead of on the
+# next poll; the snapshot comparison stays the source of truth.
+#
+# A changed note is exported once it has been left alone for the debounce
+# delay, on a bounded pool of worker processes (the same convert_note the
+# batch `convert` mode uses). Deleted notes have their mirrored file
+# removed. The signature of every note last exported is kept in a small
+# JSON state file, so a restart only re-exports what changed meanwhile.
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Optional
+
+from services.batch_convert import (
+    NOTE_SUFFIXES, OUTPUT_SUFFIXES, ConversionResult, ConversionTask, convert_note,
+)
+
+STATE_VERSION = 1
+DEFAULT_STATE_NAME = ".export-state.json"
+
+# How long the loop may sleep with nothing pending when inotify is watching;
+# the rescan after it catches anything inotify missed (e.g. network mounts).
+_IDLE_RESCAN_SECONDS = 60.0
+# Exports queued per worker process; bounds the work handed to the pool
+# (and lost on a crash) while keeping every worker busy.
+_IN_FLIGHT_PER_WORKER = 4
+# The state file is rewritten at most this often while exports complete,
+# and always on shutdown.
+_STATE_SAVE_SECONDS = 5.0
+
+
+def scan_notes(root: Path) -> tuple[dict[str, list[int]], list[str]]:
+    """Snapshot *root*: note path (relative, '/'-separated) -> [mtime_ns, size],
+    plus every folder visited."""
+    notes = {}
+    folders = [str(root)]
+    stack = [(str(root), "")]
+    while stack:
+        path, prefix = stack.pop()
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                folders.append(entry.path)
+                stack.append((entry.path, prefix + entry.name + "/"))
+            elif os.path.splitext(entry.name)[1].lower() in NOTE_SUFFIXES:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # deleted between listing and stat
+                notes[prefix + entry.name] = [stat.st_mtime_ns, stat.st_size]
+    return notes, folders
+
+
+def _ignore_interrupts():
+    # Worker initializer: Ctrl+C (or a service manager's SIGTERM) reaches the
+    # whole process group, but only the watcher itself should react, by
+    # letting running exports finish and saving its state.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class _InlineExecutor:
+    """Runs submissions immediately; stands in for the pool when jobs is 1."""
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+
+class _InotifyWaker:
+    """Wakes the watch loop early on filesystem activity (Linux only)."""
+
+    _IN_NONBLOCK = 0o4000
+    _IN_CLOEXEC = 0o2000000
+    # modify, close-write, moved from/to, create, delete
+    _MASK = 0x002 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self._fd = fd
+        self._watched: set[str] = set()
+
+    @classmethod
+    def create(cls) -> Optional["_InotifyWaker"]:
+        """An inotify instance, or None where inotify isn't available."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+            fd = libc.inotify_init1(cls._IN_NONBLOCK | cls._IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def watch(self, folders: list[str]):
+        for folder in folders:
+            if folder not in self._watched:
+                if self._libc.inotify_add_watch(self._fd, os.fsencode(folder), self._MASK) >= 0:
+                    self._watched.add(folder)
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to *timeout* seconds; True if there was activity."""
+        ready, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not ready:
+            return False
+        try:
+            while os.read(self._fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        os.close(self._fd)
+
+
+class FolderWatcher:
+    """Mirrors the notes under *source* into *out_dir* as they change."""
+
+    def __init__(self, source: Path, out_dir: Path, fmt: str, state_path: Optional[Path] = None,
+                 jobs: int = 1, debounce: float = 1.0, interval: float = 2.0,
+                 html_fallback: bool = False, log: Callable[[str], None] = print):
+        self.source = Path(source)
+        self.out_dir = Path(out_dir)
+        self.format = fmt
+        self.state_path = Path(state_path) if state_path else self.out_dir / DEFAULT_STATE_NAME
+        self.jobs = max(1, jobs)
+        self.debounce = debounce
+        self.interval = interval
+        self.html_fallback = html_fallback
+        self._log = log
+        self._executor = (ProcessPoolExecutor(self.jobs, initializer=_ignore_interrupts)
+                          if self.jobs > 1 else _InlineExecutor())
+        # note -> signature last exported, forgetting mirrored files since removed
+        self._exported = {note: signature for note, signature in self._load_state().items()
+                          if self._target(note).exists()}
+        self._failed: dict[str, list[int]] = {}  # note -> signature that failed
+        self._pending: dict[str, tuple[list[int], float]] = {}  # note -> (signature, seen at)
+        self._in_flight: dict[Future, tuple[str, list[int]]] = {}
+        self._folders: list[str] = []
+        self._state_dirty = False
+        self._state_saved_at = float("-inf")
+
+    # -- state file ----------------------------------------------------------
+
+    def _load_state(self) -> dict[str, list[int]]:
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if state.get("version") != STATE_VERSION or state.get("format") != self.format:
+            return {}
+        return state.get("notes", {})
+
+    def _save_state(self) -> bool:
+        """Write the state file; on failure (disk full, out dir unmounted)
+        log it and return False, and the next save tries again."""
+        partial = self.state_path.with_name(self.state_path.name + ".part")
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(partial, "w", encoding="utf-8") as f:
+                json.dump({"version": STATE_VERSION, "format": self.format,
+                           "notes": self._exported}, f)
+            os.replace(partial, self.state_path)
+        except OSError as e:
+            self._log(f"Could not save {self.state_path}: {e}")
+            try:
+                partial.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return False
+        self._state_dirty = False
+        return True
+
+    # -- one pass ------------------------------------------------------------
+
+    def _target(self, note: str) -> Path:
+        return (self.out_dir / note).with_suffix(OUTPUT_SUFFIXES[self.format])
+
+    def scan(self, now: Optional[float] = None):
+        """Rescan the folder: queue new and changed notes, and remove the
+        mirrored copies of deleted ones."""
+        now = time.monotonic() if now is None else now
+        notes, self._folders = scan_notes(self.source)
+
+        for note, signature in notes.items():
+            if self._exported.get(note) == signature or self._failed.get(note) == signature:
+                self._pending.pop(note, None)
+                continue
+            queued = self._pending.get(note)
+            if queued is None or queued[0] != signature:
+                self._pending[note] = (signature, now)  # (re)starts its debounce
+
+        for note in [n for n in self._pending if n not in notes]:
+            del self._pending[note]
+        for note in [n for n in self._failed if n not in notes]:
+            del self._failed[note]
+        for note in [n for n in self._exported if n not in notes]:
+            del self._exported[note]
+            self._failed.pop(note, None)
+            target = self._target(note)
+            target.unlink(missing_ok=True)
+            self._log(f"Removed {target}")
+            self._state_dirty = True
+
+    def dispatch(self, now: Optional[float] = None) -> int:
+        """Start exports for settled notes, up to the in-flight bound, and
+        collect finished ones. Returns the number of exports started."""
+        now = time.monotonic() if now is None else now
+        started = 0
+        while True:
+            self._collect()
+            busy = {note for note, _ in self._in_flight.values()}
+            submitted = 0
+            for note, (signature, seen) in list(self._pending.items()):
+                if len(self._in_flight) >= self.jobs * _IN_FLIGHT_PER_WORKER:
+                    break
+                if now - seen < self.debounce or note in busy:
+                    continue
+                task = ConversionTask(self.source / note, self._target(note))
+                future = self._executor.submit(convert_note, task, self.format, self.html_fallback)
+                self._in_flight[future] = (note, signature)
+                del self._pending[note]
+                submitted += 1
+            started += submitted
+            # Only the inline executor finishes work here; a pool is waited on in run()
+            if not submitted or not any(f.done() for f in self._in_flight):
+                break
+        self._maybe_save_state(now)
+        return started
+
+    def poll(self, now: Optional[float] = None) -> int:
+        """One full pass: scan() then dispatch()."""
+        now = time.monotonic() if now is None else now
+        self.scan(now)
+        return self.dispatch(now)
+
+    def _collect(self, block: bool = False):
+        for future in [f for f in self._in_flight if block or f.done()]:
+            note, signature = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:  # e.g. a worker process died
+                result = ConversionResult(None, 0, 0.0, str(e) or type(e).__name__)
+            if result.error is None:
+                self._exported[note] = signature
+                self._failed.pop(note, None)
+                self._state_dirty = True
+                self._log(f"Exported {note} ({result.seconds * 1000:.0f} ms)")
+            else:
+                # Retried only once the note changes again
+                self._failed[note] = signature
+                self._log(f"Failed: {note}: {result.error}")
+
+    def _maybe_save_state(self, now: float):
+        if self._state_dirty and now - self._state_saved_at >= _STATE_SAVE_SECONDS:
+            # Stays dirty if the save fails, so it's retried a period later
+            self._save_state()
+            self._state_saved_at = now
+
+    def next_wakeup(self, now: Optional[float] = None) -> float:
+        """Seconds until the next pending note settles (at most the poll
+        interval). Settled notes still waiting for a free worker don't count;
+        a finished export wakes the loop for those."""
+        now = time.monotonic() if now is None else now
+        settling = [seen + self.debounce - now for _, seen in self._pending.values()
+                    if seen + self.debounce > now]
+        return min(settling + [self.interval])
+
+    # -- loops -----------------------------------------------------------------
+
+    def sync(self):
+        """Export everything out of date right away, then return."""
+        debounce, self.debounce = self.debounce, 0
+        try:
+            self.poll()
+            while self._pending or self._in_flight:
+                wait(list(self._in_flight), return_when=FIRST_COMPLETED)
+                self.dispatch()
+        finally:
+            self.debounce = debounce
+
+    def run(self):
+        """Watch until interrupted (Ctrl+C)."""
+        waker = _InotifyWaker.create()
+        self._log(f"Watching {self.source} ({'inotify' if waker else 'polling'}), "
+                  f"exporting to {self.out_dir}")
+        # With inotify the folder is only rescanned on activity, when a note
+        # settles, and now and then in case an event was missed
+        rescan_every = self.interval if waker is None else _IDLE_RESCAN_SECONDS
+        last_scan = float("-inf")
+        activity = False
+        try:
+            while True:
+                now = time.monotonic()
+                settled = any(last_scan < seen + self.debounce <= now
+                              for _, seen in self._pending.values())
+                if activity or settled or now - last_scan >= rescan_every:
+                    self.scan(now)
+                    last_scan = now
+                    if waker is not None:
+                        waker.watch(self._folders)
+                self.dispatch(now)
+
+                timeout = min(self.next_wakeup(now), rescan_every)
+                if self._in_flight:
+                    wait(list(self._in_flight), timeout, return_when=FIRST_COMPLETED)
+                    activity = waker is not None and waker.wait(0)
+                elif waker is not None:
+                    activity = waker.wait(timeout if self._pending else rescan_every)
+                else:
+                    time.sleep(timeout)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+            if waker is not None:
+                waker.close()
+
+    def close(self):
+        """Finish exports already running and save the state."""
+        self._executor.shutdown(wait=True)
+        self._collect(block=True)
+        self._save_state()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point for `python main.py watch ...`; returns the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="main.py watch",
+        description="Keep a Markdown or Word copy of a notes folder up to date.",
+    )
+    parser.add_argument("source", type=Path, metavar="SRC", help="notes folder to watch")
+    parser.add_argument("--to", required=True, choices=sorted(OUTPUT_SUFFIXES),
+                        help="output format")
+    parser.add_argument("--out", required=True, type=Path, metavar="DIR",
+                        help="folder to mirror the converted notes into")
+    parser.add_argument("-j", "--jobs", type=int, default=2, metavar="N",
+                        help="worker processes (default: 2)")
+    parser.add_argument("--debounce", type=float, default=1.0, metavar="SECONDS",
+                        help="how long a note must be left alone before exporting it")
+    parser.add_argument("--interval", type=float, default=2.0, metavar="SECONDS",
+                        help="polling interval when inotify isn't available")
+    parser.add_argument("--state", type=Path, metavar="FILE",
+                        help=f"state file (default: DIR/{DEFAULT_STATE_NAME})")
+    parser.add_argument("--html-fallback", action="store_true",
+                        help="keep underline, colors and fonts as inline HTML in Markdown")
+    parser.add_argument("--once", action="store_true",
+                        help="bring the copy up to date once and exit")
+    args = parser.parse_args(argv)
+
+    if not args.source.is_dir():
+        parser.error(f"not a folder: {args.source}")
+
+    watcher = FolderWatcher(args.source, args.out, args.to, args.state, args.jobs,
+                            args.debounce, args.interval, args.html_fallback)
+    if args.once:
+        try:
+            watcher.sync()
+        finally:
+            watcher.close()
+    else:
+        # A service manager stops the daemon with SIGTERM; shut down as for Ctrl+C
+        signal.signal(signal.SIGTERM, _interrupt)
+        watcher.run()
+    return 0
@@ -0,0 +1,75 @@
+# Tests for services/batch_convert.py: the headless `main.py convert` mode.
+import os
+
+import pytest
+
+from services.batch_convert import (
+    ConversionTask, convert_html, is_up_to_date, main, plan_conversions,
+)
+
+
+@pytest.fixture
+def notes(tmp_path):
+    root = tmp_path / "notes"
+    (root / "work").mkdir(parents=True)
+    (root / "a.html").write_text("<h1>A</h1><p>First</p>", encoding="utf-8")
+    (root / "work" / "b.html").write_text("<p>Second <b>bold</b></p>", encoding="utf-8")
+    (root / "ignored.txt").write_text("not a note", encoding="utf-8")
+    return root
+
+
+def test_plan_keeps_folder_layout(notes, tmp_path):
+    out = tmp_path / "out"
+    tasks = plan_conversions([notes, notes / "a.html"], out, "md")
+    assert tasks == [
+        ConversionTask(notes / "a.html", out / "a.md"),
+        ConversionTask(notes / "work" / "b.html", out / "work" / "b.md"),
+        ConversionTask(notes / "a.html", out / "a.md"),
+    ]
+
+
+def test_convert_folder_to_markdown(notes, tmp_path, capsys):
+    out = tmp_path / "out"
+    assert main(["--to", "md", str(notes), "--out", str(out), "-j", "2"]) == 0
+
+    assert (out / "a.md").read_text(encoding="utf-8") == "# A\n\nFirst\n"
+    assert (out / "work" / "b.md").read_text(encoding="utf-8") == "Second **bold**\n"
+    assert "Converted 2 notes" in capsys.readouterr().out
+
+
+def test_convert_html_takes_the_note_from_memory(tmp_path):
+    task = ConversionTask("Open tab", tmp_path / "tab.md")
+    result = convert_html(task, "<p>In <i>memory</i></p>", "md")
+
+    assert result.error is None and result.bytes_in == 23
+    assert task.target.read_text(encoding="utf-8") == "In *memory*\n"
+
+
+def test_outputs_newer_than_source_are_skipped(notes, tmp_path, capsys):
+    out = tmp_path / "out"
+    main(["--to", "md", str(notes), "--out", str(out), "-j", "1"])
+    source = notes / "a.html"
+    stale = source.stat().st_mtime - 10
+    os.utime(out / "a.md", (stale, stale))  # as if a.html was edited since
+    capsys.readouterr()
+
+    main(["--to", "md", str(notes), "--out", str(out), "-j", "1"])
+
+    assert "Converted 1 notes" in capsys.readouterr().out
+    assert is_up_to_date(ConversionTask(source, out / "a.md"))
+
+
+def test_failures_are_reported_with_exit_code(notes, tmp_path, capsys):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "a.md").mkdir()  # the output path is taken by a folder
+    assert main(["--to", "md", str(notes / "a.html"), "--out", str(out), "-j", "1", "--force"]) == 1
+
+    captured = capsys.readouterr()
+    assert "Failed:" in captured.err
+    assert "1 failed" in captured.out
+
+
+def test_missing_source_is_a_usage_error(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--to", "md", str(tmp_path / "nope"), "--out", str(tmp_path / "out")])
@@ -0,0 +1,94 @@
+# Tests for services/compact_html.py: moving QTextEdit.toHtml()'s repeated
+# inline styles into <style> rules without changing what the note loads as.
+import re
+
+from PyQt6.QtGui import QTextDocument
+
+from services.compact_html import compact_qt_html
+from services.document_tree import parse_html
+
+SAMPLE = (
+    "<h2>Heading</h2><p>a <b>bold</b> <i>it</i> <span style='color:#ff0000'>red</span> "
+    "<a href='http://x.y/'>link</a></p><p>second <b>bold</b></p>"
+    "<ul><li>one</li><li>two <b>b</b><ul><li>nested</li></ul></li></ul>"
+    "<table border=1><tr><td bgcolor='#123456'>A</td><td><b>B</b></td></tr></table>"
+    "<pre>code\n  more</pre><p align='center' style='-qt-block-indent:2'>indented</p>"
+    "<p></p><p><span style='font-family:Georgia'>geo</span></p><hr/>"
+)
+
+
+def _qt_html(html: str) -> str:
+    document = QTextDocument()
+    document.setHtml(html)
+    return document.toHtml()
+
+
+def test_compact_html_loads_back_identically(qtbot):
+    original = _qt_html(SAMPLE)
+    compact = compact_qt_html(original)
+
+    assert len(compact) < len(original)
+    assert "<p>" in compact  # the common paragraph style is a bare p rule
+    assert _qt_html(compact) == _qt_html(original)
+
+
+def test_compact_html_parses_to_the_same_tree(qtbot):
+    original = _qt_html(SAMPLE)
+    compact = compact_qt_html(original)
+
+    assert parse_html(compact).blocks == parse_html(original).blocks
+    assert parse_html(compact).default_font == parse_html(original).default_font
+
+
+def _qt_markdown(markdown: str) -> str:
+    document = QTextDocument()
+    document.setMarkdown(markdown)
+    return document.toHtml()
+
+
+def _tags(html: str, tag: str) -> list[str]:
+    return re.findall(rf"<{tag}\b.*?</{tag}>", html, re.DOTALL)
+
+
+def test_compact_html_leaves_pre_blocks_alone(qtbot):
+    # Code fences from a Markdown import: every <pre> shares one style
+    original = _qt_markdown("text\n\n```\ncode one\n```\n\npara\n\n```\ncode two\n  more\n```\n")
+    compact = compact_qt_html(original)
+
+    assert len(compact) < len(original)
+    assert _tags(compact, "pre") == _tags(original, "pre")
+    assert _qt_html(compact) == _qt_html(original)
+
+
+def test_compact_html_leaves_colored_cells_alone(qtbot):
+    original = _qt_html(
+        "<table border=1><tr><th bgcolor='#ffff00'>H1</th><th bgcolor='#ffff00'>H2</th></tr>"
+        "<tr><td bgcolor='#123456'>A</td><td bgcolor='#123456'><b>B</b></td><td>C</td></tr>"
+        "</table><p>after</p><p>more <b>bold</b></p>")
+    compact = compact_qt_html(original)
+
+    assert len(compact) < len(original)
+    assert _tags(compact, "td") == _tags(original, "td")
+    assert _qt_html(compact) == _qt_html(original)
+
+
+def test_compact_html_merges_adjacent_identical_spans():
+    html = ('<html><head><style type="text/css">\n</style></head><body>'
+            '<p style=" margin-top:0px;"><span style=" font-weight:700;">a</span>'
+            '<span style=" font-weight:700;">b</span></p>'
+            '<p style=" margin-top:0px;"><span style=" font-weight:700;">c</span></p></body></html>')
+    compact = compact_qt_html(html)
+
+    assert '<p><span class="s0">ab</span></p><p><span class="s0">c</span></p>' in compact
+    assert "p { margin-top:0px; }" in compact
+    assert ".s0 { font-weight:700; }" in compact
+
+
+def test_compact_html_keeps_single_use_styles_inline_and_ignores_non_qt_html():
+    html = ('<html><head><style type="text/css">\n</style></head><body>'
+            '<p style=" margin-top:0px;"><span style=" color:#ff0000;">once</span></p>'
+            '</body></html>')
+    assert '<span style=" color:#ff0000;">once</span>' in compact_qt_html(html)
+
+    plain = "<p style='color:red'>no head</p>"
+    assert compact_qt_html(plain) == plain
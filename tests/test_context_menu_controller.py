@@ -29,10 +29,10 @@ class FakeSpellService:
         self._suggestions = suggestions or {}
         self.added_words = []
 
-    def is_correct(self, word):
+    def is_correct(self, word, language=None):
         return word.lower() not in self._misspelled
 
-    def suggestions(self, word):
+    def suggestions(self, word, language=None):
         return self._suggestions.get(word.lower(), [])
 
     def add_word(self, word):
@@ -220,7 +220,7 @@ def test_table_properties_action_opens_dialog(text_edit, captured_menu, monkeypa
     controller.show(text_edit.cursorRect(cursor).center(), text_edit)
 
     opened = {}
-    from app.controllers import context_menu_controller as cmc_module
+    from widgets import table_dialog
 
     class FakeDialog:
         def __init__(self, table_arg, parent):
@@ -229,7 +229,7 @@ def test_table_properties_action_opens_dialog(text_edit, captured_menu, monkeypa
         def exec(self):
             return None
 
-    monkeypatch.setattr(cmc_module, "TablePropertiesDialog", FakeDialog)
+    monkeypatch.setattr(table_dialog, "TablePropertiesDialog", FakeDialog)
 
     menu = captured_menu["menu"]
     table_menu = next(a.menu() for a in menu.actions() if a.menu() and a.menu().title() == "Table")
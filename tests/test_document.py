@@ -0,0 +1,83 @@
+# Tests for models/document.py: the Qt-free note model. Nothing here needs
+# a QApplication.
+import subprocess
+import sys
+from pathlib import Path
+
+from models.document import Document, OutlineEntry, count_words
+from services.document_tree import Heading, Run, Table
+
+PNG = "data:image/png;base64,iVBORw0KGgo="
+
+NOTE = (
+    "<body style=\"font-family:'Georgia'\">"
+    "<h1>Plan</h1><p align=\"center\" style=\"-qt-block-indent:1; text-indent:20px\">"
+    "Some <b>bold</b>, <i><u>under</u></i> <s>old</s> <code>x &lt; y</code> "
+    "<span style=\"color:#ff0000; background-color:#ffff00; font-size:14pt; "
+    "font-family:'Arial'\">loud</span><br>next <a href=\"http://x.y/?a=1&amp;b=2\">a "
+    f"<b>link</b><img src=\"{PNG}\" alt=\"dot\" width=\"4\"></a></p>"
+    "<h2>Details</h2><ul><li>one<ol><li>inner</li></ol></li><li>two</li></ul>"
+    "<pre>code  <kept>\n  indented</pre><hr>"
+    "<table><tr><th>Head</th><td><p>cell</p><table><tr><td>nested</td></tr></table></td></tr></table>"
+    "</body>"
+)
+
+
+def test_html_round_trip_keeps_every_block():
+    document = Document.from_html(NOTE)
+    again = Document.from_html(document.to_html())
+
+    assert again.blocks == document.blocks
+    assert again.default_font == "Georgia"
+    assert document.blocks[1].align == "center" and document.blocks[1].indent == 1
+    assert Run("loud", color="#ff0000", highlight="#ffff00", font="Arial", size=14.0) \
+        in document.blocks[1].inlines
+
+
+def test_to_html_is_a_lossy_export_of_qt_layout():
+    qt_note = ('<p align="center" style="margin-top:12px; margin-bottom:12px;">'
+               '<span style="font-size:24pt; font-weight:700;">Plan</span></p>'
+               '<p style="margin-top:20px; line-height:150%;">body</p>'
+               '<table><tr><td colspan="2" bgcolor="#ffff00">wide</td></tr>'
+               '<tr><td>a</td><td>b</td></tr></table>')
+    html = Document.from_html(qt_note).to_html()
+
+    for dropped in ("colspan", "bgcolor", "align=", "margin", "line-height"):
+        assert dropped not in html
+    assert '<h1><span style="font-size:24pt;"><b>Plan</b></span></h1>' in html
+    # The spanned cell's row now has one cell, its neighbour row two
+    assert "<tr><td><p>wide</p>\n</td></tr>" in html
+
+
+def test_save_and_load(tmp_path):
+    document = Document.from_html(NOTE)
+    path = tmp_path / "note.html"
+    document.save(path)
+
+    assert Document.load(path).blocks == document.blocks
+
+
+def test_stats_outline_images_and_tables():
+    document = Document.from_html(NOTE)
+
+    assert document.outline() == [OutlineEntry(1, "Plan", 0), OutlineEntry(2, "Details", 2)]
+    assert document.word_count() == count_words(document.plain_text())
+    assert document.character_count() == len(document.plain_text())
+    assert [image.alt for image in document.images()] == ["dot"]
+    assert [type(t) for t in document.tables()] == [Table, Table]
+    assert count_words("  two\twords\n") == 2 and count_words(" ") == 0
+
+
+def test_from_tree_shares_the_blocks():
+    document = Document.from_html("<h3>Title</h3>")
+    assert Document.from_tree(document) is document
+    assert document.blocks == [Heading(3, [Run("Title")])]
+
+
+def test_importing_the_model_does_not_import_qt():
+    code = ("import sys; from models.document import Document; "
+            "Document.from_html('<p>x</p>').word_count(); "
+            "print(any(name.startswith('PyQt6') for name in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent, check=True)
+    assert result.stdout.strip() == "False"
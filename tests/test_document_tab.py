@@ -153,6 +153,33 @@ def test_image_html_round_trip_preserves_embedded_data(qtbot):
     assert "data:image/png;base64," in restored_html
 
 
+def test_loaded_images_keep_their_original_bytes_until_resized(qtbot):
+    """A JPEG should be saved back as the same JPEG, not re-encoded as PNG."""
+    from PyQt6.QtCore import QBuffer, QIODevice
+
+    image = QImage(16, 16, QImage.Format.Format_RGB32)
+    image.fill(Qt.GlobalColor.red)
+    buf = QBuffer()
+    buf.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buf, "JPEG")
+    jpeg_uri = "data:image/jpeg;base64," + buf.data().toBase64().data().decode()
+
+    doc = DocumentTab("Test")
+    doc.set_content(f'<p><img src="{jpeg_uri}" /> and again <img src="{jpeg_uri}" /></p>',
+                    is_html=True)
+    html = doc.get_content_html()
+    assert html.count(jpeg_uri) == 2
+    assert "data:image/png" not in html
+
+    # Resizing swaps in a new image under the same name
+    name = next(iter(doc._image_sources))
+    qt_doc = doc.text_edit.document()
+    qt_doc.addResource(QTextDocument.ResourceType.ImageResource, QUrl(name), image.scaled(8, 8))
+    html = doc.get_content_html()
+    assert jpeg_uri not in html
+    assert "data:image/png;base64," in html
+
+
 def test_session_restore_preserves_tab_order_when_files_load_out_of_order(qtbot, tmp_path):
     """Previously open tabs should be restored in the same order they were saved,
     even if their background loads finish in a different order."""
@@ -217,4 +244,92 @@ def test_save_session_uses_visible_tab_order_after_reordering(qtbot, tmp_path):
     window._save_session()
     saved_tabs, _ = window.settings_manager.get_open_tabs()
 
-    assert saved_tabs == [str(first_file), str(third_file), str(second_file)]
\ No newline at end of file
+    assert saved_tabs == [str(first_file), str(third_file), str(second_file)]
+
+
+def test_document_tree_is_cached_until_the_next_edit(qtbot):
+    doc = DocumentTab("Test")
+    doc.set_content("<p>Hello <b>world</b></p>", is_html=True)
+
+    first = doc.get_document_tree()
+    assert doc.get_document_tree() is first
+    assert "Hello world" in first.plain_text()
+
+    revision = doc.revision
+    cursor = doc.text_edit.textCursor()
+    cursor.movePosition(cursor.MoveOperation.End)
+    cursor.insertText("!")
+    assert doc.revision != revision
+
+    second = doc.get_document_tree()
+    assert second is not first
+    assert "Hello world!" in second.plain_text()
+
+
+def test_print_layouts_are_cached_per_setup_until_the_next_edit(qtbot):
+    from services.print_document import PageSetup, layout_print_document
+
+    doc = DocumentTab("Test")
+    doc.set_content("<p>Hello</p>", is_html=True)
+    setups = [PageSetup(size) for size in (10, 12, 14, 16)]
+    for setup in setups:
+        doc.remember_print_layout(doc.revision, layout_print_document(doc.get_document_tree(), setup))
+
+    # Only the most recently used ones are kept
+    assert doc.cached_print_layout(setups[0]) is None
+    assert doc.cached_print_layout(setups[3]).setup == setups[3]
+
+    stale = doc.revision
+    doc.text_edit.insertPlainText("!")
+    assert doc.cached_print_layout(setups[3]) is None
+    doc.remember_print_layout(stale, layout_print_document(doc.get_document_tree(), setups[0]))
+    assert doc.cached_print_layout(setups[0]) is None
+
+
+def test_document_model_goes_in_and_out_of_the_editor(qtbot):
+    from models.document import Document, OutlineEntry
+
+    document = Document.from_html("<h1>Plan</h1><p>Some <b>bold</b> text</p>"
+                                  "<h2>Next</h2><ul><li>one</li><li>two</li></ul>"
+                                  "<table><tr><td>cell</td></tr></table>")
+    doc = DocumentTab("Test")
+    doc.set_document(document)
+
+    edited = doc.get_document()
+    assert isinstance(edited, Document) and edited is doc.get_document()
+    assert edited.outline() == [OutlineEntry(1, "Plan", 0), OutlineEntry(2, "Next", 2)]
+    assert edited.plain_text() == document.plain_text()
+    assert edited.word_count() == 8
+
+
+def test_content_html_pieces_join_to_the_full_html(qtbot):
+    """iter_content_html() yields images whole, as the kept data URI"""
+    png_1x1 = ("data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNk"
+               "+A8AAQUBAScY42YAAAAASUVORK5CYII=")
+    doc = DocumentTab("Test")
+    doc.set_content(f'<p>a <img src="{png_1x1}" /></p>'
+                    '<table><tr><td>x</td></tr></table>', is_html=True)
+
+    pieces = list(doc.iter_content_html())
+    assert "".join(pieces) == doc.get_content_html()
+    assert png_1x1 in pieces
+    assert doc.get_export_snapshot() == pieces
+
+
+def test_set_content_takes_images_decoded_elsewhere(qtbot):
+    """HTML already run through decode_embedded_images() isn't decoded again"""
+    from services.embedded_images import decode_embedded_images
+
+    image = QImage(5, 3, QImage.Format.Format_RGB32)
+    image.fill(0x0000FF)
+    doc = DocumentTab()
+    doc.text_edit.document().addResource(2, QUrl("pic.png"), image)
+    doc.text_edit.setHtml('<p><img src="pic.png" /></p>')
+    html, images = decode_embedded_images(doc.get_content_html())
+    (name, (decoded, src)), = images.items()
+
+    restored = DocumentTab()
+    restored.set_content(html, True, images)
+
+    assert restored.text_edit.document().resource(2, QUrl(name)).cacheKey() == decoded.cacheKey()
+    assert src in restored.get_content_html()
@@ -0,0 +1,125 @@
+# Tests for services/document_tree.py: parsing Qt's toHtml() output and
+# plain semantic HTML into the shared tree the exporters consume.
+from services.document_tree import (
+    CodeBlock, Heading, Image, LineBreak, ListBlock, Paragraph, Rule, Run, Table,
+    parse_html,
+)
+
+
+# ============================================================================
+# Blocks
+# ============================================================================
+
+def test_parse_semantic_blocks():
+    tree = parse_html(
+        "<h2>Title</h2><p>Body</p><pre>x = 1</pre><hr/>"
+        "<ul><li>a</li><li>b</li></ul>"
+    )
+    kinds = [type(block) for block in tree.blocks]
+    assert kinds == [Heading, Paragraph, CodeBlock, Rule, ListBlock]
+    assert tree.blocks[0].level == 2
+    assert tree.blocks[2].text == "x = 1"
+    assert [item.inlines[0].text for item in tree.blocks[4].items] == ["a", "b"]
+
+
+def test_parse_qt_heading_paragraph():
+    tree = parse_html(
+        '<p style=" margin-top:12px; margin-bottom:12px;">'
+        '<span style=" font-size:20pt; font-weight:700;">Sub</span></p>'
+    )
+    heading = tree.blocks[0]
+    assert type(heading) is Heading and heading.level == 2
+    assert heading.inlines[0].text == "Sub" and heading.inlines[0].bold
+
+
+def test_parse_qt_heading_needs_the_span_to_fill_the_paragraph():
+    tree = parse_html(
+        '<p style=" margin-top:12px; margin-bottom:12px;">'
+        '<span style=" font-size:20pt; font-weight:700;">Big</span> words</p>'
+    )
+    assert type(tree.blocks[0]) is Paragraph
+
+
+def test_parse_skips_head_and_reads_body_font():
+    tree = parse_html(
+        "<html><head><style>p { color: red; }</style></head>"
+        "<body style=\" font-family:'Georgia';\">\n<p>Text</p>\n</body></html>"
+    )
+    assert tree.default_font == "Georgia"
+    assert len(tree.blocks) == 1
+    assert tree.plain_text() == "Text"
+
+
+def test_parse_loose_text_becomes_a_paragraph():
+    tree = parse_html("loose <b>text</b><p>para</p>")
+    assert [type(b) for b in tree.blocks] == [Paragraph, Paragraph]
+    assert tree.blocks[0].inlines[1] == Run("text", bold=True)
+
+
+def test_parse_paragraph_alignment_and_indent():
+    tree = parse_html('<p align="center" style=" -qt-block-indent:2; text-indent:10px;">x</p>')
+    paragraph = tree.blocks[0]
+    assert (paragraph.align, paragraph.indent, paragraph.text_indent) == ("center", 2, 10)
+
+
+# ============================================================================
+# Inlines
+# ============================================================================
+
+def test_parse_qt_span_styles():
+    tree = parse_html(
+        '<p><span style=" font-weight:700; font-style:italic; color:#ff0000;">a</span>'
+        "<span style=\" font-family:'Courier New';\">b</span>"
+        '<span style=" background-color:#ffff00; text-decoration: line-through;">c</span></p>'
+    )
+    a, b, c = tree.blocks[0].inlines
+    assert a == Run("a", bold=True, italic=True, color="#ff0000")
+    assert b == Run("b", code=True)
+    assert c == Run("c", strike=True, highlight="#ffff00")
+
+
+def test_parse_links_images_and_breaks():
+    tree = parse_html(
+        '<p><a href="https://example.com"><span style=" text-decoration: underline;'
+        ' color:#0000ff;">site</span></a><br/>'
+        '<img src="pic.png" alt="Pic" width="40" style="height: 30px;" /></p>'
+    )
+    link, line_break, image = tree.blocks[0].inlines
+    assert link == Run("site", href="https://example.com")  # no extra color/underline
+    assert line_break == LineBreak()
+    assert image == Image("pic.png", "Pic", 40, 30)
+
+
+def test_parse_merges_adjacent_runs_with_the_same_formatting():
+    tree = parse_html("<p><b>one</b><b> two</b> three</p>")
+    assert tree.blocks[0].inlines == [Run("one two", bold=True), Run(" three")]
+
+
+def test_parse_unclosed_inline_tag_does_not_leak_into_next_block():
+    tree = parse_html("<p><b>bold</p><p>plain</p>")
+    assert tree.blocks[1].inlines == [Run("plain")]
+
+
+# ============================================================================
+# Tables and lists
+# ============================================================================
+
+def test_parse_table_cells_keep_their_blocks():
+    tree = parse_html(
+        "<table><tr><th>Name</th><td>\n<p><b>Bold</b> cell</p></td></tr></table>"
+    )
+    table = tree.blocks[0]
+    assert type(table) is Table
+    header, cell = table.rows[0]
+    assert header.header and not cell.header
+    assert cell.blocks[0].inlines == [Run("Bold", bold=True), Run(" cell")]
+    assert tree.plain_text() == "Name\tBold cell"
+
+
+def test_parse_nested_list():
+    tree = parse_html("<ol><li>one<ul><li>inner</li></ul></li><li>two</li></ol>")
+    outer = tree.blocks[0]
+    assert outer.ordered and len(outer.items) == 2
+    inner = outer.items[0].sublists[0]
+    assert not inner.ordered
+    assert inner.items[0].inlines == [Run("inner")]
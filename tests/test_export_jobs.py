@@ -0,0 +1,139 @@
+# Tests for services/export_jobs.py: exports queued on the worker thread,
+# their progress, cancellation and failures.
+import pytest
+
+from services.document_tree import parse_html
+from services.export_jobs import BatchExportJob, ExportJob, ExportJobRunner
+from services.print_document import PageSetup, layout_print_document
+
+LONG_HTML = "".join(f"<p>Paragraph {i} with <b>bold</b> text.</p>" for i in range(3000))
+
+
+@pytest.fixture
+def runner(qtbot):
+    runner = ExportJobRunner()
+    yield runner
+    runner.shutdown()
+
+
+def test_markdown_job_writes_file_and_reports_progress(runner, qtbot, tmp_path):
+    target = tmp_path / "note.md"
+    job = ExportJob("<h1>Title</h1><p>Body</p>", target, "md")
+    progress = []
+    runner.job_progress.connect(lambda j, percent: progress.append(percent))
+
+    with qtbot.waitSignal(runner.job_finished, timeout=5000) as blocker:
+        runner.submit(job)
+
+    assert blocker.args == [job]
+    assert target.read_text(encoding="utf-8") == "# Title\n\nBody\n"
+    assert progress[-1] == 100
+    assert job.tree is not None and job.tree.plain_text() == "Title\nBody"
+    assert runner.pending() == []
+
+
+def test_pdf_job_renders_tree_snapshot(runner, qtbot, tmp_path):
+    target = tmp_path / "note.pdf"
+    job = ExportJob(parse_html("<p>Hello</p>"), target, "pdf", font_size=14)
+
+    with qtbot.waitSignal(runner.job_finished, timeout=10000):
+        runner.submit(job)
+
+    assert target.read_bytes().startswith(b"%PDF")
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_pdf_job_writes_a_preview_layout_as_is(runner, qtbot, tmp_path):
+    layout = layout_print_document(parse_html("<p>Hello</p>"), PageSetup(font_size=16))
+    target = tmp_path / "note.pdf"
+    job = ExportJob(layout.tree, target, "pdf", font_size=16, layout=layout)
+
+    with qtbot.waitSignal(runner.job_finished, timeout=10000):
+        runner.submit(job)
+
+    assert target.read_bytes().startswith(b"%PDF")
+    assert job.tree is layout.tree
+
+
+def test_jobs_queue_in_order(runner, qtbot, tmp_path):
+    finished = []
+    runner.job_finished.connect(lambda job: finished.append(job.filepath.name))
+    jobs = [ExportJob(f"<p>{i}</p>", tmp_path / f"{i}.md", "md") for i in range(3)]
+
+    with qtbot.waitSignal(runner.job_finished, timeout=5000,
+                          check_params_cb=lambda job: job is jobs[-1]):
+        for job in jobs:
+            runner.submit(job)
+
+    assert finished == ["0.md", "1.md", "2.md"]
+
+
+def test_cancel_running_job_leaves_no_file(runner, qtbot, tmp_path):
+    target = tmp_path / "long.md"
+    job = ExportJob(LONG_HTML, target, "md")
+    runner.job_progress.connect(lambda j, percent: j.cancel())
+
+    with qtbot.waitSignal(runner.job_cancelled, timeout=5000):
+        runner.submit(job)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cancel_all_skips_queued_jobs(runner, qtbot, tmp_path):
+    cancelled = []
+    runner.job_cancelled.connect(lambda job: cancelled.append(job))
+    jobs = [ExportJob(LONG_HTML, tmp_path / f"{i}.docx", "docx") for i in range(3)]
+    for job in jobs:
+        runner.submit(job)
+    runner.cancel_all()
+
+    qtbot.waitUntil(lambda: not runner.pending(), timeout=10000)
+    assert cancelled == jobs
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_job_reports_error(runner, qtbot, tmp_path):
+    blocker_file = tmp_path / "not-a-dir"
+    blocker_file.write_text("x")
+    job = ExportJob("<p>Body</p>", blocker_file / "note.md", "md")
+
+    with qtbot.waitSignal(runner.job_failed, timeout=5000) as blocker:
+        runner.submit(job)
+
+    assert blocker.args[0] is job
+    assert blocker.args[1]
+
+
+def test_unknown_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ExportJob("<p>x</p>", tmp_path / "note.rtf", "rtf")
+
+
+def test_batch_job_exports_every_note_in_every_format(runner, qtbot, tmp_path):
+    notes = [("Plan", "<h1>Plan</h1>"), ("a/b: c?", "<p>odd name</p>"), ("plan", "<p>again</p>")]
+    job = BatchExportJob(notes, tmp_path / "out", ["md", "docx", "pdf"], workers=2)
+    progress = []
+    runner.job_progress.connect(lambda j, percent: progress.append(percent))
+
+    with qtbot.waitSignal(runner.job_finished, timeout=30000):
+        runner.submit(job)
+
+    names = sorted(p.name for p in (tmp_path / "out").iterdir())
+    assert names == sorted(f"{stem}{suffix}" for stem in ("Plan", "a_b_ c_", "plan (2)")
+                           for suffix in (".md", ".docx", ".pdf"))
+    assert (tmp_path / "out" / "Plan.md").read_text(encoding="utf-8") == "# Plan\n"
+    assert len(job.results) == 9 and all(r.error is None for r in job.results)
+    assert progress[-1] == 100
+    assert job.summary().startswith("Exported 9 files")
+    assert len(job.log_lines()) == 9
+
+
+def test_batch_job_reports_failed_files(tmp_path):
+    job = BatchExportJob([("note", "<p>x</p>")], tmp_path, ["md"])
+    # The target itself is a folder, so writing it fails
+    (tmp_path / "note.md").mkdir()
+    job.run()
+
+    assert job.results[0].error
+    assert "1 failed" in job.summary()
+    assert job.log_lines()[0].startswith("Failed: note.md")
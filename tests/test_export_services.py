@@ -3,10 +3,13 @@
 # DocumentTab.get_content_html() (span-based headings/code, not real
 # <h1>/<code> tags).
 import base64
+import io
 
 import pytest
 
-from services.export_services import html_to_markdown, strip_tags, save_html_as_docx
+from services.export_services import (
+    html_to_markdown, save_html_as_docx, save_html_as_markdown, strip_tags, write_markdown,
+)
 
 docx = pytest.importorskip("docx")
 
@@ -139,6 +142,60 @@ def test_html_to_markdown_does_not_leave_stray_tags():
     assert "<" not in md and ">" not in md
 
 
+def test_html_to_markdown_qt_heading_paragraph_with_extra_text_stays_paragraph():
+    html = (
+        '<p style=" margin-top:12px; margin-bottom:12px;">'
+        '<span style=" font-size:24pt; font-weight:700;">Big</span> and plain</p>'
+    )
+    md = html_to_markdown(html)
+    assert "#" not in md
+    assert "**Big** and plain" in md
+
+
+def test_html_to_markdown_skips_qt_head_and_style():
+    html = (
+        '<html><head><meta name="qrichtext" content="1" /><style type="text/css">\n'
+        "p, li { white-space: pre-wrap; }\n</style></head>"
+        "<body><p>Only this.</p></body></html>"
+    )
+    assert html_to_markdown(html) == "Only this.\n"
+
+
+def test_html_to_markdown_collapses_blank_lines_and_unescapes():
+    html = "<p>a &amp; b</p>\n\n\n<p></p><p></p><p>&lt;c&gt;</p>"
+    assert html_to_markdown(html) == "a & b\n\n<c>\n"
+
+
+# ============================================================================
+# Streaming Markdown output
+# ============================================================================
+
+def test_write_markdown_streams_to_text_stream():
+    html = "<h1>Title</h1><p>Some <strong>bold</strong> text.</p>"
+    stream = io.StringIO()
+    write_markdown(html, stream)
+    assert stream.getvalue() == html_to_markdown(html)
+
+
+def test_write_markdown_emits_blocks_as_they_close():
+    writes = []
+
+    class Recorder:
+        def write(self, text):
+            writes.append(text)
+
+    write_markdown("<p>one</p><p>two</p><p>three</p>", Recorder())
+    assert "".join(writes) == "one\n\ntwo\n\nthree\n"
+    assert len(writes) > 1
+
+
+def test_save_html_as_markdown(tmp_path):
+    out_path = tmp_path / "nested" / "out.md"
+    html = '<p><span style=" color:#ff0000;">red</span></p>'
+    save_html_as_markdown(html, out_path, html_fallback=True)
+    assert out_path.read_text(encoding="utf-8") == html_to_markdown(html, html_fallback=True)
+
+
 # ============================================================================
 # save_html_as_docx
 # ============================================================================
@@ -196,6 +253,24 @@ def test_save_html_as_docx_table(tmp_path):
     assert [c.text for c in table.rows[1].cells] == ["1", "2"]
 
 
+def test_save_html_as_docx_table_keeps_cell_formatting(tmp_path):
+    from docx import Document
+
+    html = ('<table><tr><td><b>Bold</b> plain</td>'
+            '<td><a href="https://example.com">Link</a></td></tr>'
+            '<tr><td>short row</td></tr></table>')
+    out_path = tmp_path / "table.docx"
+    save_html_as_docx(html, out_path)
+
+    table = Document(str(out_path)).tables[0]
+    first = table.rows[0].cells[0].paragraphs[0]
+    assert [(r.text, bool(r.bold)) for r in first.runs] == [("Bold", True), (" plain", False)]
+    assert "w:hyperlink" in table.rows[0].cells[1]._tc.xml
+    assert table.rows[0].cells[1].text == "Link"
+    # Short rows are padded out to the full grid
+    assert [c.text for c in table.rows[1].cells] == ["short row", ""]
+
+
 def test_save_html_as_docx_hyperlink(tmp_path):
     from docx import Document
 
@@ -210,6 +285,30 @@ def test_save_html_as_docx_hyperlink(tmp_path):
     assert "Example" in xml
 
 
+def test_save_html_as_docx_hyperlink_keeps_run_formatting(tmp_path):
+    from docx import Document
+    from docx.oxml.ns import qn
+
+    html = ('<p><a href="https://example.com">the <b>bold</b> link </a>next</p>'
+            '<table><tr><td>in <a href="https://example.com"><b>B</b><br>two</a></td></tr></table>')
+    out_path = tmp_path / "links.docx"
+    save_html_as_docx(html, out_path)
+
+    doc = Document(str(out_path))
+    paragraph = doc.paragraphs[0]._p
+    link = paragraph.find(qn("w:hyperlink"))
+    runs = link.findall(qn("w:r"))
+    assert ["".join(t.text for t in r.iter(qn("w:t"))) for r in runs] == ["the ", "bold", " link "]
+    assert [r.find(qn("w:rPr")).find(qn("w:b")) is not None for r in runs] == [False, True, False]
+    assert all(r.find(qn("w:rPr")).find(qn("w:u")) is not None for r in runs)
+    assert doc.paragraphs[0].text.endswith("link next")
+
+    cell = doc.tables[0].rows[0].cells[0]._tc
+    cell_link = cell.find(".//" + qn("w:hyperlink"))
+    assert cell_link.find(qn("w:r")).find(qn("w:rPr")).find(qn("w:b")) is not None
+    assert cell_link.find(".//" + qn("w:br")) is not None
+
+
 def test_save_html_as_docx_image(tmp_path):
     from docx import Document
 
@@ -226,6 +325,35 @@ def test_save_html_as_docx_image(tmp_path):
     assert len(doc.inline_shapes) == 1
 
 
+def test_save_html_as_docx_embeds_repeated_image_once_at_html_size(tmp_path):
+    from docx import Document
+    from docx.shared import Inches
+
+    png_1x1 = ("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNk"
+               "+A8AAQUBAScY42YAAAAASUVORK5CYII=")
+    src = f"data:image/png;base64,{png_1x1}"
+    html = (f'<p><img src="{src}" width="96" height="48" /></p>'
+            f'<p><img src="{src}" width="192" /></p>'
+            f'<p><img src="{src}" /></p>'
+            f'<p><img src="{src}" width="5000" height="100" /></p>')
+    out_path = tmp_path / "images.docx"
+    save_html_as_docx(html, out_path)
+
+    doc = Document(str(out_path))
+    image_parts = [p for p in doc.part.package.iter_parts() if p.partname.startswith("/word/media/")]
+    assert len(image_parts) == 1
+    assert image_parts[0].blob == base64.b64decode(png_1x1)
+    sizes = [(s.width, s.height) for s in doc.inline_shapes]
+    assert sizes[0] == (Inches(1), Inches(0.5))
+    assert sizes[1] == (Inches(2), Inches(2))  # aspect ratio from the pixels
+    assert sizes[2] == (9525, 9525)  # one pixel at 96 dpi
+    # Too wide for the page: shrunk to the text column, keeping the ratio
+    section = doc.sections[0]
+    text_width = section.page_width - section.left_margin - section.right_margin
+    assert sizes[3][0] == text_width
+    assert sizes[3][1] == int(100 * 9525 * text_width / (5000 * 9525))
+
+
 def test_save_html_as_docx_creates_parent_dirs(tmp_path):
     out_path = tmp_path / "nested" / "dir" / "out.docx"
     save_html_as_docx("<p>Hello</p>", out_path)
@@ -470,3 +598,34 @@ def test_save_html_as_docx_single_blank_line_stays_single(tmp_path):
     doc = Document(str(out_path))
     texts = [p.text for p in doc.paragraphs]
     assert texts == ["First paragraph.", "\n", "Second paragraph."]
+
+
+# ============================================================================
+# Shared DocumentTree input
+# ============================================================================
+
+def test_exporters_accept_a_parsed_document_tree(tmp_path):
+    from docx import Document
+    from services.document_tree import parse_html
+
+    html = "<h1>Title</h1><p>Some <strong>bold</strong> text.</p>"
+    tree = parse_html(html)
+    assert html_to_markdown(tree) == html_to_markdown(html)
+
+    out_path = tmp_path / "tree.docx"
+    save_html_as_docx(tree, out_path)
+    assert [p.text for p in Document(str(out_path)).paragraphs] == ["Title", "Some bold text."]
+
+
+def test_html_to_markdown_nested_list():
+    md = html_to_markdown("<ol><li>one<ul><li>inner</li></ul></li><li>two</li></ol>")
+    assert "1. one\n   - inner\n2. two" in md
+
+
+def test_save_html_as_docx_nested_list(tmp_path):
+    from docx import Document
+
+    out_path = tmp_path / "nested.docx"
+    save_html_as_docx("<ul><li>one<ul><li>inner</li></ul></li></ul>", out_path)
+    styles = [(p.text, p.style.name) for p in Document(str(out_path)).paragraphs]
+    assert styles == [("one", "List Bullet"), ("inner", "List Bullet 2")]
@@ -53,4 +53,48 @@ def test_delete_nonexistent_file(tmp_path):
     """Test deleting a file that doesn't exist"""
     file = tmp_path / "nonexistent.txt"
     with pytest.raises(Exception):
-        FileOperations.delete_file(file)
\ No newline at end of file
+        FileOperations.delete_file(file)
+
+def test_write_file_streams_pieces_and_keeps_original_on_failure(tmp_path):
+    """Content can be an iterable of pieces; a failed write leaves the note
+    as it was, plus the .bak"""
+    file = tmp_path / "note.html"
+    FileOperations.write_file(file, iter(["<p>", "streamed", "</p>"]))
+    assert file.read_text(encoding='utf-8') == "<p>streamed</p>"
+    assert not file.with_suffix(".html.bak").exists()
+
+    def failing_pieces():
+        yield "<p>partial"
+        raise RuntimeError("boom")
+
+    with pytest.raises(IOError):
+        FileOperations.write_file(file, failing_pieces())
+    assert file.with_suffix(".html.bak").read_text(encoding='utf-8') == "<p>streamed</p>"
+    # The note itself is untouched, and no partial file is left behind
+    assert file.read_text(encoding='utf-8') == "<p>streamed</p>"
+    assert not file.with_name("note.html.part").exists()
+
+def test_markdown_is_read_as_html_with_images_decoded_by_the_worker(tmp_path, qtbot):
+    """Imports come back as HTML; the load worker decodes embedded pictures"""
+    from PyQt6.QtGui import QImage
+    from services.file_operations import FileLoadWorker
+
+    image = QImage(3, 2, QImage.Format.Format_RGB32)
+    image.fill(0xFF0000)
+    image.save(str(tmp_path / "dot.png"))
+    note = tmp_path / "note.md"
+    note.write_text("# Title\n\n![dot](dot.png) ![dot](dot.png)", encoding='utf-8')
+
+    content, is_html = FileOperations.read_file(note)
+    assert is_html is True
+    assert "<h1>Title</h1>" in content and "data:image/png;base64," in content
+
+    worker = FileLoadWorker(note)
+    with qtbot.waitSignal(worker.finished) as blocker:
+        worker.run()
+    html, is_html, images = blocker.args
+    assert is_html is True and "data:" not in html
+    assert len(images) == 1  # the same picture twice is decoded once
+    (name, (decoded, src)), = images.items()
+    assert html.count(f'src="{name}"') == 2
+    assert decoded.size() == image.size() and src.startswith("data:image/png;base64,")
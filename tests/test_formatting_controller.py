@@ -415,7 +415,7 @@ def test_show_table_properties_with_table_opens_dialog(controller, tab, monkeypa
     tab.text_edit.setTextCursor(cursor)
 
     opened = {}
-    from app.controllers import formatting_controller as fc_module
+    from widgets import table_dialog
 
     class FakeDialog:
         def __init__(self, table, parent):
@@ -424,7 +424,7 @@ def test_show_table_properties_with_table_opens_dialog(controller, tab, monkeypa
         def exec(self):
             return None
 
-    monkeypatch.setattr(fc_module, "TablePropertiesDialog", FakeDialog)
+    monkeypatch.setattr(table_dialog, "TablePropertiesDialog", FakeDialog)
     controller.show_table_properties()
     assert "table" in opened
 
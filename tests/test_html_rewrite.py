@@ -0,0 +1,54 @@
+# Tests for services/html_rewrite.py: the single-pass scanner DocumentTab
+# uses to swap image sources and clean table-cell styles.
+from services.html_rewrite import rewrite_html
+
+
+def _rewrite(html, image_src=None, strip_cell_backgrounds=False):
+    return "".join(rewrite_html(html, image_src, strip_cell_backgrounds))
+
+
+def test_unchanged_html_comes_back_whole():
+    html = ('<!DOCTYPE html><html><body><p class="x">a &lt; b</p>'
+            '<img src="a.png" /><td style="color:red">c</td></body></html>')
+    assert _rewrite(html) == html
+    assert _rewrite(html, lambda src: None, strip_cell_backgrounds=True) == html
+
+
+def test_image_sources_are_replaced_in_every_quoting_style():
+    html = '<p><img src="a.png" /><IMG alt=\'x\' SRC=\'b.png\'><img src=c.png width=3></p>'
+    seen = []
+
+    def image_src(src):
+        seen.append(src)
+        return None if src == "b.png" else f"data:{src}"
+
+    assert _rewrite(html, image_src) == (
+        '<p><img src="data:a.png" /><IMG alt=\'x\' SRC=\'b.png\'><img src=data:c.png width=3></p>')
+    assert seen == ["a.png", "b.png", "c.png"]
+
+
+def test_only_img_src_and_cell_styles_are_touched():
+    html = ('<script src="a.png"></script><p style="background-color:#111">p</p>'
+            '<td bgcolor="#222" style=" vertical-align:top; background-color:#333;">'
+            '<span style="background-color:#444">x</span></td>'
+            '<TH STYLE="Background-Color: #555">h</TH>')
+    assert _rewrite(html, lambda src: "changed", strip_cell_backgrounds=True) == (
+        '<script src="a.png"></script><p style="background-color:#111">p</p>'
+        '<td bgcolor="#222" style=" vertical-align:top;">'
+        '<span style="background-color:#444">x</span></td>'
+        '<TH STYLE="">h</TH>')
+
+
+def test_comments_and_raw_text_are_skipped():
+    html = ('<!-- <img src="a.png"> --><style>td { background-color: red } '
+            '<img src="b.png"></style><img src="c.png">')
+    assert _rewrite(html, lambda src: "x") == (
+        '<!-- <img src="a.png"> --><style>td { background-color: red } '
+        '<img src="b.png"></style><img src="x">')
+
+
+def test_large_values_are_passed_through_as_pieces():
+    uri = "data:image/png;base64," + "A" * 100_000
+    pieces = list(rewrite_html('<p><img src="a.png"></p>', lambda src: uri))
+    assert uri in pieces
+    assert "".join(pieces) == f'<p><img src="{uri}"></p>'
@@ -0,0 +1,156 @@
+# Tests for services/import_services.py: Markdown and Word files turned into
+# HTML that DocumentTab loads like a note. Like the export tests, these run
+# without Qt and check the HTML through parse_html().
+import base64
+import io
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+
+from services.document_tree import (
+    CodeBlock, Heading, Image, ListBlock, Paragraph, Rule, Run, Table, parse_html,
+)
+from services.export_services import html_to_markdown, save_html_as_docx
+from services.import_services import docx_to_html, import_document, markdown_to_html
+
+
+def _png(width: int, height: int) -> bytes:
+    raw = b"".join(b"\x00" + b"\x00\x80\xff" * width for _ in range(height))
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def test_markdown_blocks():
+    html = markdown_to_html(
+        "Title\n=====\n\n## Sub\n\nSome text\nwrapped  \nbroken\n\n"
+        "- one\n- two\n  1. nested\n\n```\ncode <here>\n  indented\n```\n\n"
+        "| a | b |\n|---|--:|\n| 1 | 2 |\n\n> quoted\n\n***\n"
+    )
+    blocks = parse_html(html).blocks
+
+    assert blocks[0] == Heading(1, [Run("Title")])
+    assert blocks[1] == Heading(2, [Run("Sub")])
+    assert [type(i).__name__ for i in blocks[2].inlines] == ["Run", "LineBreak", "Run"]
+    assert blocks[2].inlines[0].text == "Some text wrapped"
+    assert type(blocks[3]) is ListBlock and not blocks[3].ordered
+    assert [item.inlines[0].text for item in blocks[3].items] == ["one", "two"]
+    assert blocks[3].items[1].sublists[0].ordered
+    assert blocks[4] == CodeBlock("code <here>\n  indented")
+    assert type(blocks[5]) is Table and len(blocks[5].rows) == 2
+    assert blocks[6].inlines[0].text == "quoted"
+    assert type(blocks[7]) is Rule
+
+
+def test_markdown_inlines():
+    html = markdown_to_html(
+        "*a **b** c* ~~gone~~ `x*y` snake_case_name \\*lit\\* "
+        "[link *text*](http://example.com/ \"T\") <https://auto.link/> <u>raw</u> a < b"
+    )
+    assert html == (
+        "<html><body><p><em>a <strong>b</strong> c</em> <s>gone</s> <code>x*y</code> "
+        "snake_case_name *lit* <a href=\"http://example.com/\" title=\"T\">link <em>text</em></a> "
+        "<a href=\"https://auto.link/\">https://auto.link/</a> <u>raw</u> a &lt; b</p></body></html>"
+    )
+
+
+def test_markdown_images_next_to_the_file_are_embedded(tmp_path):
+    (tmp_path / "pics").mkdir()
+    (tmp_path / "pics" / "dot.png").write_bytes(_png(2, 2))
+    note = tmp_path / "note.md"
+    note.write_text("![dot](pics/dot.png) ![remote](http://x.y/z.png) ![gone](missing.png)",
+                    encoding="utf-8")
+
+    images = [i for i in parse_html(import_document(note)).blocks[0].inlines if type(i) is Image]
+
+    assert images[0].src == "data:image/png;base64," + base64.b64encode(_png(2, 2)).decode()
+    assert images[0].alt == "dot"
+    assert [i.src for i in images[1:]] == ["http://x.y/z.png", "missing.png"]
+
+
+def test_markdown_export_reads_back():
+    html = ("<h2>Heading</h2><p>Some <b>bold</b>, <i>italic</i> and <code>code</code> "
+            "with <a href='http://x.y/'>a link</a></p><ul><li>one</li><li>two<ol><li>a</li>"
+            "</ol></li></ul><pre>line 1\n  line 2</pre><table><tr><td>A</td><td>B</td></tr>"
+            "<tr><td>1</td><td>2</td></tr></table>")
+    original = parse_html(html).blocks
+    imported = parse_html(markdown_to_html(html_to_markdown(html))).blocks
+
+    assert imported[:4] == original[:4]
+    assert [[cell.blocks for cell in row] for row in imported[4].rows] == \
+        [[cell.blocks for cell in row] for row in original[4].rows]
+
+
+def test_docx_import(tmp_path):
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_COLOR_INDEX
+    from docx.shared import Inches, Pt, RGBColor
+
+    document = Document()
+    document.add_heading("Report", 1)
+    paragraph = document.add_paragraph("Plain ")
+    run = paragraph.add_run("red")
+    run.bold = True
+    run.font.color.rgb = RGBColor(0xFF, 0, 0)
+    run.font.size = Pt(16)
+    paragraph.add_run(" marked").font.highlight_color = WD_COLOR_INDEX.YELLOW
+    paragraph.add_run("\tand  spaced")
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    document.add_paragraph("first", style="List Bullet")
+    document.add_paragraph("inner", style="List Bullet 2")
+    document.add_paragraph("counted", style="List Number")
+    table = document.add_table(rows=2, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(0, 2).merge(table.cell(1, 2))
+    table.cell(1, 0).text = "below"
+    document.add_picture(io.BytesIO(_png(30, 20)), width=Inches(1))
+    path = tmp_path / "report.docx"
+    document.save(str(path))
+
+    html = docx_to_html(path)
+    blocks = parse_html(html).blocks
+
+    assert blocks[0] == Heading(1, [Run("Report")])
+    assert '<p align="center">' in html
+    assert '<span style="font-size:16pt; color:#FF0000;"><b>red</b></span>' in html
+    assert '<span style="background-color:#ffff00;"> marked</span>' in html
+    assert "and  spaced" in html and "white-space: pre-wrap" in html
+    assert blocks[2].items[0].inlines == [Run("first")]
+    assert blocks[2].items[0].sublists[0].items[0].inlines == [Run("inner")]
+    assert blocks[3].ordered and blocks[3].items[0].inlines == [Run("counted")]
+    assert '<td colspan="2">' in html and '<td rowspan="2">' in html
+    assert parse_html(html).plain_text().count("below") == 1
+    image = blocks[-1].inlines[0]
+    assert image.src == "data:image/png;base64," + base64.b64encode(_png(30, 20)).decode()
+    assert (image.width, image.height) == (96, 64)
+
+
+def test_docx_export_reads_back(tmp_path):
+    dot = "data:image/png;base64," + base64.b64encode(_png(4, 3)).decode()
+    html = ("<h1>Title</h1><p>A <b>bold</b> <a href='http://x.y/'>link</a></p>"
+            "<ol><li>one</li><li>two<ul><li>inner</li></ul></li></ol>"
+            f"<table><tr><td>A</td><td>B</td></tr></table><p><img src='{dot}' width=40 height=30></p>")
+    path = tmp_path / "note.docx"
+    save_html_as_docx(html, path)
+
+    blocks = parse_html(import_document(path)).blocks
+
+    assert blocks[0] == Heading(1, [Run("Title")])
+    assert [i.text for i in blocks[1].inlines] == ["A ", "bold", " ", "link"]
+    assert blocks[1].inlines[3].href == "http://x.y/"
+    assert type(blocks[2]) is ListBlock and blocks[2].ordered
+    assert blocks[2].items[1].sublists[0].items[0].inlines == [Run("inner")]
+    assert [[cell.blocks[0].inlines[0].text for cell in row] for row in blocks[3].rows] == [["A", "B"]]
+    assert blocks[4] == Paragraph([Image(dot, "", 40, 30)])
+
+
+def test_import_document_rejects_other_files(tmp_path):
+    with pytest.raises(ValueError):
+        import_document(tmp_path / "note.odt")
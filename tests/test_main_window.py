@@ -7,19 +7,26 @@
 # MainWindow talks to real QSettings, real QFileDialog/QMessageBox modals,
 # and spawns background QThreads for file loading. To keep tests fast,
 # deterministic, and free of any real dialogs or on-disk settings:
-#   - SettingsManager is redirected to a per-test temp .ini file.
+#   - SettingsManager is redirected to a per-test temp .ini file, and its
+#     data/cache dirs (dictionaries, suggestion indexes) to a temp dir
+#     shared by the session.
 #   - The status/autosave QTimers are stopped right after construction.
 #   - QFileDialog / QMessageBox calls are monkeypatched per-test as needed.
 #   - Background file loads are awaited with qtbot.waitUntil.
 # ============================================================================
 
+import os
+import subprocess
+import sys
+
 import pytest
 from pathlib import Path
-from PyQt6.QtWidgets import QApplication, QFileDialog, QMessageBox
+from PyQt6.QtWidgets import QApplication, QFileDialog, QFontComboBox, QMessageBox
 from PyQt6.QtCore import QSettings, Qt
 from PyQt6.QtGui import QFont
 
 from app.main_window import MainWindow
+from services.export_jobs import ExportJob
 from services.settings_manager import SettingsManager
 
 
@@ -31,14 +38,37 @@ def qapp():
     return app
 
 
-@pytest.fixture
-def window(qapp, tmp_path, monkeypatch):
+@pytest.fixture(scope="session")
+def app_dirs(tmp_path_factory):
+    # Shared by the session: the compiled dictionaries and suggestion indexes
+    # take seconds to build, so each test rebuilding them would be slow
+    return tmp_path_factory.mktemp("app-dirs")
+
+
+def isolate_settings(monkeypatch, tmp_path, app_dirs) -> Path:
+    """Point SettingsManager's .ini into tmp_path and its data and cache
+    dirs into app_dirs, never the user's real ones."""
     ini_path = tmp_path / "settings.ini"
 
     def fake_init(self):
         self.settings = QSettings(str(ini_path), QSettings.Format.IniFormat)
 
+    def temp_dir(name):
+        def directory(self):
+            path = app_dirs / name
+            path.mkdir(exist_ok=True)
+            return path
+        return directory
+
     monkeypatch.setattr(SettingsManager, "__init__", fake_init)
+    monkeypatch.setattr(SettingsManager, "data_dir", temp_dir("data"))
+    monkeypatch.setattr(SettingsManager, "cache_dir", temp_dir("cache"))
+    return ini_path
+
+
+@pytest.fixture
+def window(qapp, tmp_path, monkeypatch, app_dirs):
+    isolate_settings(monkeypatch, tmp_path, app_dirs)
 
     win = MainWindow()
     # Prevent background timers from firing mid-assertion / after the test.
@@ -249,6 +279,34 @@ def test_open_file_adds_to_recent_files(window, qtbot, tmp_path):
     assert str(f) in window.settings_manager.get_recent_files()
 
 
+def test_open_word_file_imports_it_into_an_unsaved_tab(window, qtbot, monkeypatch, tmp_path):
+    from services.export_services import save_html_as_docx
+
+    source = tmp_path / "report.docx"
+    save_html_as_docx("<h1>Report</h1><p>Body <b>text</b></p>", source)
+
+    window.open_file(str(source))
+    wait_for_tab_count(qtbot, window, 2)
+
+    tab = window.tabs[-1]
+    assert tab.text_edit.toPlainText() == "Report\nBody text"
+    assert tab.current_file is None and tab.imported_from == source
+    assert tab.get_display_name() == "report.docx"
+
+    window.open_file(str(source))  # already open
+    assert len(window.tabs) == 2
+
+    suggested = {}
+
+    def fake_save(parent, caption, directory, filters):
+        suggested["path"] = directory
+        return "", ""
+
+    monkeypatch.setattr(QFileDialog, "getSaveFileName", staticmethod(fake_save))
+    assert window.save() is None and tab.current_file is None
+    assert suggested["path"] == str(tmp_path / "report.html")
+
+
 # ------------------------------------------------------------------
 # Save / Save As
 # ------------------------------------------------------------------
@@ -266,6 +324,25 @@ def test_save_as_writes_file_and_updates_tab(window, monkeypatch, tmp_path):
     assert window.tabs[0].current_file == target
 
 
+def test_save_writes_compact_html_unless_turned_off(window, monkeypatch, tmp_path):
+    target = tmp_path / "note.html"
+    tab = window.tabs[0]
+    tab.set_content("<p>one <b>bold</b></p><p>two <b>bold</b></p>", is_html=True)
+    tab.current_file = target
+
+    assert window._save_document(tab) is True
+    compact = target.read_text(encoding="utf-8")
+    assert 'class="s0"' in compact
+    assert "<p>one" in compact
+
+    window.compact_html_action.trigger()
+    assert window.settings_manager.get_compact_html() is False
+    assert window._save_document(tab) is True
+    verbatim = target.read_text(encoding="utf-8")
+    assert 'class="s0"' not in verbatim
+    assert len(verbatim) > len(compact)
+
+
 def test_save_as_cancelled_dialog_returns_false(window, monkeypatch):
     monkeypatch.setattr(QFileDialog, "getSaveFileName", staticmethod(lambda *a, **k: ("", "")))
     result = window.save_as()
@@ -316,6 +393,62 @@ def test_save_document_failure_shows_error(window, monkeypatch, tmp_path):
     assert shown.get("shown") is True
 
 
+# ------------------------------------------------------------------
+# Background export
+# ------------------------------------------------------------------
+
+def test_export_markdown_runs_in_background_and_caches_tree(window, qtbot, monkeypatch, tmp_path):
+    target = tmp_path / "note.md"
+    monkeypatch.setattr(QFileDialog, "getSaveFileName", staticmethod(lambda *a, **k: (str(target), "")))
+    tab = window.tabs[0]
+    tab.text_edit.setPlainText("exported text")
+
+    with qtbot.waitSignal(window.export_runner.job_finished, timeout=5000):
+        window._export_to_markdown()
+        assert not window.status_widget.export_progress.isHidden()
+
+    assert target.read_text(encoding="utf-8") == "exported text\n"
+    assert window.status_widget.export_progress.isHidden()
+    assert tab._document_tree is not None and tab._document_tree[0] == tab.revision
+
+
+def test_export_failure_shows_error(window, qtbot, monkeypatch, tmp_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("x")
+    monkeypatch.setattr(QFileDialog, "getSaveFileName",
+                        staticmethod(lambda *a, **k: (str(not_a_dir / "note.md"), "")))
+    shown = []
+    monkeypatch.setattr(QMessageBox, "critical", staticmethod(lambda *a, **k: shown.append(a[1])))
+
+    with qtbot.waitSignal(window.export_runner.job_failed, timeout=5000):
+        window._export_to_markdown()
+
+    assert shown == ["Export Markdown"]
+
+
+def test_export_all_writes_every_tab_and_shows_one_summary(window, qtbot, monkeypatch, tmp_path):
+    window.tabs[0].text_edit.setPlainText("first")
+    window.new_tab()
+    window.tabs[1].text_edit.setPlainText("second")
+    window.tabs[1].name = window.tabs[0].name  # same name: the files must not collide
+    shown = []
+    monkeypatch.setattr(QMessageBox, "exec",
+                        lambda box: shown.append((box.text(), box.detailedText())) or 0)
+
+    out = tmp_path / "out"
+    with qtbot.waitSignal(window.export_runner.job_finished, timeout=10000):
+        window._queue_export_all(out, ["md", "docx"])
+
+    name = window.tabs[0].name
+    assert (out / f"{name}.md").read_text(encoding="utf-8") == "first\n"
+    assert (out / f"{name} (2).md").read_text(encoding="utf-8") == "second\n"
+    assert sorted(p.suffix for p in out.iterdir()) == [".docx", ".docx", ".md", ".md"]
+    assert len(shown) == 1
+    summary, details = shown[0]
+    assert summary.startswith("Exported 4 files")
+    assert details.count("Exported ") == 4 and details.count(" ms") == 4
+
+
 # ------------------------------------------------------------------
 # Delete file
 # ------------------------------------------------------------------
@@ -509,6 +642,65 @@ def test_toggle_spell_check_reenable(window):
     assert window.spell_check_enabled is True
 
 
+def test_toggle_spell_check_persists(window):
+    window._toggle_spell_check(False)
+    assert window.settings_manager.get_spell_check_enabled() is False
+
+
+def test_spellcheck_dictionary_loads_after_first_paint(qtbot, window):
+    qtbot.waitUntil(lambda: "spellcheck_ready" in window.startup_timings, timeout=5000)
+    timings = window.startup_timings
+    assert timings["ui_ready"] <= timings["first_paint"] <= timings["spellcheck_ready"]
+    assert window.spell_service.is_ready()
+
+
+def test_suggestion_index_is_cached_in_the_isolated_cache_dir(qtbot, window, app_dirs,
+                                                              monkeypatch):
+    cache_dirs = []
+    monkeypatch.setattr(window.spell_service, "prepare_suggestions", cache_dirs.append)
+    window._spellcheck_started = False
+    window._start_spell_check()
+    assert cache_dirs == [str(app_dirs / "cache")]
+
+
+def test_spellcheck_disabled_at_startup_skips_dictionary(qapp, qtbot, tmp_path, monkeypatch,
+                                                        app_dirs):
+    ini_path = isolate_settings(monkeypatch, tmp_path, app_dirs)
+    QSettings(str(ini_path), QSettings.Format.IniFormat).setValue("editor/spell_check", False)
+
+    win = MainWindow()
+    win.status_timer.stop()
+    win.autosave_timer.stop()
+    win.show()
+    qtbot.waitUntil(lambda: "first_paint" in win.startup_timings)
+    assert win.spell_check_action.isChecked() is False
+    assert win.spell_service.is_ready() is False
+    win.close()
+
+
+def test_font_combo_and_export_runner_are_built_on_first_use(qtbot, window):
+    qtbot.waitUntil(lambda: "first_paint" in window.startup_timings)
+    assert isinstance(window.toolbar_ctrl.font_combo, QFontComboBox)
+    assert window._export_runner is None
+    assert window.export_runner is window.export_runner
+
+
+def test_startup_does_not_import_print_export_or_spellchecker(tmp_path):
+    # Checked before the first paint: the dictionary starts loading right after it
+    code = ("import sys; from PyQt6.QtWidgets import QApplication; "
+            "from app.main_window import MainWindow; app = QApplication([]); "
+            "window = MainWindow(); window.show(); "
+            "print(sorted(m for m in ('PyQt6.QtPrintSupport', 'docx', 'spellchecker', "
+            "'services.export_jobs', 'services.print_document', 'services.import_services', "
+            "'widgets.table_dialog') if m in sys.modules))")
+    env = dict(os.environ, HOME=str(tmp_path), XDG_CONFIG_HOME=str(tmp_path),
+               XDG_DATA_HOME=str(tmp_path), XDG_CACHE_HOME=str(tmp_path),
+               QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent, env=env, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
 # ------------------------------------------------------------------
 # Search / replace
 # ------------------------------------------------------------------
@@ -666,6 +858,19 @@ def test_close_event_with_modified_tabs_and_yes_choice_accepts(window, monkeypat
     assert event._accepted is True
 
 
+def test_close_event_with_running_export_and_no_choice_ignores(window, monkeypatch, tmp_path):
+    job = window.export_runner.submit(ExportJob("<p>x</p>" * 20000, tmp_path / "big.docx", "docx"))
+    monkeypatch.setattr(QMessageBox, "question", staticmethod(lambda *a, **k: QMessageBox.StandardButton.No))
+
+    event = type("FakeEvent", (), {"_accepted": None,
+                                    "accept": lambda self: setattr(self, "_accepted", True),
+                                    "ignore": lambda self: setattr(self, "_accepted", False)})()
+    window.closeEvent(event)
+    assert event._accepted is False
+    assert not job.cancelled
+    window.export_runner.shutdown()
+
+
 # ------------------------------------------------------------------
 # Key press handling
 # ------------------------------------------------------------------
@@ -677,4 +882,25 @@ def test_escape_key_hides_visible_search_bar(window):
     window._show_search_bar()
     event = QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_Escape, Qt.KeyboardModifier.NoModifier)
     window.keyPressEvent(event)
-    assert window.search_bar.isVisible() is False
\ No newline at end of file
+    assert window.search_bar.isVisible() is False
+
+
+def test_spell_language_menu_sets_current_tab_language(window):
+    window._tab_changed(window.tab_widget.currentIndex())
+    assert window.spell_language_actions["auto"].isChecked()
+    window.spell_language_actions["fr"].trigger()
+    tab = window._get_current_tab()
+    assert tab.spell_highlighter.language == "fr"
+    assert window._spell_language_for(tab.text_edit) == "fr"
+
+
+def test_print_action_opens_the_dialog_with_the_default_setup(window, monkeypatch):
+    from PyQt6.QtGui import QAction, QPageSize
+    from PyQt6.QtPrintSupport import QPrintDialog
+
+    shown = []
+    monkeypatch.setattr(QPrintDialog, "exec",
+                        lambda self: shown.append(self.printer().pageLayout().pageSize().id()) or 0)
+    print_action = next(a for a in window.findChildren(QAction) if a.text() == "&Print...")
+    print_action.trigger()  # triggered passes checked=False; it must not become the setup
+    assert shown == [QPageSize.PageSizeId.A4]
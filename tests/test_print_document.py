@@ -0,0 +1,118 @@
+# Tests for services/print_document.py: building the QTextDocument used for
+# printing and PDF export straight from a DocumentTree.
+from PyQt6.QtCore import QUrl
+from PyQt6.QtGui import QFont, QPageSize, QTextDocument
+
+from services.document_tree import parse_html
+from services.print_document import PageSetup, build_print_document, layout_print_document
+
+PNG_1X1 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNk"
+    "+A8AAQUBAScY42YAAAAASUVORK5CYII="
+)
+
+
+def _blocks(document):
+    block = document.begin()
+    while block.isValid():
+        yield block
+        block = block.next()
+
+
+def _fragments(block):
+    it = block.begin()
+    while not it.atEnd():
+        yield it.fragment()
+        it += 1
+
+
+def test_print_document_text_and_font_sizes(qtbot):
+    tree = parse_html("<h1>Title</h1><p>Body <b>bold</b></p>")
+    document = build_print_document(tree, font_size=10)
+
+    assert document.toPlainText() == "Title\nBody bold"
+    heading, body = list(_blocks(document))
+    title = next(_fragments(heading))
+    assert title.charFormat().fontPointSize() == 20
+    assert title.charFormat().fontWeight() == QFont.Weight.Bold
+    bold = [f for f in _fragments(body) if f.text() == "bold"][0]
+    assert bold.charFormat().fontWeight() == QFont.Weight.Bold
+    assert bold.charFormat().fontPointSize() == 10
+
+
+def test_print_document_keeps_explicit_qt_heading_size(qtbot):
+    tree = parse_html(
+        '<p style=" margin-top:12px; margin-bottom:12px;">'
+        '<span style=" font-size:24pt; font-weight:700;">Big</span></p>'
+    )
+    document = build_print_document(tree, font_size=10)
+    assert next(_fragments(document.begin())).charFormat().fontPointSize() == 24
+
+
+def test_print_document_lists_tables_links_and_images(qtbot):
+    html = (
+        "<ul><li>one</li><li>two</li></ul>"
+        "<table><tr><td>A</td><td>B</td></tr></table>"
+        '<p><a href="https://example.com">site</a> '
+        f'<img src="data:image/png;base64,{PNG_1X1}" width="20" /></p>'
+    )
+    document = build_print_document(parse_html(html))
+    blocks = list(_blocks(document))
+
+    assert blocks[0].textList() is not None
+    assert blocks[0].textList().count() == 2
+    assert "A" in document.toPlainText() and "B" in document.toPlainText()
+
+    link_block = next(b for b in blocks if "site" in b.text())
+    formats = [f.charFormat() for f in _fragments(link_block)]
+    assert formats[0].anchorHref() == "https://example.com"
+    image_format = next(f for f in formats if f.isImageFormat()).toImageFormat()
+    assert image_format.width() == 20
+    resource = document.resource(QTextDocument.ResourceType.ImageResource,
+                                 QUrl(image_format.name()))
+    assert resource is not None
+
+
+def _long_note(paragraphs: int) -> str:
+    return "".join(f"<p>Paragraph {i} " + "lorem ipsum dolor " * 20 + "</p>"
+                   for i in range(paragraphs))
+
+
+def test_page_signatures_only_change_where_the_pages_do(qtbot):
+    layout = layout_print_document(parse_html(_long_note(60)))
+    assert layout.page_count > 3
+
+    appended = layout_print_document(parse_html(_long_note(60) + "<p>One more</p>"))
+    changed = [page for page, (old, new) in enumerate(zip(layout.signatures, appended.signatures))
+               if old != new]
+    # Only the page(s) the new paragraph landed on
+    assert changed and changed[0] >= layout.page_count - 2
+
+    larger = layout_print_document(parse_html(_long_note(60)), PageSetup(font_size=14))
+    assert larger.page_count > layout.page_count
+    assert not set(larger.signatures) & set(layout.signatures)
+
+
+def test_page_number_can_be_drawn_onto_an_unnumbered_page(qtbot):
+    layout = layout_print_document(parse_html(_long_note(30)))
+    plain = layout.render_page(1, 200, number=False)
+
+    assert plain != layout.render_page(1, 200)
+    assert layout.number_page(plain, 1) == layout.render_page(1, 200)
+
+
+def test_print_layout_renders_pages_and_writes_pdf_without_relayout(qtbot, tmp_path):
+    layout = layout_print_document(parse_html(_long_note(30)),
+                                   PageSetup(page_size=QPageSize.PageSizeId.Letter))
+    image = layout.render_page(0, 200)
+    assert (image.width(), image.height()) == (200, round(200 * 11 / 8.5))
+
+    relayouts = []
+    layout.document.documentLayout().documentSizeChanged.connect(relayouts.append)
+    target = tmp_path / "note.pdf"
+    done = []
+    layout.write_pdf(target, lambda page, pages: done.append(page))
+
+    assert target.read_bytes().startswith(b"%PDF")
+    assert done[-1] == layout.page_count
+    assert relayouts == []
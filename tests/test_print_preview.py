@@ -0,0 +1,84 @@
+# Tests for widgets/print_preview.py: the preview lays pages out on a worker
+# thread, caches the layout on the tab, and only redraws pages that changed.
+from PyQt6.QtGui import QPageSize
+
+from models.document_tab import DocumentTab
+from services.print_document import PageSetup
+from widgets.print_preview import PrintPreviewDialog
+
+
+def _tab(paragraphs: int) -> DocumentTab:
+    tab = DocumentTab("Test")
+    tab.set_content("".join(f"<p>Paragraph {i} " + "lorem ipsum dolor " * 20 + "</p>"
+                            for i in range(paragraphs)), is_html=True)
+    return tab
+
+
+def _wait_for_pages(qtbot, dialog):
+    """Wait until the dialog shows its current setup with every page drawn"""
+    def drawn():
+        layout = dialog.print_layout
+        assert layout is not None and layout.setup == dialog.page_setup()
+        assert all(signature in dialog.tab._page_images for signature in layout.signatures)
+
+    qtbot.waitUntil(drawn, timeout=10000)
+
+
+def test_preview_lays_out_in_the_background_and_caches_the_layout(qtbot):
+    tab = _tab(30)
+    dialog = PrintPreviewDialog(tab)
+    qtbot.addWidget(dialog)
+    _wait_for_pages(qtbot, dialog)
+
+    layout = dialog.print_layout
+    assert layout.setup == PageSetup()
+    assert tab.cached_print_layout(PageSetup()) is layout
+    assert dialog.page_list.count() == layout.page_count
+    assert len(tab._page_images) == layout.page_count
+    assert dialog.print_button.isEnabled()
+
+    # A second preview of the unchanged note has nothing left to lay out
+    again = PrintPreviewDialog(tab)
+    qtbot.addWidget(again)
+    assert again.print_layout is layout
+
+
+def test_preview_redraws_for_a_new_paper_size_and_reuses_pages_switching_back(qtbot):
+    tab = _tab(30)
+    dialog = PrintPreviewDialog(tab)
+    qtbot.addWidget(dialog)
+    _wait_for_pages(qtbot, dialog)
+    a4_images = dict(tab._page_images)
+
+    # Every page of a different sheet looks different
+    dialog.paper_combo.setCurrentIndex(1)  # Letter
+    _wait_for_pages(qtbot, dialog)
+    letter = dialog.print_layout
+    assert letter.setup.page_size == QPageSize.PageSizeId.Letter
+    assert len(tab._page_images) == len(a4_images) + letter.page_count
+
+    # Back to A4: the layout and every page image are still cached
+    dialog.paper_combo.setCurrentIndex(0)
+    _wait_for_pages(qtbot, dialog)
+    assert dialog.print_layout is tab.cached_print_layout(PageSetup())
+    assert len(tab._page_images) == len(a4_images) + letter.page_count
+    assert all(tab._page_images[signature] is image for signature, image in a4_images.items())
+
+
+def test_new_preview_after_an_edit_only_draws_the_changed_pages(qtbot):
+    tab = _tab(30)
+    dialog = PrintPreviewDialog(tab)
+    qtbot.addWidget(dialog)
+    _wait_for_pages(qtbot, dialog)
+    before = set(tab._page_images)
+    dialog.reject()
+
+    tab.text_edit.moveCursor(tab.text_edit.textCursor().MoveOperation.End)
+    tab.text_edit.insertPlainText(" and one more sentence")
+    edited = PrintPreviewDialog(tab)
+    qtbot.addWidget(edited)
+    _wait_for_pages(qtbot, edited)
+
+    # The page images live on the tab, so only the end is drawn again
+    assert 0 < len(set(tab._page_images) - before) <= 2
+    assert edited.page_list.count() == edited.print_layout.page_count
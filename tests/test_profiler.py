@@ -0,0 +1,103 @@
+# Tests for services/profiler.py: @traced is free until --profile turns it
+# on, and the events come out as Chrome trace-event JSON.
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from services import profiler
+from services.profiler import Profiler, parse_profile_option, traced
+
+
+@pytest.fixture
+def enabled():
+    yield profiler.enable()
+    profiler.disable()
+
+
+def test_traced_returns_the_function_when_not_profiling():
+    def work():
+        return 1
+
+    assert profiler.active() is None
+    assert traced()(work) is work
+    profiler.mark("ignored")  # no profiler, nothing to record
+
+
+def test_traced_records_complete_events_per_thread(enabled):
+    @traced(category="test")
+    def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 42
+
+    assert work() == 42
+    with pytest.raises(ValueError):
+        work(fail=True)
+    worker = threading.Thread(target=work, name="worker")
+    worker.start()
+    worker.join()
+    profiler.mark("done")
+
+    events = enabled.events()
+    calls = [e for e in events if e["ph"] == "X"]
+    assert [e["name"] for e in calls] == [work.__qualname__] * 3
+    assert all(e["cat"] == "test" and e["dur"] >= 0 and e["ts"] >= 0 for e in calls)
+    assert calls[0]["tid"] == calls[1]["tid"] != calls[2]["tid"]
+    assert events[-1]["name"] == "done" and events[-1]["ph"] == "i"
+
+
+def test_write_produces_chrome_trace_json(tmp_path):
+    recorder = Profiler(origin=0.0)
+    recorder.MAX_EVENTS = 2
+    recorder.complete("load", "file", 1.0, 1.5, args={"bytes": 10})
+    recorder.complete("save", "file", 2.0, 2.25)
+    recorder.instant("late")  # over the limit: counted, not kept
+
+    path = tmp_path / "trace.json"
+    recorder.write(path)
+    trace = json.loads(path.read_text(encoding="utf-8"))
+
+    metadata, *events = trace["traceEvents"]
+    assert metadata["ph"] == "M" and metadata["args"]["name"] == "MainThread"
+    assert events[0] == {"name": "load", "cat": "file", "ph": "X", "ts": 1_000_000.0,
+                         "dur": 500_000.0, "args": {"bytes": 10},
+                         "pid": os.getpid(), "tid": threading.get_ident()}
+    assert [e["name"] for e in events] == ["load", "save"]
+    assert trace["otherData"]["dropped_events"] == 1
+
+
+def test_parse_profile_option():
+    assert parse_profile_option(["main.py", "a.html"]) == (None, ["main.py", "a.html"])
+    assert parse_profile_option(["main.py", "--profile"]) == \
+        (Path(profiler.DEFAULT_TRACE_FILE), ["main.py"])
+    assert parse_profile_option(["main.py", "--profile=out.json", "-x"]) == \
+        (Path("out.json"), ["main.py", "-x"])
+
+
+def test_profiled_startup_traces_phases_and_hot_paths(tmp_path):
+    code = (
+        "import sys, time; start = time.perf_counter()\n"
+        "from services import profiler; recorder = profiler.enable(origin=start)\n"
+        "from PyQt6.QtWidgets import QApplication\n"
+        "from app.main_window import MainWindow\n"
+        "app = QApplication([]); window = MainWindow(started_at=start); window.show()\n"
+        "window.tabs[0].set_content('<p>some text</p>', is_html=True)\n"
+        "while 'first_paint' not in window.startup_timings: app.processEvents()\n"
+        "import json; print(json.dumps(sorted({e['name'] for e in recorder.events()})))\n"
+    )
+    env = dict(os.environ, HOME=str(tmp_path), XDG_CONFIG_HOME=str(tmp_path),
+               XDG_DATA_HOME=str(tmp_path), XDG_CACHE_HOME=str(tmp_path),
+               QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            cwd=Path(__file__).resolve().parent.parent, env=env, check=True)
+    names = set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    assert {"MainWindow._setup_ui", "MainWindow._restore_settings",
+            "MainWindow._restore_session", "DocumentTab.set_content",
+            "SpellCheckHighlighter.highlightBlock", "imports", "ui_ready",
+            "first_paint"} <= names
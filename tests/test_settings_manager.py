@@ -189,3 +189,16 @@ def test_save_and_get_theme_dark(manager):
     manager.save_theme(False)
     manager.save_theme(True)
     assert manager.get_theme() is True
+
+
+# ------------------------------------------------------------------
+# Compact HTML saving
+# ------------------------------------------------------------------
+
+def test_get_compact_html_defaults_to_on(manager):
+    assert manager.get_compact_html() is True
+
+
+def test_save_and_get_compact_html(manager):
+    manager.save_compact_html(False)
+    assert manager.get_compact_html() is False
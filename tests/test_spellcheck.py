@@ -11,6 +11,13 @@ from models.document_tab import DocumentTab
 from widgets.spellcheck_highlighter import SpellCheckHighlighter
 
 
+def flagged_words(block):
+    return {
+        block.text()[fmt.start:fmt.start + fmt.length]
+        for fmt in block.layout().formats()
+    }
+
+
 @pytest.fixture(scope="session")
 def qapp():
     """Create QApplication for tests"""
@@ -50,6 +57,50 @@ def test_add_word_is_case_insensitive(spell_service):
     assert spell_service.is_correct("ZEPHYRIX") is True
 
 
+def test_add_word_with_a_curly_apostrophe(spell_service):
+    assert spell_service.is_correct("zorbl’s") is False
+    spell_service.add_word("Zorbl’s")
+    # The cached "wrong" verdict is dropped, and either apostrophe matches
+    assert spell_service.is_correct("zorbl’s") is True
+    assert spell_service.is_correct("zorbl's") is True
+
+
+def test_repeated_lookups_hit_the_cache(spell_service):
+    spell_service.is_correct("hello")
+    spell_service.is_correct("Hello")
+    spell_service.is_correct("HELLO")
+    info = spell_service.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+    assert info.currsize == 1
+
+
+def test_cache_is_bounded():
+    service = SpellCheckService(cache_size=2)
+    for word in ("one", "two", "three"):
+        service.is_correct(word)
+    assert service.cache_info().currsize == 2
+    # "one" was least recently used, so it was evicted and misses again
+    service.is_correct("one")
+    assert service.cache_info().misses == 4
+
+
+def test_add_word_invalidates_cached_verdict(spell_service):
+    assert spell_service.is_correct("qwertzuiop") is False
+    spell_service.is_correct("hello")
+    spell_service.add_word("qwertzuiop")
+    assert spell_service.is_correct("qwertzuiop") is True
+    # unrelated entries stay warm
+    assert spell_service.cache_info().currsize == 2
+
+
+def test_set_language_clears_cache(spell_service):
+    spell_service.is_correct("bonjour")
+    spell_service.set_language("fr")
+    assert spell_service.cache_info() == (0, 0, spell_service.DEFAULT_CACHE_SIZE, 0)
+    assert spell_service.is_correct("bonjour") is True
+
+
 def test_match_case_preserves_capitalized_word():
     from app.controllers.context_menu_controller import ContextMenuController
     assert ContextMenuController._match_case("Thiss", "this") == "This"
@@ -72,11 +123,7 @@ def test_highlighter_flags_misspelled_words(qtbot, spell_service):
     doc_tab.text_edit.setPlainText("This is a tesst of the spel chekcer.")
 
     block = doc_tab.text_edit.document().firstBlock()
-    flagged_words = {
-        block.text()[fmt.start:fmt.start + fmt.length]
-        for fmt in block.layout().formats()
-    }
-    assert flagged_words == {"tesst", "spel", "chekcer"}
+    qtbot.waitUntil(lambda: flagged_words(block) == {"tesst", "spel", "chekcer"})
 
 
 def test_highlighter_disabled_clears_flags(qtbot, spell_service):
@@ -84,8 +131,345 @@ def test_highlighter_disabled_clears_flags(qtbot, spell_service):
     highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
 
     doc_tab.text_edit.setPlainText("This has a tesst in it.")
+    block = doc_tab.text_edit.document().firstBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"tesst"})
     highlighter.set_enabled(False)
 
-    block = doc_tab.text_edit.document().firstBlock()
     formats = block.layout().formats()
     assert len(formats) == 0
+
+
+def test_highlighter_reuses_block_cache_on_rehighlight(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+
+    doc_tab.text_edit.setPlainText("First tesst line.\nSecond lline here.")
+    block = doc_tab.text_edit.document().lastBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"lline"})
+    lookups_before = spell_service.cache_info()
+
+    highlighter.set_enabled(False)
+    highlighter.set_enabled(True)
+
+    # Reapplied straight from the block cache - nothing queued, no lookups
+    assert spell_service.cache_info() == lookups_before
+    assert flagged_words(block) == {"lline"}
+
+
+def test_highlighter_rechecks_cached_block_after_add_word(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+
+    doc_tab.text_edit.setPlainText("A zorblax appears.")
+    block = doc_tab.text_edit.document().firstBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"zorblax"})
+
+    spell_service.add_word("zorblax")
+    highlighter.rehighlight()
+
+    qtbot.waitUntil(lambda: flagged_words(block) == set())
+
+
+def test_highlighter_checks_off_the_gui_thread(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+
+    doc_tab.text_edit.setPlainText("Nothing is checked synchronously heree.")
+
+    # Setting the text only queued the block; the underline lands later.
+    block = doc_tab.text_edit.document().firstBlock()
+    assert flagged_words(block) == set()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"heree"})
+
+
+def test_background_checker_runs_higher_priority_jobs_first(spell_service):
+    import threading
+    from services.spellcheck_service import BackgroundSpellChecker
+
+    checker = BackgroundSpellChecker(spell_service)
+    gate = threading.Event()
+    order = []
+    done = threading.Event()
+
+    # First job blocks the worker so the rest pile up in the queue.
+    checker.submit("first", lambda spans: gate.wait(5))
+    checker.submit("background", lambda spans: order.append("background"))
+    checker.submit("visible", lambda spans: order.append("visible"),
+                   priority=BackgroundSpellChecker.PRIORITY_VISIBLE)
+    checker.submit("last", lambda spans: done.set())
+    gate.set()
+
+    assert done.wait(5)
+    assert order == ["visible", "background"]
+
+
+def test_highlighter_checks_visible_blocks_before_the_rest(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    doc_tab.text_edit.resize(400, 200)
+    doc_tab.text_edit.show()
+    qtbot.waitExposed(doc_tab.text_edit)
+    highlighter = SpellCheckHighlighter(
+        doc_tab.text_edit.document(), spell_service, doc_tab.text_edit
+    )
+    highlighter.IDLE_DELAY_MS = 10_000  # keep the idle walk out of the way
+
+    doc_tab.text_edit.setPlainText("\n".join(f"Line {i} has a tesst." for i in range(500)))
+    document = doc_tab.text_edit.document()
+    first, last = document.firstBlock(), document.lastBlock()
+
+    qtbot.waitUntil(lambda: flagged_words(first) == {"tesst"})
+    # Far below the fold: only marked unchecked, never sent to the worker.
+    assert last.userData().checked is False
+    assert last.blockNumber() not in highlighter._pending
+
+
+def test_highlighter_checks_offscreen_blocks_when_idle(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    doc_tab.text_edit.resize(400, 200)
+    doc_tab.text_edit.show()
+    qtbot.waitExposed(doc_tab.text_edit)
+    highlighter = SpellCheckHighlighter(
+        doc_tab.text_edit.document(), spell_service, doc_tab.text_edit
+    )
+    highlighter.IDLE_DELAY_MS = 10
+
+    doc_tab.text_edit.setPlainText("\n".join(f"Line {i} has a tesst." for i in range(500)))
+    last = doc_tab.text_edit.document().lastBlock()
+
+    qtbot.waitUntil(lambda: flagged_words(last) == {"tesst"}, timeout=10_000)
+    assert last.userData().checked is True
+
+
+SMALL_DICTIONARY = {"the": 500, "then": 50, "ten": 40, "receive": 30, "relieve": 5,
+                    "spelling": 20, "definitely": 10, "internationalization": 2}
+
+
+def test_suggestion_index_ranks_by_distance_then_frequency():
+    from services.suggestion_index import SuggestionIndex
+    index = SuggestionIndex.build(SMALL_DICTIONARY)
+    assert index.lookup("teh") == ["the", "ten", "then"]
+    assert index.lookup("recieve", limit=1) == ["receive"]
+    # Past the indexed prefix, the full word still decides the distance
+    assert index.lookup("internationalisation") == ["internationalization"]
+    assert index.lookup("definately") == ["definitely"]
+    assert index.lookup("zzzzzz") == []
+
+
+def test_suggestion_index_round_trips_through_disk(tmp_path):
+    from services.suggestion_index import SuggestionIndex
+    index = SuggestionIndex.build(SMALL_DICTIONARY)
+    path = str(tmp_path / "en.idx")
+    index.save(path)
+
+    loaded = SuggestionIndex.load(path, SuggestionIndex.fingerprint_of(SMALL_DICTIONARY))
+    assert loaded is not None
+    assert loaded.lookup("speling") == ["spelling"]
+    # Built from a different dictionary -> treated as stale
+    assert SuggestionIndex.load(path, fingerprint=1) is None
+    assert SuggestionIndex.load(str(tmp_path / "missing.idx")) is None
+
+
+def test_edit_distance_counts_transpositions_and_stops_early():
+    from services.suggestion_index import edit_distance
+    assert edit_distance("teh", "the", 2) == 1
+    assert edit_distance("kitten", "sitting", 3) == 3
+    assert edit_distance("kitten", "sitting", 2) == 3  # capped at max + 1
+    assert edit_distance("same", "same", 2) == 0
+
+
+def test_suggestions_use_index_and_custom_words(spell_service):
+    from services.suggestion_index import SuggestionIndex
+    spell_service._suggestion_indexes["en"] = SuggestionIndex.build(SMALL_DICTIONARY)
+    spell_service.add_word("zorblax")
+    assert spell_service.suggestions("teh", limit=2) == ["the", "ten"]
+    assert spell_service.suggestions("zorblux") == ["zorblax"]
+
+
+def test_lazy_service_loads_on_demand_and_reports_ready():
+    service = SpellCheckService(lazy=True)
+    assert service.is_ready() is False
+    fired = []
+    service.call_when_ready(lambda: fired.append(True))
+
+    assert service.is_correct("hello") is True  # loads synchronously if asked
+    assert service.is_ready() is True
+    assert fired == [True]
+    service.call_when_ready(lambda: fired.append(True))
+    assert fired == [True, True]
+
+
+def test_highlighter_waits_for_dictionary_then_rehighlights(qtbot):
+    service = SpellCheckService(lazy=True)
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), service)
+
+    doc_tab.text_edit.setPlainText("Pending untill loaded.")
+    block = doc_tab.text_edit.document().firstBlock()
+    assert highlighter.pending is True
+    assert flagged_words(block) == set()
+
+    service.start_loading()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"untill"})
+    assert highlighter.pending is False
+
+
+def test_compiled_dictionary_round_trips_through_mmap(tmp_path):
+    from services.dictionary_store import CompiledDictionary
+    compiled = CompiledDictionary.compile(["hello", "world", "don't"], fingerprint=7)
+    path = str(tmp_path / "words.bin")
+    compiled.save(path)
+
+    mapped = CompiledDictionary.open(path, fingerprint=7)
+    assert mapped is not None
+    assert len(mapped) == 3
+    assert "hello" in mapped and "don't" in mapped
+    assert "helo" not in mapped
+    # Far longer than any known word -> never flagged, like pyspellchecker
+    assert "x" * 20 in mapped
+    mapped.close()
+
+    assert CompiledDictionary.open(path, fingerprint=8) is None
+    (tmp_path / "junk.bin").write_bytes(b"not a dictionary")
+    assert CompiledDictionary.open(str(tmp_path / "junk.bin")) is None
+
+
+def test_service_compiles_dictionary_into_store_and_reuses_it(tmp_path):
+    store_dir = str(tmp_path / "store")
+    first = SpellCheckService(store_dir=store_dir)
+    assert first.is_correct("hello") is True
+    assert first.is_correct("teh") is False
+    assert (tmp_path / "store" / "dictionary-en.bin").exists()
+
+    from services.dictionary_store import CompiledDictionary, DictionaryStore
+    assert DictionaryStore(store_dir).load_dictionary("en") is not None
+    second = SpellCheckService(store_dir=store_dir)
+    assert isinstance(second._dictionaries["en"], CompiledDictionary)
+    assert second.is_correct("hello") is True
+    assert second.is_correct("teh") is False
+
+
+def test_custom_words_persist_in_store(tmp_path):
+    store_dir = str(tmp_path / "store")
+    SpellCheckService(store_dir=store_dir).add_word("Zorblax")
+
+    reloaded = SpellCheckService(store_dir=store_dir)
+    assert reloaded.is_correct("zorblax") is True
+
+
+def test_detect_language_from_stopwords():
+    from services.language_detection import detect_language
+    assert detect_language("The cat sat on the mat and it was happy.") == "en"
+    assert detect_language("Le chat est sur le tapis et il dort dans la maison.") == "fr"
+    assert detect_language("Der Hund ist nicht in dem Haus und die Katze auch nicht.") == "de"
+    assert detect_language("Hello") is None  # too little to go on
+
+
+def test_service_checks_each_language_with_its_own_dictionary(spell_service):
+    assert spell_service.is_correct("maison", language="fr") is True
+    assert spell_service.is_correct("Straße", language="de") is True
+    assert spell_service.is_correct("maison") is False  # default stays English
+    assert spell_service.is_ready("fr") and spell_service.is_ready("de")
+
+
+def test_elisions_are_checked_part_by_part(spell_service):
+    assert spell_service.misspelled_spans("l'homme qu'il aime", language="fr") == []
+    assert spell_service.misspelled_spans("l'hommme", language="fr") == [(0, 8)]
+
+
+def test_highlighter_detects_document_language(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+
+    doc_tab.text_edit.setPlainText("Le chat est dans la maison et il dort sur le tapiss.")
+    block = doc_tab.text_edit.document().firstBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"tapiss"})
+    assert highlighter.effective_language() == "fr"
+
+
+def test_highlighter_language_can_be_set_per_document(qtbot, spell_service):
+    english, german = DocumentTab("A"), DocumentTab("B")
+    english_highlighter = SpellCheckHighlighter(english.text_edit.document(), spell_service)
+    german_highlighter = SpellCheckHighlighter(german.text_edit.document(), spell_service)
+    german_highlighter.set_language("de")
+
+    english.text_edit.setPlainText("Haus")
+    german.text_edit.setPlainText("Haus")
+    assert english_highlighter.effective_language() == "en"
+
+    qtbot.waitUntil(lambda: flagged_words(english.text_edit.document().firstBlock()) == {"Haus"})
+    qtbot.waitUntil(lambda: german.text_edit.document().firstBlock().userData() is not None)
+    assert flagged_words(german.text_edit.document().firstBlock()) == set()
+
+
+def test_urls_and_emails_are_not_spellchecked(spell_service):
+    text = "Seee https://exmaple.com/pth?q=zz and www.foobr.org or mail bob@exmaple.org"
+    flagged = [text[s:s + n] for s, n in spell_service.misspelled_spans(text)]
+    assert flagged == ["Seee"]
+
+
+def test_highlighter_skips_code_and_link_fragments(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+
+    doc_tab.text_edit.setHtml(
+        '<p>A tesst with <span style="font-family:Courier New">fooo_bar()</span>'
+        ' and <a href="https://example.com">linkk</a>.</p>'
+    )
+    block = doc_tab.text_edit.document().firstBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"tesst"})
+
+
+def test_highlighter_never_looks_up_all_code_blocks(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+    lookups_before = spell_service.cache_info()
+
+    doc_tab.text_edit.setHtml(
+        '<pre style="font-family:Courier New">def fooo():\n    retrn barr</pre>'
+    )
+    document = doc_tab.text_edit.document()
+    # Settled synchronously: every block is cached clean, nothing queued
+    block = document.firstBlock()
+    while block.isValid():
+        assert block.userData() is not None and block.userData().spans == []
+        block = block.next()
+    assert spell_service.cache_info() == lookups_before
+    assert highlighter._pending == {}
+
+
+def test_highlighter_caches_the_code_and_link_classification(qtbot, spell_service):
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+    doc_tab.text_edit.setHtml(
+        '<p>A tesst with <a href="https://example.com">linkk</a>.</p>'
+        '<pre style="font-family:Courier New">def fooo():</pre>'
+    )
+    block = doc_tab.text_edit.document().firstBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"tesst"})
+
+    walked = []
+    classify = highlighter._text_to_check
+    highlighter._text_to_check = lambda b, text: walked.append(text) or classify(b, text)
+    highlighter.rehighlight()
+
+    # Prose and all-code blocks alike reuse what the first pass found
+    assert walked == []
+    assert flagged_words(block) == {"tesst"}
+
+
+def test_reformatting_text_as_code_invalidates_block_cache(qtbot, spell_service):
+    from PyQt6.QtGui import QTextCharFormat, QTextCursor
+    doc_tab = DocumentTab("Test")
+    highlighter = SpellCheckHighlighter(doc_tab.text_edit.document(), spell_service)
+
+    doc_tab.text_edit.setPlainText("print(fooo)")
+    block = doc_tab.text_edit.document().firstBlock()
+    qtbot.waitUntil(lambda: flagged_words(block) == {"fooo"})
+
+    cursor = QTextCursor(block)
+    cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
+    code = QTextCharFormat()
+    code.setFontFamilies(["Courier New"])
+    cursor.mergeCharFormat(code)
+
+    qtbot.waitUntil(lambda: flagged_words(block) == set())
@@ -1,7 +1,7 @@
 # ============================================================================
 # StatusBarWidget Tests
-# covers initial labels and the update_file/update_cursor/update_word_count
-# display helpers.
+# covers initial labels, the update_file/update_cursor/update_word_count
+# display helpers and the background export progress display.
 # ============================================================================
 
 import pytest
@@ -59,3 +59,26 @@ def test_update_word_count(status_bar):
 def test_update_word_count_zero(status_bar):
     status_bar.update_word_count(0, 0)
     assert status_bar.word_count_label.text() == "0 words, 0 chars"
+
+
+def test_export_progress_hidden_initially(status_bar):
+    assert status_bar.export_progress.isHidden()
+    assert status_bar.export_cancel_button.isHidden()
+
+
+def test_update_export_progress_shows_job_and_queue(status_bar):
+    status_bar.update_export_progress("notes.pdf", 40, queued=2)
+    assert status_bar.export_label.text() == "Exporting notes.pdf (+2 queued)"
+    assert status_bar.export_progress.value() == 40
+    assert not status_bar.export_cancel_button.isHidden()
+
+    status_bar.clear_export_progress()
+    assert status_bar.export_progress.isHidden()
+    assert status_bar.export_label.text() == ""
+
+
+def test_cancel_button_emits_export_cancel_requested(status_bar):
+    requests = []
+    status_bar.export_cancel_requested.connect(lambda: requests.append(True))
+    status_bar.export_cancel_button.click()
+    assert requests == [True]
@@ -8,7 +8,7 @@
 # ============================================================================
 
 import pytest
-from PyQt6.QtWidgets import QApplication, QWidget
+from PyQt6.QtWidgets import QApplication, QFontComboBox, QWidget
 from PyQt6.QtGui import QColor, QFont
 from PyQt6.QtCore import Qt
 
@@ -243,6 +243,23 @@ def test_font_family_change_calls_change_font_family(built, fmt):
     assert matching[0][1][0].family() == "Georgia"
 
 
+def test_deferred_font_combo_is_built_on_request(controller, fmt):
+    controller.build("#555555", defer_font_combo=True)
+    placeholder = controller.font_combo
+    assert not isinstance(placeholder, QFontComboBox)
+    assert placeholder.isEnabled() is False
+
+    controller.build_font_combo()
+    assert isinstance(controller.font_combo, QFontComboBox)
+    assert controller.toolbar_widget.isAncestorOf(controller.font_combo)
+    controller.font_combo.currentFontChanged.emit(QFont("Georgia"))
+    assert [c[0] for c in fmt.calls] == ["change_font_family"]
+
+    built_combo = controller.font_combo
+    controller.build_font_combo()
+    assert controller.font_combo is built_combo
+
+
 def test_font_size_change_calls_change_font_size(built, fmt):
     controller, _ = built
     controller.size_combo.setCurrentText("24")
@@ -0,0 +1,134 @@
+# Tests for services/watch_export.py: the headless `main.py watch` mode,
+# driven one pass at a time with an explicit clock.
+import os
+
+import pytest
+
+from services.watch_export import FolderWatcher, main, scan_notes
+
+
+@pytest.fixture
+def notes(tmp_path):
+    root = tmp_path / "notes"
+    (root / "work").mkdir(parents=True)
+    (root / "a.html").write_text("<p>First</p>", encoding="utf-8")
+    (root / "work" / "b.html").write_text("<p>Second</p>", encoding="utf-8")
+    return root
+
+
+def _watcher(notes, tmp_path, **kwargs):
+    kwargs.setdefault("debounce", 1.0)
+    return FolderWatcher(notes, tmp_path / "out", "md", log=lambda message: None, **kwargs)
+
+
+def _touch(path, text):
+    # Bump mtime explicitly; a rewrite within the same tick may not change it
+    stamp = path.stat().st_mtime_ns + 1_000_000_000 if path.exists() else None
+    path.write_text(text, encoding="utf-8")
+    if stamp:
+        os.utime(path, ns=(stamp, stamp))
+
+
+def test_scan_notes_uses_relative_paths(notes):
+    found, folders = scan_notes(notes)
+    assert sorted(found) == ["a.html", "work/b.html"]
+    assert str(notes / "work") in folders
+
+
+def test_notes_export_once_settled(notes, tmp_path):
+    watcher = _watcher(notes, tmp_path)
+    out = tmp_path / "out"
+
+    assert watcher.poll(now=100.0) == 0  # still within the debounce delay
+    assert watcher.poll(now=101.5) == 2
+    watcher.close()
+
+    assert (out / "a.md").read_text(encoding="utf-8") == "First\n"
+    assert (out / "work" / "b.md").read_text(encoding="utf-8") == "Second\n"
+
+
+def test_change_during_debounce_restarts_it(notes, tmp_path):
+    watcher = _watcher(notes, tmp_path)
+    watcher.poll(now=100.0)
+    _touch(notes / "a.html", "<p>Edited</p>")
+
+    assert watcher.poll(now=100.8) == 0
+    assert watcher.poll(now=101.5) == 1  # only b.html has been quiet for 1s
+    assert watcher.poll(now=102.0) == 1
+    watcher.close()
+
+
+def test_state_file_survives_restart(notes, tmp_path):
+    watcher = _watcher(notes, tmp_path, debounce=0)
+    watcher.poll()
+    watcher.close()
+    assert (tmp_path / "out" / ".export-state.json").exists()
+
+    restarted = _watcher(notes, tmp_path, debounce=0)
+    assert restarted.poll() == 0
+
+    _touch(notes / "a.html", "<p>Edited</p>")
+    assert restarted.poll() == 1
+    restarted.close()
+    assert (tmp_path / "out" / "a.md").read_text(encoding="utf-8") == "Edited\n"
+
+
+def test_deleted_note_removes_its_copy(notes, tmp_path):
+    watcher = _watcher(notes, tmp_path, debounce=0)
+    watcher.poll()
+    (notes / "a.html").unlink()
+
+    watcher.poll()
+    watcher.close()
+
+    assert not (tmp_path / "out" / "a.md").exists()
+    assert (tmp_path / "out" / "work" / "b.md").exists()
+
+
+def test_failed_note_waits_for_next_change(notes, tmp_path):
+    (tmp_path / "out" / "a.md").mkdir(parents=True)  # output path is taken
+    messages = []
+    watcher = FolderWatcher(notes, tmp_path / "out", "md", debounce=0, log=messages.append)
+
+    assert watcher.poll() == 2
+    assert any(m.startswith("Failed: a.html") for m in messages)
+    assert watcher.poll() == 0
+
+    (tmp_path / "out" / "a.md").rmdir()
+    _touch(notes / "a.html", "<p>Fixed</p>")
+    assert watcher.poll() == 1
+    watcher.close()
+
+
+def test_failed_note_is_forgotten_once_deleted(notes, tmp_path):
+    (tmp_path / "out" / "a.md").mkdir(parents=True)
+    watcher = _watcher(notes, tmp_path, debounce=0)
+    watcher.poll()
+    assert "a.html" in watcher._failed
+
+    (notes / "a.html").unlink()
+    watcher.poll()
+    watcher.close()
+    assert watcher._failed == {}
+
+
+def test_state_save_failure_is_logged_and_retried(notes, tmp_path):
+    blocker = tmp_path / "state"
+    blocker.write_text("not a folder", encoding="utf-8")
+    messages = []
+    watcher = FolderWatcher(notes, tmp_path / "out", "md", state_path=blocker / "state.json",
+                            debounce=0, log=messages.append)
+
+    assert watcher.poll(now=100.0) == 2  # exports fine, the state save fails
+    assert any(m.startswith("Could not save") for m in messages)
+
+    blocker.unlink()
+    watcher.poll(now=110.0)
+    assert (blocker / "state.json").exists()
+    watcher.close()
+
+
+def test_once_mode_syncs_and_exits(notes, tmp_path, capsys):
+    assert main([str(notes), "--to", "md", "--out", str(tmp_path / "out"), "-j", "2", "--once"]) == 0
+    assert (tmp_path / "out" / "work" / "b.md").exists()
+    assert capsys.readouterr().out.count("Exported") == 2
@@ -0,0 +1,227 @@
+# ============================================================================
+# Print Preview Dialog
+# shows a note's printed pages and lets the user pick font size, paper and
+# margins before printing or exporting a PDF
+# ============================================================================
+#
+# The pages come from a PrintLayout (services/print_document.py), laid out
+# on the shared layout thread from the tab's export snapshot, so a long note
+# doesn't freeze the dialog. Layouts are cached on the DocumentTab per
+# (revision, PageSetup): flipping back to a setup already tried, or printing
+# / exporting right after previewing, reuses the layout instead of making a
+# new one.
+#
+# Page images are drawn one per timer tick, without their page number, and
+# cached on the tab by page signature (what is on the page, where, and the
+# sheet geometry). A later preview - after an edit, or back on a setup
+# tried before - only draws the pages whose signature is new; the number
+# is painted onto a copy when the page is shown.
+
+from typing import Optional
+
+from PyQt6.QtWidgets import *
+from PyQt6.QtGui import *
+from PyQt6.QtCore import *
+
+from services.print_document import PageSetup, PrintLayout, shared_layout_runner
+
+
+class PrintPreviewDialog(QDialog):
+    """Preview of the current tab's printout with its page setup controls"""
+
+    FONT_SIZES = [("Normal (10pt)", 10), ("Large (12pt)", 12),
+                  ("Extra Large (14pt)", 14), ("Huge (16pt)", 16)]
+    PAPER_SIZES = [("A4", QPageSize.PageSizeId.A4), ("Letter", QPageSize.PageSizeId.Letter),
+                   ("Legal", QPageSize.PageSizeId.Legal), ("A5", QPageSize.PageSizeId.A5)]
+    PAGE_WIDTH = 300  # preview width of a page in pixels
+    SETTINGS_DELAY_MS = 250  # lets the margin spin box settle before laying out
+
+    def __init__(self, tab, parent=None):
+        super().__init__(parent)
+        self.tab = tab
+        # Set when the dialog is accepted: "print" or "pdf", and the layout
+        # it was showing
+        self.action: Optional[str] = None
+        self.print_layout: Optional[PrintLayout] = None
+
+        self._unrendered: list[int] = []
+        self._laying_out: set = set()  # PageSetups submitted but not back yet
+        self._runner = shared_layout_runner()
+        self._runner.layout_ready.connect(self._on_layout_ready)
+        self._runner.layout_failed.connect(self._on_layout_failed)
+
+        self.setWindowTitle("Print Preview")
+        self.resize(520, 720)
+        self._build_ui()
+
+        self._render_timer = QTimer(self)
+        self._render_timer.setInterval(0)
+        self._render_timer.timeout.connect(self._render_next_page)
+        self._settings_timer = QTimer(self)
+        self._settings_timer.setSingleShot(True)
+        self._settings_timer.setInterval(self.SETTINGS_DELAY_MS)
+        self._settings_timer.timeout.connect(self._update_layout)
+
+        self._update_layout()
+
+    # ------------------------------------------------------------------
+    # UI construction
+    # ------------------------------------------------------------------
+
+    def _build_ui(self):
+        root = QVBoxLayout(self)
+        root.setSpacing(10)
+
+        settings = QHBoxLayout()
+        self.font_combo = QComboBox()
+        for label, size in self.FONT_SIZES:
+            self.font_combo.addItem(label, size)
+        self.font_combo.setCurrentIndex(1)
+        settings.addWidget(QLabel("Font:"))
+        settings.addWidget(self.font_combo)
+
+        self.paper_combo = QComboBox()
+        for label, page_size in self.PAPER_SIZES:
+            self.paper_combo.addItem(label, page_size)
+        settings.addWidget(QLabel("Paper:"))
+        settings.addWidget(self.paper_combo)
+
+        self.margin_spin = QDoubleSpinBox()
+        self.margin_spin.setRange(0, 50)
+        self.margin_spin.setDecimals(1)
+        self.margin_spin.setSingleStep(1)
+        self.margin_spin.setSuffix(" mm")
+        self.margin_spin.setValue(PageSetup().margin_mm)
+        settings.addWidget(QLabel("Margins:"))
+        settings.addWidget(self.margin_spin)
+        settings.addStretch()
+        root.addLayout(settings)
+
+        self.font_combo.currentIndexChanged.connect(self._on_settings_changed)
+        self.paper_combo.currentIndexChanged.connect(self._on_settings_changed)
+        self.margin_spin.valueChanged.connect(self._on_settings_changed)
+
+        self.page_list = QListWidget()
+        self.page_list.setViewMode(QListView.ViewMode.IconMode)
+        self.page_list.setFlow(QListView.Flow.TopToBottom)
+        self.page_list.setWrapping(False)
+        self.page_list.setMovement(QListView.Movement.Static)
+        self.page_list.setSpacing(8)
+        self.page_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        root.addWidget(self.page_list, 1)
+
+        self.status_label = QLabel()
+        root.addWidget(self.status_label)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        self.print_button = buttons.addButton("&Print...", QDialogButtonBox.ButtonRole.AcceptRole)
+        self.pdf_button = buttons.addButton("Export &PDF...", QDialogButtonBox.ButtonRole.AcceptRole)
+        self.print_button.clicked.connect(lambda: self._finish("print"))
+        self.pdf_button.clicked.connect(lambda: self._finish("pdf"))
+        buttons.rejected.connect(self.reject)
+        root.addWidget(buttons)
+        self._set_ready(False)
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def page_setup(self) -> PageSetup:
+        """The setup the controls currently describe"""
+        return PageSetup(self.font_combo.currentData(), self.paper_combo.currentData(),
+                         round(self.margin_spin.value(), 1))
+
+    def _on_settings_changed(self):
+        self._set_ready(False)
+        self._settings_timer.start()
+
+    def _update_layout(self):
+        setup = self.page_setup()
+        layout = self.tab.cached_print_layout(setup)
+        if layout is not None:
+            self._show_layout(layout)
+            return
+        self._render_timer.stop()
+        self._set_ready(False)
+        self.status_label.setText("Laying out pages...")
+        if setup in self._laying_out:
+            return
+        self._laying_out.add(setup)
+        self._runner.submit(self.tab.get_export_snapshot(), setup,
+                            context=(self, self.tab.revision, setup))
+
+    def _on_layout_ready(self, context, layout: PrintLayout):
+        dialog, revision, setup = context
+        if dialog is not self:
+            return  # another preview's request
+        self._laying_out.discard(setup)
+        self.tab.remember_print_layout(revision, layout)
+        # The user may have moved on to another setup meanwhile
+        if setup == self.page_setup():
+            self._show_layout(layout)
+
+    def _on_layout_failed(self, context, message: str):
+        dialog, _revision, setup = context
+        if dialog is not self:
+            return
+        self._laying_out.discard(setup)
+        self.status_label.setText(f"Could not lay out the pages: {message}")
+
+    def _show_layout(self, layout: PrintLayout):
+        self.print_layout = layout
+        self.page_list.clear()
+        self._unrendered = []
+
+        sheet = QPageSize(layout.setup.page_size).sizePoints()
+        height = round(self.PAGE_WIDTH * sheet.height() / sheet.width())
+        self.page_list.setIconSize(QSize(self.PAGE_WIDTH, height))
+        blank = QPixmap(self.PAGE_WIDTH, height)
+        blank.fill(Qt.GlobalColor.white)
+
+        for page, signature in enumerate(layout.signatures):
+            item = QListWidgetItem(f"Page {page + 1}")
+            image = self.tab.cached_page_image(signature)
+            if image is None:
+                pixmap = blank
+                self._unrendered.append(page)
+            else:
+                pixmap = QPixmap.fromImage(layout.number_page(image, page))
+            item.setIcon(QIcon(pixmap))
+            self.page_list.addItem(item)
+
+        pages = layout.page_count
+        self.status_label.setText(f"{pages} page{'s' if pages != 1 else ''}")
+        self._set_ready(True)
+        if self._unrendered:
+            self._render_timer.start()
+
+    def _render_next_page(self):
+        if not self._unrendered or self.print_layout is None:
+            self._render_timer.stop()
+            return
+        page = self._unrendered.pop(0)
+        layout = self.print_layout
+        image = layout.render_page(page, self.PAGE_WIDTH, number=False)
+        self.tab.remember_page_image(layout.signatures[page], image)
+        self.page_list.item(page).setIcon(QIcon(QPixmap.fromImage(layout.number_page(image, page))))
+
+    # ------------------------------------------------------------------
+    # Closing
+    # ------------------------------------------------------------------
+
+    def _set_ready(self, ready: bool):
+        self.print_button.setEnabled(ready)
+        self.pdf_button.setEnabled(ready)
+
+    def _finish(self, action: str):
+        self.action = action
+        self.accept()
+
+    def done(self, result: int):
+        self._render_timer.stop()
+        self._settings_timer.stop()
+        # Layouts still queued finish on their own; nothing here wants them
+        self._runner.layout_ready.disconnect(self._on_layout_ready)
+        self._runner.layout_failed.disconnect(self._on_layout_failed)
+        self._laying_out.clear()
+        super().done(result)
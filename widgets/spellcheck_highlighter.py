@@ -5,21 +5,166 @@
 #
 # Qt only re-runs highlightBlock() on the block(s) that actually changed
 # (not the whole document), so this stays cheap even in large documents.
+#
+# Qt also re-runs it on *every* block for rehighlight() (spellcheck toggle)
+# and setHtml() (loading a note), though, so each block remembers the hash
+# of the text it last checked plus the misspelled spans it found. An
+# unchanged block just reapplies those spans without touching the dictionary.
+#
+# Blocks that do need checking never block the GUI thread: their text is
+# queued to the service's BackgroundSpellChecker (visible blocks first),
+# and the result comes back through a queued signal that stores the spans
+# on the block and calls rehighlightBlock() - which is then a cache hit.
+#
+# Only blocks on screen (plus a one-screen prefetch margin above and
+# below) are queued straight away. Everything else is just marked
+# "unchecked" and picked up later, either when it scrolls near the
+# viewport or a chunk at a time while the editor is idle - so opening a
+# huge file only costs one screenful of checking up front.
+#
+# If the service's dictionary is still loading (MainWindow loads it after
+# the first paint), the highlighter stays "pending": it queues nothing and
+# draws nothing until the service reports ready, then rehighlights.
+#
+# Each document has its own spellcheck language. In "auto" mode it's
+# guessed from a few KB of the document's text by stopword counts (see
+# services.language_detection), redone only after large edits such as a
+# load or paste, so only the dictionary actually needed gets loaded.
+#
+# Code and links aren't prose: fragments in a monospace font (code blocks,
+# inline code) or carrying an anchor are blanked out before a block is
+# checked, and the block's cache key is the hash of that blanked text - so
+# reformatting text as code invalidates it, and a block that's all code is
+# recorded as clean without ever reaching the worker or the dictionary.
+
+import weakref
+from typing import Optional
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, QPoint, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QSyntaxHighlighter, QTextBlockUserData, QTextCharFormat, QColor
+from PyQt6.QtWidgets import QTextEdit
+
+from services.language_detection import detect_language
+from services.profiler import traced
+from services.spellcheck_service import BackgroundSpellChecker, SpellCheckService
+
+_MONOSPACE_FAMILIES = {
+    "courier", "courier new", "consolas", "monaco", "menlo", "monospace",
+    "lucida console", "source code pro", "fira code", "cascadia code", "sf mono",
+}
+
+
+def _is_code_or_link(fmt) -> bool:
+    """True for char formats whose text shouldn't be spellchecked."""
+    if fmt.isAnchor() or fmt.fontFixedPitch():
+        return True
+    for family in fmt.fontFamilies() or ():
+        family = family.lower()
+        if family in _MONOSPACE_FAMILIES or "mono" in family:
+            return True
+    return False
+
+
+class _SpellBlockData(QTextBlockUserData):
+    """Cached spellcheck result (or "not checked yet") for a single block."""
+
+    def __init__(self, text_hash: int, generation: int, language: str,
+                 spans: list[tuple[int, int]], checked: bool = True,
+                 source: Optional[tuple[int, str]] = None):
+        super().__init__()
+        self.text_hash = text_hash
+        self.generation = generation
+        self.language = language
+        self.spans = spans  # (start, length) of each misspelled word
+        # False while the block is waiting to be checked lazily; spans are
+        # then whatever was last known for it (possibly nothing).
+        self.checked = checked
+        # (hash of the block's text, that text with code/links blanked), so
+        # the fragment formats are only walked again once the block's text
+        # or formats change; None when unknown or invalidated.
+        self.source = source
+
+
+class _ResultRelay(QObject):
+    """
+    Hops finished checks from the worker thread to the GUI thread.
+
+    Emitting on the highlighter itself would race with its deletion when a
+    tab closes mid-check, so the worker only ever emits on this one
+    never-deleted object and highlighters are looked up by weakref on
+    the GUI side.
+    """
+
+    # highlighter weakref, block number, text hash (64-bit, so not a C int),
+    # service generation, language, spans
+    spans_ready = pyqtSignal(object, int, object, int, str, object)
+    # highlighter weakref; the service's dictionary finished loading
+    dictionary_ready = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.spans_ready.connect(self._dispatch)
+        # Always queued: if the dictionary is already loaded the emit happens
+        # on the GUI thread, inside highlightBlock(), where rehighlighting
+        # again straight away would re-enter the highlighter.
+        self.dictionary_ready.connect(
+            self._dispatch_ready, Qt.ConnectionType.QueuedConnection
+        )
+
+    @staticmethod
+    def _dispatch(highlighter_ref, block_number, text_hash, generation, language, spans):
+        highlighter = highlighter_ref()
+        if highlighter is None or sip.isdeleted(highlighter):
+            return
+        highlighter._apply_spans(block_number, text_hash, generation, language, spans)
+
+    @staticmethod
+    def _dispatch_ready(highlighter_ref):
+        highlighter = highlighter_ref()
+        if highlighter is None or sip.isdeleted(highlighter):
+            return
+        highlighter._on_dictionary_ready()
 
-import re
-from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor
 
-from services.spellcheck_service import SpellCheckService
+_relay: Optional[_ResultRelay] = None
 
-_WORD_RE = re.compile(r"[A-Za-z']+")
+
+def _result_relay() -> _ResultRelay:
+    # Created lazily by the first highlighter, i.e. on the GUI thread.
+    global _relay
+    if _relay is None:
+        _relay = _ResultRelay()
+    return _relay
 
 
 class SpellCheckHighlighter(QSyntaxHighlighter):
     """Attach to a QTextDocument to underline misspelled words live."""
 
-    def __init__(self, document, spell_service: SpellCheckService):
+    # Extra screens checked above/below the viewport so short scrolls
+    # already find their squiggles in place.
+    PREFETCH_SCREENS = 1
+    # Idle checking: how long the editor must be quiet before it starts,
+    # and how many blocks each idle tick walks (bounds GUI-thread time).
+    IDLE_DELAY_MS = 300
+    IDLE_CHUNK_BLOCKS = 200
+    # Language detection: how much text to sample, and how big an edit
+    # (characters added + removed) makes an earlier guess worth redoing.
+    AUTO_LANGUAGE = "auto"
+    DETECT_SAMPLE_CHARS = 4000
+    REDETECT_EDIT_CHARS = 500
+
+    def __init__(self, document, spell_service: SpellCheckService,
+                 text_edit: Optional[QTextEdit] = None):
         super().__init__(document)
+        # Detached and attached again so _on_contents_change is connected
+        # before QSyntaxHighlighter's own handler: a block's cached code/link
+        # classification is dropped before the block is rehighlighted.
+        self.setDocument(None)
+        document.contentsChange.connect(self._on_contents_change)
+        self.setDocument(document)
         self._spell = spell_service
+        self._text_edit = text_edit
 
         self._format = QTextCharFormat()
         self._format.setUnderlineStyle(
@@ -28,18 +173,300 @@ class SpellCheckHighlighter(QSyntaxHighlighter):
         self._format.setUnderlineColor(QColor("#e74c3c"))
 
         self.enabled = True
+        # True while waiting on the service's dictionary to finish loading.
+        self.pending = False
+
+        # "auto" or a language code; see effective_language().
+        self.language = self.AUTO_LANGUAGE
+        self._detected_language: Optional[str] = None
+        self._detection_stale = True
+
+        # block number -> (text hash, priority, language) already queued, so
+        # a block that's rehighlighted again before its result lands isn't
+        # queued twice (unless it scrolled into view and needs promoting).
+        self._pending: dict[int, tuple[int, int, str]] = {}
+        # (first, last) block numbers of the viewport and of the viewport
+        # plus prefetch margin; None until the view has been laid out.
+        self._visible_range: Optional[tuple[int, int]] = None
+        self._prefetch_range: Optional[tuple[int, int]] = None
+        self._visible_update_scheduled = False
+
+        # Lowest block number marked unchecked since the idle walk last
+        # reached the end of the document (None = nothing left to do).
+        self._idle_scan_from: Optional[int] = None
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.timeout.connect(self._check_idle_chunk)
 
+        self._relay = _result_relay()
+        if text_edit is not None:
+            scroll_bar = text_edit.verticalScrollBar()
+            scroll_bar.valueChanged.connect(self._schedule_visible_update)
+            scroll_bar.rangeChanged.connect(self._schedule_visible_update)
+
+    @traced(category="spellcheck")
     def highlightBlock(self, text: str):
         if not self.enabled:
             return
-        for match in _WORD_RE.finditer(text):
-            word = match.group()
-            if len(word) < 2:
-                continue
-            if not self._spell.is_correct(word):
-                self.setFormat(match.start(), len(word), self._format)
+        language = self.effective_language()
+        if not self._spell.is_ready(language):
+            self._wait_for_dictionary(language)
+            return
+
+        data = self.currentBlockUserData()
+        source = self._source_for(self.currentBlock(), text, data)
+        check_text = source[1]
+        if not check_text.strip():
+            # Nothing but code/links (or blank): clean by definition, and
+            # nothing to look up or draw once that's recorded.
+            if not (isinstance(data, _SpellBlockData) and data.source is source):
+                self._pending.pop(self.currentBlock().blockNumber(), None)
+                self.setCurrentBlockUserData(_SpellBlockData(
+                    hash(check_text), self._spell.generation, language, [], source=source
+                ))
+            return
+
+        text_hash = hash(check_text)
+        if self._is_fresh(data, text_hash, language):
+            spans = data.spans
+        else:
+            # Keep the last known squiggles (clipped to the new text) until
+            # the fresh result lands, so editing a line doesn't flicker.
+            spans = []
+            if isinstance(data, _SpellBlockData):
+                spans = [(s, n) for s, n in data.spans if s + n <= len(text)]
+
+            block_number = self.currentBlock().blockNumber()
+            priority = self._priority_for(block_number)
+            if priority is not None:
+                self._queue_check(block_number, check_text, text_hash, priority, language)
+            else:
+                self.setCurrentBlockUserData(_SpellBlockData(
+                    text_hash, self._spell.generation, language, spans, checked=False,
+                    source=source,
+                ))
+                self._mark_unchecked(block_number)
+
+        for start, length in spans:
+            self.setFormat(start, length, self._format)
 
     def set_enabled(self, enabled: bool):
         """Toggle spell checking on/off and force a re-highlight."""
         self.enabled = enabled
         self.rehighlight()
+
+    def set_language(self, language: str):
+        """Spellcheck this document in `language`, or "auto" to detect it."""
+        if language == self.language:
+            return
+        self.language = language
+        self._detection_stale = True
+        self.rehighlight()
+
+    def effective_language(self) -> str:
+        """The language blocks are actually checked in right now."""
+        if self.language != self.AUTO_LANGUAGE:
+            return self.language
+        if self._detection_stale:
+            self._detection_stale = False
+            detected = detect_language(self._text_sample()) or self._detected_language
+            if detected != self._detected_language:
+                self._detected_language = detected
+                # Blocks already highlighted in this pass used the old guess.
+                QTimer.singleShot(0, self.rehighlight)
+        return self._detected_language or self._spell.language
+
+    def _text_sample(self) -> str:
+        parts, size = [], 0
+        block = self.document().firstBlock()
+        while block.isValid() and size < self.DETECT_SAMPLE_CHARS:
+            text = block.text()
+            parts.append(text)
+            size += len(text)
+            block = block.next()
+        return "\n".join(parts)
+
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        if self._detected_language is None or removed + added >= self.REDETECT_EDIT_CHARS:
+            self._detection_stale = True
+        # Text or formats changed in these blocks (a format-only change
+        # keeps the text, so the text hash alone wouldn't notice)
+        document = self.document()
+        block = document.findBlock(position)
+        end = position + max(added, 1)
+        while block.isValid() and block.position() < end:
+            data = block.userData()
+            if isinstance(data, _SpellBlockData):
+                data.source = None
+            block = block.next()
+
+    def _wait_for_dictionary(self, language: str):
+        if self.pending:
+            return
+        self.pending = True
+        signal = self._relay.dictionary_ready
+        highlighter_ref = weakref.ref(self)
+        # May fire on the loader thread - hop back via the relay.
+        self._spell.call_when_ready(lambda: signal.emit(highlighter_ref), language)
+
+    def _on_dictionary_ready(self):
+        self.pending = False
+        if self.enabled:
+            self.rehighlight()
+
+    def _source_for(self, block, text: str, data) -> tuple[int, str]:
+        """(hash of `text`, the text to check), from the block's cache if valid."""
+        text_hash = hash(text)
+        if isinstance(data, _SpellBlockData) and data.source is not None \
+                and data.source[0] == text_hash:
+            return data.source
+        return text_hash, self._text_to_check(block, text)
+
+    @staticmethod
+    def _text_to_check(block, text: str) -> str:
+        """`text` with code and link fragments blanked (same length, so offsets hold)."""
+        pieces, cursor = [], 0
+        block_start = block.position()
+        it = block.begin()
+        while not it.atEnd():
+            fragment = it.fragment()
+            if fragment.isValid() and _is_code_or_link(fragment.charFormat()):
+                start = fragment.position() - block_start
+                pieces.append(text[cursor:start])
+                pieces.append(" " * fragment.length())
+                cursor = start + fragment.length()
+            it += 1
+        if not pieces:
+            return text
+        pieces.append(text[cursor:])
+        return "".join(pieces)
+
+    def _is_fresh(self, data, text_hash: int, language: str) -> bool:
+        return (
+            isinstance(data, _SpellBlockData)
+            and data.checked
+            and data.text_hash == text_hash
+            and data.generation == self._spell.generation
+            and data.language == language
+        )
+
+    # -- background checking ---------------------------------------------
+
+    def _queue_check(self, block_number: int, text: str, text_hash: int,
+                     priority: int, language: str):
+        pending = self._pending.get(block_number)
+        if (pending is not None and pending[0] == text_hash and pending[1] <= priority
+                and pending[2] == language):
+            return
+        self._pending[block_number] = (text_hash, priority, language)
+
+        generation = self._spell.generation
+        signal = self._relay.spans_ready
+        highlighter_ref = weakref.ref(self)
+
+        def deliver(spans):
+            signal.emit(highlighter_ref, block_number, text_hash, generation, language, spans)
+
+        self._spell.background.submit(text, deliver, priority, language)
+
+    def _queue_block_if_stale(self, block, priority: int):
+        data = block.userData()
+        text = self._source_for(block, block.text(), data)[1]
+        if not text.strip():
+            return
+        text_hash = hash(text)
+        language = self.effective_language()
+        if not self._is_fresh(data, text_hash, language):
+            self._queue_check(block.blockNumber(), text, text_hash, priority, language)
+
+    def _apply_spans(self, block_number: int, text_hash: int, generation: int,
+                     language: str, spans):
+        """Store a finished result on its block and repaint just that block."""
+        pending = self._pending.get(block_number)
+        if pending is not None and pending[0] == text_hash:
+            del self._pending[block_number]
+
+        block = self.document().findBlockByNumber(block_number)
+        if not block.isValid():
+            return
+        source = self._source_for(block, block.text(), block.userData())
+        if hash(source[1]) != text_hash:
+            return  # edited (or moved) since it was queued; a newer job is on its way
+
+        block.setUserData(_SpellBlockData(text_hash, generation, language, spans, source=source))
+        if self.enabled:
+            self.rehighlightBlock(block)
+
+    # -- visible region ----------------------------------------------------
+
+    def _priority_for(self, block_number: int) -> Optional[int]:
+        """Queue priority for a stale block, or None to leave it unchecked."""
+        if self._text_edit is None:
+            return BackgroundSpellChecker.PRIORITY_VISIBLE
+        if self._visible_range is None:
+            return None
+        first, last = self._visible_range
+        if first <= block_number <= last:
+            return BackgroundSpellChecker.PRIORITY_VISIBLE
+        first, last = self._prefetch_range
+        if first <= block_number <= last:
+            return BackgroundSpellChecker.PRIORITY_BACKGROUND
+        return None
+
+    def _schedule_visible_update(self, *_args):
+        # Scroll-bar signals fire mid-layout; hit-testing there could
+        # re-enter the layout, so do the real work on the next loop turn.
+        if not self._visible_update_scheduled:
+            self._visible_update_scheduled = True
+            QTimer.singleShot(0, self._update_visible_range)
+
+    def _update_visible_range(self):
+        """Recompute the on-screen range and queue stale blocks in and near it."""
+        self._visible_update_scheduled = False
+        if sip.isdeleted(self._text_edit):
+            return
+
+        height = self._text_edit.viewport().height()
+        margin = height * self.PREFETCH_SCREENS
+
+        def block_at(y: int) -> int:
+            return self._text_edit.cursorForPosition(QPoint(0, y)).blockNumber()
+
+        self._visible_range = (block_at(0), block_at(height))
+        self._prefetch_range = (block_at(-margin), block_at(height + margin))
+
+        if not self.enabled or self.pending:
+            return
+        first, last = self._prefetch_range
+        block = self.document().findBlockByNumber(first)
+        while block.isValid() and block.blockNumber() <= last:
+            self._queue_block_if_stale(block, self._priority_for(block.blockNumber()))
+            block = block.next()
+
+    # -- idle checking -----------------------------------------------------
+
+    def _mark_unchecked(self, block_number: int):
+        if self._idle_scan_from is None or block_number < self._idle_scan_from:
+            self._idle_scan_from = block_number
+        self._idle_timer.start(self.IDLE_DELAY_MS)
+
+    def _check_idle_chunk(self):
+        """Queue the next chunk of still-unchecked blocks at idle priority."""
+        if self._idle_scan_from is None or not self.enabled:
+            return
+        if self._pending:
+            # Visible/prefetch work still in flight - stay out of its way.
+            self._idle_timer.start(self.IDLE_DELAY_MS)
+            return
+
+        block = self.document().findBlockByNumber(self._idle_scan_from)
+        for _ in range(self.IDLE_CHUNK_BLOCKS):
+            if not block.isValid():
+                self._idle_scan_from = None
+                return
+            self._queue_block_if_stale(block, BackgroundSpellChecker.PRIORITY_IDLE)
+            block = block.next()
+
+        self._idle_scan_from = block.blockNumber() if block.isValid() else None
+        if self._idle_scan_from is not None:
+            self._idle_timer.start(0)
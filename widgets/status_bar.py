@@ -1,7 +1,11 @@
-from PyQt6.QtWidgets import QWidget, QLabel, QHBoxLayout
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QWidget, QLabel, QHBoxLayout, QProgressBar, QToolButton
 
 class StatusBarWidget(QWidget):
     """Custom status bar with document info"""
+
+    # The cancel button next to the export progress bar was clicked
+    export_cancel_requested = pyqtSignal()
     
     def __init__(self):
         super().__init__()
@@ -13,9 +17,23 @@ class StatusBarWidget(QWidget):
         self.cursor_label = QLabel("Line 1, Col 1")
         self.word_count_label = QLabel("0 words")
         self.encoding_label = QLabel("UTF-8")
+
+        # Background export progress, hidden while nothing is exporting
+        self.export_label = QLabel()
+        self.export_progress = QProgressBar()
+        self.export_progress.setRange(0, 100)
+        self.export_progress.setMaximumWidth(120)
+        self.export_cancel_button = QToolButton()
+        self.export_cancel_button.setText("Cancel")
+        self.export_cancel_button.setToolTip("Cancel the running export")
+        self.export_cancel_button.clicked.connect(self.export_cancel_requested)
+        self.clear_export_progress()
         
         layout.addWidget(self.file_label)
         layout.addStretch()
+        layout.addWidget(self.export_label)
+        layout.addWidget(self.export_progress)
+        layout.addWidget(self.export_cancel_button)
         layout.addWidget(self.word_count_label)
         layout.addWidget(self.cursor_label)
         layout.addWidget(self.encoding_label)
@@ -33,4 +51,21 @@ class StatusBarWidget(QWidget):
     
     def update_word_count(self, words: int, chars: int):
         """Update word and character count"""
-        self.word_count_label.setText(f"{words} words, {chars} chars")
\ No newline at end of file
+        self.word_count_label.setText(f"{words} words, {chars} chars")
+
+    def update_export_progress(self, description: str, percent: int, queued: int = 0):
+        """Show a running export and how many more are waiting behind it"""
+        text = f"Exporting {description}"
+        if queued:
+            text += f" (+{queued} queued)"
+        self.export_label.setText(text)
+        self.export_progress.setValue(percent)
+        for widget in (self.export_label, self.export_progress, self.export_cancel_button):
+            widget.setVisible(True)
+
+    def clear_export_progress(self):
+        """Hide the export progress once nothing is exporting"""
+        self.export_label.clear()
+        self.export_progress.reset()
+        for widget in (self.export_label, self.export_progress, self.export_cancel_button):
+            widget.setVisible(False)